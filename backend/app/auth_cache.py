@@ -0,0 +1,165 @@
+"""
+Auth context cache: user and effective permissions per token
+
+Without it every authenticated request reads the user (get_current_user)
+and then the role, once per permission check. Each API process keeps the
+context of recently seen tokens for settings.auth_cache_ttl_sec, never past
+the token's own expiry:
+
+    token -> (user document, role_id, frozenset of effective permissions)
+
+Handlers get a deep copy of the cached user, so mutating and saving it
+(e.g. PUT /v1/profile/me) does not touch the cache.
+
+Edits of users and roles (routers/users.py, routers/roles.py,
+routers/profile.py) call invalidate(), which drops the affected contexts
+locally and publishes the user or role id on `auth:invalidate`. Every API
+process holds one subscription to that channel and drops the same
+contexts. Cached contexts are only served while that subscription is up,
+so a process that could miss an invalidation falls back to reading Mongo
+on every request instead of serving revoked permissions.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Optional
+from loguru import logger
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+
+CHANNEL = "auth:invalidate"
+
+
+class AuthContext:
+    """Cached user of one token"""
+
+    def __init__(self, user, permissions: FrozenSet[str], expires_at: float):
+        self.user = user
+        self.user_id = str(user.id)
+        self.role_id = str(user.role_id) if user.role_id else None
+        self.permissions = permissions
+        self.expires_at = expires_at
+
+
+class AuthContextCache:
+    def __init__(self):
+        self.redis = None
+        self.task = None
+        self.subscribed = False
+        self.contexts: "OrderedDict[str, AuthContext]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _client(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(settings.redis_url or "redis://redis:6379/0", socket_connect_timeout=5)
+        return self.redis
+
+    @property
+    def active(self) -> bool:
+        """Contexts are served only while invalidations can be received"""
+        return settings.auth_cache_enabled and self.subscribed
+
+    def get(self, token: str):
+        """Copy of the cached user of a token, None on a miss"""
+        if not self.active:
+            return None
+        context = self.contexts.get(token)
+        if context is None or context.expires_at <= time.time():
+            if context is not None:
+                del self.contexts[token]
+            self.stats["misses"] += 1
+            return None
+        self.contexts.move_to_end(token)
+        self.stats["hits"] += 1
+        user = context.user.model_copy(deep=True)
+        user.set_effective_permissions(context.permissions)
+        return user
+
+    def put(self, token: str, user, permissions: FrozenSet[str], token_expires_at: Optional[float]):
+        """Remember a freshly loaded user, for the TTL or until the token expires"""
+        if not self.active:
+            return
+        expires_at = time.time() + settings.auth_cache_ttl_sec
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        self.contexts[token] = AuthContext(user.model_copy(deep=True), permissions, expires_at)
+        self.contexts.move_to_end(token)
+        while len(self.contexts) > settings.auth_cache_size:
+            self.contexts.popitem(last=False)
+
+    def drop(self, user_id: Optional[str] = None, role_id: Optional[str] = None) -> int:
+        """Forget the contexts of a user or of every user of a role; returns how many"""
+        tokens = [
+            token for token, context in self.contexts.items()
+            if (user_id and context.user_id == user_id) or (role_id and context.role_id == role_id)
+        ]
+        for token in tokens:
+            del self.contexts[token]
+        return len(tokens)
+
+    async def invalidate(self, user_id=None, role_id=None):
+        """Drop the contexts of an edited user or role in this and every other API process"""
+        user_id = str(user_id) if user_id else None
+        role_id = str(role_id) if role_id else None
+        self.stats["invalidations"] += 1
+        self.drop(user_id, role_id)
+        try:
+            await self._client().publish(CHANNEL, json.dumps({"user_id": user_id, "role_id": role_id}))
+        except Exception as e:
+            # Other processes cannot be told; stop serving cached contexts until resubscribed
+            logger.warning(f"Could not publish auth invalidation: {str(e)}")
+            self.subscribed = False
+            self.contexts.clear()
+
+    def dispatch(self, data) -> int:
+        """Apply one published invalidation"""
+        message = json.loads(data)
+        return self.drop(message.get("user_id"), message.get("role_id"))
+
+    def start(self):
+        """Start the invalidation subscription"""
+        if settings.auth_cache_enabled and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.subscribed = False
+        self.contexts.clear()
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    async def _listen(self):
+        """Subscription loop, resubscribing after Redis errors"""
+        delay = 1.0
+        while True:
+            try:
+                pubsub = self._client().pubsub()
+                await pubsub.subscribe(CHANNEL)
+                self.subscribed = True
+                logger.info("📡 Subscribed to auth invalidations")
+                delay = 1.0
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(message["data"])
+                finally:
+                    self.subscribed = False
+                    # Invalidations may have been missed while disconnected
+                    self.contexts.clear()
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Auth invalidation subscription failed, retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+auth_cache = AuthContextCache()
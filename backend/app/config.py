@@ -9,6 +9,8 @@ class Settings(BaseSettings):
     gcs_bucket: str = "doky_ai_audio_storage"
     gcs_credentials_path: Optional[str] = "./gcs-service-account.json"
     gcs_public_base: str = "https://storage.googleapis.com"
+    gcs_max_workers: int = 8  # threads (and pooled HTTP connections) running blocking GCS SDK calls
+    gcs_metrics_window: int = 1024  # latest latencies kept per storage operation for p50/p95/p99
     
     # ElevenLabs Speech-to-Text settings
     long_pause_ms: int = 500
@@ -35,6 +37,27 @@ class Settings(BaseSettings):
     log_file: str = "./logs/app.log"
     trace_slow_ms: int = 250
     
+    # Rate limits (slowapi, per client IP); raise for load tests
+    upload_rate_limit: str = "5/minute"
+    
+    # Upload ingest: request body read, hashed and sent to GCS in chunks of this size (see app/services/upload_ingest.py)
+    upload_chunk_bytes: int = 1024 * 1024  # rounded up to a multiple of 256 KiB for GCS
+    
+    # Analysis progress over SSE (GET /v1/upload/status/{id}/events), fed by worker Redis pub/sub
+    progress_keepalive_sec: float = 15.0  # comment line sent on idle streams
+    progress_retry_ms: int = 3000  # EventSource reconnect delay
+    progress_queue_size: int = 16  # buffered events per client, oldest dropped first
+    
+    # Response cache for done analyses: in-process LRU in front of Redis (see app/response_cache.py)
+    analysis_cache_enabled: bool = True
+    analysis_cache_lru_size: int = 512  # responses kept per API process
+    analysis_cache_ttl_sec: int = 24 * 3600  # Redis copies
+    
+    # Auth context cache: user + effective permissions per token, invalidated over Redis pub/sub (see app/auth_cache.py)
+    auth_cache_enabled: bool = True
+    auth_cache_ttl_sec: float = 60.0
+    auth_cache_size: int = 1024  # tokens kept per API process
+    
     # Additional environment variables that might be passed
     mongo_url: Optional[str] = None
     redis_url: Optional[str] = None
@@ -1,7 +1,14 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from bson import ObjectId
-from app.models.documents import AudioFileDoc
+from app.models.documents import (
+    AudioFileDoc, WordEventDoc, PauseEventDoc, AnalysisEventsDoc,
+    AnalysisDoc, AnalysisListViewDoc, ReadingSessionDoc, TextDoc
+)
+from app.models.student import StudentDoc
+from app.services import list_view
+from app.services.event_columns import decode_events
 from app.schemas import AudioCreate, AudioUpdate
 from loguru import logger
 
@@ -181,3 +188,112 @@ def audio_doc_to_response(audio_doc: AudioFileDoc) -> Dict[str, Any]:
         "created_at": audio_doc.created_at.isoformat() if hasattr(audio_doc, 'created_at') and audio_doc.created_at else None,
         "updated_at": audio_doc.updated_at.isoformat() if hasattr(audio_doc, 'updated_at') and audio_doc.updated_at else None
     }
+
+
+async def get_analysis_events(analysis_id, include_words: bool = True,
+                              include_pauses: bool = True) -> Tuple[List[WordEventDoc], List[PauseEventDoc]]:
+    """
+    Word and pause events of an analysis.
+    
+    Reads the columnar analysis_events document when the analysis has one and
+    falls back to the per-event word_events/pause_events collections. Either
+    way the caller gets WordEventDoc/PauseEventDoc objects in the usual shape.
+    
+    Args:
+        analysis_id: The analysis ID (str or ObjectId)
+        include_words: Load word events
+        include_pauses: Load pause events
+        
+    Returns:
+        (word events, pause events); a skipped kind is an empty list
+    """
+    oid = ObjectId(str(analysis_id))
+    
+    columnar = await AnalysisEventsDoc.get_motor_collection().find_one({"analysis_id": oid})
+    if columnar:
+        word_rows, pause_rows = decode_events(columnar)
+        word_events = [
+            WordEventDoc.model_construct(id=f"{oid}-w{row['position']}", **row)
+            for row in word_rows
+        ] if include_words else []
+        pause_events = [
+            PauseEventDoc.model_construct(id=f"{oid}-p{row['after_position']}", **row)
+            for row in pause_rows
+        ] if include_pauses else []
+        return word_events, pause_events
+    
+    async def _none():
+        return []
+    
+    word_events, pause_events = await asyncio.gather(
+        WordEventDoc.find(WordEventDoc.analysis_id == oid).to_list() if include_words else _none(),
+        PauseEventDoc.find(PauseEventDoc.analysis_id == oid).to_list() if include_pauses else _none()
+    )
+    return word_events, pause_events
+
+
+async def refresh_list_view(analysis: AnalysisDoc, session: Optional[ReadingSessionDoc] = None,
+                            text: Optional[TextDoc] = None, audio: Optional[AudioFileDoc] = None) -> None:
+    """
+    Write the analysis_list_view row of an analysis (best effort).
+    
+    Related documents that are not passed are loaded, with projections.
+    A failed write is logged; scripts/migrate_analysis_list_view.py repairs rows.
+    
+    Args:
+        analysis: The analysis document
+        session, text, audio: Related documents, if the caller has them already
+    """
+    try:
+        if session is None:
+            session = await ReadingSessionDoc.get(analysis.session_id)
+            if session is None:
+                logger.warning(f"List view of analysis {analysis.id} not written: session {analysis.session_id} not found")
+                return
+        
+        async def _load(doc, model, doc_id, projection):
+            if doc is not None or doc_id is None:
+                return doc
+            return await model.get_motor_collection().find_one({"_id": doc_id}, projection)
+        
+        text, audio, student = await asyncio.gather(
+            _load(text, TextDoc, session.text_id, {"title": 1, "grade": 1}),
+            _load(audio, AudioFileDoc, session.audio_id, {"original_name": 1, "size_bytes": 1, "duration_sec": 1}),
+            _load(None, StudentDoc, analysis.student_id, {"first_name": 1, "last_name": 1})
+        )
+        row = list_view.list_view_row(analysis, session, text, audio, student)
+        await list_view.upsert_row(AnalysisListViewDoc.get_motor_collection(), row)
+    except Exception as e:
+        logger.warning(f"Could not write list view of analysis {analysis.id}: {str(e)}")
+
+
+async def update_text_in_list_view(text: TextDoc) -> int:
+    """Copy a text's title and grade into the list view rows of its analyses; returns the rows changed"""
+    try:
+        result = await AnalysisListViewDoc.get_motor_collection().update_many(
+            {"text_id": text.id}, {"$set": {"text_title": text.title, "text_grade": text.grade}}
+        )
+        return result.modified_count
+    except Exception as e:
+        logger.warning(f"Could not update list view rows of text {text.id}: {str(e)}")
+        return 0
+
+
+async def analysis_ids_of_text(text_id) -> List[ObjectId]:
+    """Ids of every analysis of the reading sessions of a text"""
+    session_ids = await ReadingSessionDoc.get_motor_collection().distinct("_id", {"text_id": text_id})
+    if not session_ids:
+        return []
+    return await AnalysisDoc.get_motor_collection().distinct("_id", {"session_id": {"$in": session_ids}})
+
+
+async def update_student_in_list_view(student: StudentDoc) -> int:
+    """Copy a student's name into the list view rows of their analyses; returns the rows changed"""
+    try:
+        result = await AnalysisListViewDoc.get_motor_collection().update_many(
+            {"student_id": student.id}, {"$set": {"student_name": list_view.student_name(student)}}
+        )
+        return result.modified_count
+    except Exception as e:
+        logger.warning(f"Could not update list view rows of student {student.id}: {str(e)}")
+        return 0
@@ -9,7 +9,7 @@ from app.config import settings
 from app.models.documents import (
     TextDoc, AudioFileDoc, AnalysisDoc,
     ReadingSessionDoc, WordEventDoc,
-    PauseEventDoc, SttResultDoc
+    PauseEventDoc, SttResultDoc, AnalysisEventsDoc, AnalysisListViewDoc
 )
 from app.models.user import UserDoc
 from app.models.role import RoleDoc
@@ -120,6 +120,8 @@ async def connect_to_mongo():
                         WordEventDoc,
                         PauseEventDoc,
                         SttResultDoc,
+                        AnalysisEventsDoc,
+                        AnalysisListViewDoc,
                         RoleDoc,
                         UserDoc,
                         StudentDoc,
@@ -183,12 +183,13 @@ def ensure_new_model_indexes():
         IndexModel([("analysis_id", ASCENDING)], name="word_events_analysis_id_asc"),
         IndexModel([("position", ASCENDING)], name="word_events_position_asc"),
         IndexModel([("type", ASCENDING)], name="word_events_type_asc"),
-        IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc"),
+        IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc", unique=True),
     ]
     
     # PauseEventDoc indexes
     pause_event_indexes = [
         IndexModel([("analysis_id", ASCENDING)], name="pause_events_analysis_id_asc"),
+        IndexModel([("analysis_id", ASCENDING), ("after_position", ASCENDING)], name="pause_events_analysis_after_position_asc", unique=True),
         IndexModel([("after_position", ASCENDING)], name="pause_events_after_position_asc"),
         IndexModel([("class_", ASCENDING)], name="pause_events_class_asc"),
         IndexModel([("duration_ms", DESCENDING)], name="pause_events_duration_ms_desc"),
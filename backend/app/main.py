@@ -13,8 +13,12 @@ from datetime import datetime
 from loguru import logger
 from app.config import settings
 from app.db import connect_to_mongo, close_mongo_connection, connect_to_redis, redis_conn
+from app.progress import progress_hub
+from app.auth_cache import auth_cache
+from app.storage.service import storage_service
 from app.routers import texts, analyses, upload, audio, sessions, auth, students, users, roles, profile, score_feedback
 from app.utils.gcs_setup import setup_gcs_credentials
+from app.utils.fast_json import FastJSONResponse
 
 
 # Configure loguru based on settings
@@ -161,6 +165,7 @@ async def lifespan(app: FastAPI):
             logger.info("📊 Connecting to Redis...")
             connect_to_redis()
             logger.info("✅ Redis connected successfully")
+            auth_cache.start()
         except Exception as e:
             logger.error(f"❌ Redis connection failed: {e}")
             logger.error(f"Redis error type: {type(e).__name__}")
@@ -184,6 +189,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     try:
         logger.info("🛑 Shutting down application")
+        await progress_hub.stop()
+        await auth_cache.stop()
+        storage_service.shutdown()
         await close_mongo_connection()
         logger.info("✅ Application shutdown complete")
     except Exception as e:
@@ -200,7 +208,8 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
 # Add rate limiter
@@ -292,6 +301,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add request timing middleware
@@ -347,6 +357,44 @@ async def debug_info():
     }
 
 
+# Queue depth endpoint
+@app.get("/v1/_queues", tags=["debug"])
+async def queue_depths():
+    """
+    Queue depths of the single-job queue and every staged pipeline queue
+    
+    Used to decide which worker pool (download/transcribe/align/persist) to scale.
+    """
+    from rq import Queue
+    from rq.registry import StartedJobRegistry
+    
+    if not redis_conn.connection:
+        raise HTTPException(status_code=503, detail="Redis connection not initialized")
+    
+    queue_names = ["main", "analysis-download", "analysis-transcribe", "analysis-align", "analysis-persist"]
+    depths = {}
+    for name in queue_names:
+        queue = Queue(name, connection=redis_conn.connection)
+        depths[name] = {
+            "queued": queue.count,
+            "started": StartedJobRegistry(queue=queue).count,
+            "scheduled": queue.scheduled_job_registry.count,
+            "failed": queue.failed_job_registry.count
+        }
+    return depths
+
+
+# Storage latency endpoint
+@app.get("/v1/_storage", tags=["debug"])
+async def storage_metrics():
+    """
+    Latency of the GCS operations run by this API process
+    
+    Count, errors and p50/p95/p99/max (ms) per operation over the latest calls.
+    """
+    return storage_service.metrics()
+
+
 # GCS Test endpoint
 @app.get("/v1/_test-gcs", tags=["debug"])
 async def test_gcs():
@@ -380,9 +428,9 @@ async def test_gcs():
     
     # Test GCS client
     try:
-        client = get_client()
+        client = await storage_service.run("get_client", get_client)
         # Try to list buckets to test connection
-        list(client.list_buckets())
+        await storage_service.run("list_buckets", lambda: list(client.list_buckets()))
         gcs_status["gcs_client_ok"] = True
     except Exception as e:
         gcs_status["gcs_error"] = str(e)
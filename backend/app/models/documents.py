@@ -52,6 +52,19 @@ class HashInfo(BaseModel):
     sha256: Optional[str] = None
 
 
+class NormalizedAudioInfo(BaseModel):
+    """Compact mono speech copy of an audio file, uploaded to STT instead of the original"""
+    storage_name: str  # GCS blob name
+    gcs_uri: str
+    content_type: str
+    codec: str  # "opus" or "flac"
+    sample_rate: int
+    channels: int = 1
+    size_bytes: int
+    sha256: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class PrivacyInfo(BaseModel):
     """Privacy and retention information"""
     retention_policy: Optional[str] = None
@@ -109,6 +122,10 @@ class AudioFileDoc(Document):
     # Hash information
     hash: HashInfo = Field(default_factory=HashInfo)
     
+    # Normalized copy for STT (size_bytes above stays the original size)
+    normalized: Optional[NormalizedAudioInfo] = None
+    original_deleted: bool = False  # original blob removed, only the normalized copy is left
+    
     # Privacy and ownership
     privacy: PrivacyInfo = Field(default_factory=PrivacyInfo)
     owner: OwnerInfo = Field(default_factory=OwnerInfo)
@@ -147,6 +164,8 @@ class AnalysisDoc(Document):
     summary: Dict[str, Any] = {}
     error: Optional[str] = None
     audio_duration_sec: Optional[float] = None
+    stage: Optional[Literal["download", "transcribe", "align", "persist"]] = None  # current stage in staged pipeline mode
+    pipeline: Dict[str, Any] = {}  # stage checkpoints for resume (completed, stt_result_id, aligned, events_written, ...)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
     
@@ -156,6 +175,9 @@ class AnalysisDoc(Document):
             IndexModel([("session_id", ASCENDING)], name="analyses_session_id_asc"),
             IndexModel([("created_at", DESCENDING)], name="analyses_created_at_desc"),
             IndexModel([("status", ASCENDING)], name="analyses_status_asc"),
+            # Keyset pagination of the analyses list, all and per student
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="analyses_created_at_id_desc"),
+            IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="analyses_student_created_at_id_desc"),
         ]
 
 print("✅ AnalysisDoc model loaded")
@@ -205,7 +227,7 @@ class WordEventDoc(Document):
             IndexModel([("analysis_id", ASCENDING)], name="word_events_analysis_id_asc"),
             IndexModel([("position", ASCENDING)], name="word_events_position_asc"),
             IndexModel([("type", ASCENDING)], name="word_events_type_asc"),
-            IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc"),
+            IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc", unique=True),
         ]
 
 print("✅ WordEventDoc model loaded")
@@ -226,6 +248,7 @@ class PauseEventDoc(Document):
         name = "pause_events"
         indexes = [
             IndexModel([("analysis_id", ASCENDING)], name="pause_events_analysis_id_asc"),
+            IndexModel([("analysis_id", ASCENDING), ("after_position", ASCENDING)], name="pause_events_analysis_after_position_asc", unique=True),
             IndexModel([("after_position", ASCENDING)], name="pause_events_after_position_asc"),
             IndexModel([("class_", ASCENDING)], name="pause_events_class_asc"),
             IndexModel([("duration_ms", DESCENDING)], name="pause_events_duration_ms_desc"),
@@ -234,6 +257,62 @@ class PauseEventDoc(Document):
 print("✅ PauseEventDoc model loaded")
 
 
+class AnalysisEventsDoc(Document):
+    """Columnar word/pause events of one analysis (see services/event_columns.py)"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    analysis_id: ObjectId  # reference to AnalysisDoc
+    version: int = 1  # columnar format version
+    strings: List[str] = Field(default_factory=list)  # token / sub_type string table
+    words: Dict[str, Any] = Field(default_factory=dict)  # packed word event columns
+    pauses: Dict[str, Any] = Field(default_factory=dict)  # packed pause event columns
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    class Settings:
+        name = "analysis_events"
+        indexes = [
+            IndexModel([("analysis_id", ASCENDING)], name="analysis_events_analysis_id_asc", unique=True),
+        ]
+
+print("✅ AnalysisEventsDoc model loaded")
+
+
+class AnalysisListViewDoc(Document):
+    """Denormalized analyses list row, _id is the analysis id (see services/list_view.py)"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    session_id: ObjectId
+    student_id: Optional[ObjectId] = None
+    student_name: Optional[str] = None
+    text_id: Optional[ObjectId] = None
+    text_title: Optional[str] = None
+    text_grade: Optional[int] = None
+    audio_id: Optional[ObjectId] = None
+    audio_name: Optional[str] = None
+    audio_size_bytes: Optional[int] = None
+    audio_duration_sec: Optional[float] = None
+    status: str = "queued"
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    wer: Optional[float] = None
+    accuracy: Optional[float] = None
+    wpm: Optional[float] = None
+    counts: Dict[str, Any] = Field(default_factory=dict)
+    updated_at: Optional[datetime] = None
+
+    class Settings:
+        name = "analysis_list_view"
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="list_view_created_at_id_desc"),
+            IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="list_view_student_created_at_id_desc"),
+            IndexModel([("text_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="list_view_text_created_at_id_desc"),
+            IndexModel([("text_grade", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="list_view_text_grade_created_at_id_desc"),
+        ]
+
+print("✅ AnalysisListViewDoc model loaded")
+
+
 class WordData(BaseModel):
     """Word data structure for STT results"""
     word: str
@@ -1,9 +1,10 @@
-from beanie import Document
+from beanie import Document, before_event, Insert, Replace, Save, SaveChanges
 from pydantic import Field, BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime, timezone
 from pymongo import IndexModel, ASCENDING, DESCENDING
 import asyncio
+from app.utils.text_tokenizer import name_search_terms
 
 class StudentDoc(Document):
     """Student document model - All dates stored in UTC"""
@@ -15,6 +16,7 @@ class StudentDoc(Document):
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: Optional[datetime] = None
+    name_search: List[str] = Field(default_factory=list)  # Turkish-folded lowercase name words, see refresh_name_search
     
     class Settings:
         name = "students"
@@ -25,8 +27,19 @@ class StudentDoc(Document):
             IndexModel([("registration_number", ASCENDING)], name="students_registration_number_asc", unique=True),
             IndexModel([("is_active", ASCENDING)], name="students_active_asc"),
             IndexModel([("created_at", DESCENDING)], name="students_created_at_desc"),
+            # Name prefix search and keyset pagination of the students list
+            IndexModel([("name_search", ASCENDING)], name="students_name_search_asc"),
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="students_created_at_id_desc"),
+            IndexModel([("first_name", ASCENDING), ("_id", ASCENDING)], name="students_first_name_id_asc"),
+            IndexModel([("last_name", ASCENDING), ("_id", ASCENDING)], name="students_last_name_id_asc"),
+            IndexModel([("grade", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="students_grade_created_at_id_desc"),
         ]
     
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def refresh_name_search(self):
+        """Keep name_search in step with the names on every write"""
+        self.name_search = name_search_terms(self.first_name, self.last_name)
+    
     @property
     def full_name(self) -> str:
         """Get full name"""
@@ -119,6 +132,22 @@ class StudentResponse(BaseModel):
             created_at=doc.created_at.isoformat(),
             updated_at=doc.updated_at.isoformat() if doc.updated_at else None
         )
+    
+    @classmethod
+    def from_row(cls, row: dict) -> "StudentResponse":
+        """Create response from a raw students document, without building a StudentDoc"""
+        return cls(
+            id=str(row["_id"]),
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            full_name=f"{row['first_name']} {row['last_name']}",
+            grade=row["grade"],
+            registration_number=row["registration_number"],
+            created_by=row["created_by"],
+            is_active=row.get("is_active", True),
+            created_at=row["created_at"].isoformat(),
+            updated_at=row["updated_at"].isoformat() if row.get("updated_at") else None
+        )
 
 class StudentListResponse(BaseModel):
     students: list[StudentResponse]
@@ -126,3 +155,4 @@ class StudentListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None  # cursor of the next page, None on the last page
@@ -1,12 +1,13 @@
 from beanie import Document
-from pydantic import Field, EmailStr
-from typing import Optional, List
+from pydantic import Field, EmailStr, PrivateAttr
+from typing import Optional, List, FrozenSet
 from datetime import datetime, timezone
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
 from app.models.role import RoleDoc
+from app.auth_cache import auth_cache
 from bson import ObjectId
 
 # Password hashing - Using pbkdf2_sha256 for reliability
@@ -51,6 +52,10 @@ class UserDoc(Document):
     
     model_config = {"arbitrary_types_allowed": True}
     
+    # Effective permissions, computed once per role_id/extra_permissions (see effective_permission_set)
+    _permissions: Optional[FrozenSet[str]] = PrivateAttr(default=None)
+    _permissions_key: Optional[tuple] = PrivateAttr(default=None)
+    
     def set_password(self, password: str):
         """Hash and set password"""
         self.password_hash = get_password_hash(password)
@@ -66,29 +71,36 @@ class UserDoc(Document):
             return await RoleDoc.get(str(self.role_id))
         return None
     
+    def set_effective_permissions(self, permissions: FrozenSet[str]):
+        """Use already known effective permissions (e.g. from the auth cache) instead of reading the role"""
+        self._permissions = frozenset(permissions)
+        self._permissions_key = (self.role_id, tuple(self.extra_permissions))
+    
+    async def effective_permission_set(self) -> FrozenSet[str]:
+        """Effective permissions (role + extra); the role is read once, not on every check"""
+        if self._permissions is None or self._permissions_key != (self.role_id, tuple(self.extra_permissions)):
+            role = await self.get_role()
+            # Combine role permissions and extra permissions
+            self.set_effective_permissions(set(role.permissions if role else []) | set(self.extra_permissions))
+        return self._permissions
+    
     async def get_effective_permissions(self) -> List[str]:
         """Get all effective permissions (role + extra)"""
-        role = await self.get_role()
-        if not role:
-            return self.extra_permissions
-        
-        # Combine role permissions and extra permissions
-        effective_permissions = set(role.permissions + self.extra_permissions)
-        return list(effective_permissions)
+        return list(await self.effective_permission_set())
     
     async def has_permission(self, permission: str) -> bool:
         """Check if user has specific permission"""
-        effective_permissions = await self.get_effective_permissions()
+        effective_permissions = await self.effective_permission_set()
         return permission in effective_permissions or "*" in effective_permissions
     
     async def has_any_permission(self, permissions: List[str]) -> bool:
         """Check if user has any of the specified permissions"""
-        effective_permissions = await self.get_effective_permissions()
+        effective_permissions = await self.effective_permission_set()
         return any(perm in effective_permissions or "*" in effective_permissions for perm in permissions)
     
     async def has_all_permissions(self, permissions: List[str]) -> bool:
         """Check if user has all of the specified permissions"""
-        effective_permissions = await self.get_effective_permissions()
+        effective_permissions = await self.effective_permission_set()
         return all(perm in effective_permissions or "*" in effective_permissions for perm in permissions)
     
     @classmethod
@@ -125,8 +137,12 @@ def verify_token(token: str) -> dict:
         )
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserDoc:
-    """Get current user from JWT token"""
+    """Get current user from JWT token, from the auth context cache when possible"""
     token = credentials.credentials
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+    
     payload = verify_token(token)
     user_id = payload.get("sub")
     
@@ -143,6 +159,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="User not found or inactive"
         )
     
+    auth_cache.put(token, user, await user.effective_permission_set(), payload.get("exp"))
     return user
 
 # Dependency for admin role
@@ -0,0 +1,169 @@
+"""
+Analysis progress fan-out: Redis pub/sub -> Server-Sent Events
+
+The worker publishes every status/stage change of an analysis on
+`analysis:progress:<analysis_id>` and keeps the latest event under
+`analysis:progress:last:<analysis_id>` (worker/progress.py).
+
+Each API process holds a single pattern subscription and hands messages to
+the queues of the SSE clients watching that analysis, so any number of open
+tabs cost one Redis subscription and no Mongo reads. The status endpoint
+also answers from the latest event when there is one.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+from loguru import logger
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+
+CHANNEL_PREFIX = "analysis:progress:"
+LAST_KEY_PREFIX = "analysis:progress:last:"
+FINAL_STATUSES = ("done", "failed")
+STATUS_FIELDS = ("analysis_id", "status", "stage", "percent", "started_at", "finished_at", "error")
+
+
+def status_event(analysis) -> Dict[str, Any]:
+    """Progress event built from an AnalysisDoc, for analyses without a published event"""
+    return {
+        "analysis_id": str(analysis.id),
+        "status": analysis.status,
+        "stage": analysis.stage,
+        "percent": 100 if analysis.status == "done" else None,
+        "started_at": analysis.started_at.isoformat() if analysis.started_at else None,
+        "finished_at": analysis.finished_at.isoformat() if analysis.finished_at else None,
+        "error": analysis.error
+    }
+
+
+def format_sse(data: Dict[str, Any], event: str = "progress") -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class ProgressHub:
+    """One Redis pattern subscription per process, fanned out to per-client queues"""
+
+    def __init__(self):
+        self.redis = None
+        self.task = None
+        self.watchers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def _client(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(settings.redis_url or "redis://redis:6379/0", socket_connect_timeout=5)
+        return self.redis
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def ensure_started(self):
+        """Start the subscription task on first use"""
+        if not self.running:
+            self.task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    def watch(self, analysis_id: str) -> asyncio.Queue:
+        """Queue receiving the progress events of one analysis"""
+        queue = asyncio.Queue(maxsize=settings.progress_queue_size)
+        self.watchers.setdefault(analysis_id, set()).add(queue)
+        return queue
+
+    def unwatch(self, analysis_id: str, queue: asyncio.Queue):
+        queues = self.watchers.get(analysis_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.watchers[analysis_id]
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """Hand one published message to its watchers; returns how many got it"""
+        queues = self.watchers.get(channel[len(CHANNEL_PREFIX):])
+        if not queues:
+            return 0
+        event = json.loads(data)
+        for queue in queues:
+            if queue.full():
+                # A stalled client only needs the latest state
+                queue.get_nowait()
+            queue.put_nowait(event)
+        return len(queues)
+
+    async def last_event(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Latest published event of an analysis, None if expired or Redis is unavailable"""
+        try:
+            value = await self._client().get(LAST_KEY_PREFIX + analysis_id)
+        except Exception as e:
+            logger.warning(f"Could not read progress of analysis {analysis_id}: {str(e)}")
+            return None
+        return json.loads(value) if value else None
+
+    async def _listen(self):
+        """Pattern subscription loop, resubscribing after Redis errors"""
+        delay = 1.0
+        while True:
+            try:
+                pubsub = self._client().pubsub()
+                await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                logger.info("📡 Subscribed to analysis progress events")
+                delay = 1.0
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self.dispatch(message["channel"].decode(), message["data"])
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress subscription failed, retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+progress_hub = ProgressHub()
+
+
+async def stream_progress(hub: ProgressHub, analysis_id: str, queue: asyncio.Queue, initial: Dict[str, Any],
+                          is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    """
+    SSE body: the current state, then every update until the analysis is done or failed
+
+    Without a live subscription the stream ends after the current state and
+    EventSource reconnects after `retry` ms, which degrades to slow polling.
+    """
+    try:
+        yield f"retry: {settings.progress_retry_ms}\n\n"
+        yield format_sse(initial)
+        if initial["status"] in FINAL_STATUSES or not hub.running:
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.progress_keepalive_sec)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                # A final event published while the subscription was reconnecting never reaches the queue
+                latest = await hub.last_event(analysis_id)
+                if latest and latest["status"] in FINAL_STATUSES:
+                    yield format_sse(latest)
+                    return
+                # Comment line, keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+            if event["status"] in FINAL_STATUSES:
+                return
+    finally:
+        hub.unwatch(analysis_id, queue)
@@ -0,0 +1,223 @@
+"""
+Response cache for finished analyses
+
+Once an analysis is done its detail, export, word/pause events and metrics
+never change unless the analysis is edited (PUT /v1/analyses/{id}) or
+recomputed (scripts/recompute_analysis.py, scripts/bulk_reanalyze.py). Their
+JSON bodies are cached in an in-process LRU in front of Redis, keyed by
+analysis id, view and a content version:
+
+    analysis:version:<analysis_id>                   integer, INCR to invalidate
+    analysis:response:<analysis_id>:<version>:<view>  etag + "\\n" + body, with a TTL
+
+Every request reads the version (one Redis GET), so an invalidation is seen
+by all API processes at once; bodies of old versions simply expire.
+Responses carry a strong ETag and `Cache-Control: private, no-cache`, so
+browsers revalidate and get a 304 without a body.
+
+Analyses that are not done are never cached. Without Redis every request
+is built from Mongo as before.
+
+Streamed views (the export) cannot send an ETag before their body is
+complete: a miss is streamed without one and stored once the last chunk is
+sent, so the next request is served from the cache with its ETag.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from loguru import logger
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.fast_json import dumps
+
+
+VERSION_KEY_PREFIX = "analysis:version:"
+RESPONSE_KEY_PREFIX = "analysis:response:"
+
+
+def json_body(content: Any) -> bytes:
+    """JSON bytes of a response body, ObjectIds as strings; rendered bytes are passed through"""
+    if isinstance(content, bytes):
+        return content
+    return dumps(content)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class AnalysisResponseCache:
+    def __init__(self):
+        self.redis = None
+        self.lru: "OrderedDict[Tuple[str, str], Tuple[int, str, bytes]]" = OrderedDict()
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _client(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(settings.redis_url or "redis://redis:6379/0", socket_connect_timeout=5)
+        return self.redis
+
+    async def version(self, analysis_id: str) -> Optional[int]:
+        """Content version of an analysis, None if Redis is unavailable"""
+        try:
+            value = await self._client().get(VERSION_KEY_PREFIX + analysis_id)
+        except Exception as e:
+            logger.warning(f"Analysis response cache unavailable: {str(e)}")
+            return None
+        return int(value) if value else 0
+
+    async def get(self, analysis_id: str, view: str, version: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) of a cached response of this version"""
+        entry = self.lru.get((analysis_id, view))
+        if entry is not None and entry[0] == version:
+            self.lru.move_to_end((analysis_id, view))
+            self.stats["lru_hits"] += 1
+            return entry[1], entry[2]
+
+        try:
+            value = await self._client().get(f"{RESPONSE_KEY_PREFIX}{analysis_id}:{version}:{view}")
+        except Exception as e:
+            logger.warning(f"Analysis response cache read failed: {str(e)}")
+            value = None
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+
+        etag, body = value.split(b"\n", 1)
+        self.stats["redis_hits"] += 1
+        self._remember(analysis_id, view, version, etag.decode(), body)
+        return etag.decode(), body
+
+    async def put(self, analysis_id: str, view: str, version: int, etag: str, body: bytes):
+        self._remember(analysis_id, view, version, etag, body)
+        try:
+            await self._client().set(
+                f"{RESPONSE_KEY_PREFIX}{analysis_id}:{version}:{view}", etag.encode() + b"\n" + body,
+                ex=settings.analysis_cache_ttl_sec
+            )
+        except Exception as e:
+            logger.warning(f"Analysis response cache write failed: {str(e)}")
+
+    async def invalidate(self, analysis_id: str):
+        """Start a new content version; cached responses of older versions are no longer served"""
+        for key in [key for key in self.lru if key[0] == analysis_id]:
+            del self.lru[key]
+        try:
+            await self._client().incr(VERSION_KEY_PREFIX + analysis_id)
+        except Exception as e:
+            logger.warning(f"Could not invalidate cached responses of analysis {analysis_id}: {str(e)}")
+
+    async def invalidate_many(self, analysis_ids: List[str]):
+        """invalidate() for many analyses with one pipelined Redis call (e.g. all analyses of an edited text)"""
+        analysis_ids = {str(analysis_id) for analysis_id in analysis_ids}
+        if not analysis_ids:
+            return
+        for key in [key for key in self.lru if key[0] in analysis_ids]:
+            del self.lru[key]
+        try:
+            pipe = self._client().pipeline(transaction=False)
+            for analysis_id in analysis_ids:
+                pipe.incr(VERSION_KEY_PREFIX + analysis_id)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not invalidate cached responses of {len(analysis_ids)} analyses: {str(e)}")
+
+    def _remember(self, analysis_id: str, view: str, version: int, etag: str, body: bytes):
+        self.lru[(analysis_id, view)] = (version, etag, body)
+        self.lru.move_to_end((analysis_id, view))
+        while len(self.lru) > settings.analysis_cache_lru_size:
+            self.lru.popitem(last=False)
+
+
+analysis_cache = AnalysisResponseCache()
+
+
+def _response(request: Request, etag: Optional[str], body: bytes) -> Response:
+    if etag is None:
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_analysis_response(request: Request, analysis_id: str, view: str,
+                                   build: Callable[[], Awaitable[Tuple[Any, str]]]) -> Response:
+    """
+    Serve one view of an analysis from the cache, or build it
+
+    Args:
+        request: Incoming request (If-None-Match)
+        analysis_id: Analysis the view belongs to
+        view: Name of the view, part of the cache key
+        build: Coroutine function returning (JSON-serializable content or rendered JSON bytes,
+            analysis status)
+    """
+    version = None
+    if settings.analysis_cache_enabled and ObjectId.is_valid(analysis_id):
+        version = await analysis_cache.version(analysis_id)
+        if version is not None:
+            cached = await analysis_cache.get(analysis_id, view, version)
+            if cached is not None:
+                return _response(request, *cached)
+
+    content, status = await build()
+    body = json_body(content)
+    if status != "done":
+        return _response(request, None, body)
+
+    etag = make_etag(body)
+    if version is not None:
+        await analysis_cache.put(analysis_id, view, version, etag, body)
+    return _response(request, etag, body)
+
+
+
+async def cached_analysis_stream(request: Request, analysis_id: str, view: str,
+                                 start: Callable[[], Awaitable[Tuple[AsyncIterator[bytes], str]]]) -> Response:
+    """
+    Serve one streamed view of an analysis from the cache, or stream it
+
+    Args:
+        request: Incoming request (If-None-Match)
+        analysis_id: Analysis the view belongs to
+        view: Name of the view, part of the cache key
+        start: Coroutine function returning (JSON body chunks, analysis status); it
+            should raise HTTPException before returning, not while streaming
+    """
+    version = None
+    if settings.analysis_cache_enabled and ObjectId.is_valid(analysis_id):
+        version = await analysis_cache.version(analysis_id)
+        if version is not None:
+            cached = await analysis_cache.get(analysis_id, view, version)
+            if cached is not None:
+                return _response(request, *cached)
+
+    chunks, status = await start()
+    if status != "done" or version is None:
+        return StreamingResponse(chunks, media_type="application/json", headers={"Cache-Control": "no-store"})
+
+    async def stream_and_store():
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        body = b"".join(parts)
+        await analysis_cache.put(analysis_id, view, version, make_etag(body), body)
+
+    return StreamingResponse(stream_and_store(), media_type="application/json",
+                             headers={"Cache-Control": "private, no-cache"})
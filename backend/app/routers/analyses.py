@@ -1,23 +1,26 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Request, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Request, Response, Depends, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from typing import Union
-import tempfile
 import os
 from datetime import datetime, timezone, timedelta
 from app.utils.timezone import get_utc_now
-import soundfile as sf
+from app.utils.pagination import encode_cursor, keyset_filter
+from app.utils.fast_json import typed_json, typed_response
 from bson import ObjectId
-from app.models.documents import AnalysisDoc, TextDoc, AudioFileDoc, WordEventDoc, PauseEventDoc, ReadingSessionDoc
+from app.models.documents import AnalysisDoc, AnalysisListViewDoc, TextDoc, AudioFileDoc, ReadingSessionDoc
 from app.models.user import UserDoc, get_current_user
 from app.models.rbac import require_permission
 from app.config import settings
-from app.storage import upload_audio_file
-from app.storage.gcs import generate_signed_url
-from app.crud import insert_audio
+from app.storage.service import storage_service
+from app.crud import insert_audio, get_analysis_events, refresh_list_view
 from app.logging_config import app_logger
 from app.schemas import WordEventResponse, PauseEventResponse, MetricsResponse
+from app.response_cache import analysis_cache, cached_analysis_response, cached_analysis_stream
+from app.services.upload_ingest import ingest_upload, UploadTooLarge
+from app.services.audio_probe import probe_audio
+from app.services.analysis_export import EXPORT_BATCH_SIZE, export_chunks, transcript_of
 
 router = APIRouter()
 
@@ -28,119 +31,88 @@ async def test_export():
     return {"message": "Export test endpoint working"}
 
 
+@router.get("/export")
+async def export_analyses(
+    student_id: Optional[str] = Query(None, description="Export analyses of this student"),
+    text_id: Optional[str] = Query(None, description="Export analyses of this text"),
+    grade: Optional[int] = Query(None, ge=0, description="Export analyses of texts of this grade"),
+    date_from: Optional[datetime] = Query(None, description="Created at or after (UTC)"),
+    date_to: Optional[datetime] = Query(None, description="Created before (UTC)"),
+    current_user: UserDoc = Depends(get_current_user)
+):
+    """
+    Export every matching analysis as NDJSON, newest first
+    
+    Each line is the object GET /v1/analyses/{id}/export returns. Analyses
+    are selected on analysis_list_view with the filters of the analyses list
+    and exported one at a time, so memory does not grow with their number.
+    Same permissions as the analyses list.
+    """
+    app_logger.info(f"Bulk export called with student_id={student_id}, text_id={text_id}, grade={grade}, date_from={date_from}, date_to={date_to}")
+    await _check_list_permission(current_user, student_id)
+    query_filter = _list_view_filter(student_id, text_id, grade, date_from, date_to)
+    
+    async def lines():
+        ids = AnalysisListViewDoc.get_motor_collection().find(query_filter, {"_id": 1}) \
+            .sort([("created_at", -1), ("_id", -1)]).batch_size(EXPORT_BATCH_SIZE)
+        batch = []
+        async for row in ids:
+            batch.append(row["_id"])
+            if len(batch) == EXPORT_BATCH_SIZE:
+                async for chunk in _export_lines(batch):
+                    yield chunk
+                batch = []
+        if batch:
+            async for chunk in _export_lines(batch):
+                yield chunk
+    
+    filename = f"analyses-{get_utc_now().strftime('%Y%m%d-%H%M%S')}.ndjson"
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+async def _export_lines(analysis_ids: List[ObjectId]):
+    """NDJSON export lines of a batch of analyses, in the given order"""
+    analyses = {
+        doc["_id"]: doc
+        for doc in await AnalysisDoc.get_motor_collection().find({"_id": {"$in": analysis_ids}}).to_list(length=None)
+    }
+    for analysis_id in analysis_ids:
+        analysis = analyses.get(analysis_id)
+        if analysis is None:
+            continue  # deleted since the view row was written
+        async for chunk in export_chunks(analysis, await transcript_of(analysis.get("session_id"))):
+            yield chunk
+        yield b"\n"
+
+
 @router.get("/{analysis_id}/export")
 @require_permission("analysis:view")
-async def export_analysis(analysis_id: str, current_user: UserDoc = Depends(get_current_user)):
-    """Export complete analysis data as JSON"""
+async def export_analysis(analysis_id: str, request: Request, current_user: UserDoc = Depends(get_current_user)):
+    """Export complete analysis data as JSON, streamed"""
     app_logger.info(f"Export analysis called with ID: {analysis_id}")
-    
-    try:
-        # Validate ObjectId
-        try:
-            oid = ObjectId(analysis_id)
-            app_logger.info(f"ObjectId created successfully: {oid}")
-        except Exception as e:
-            app_logger.error(f"Invalid ObjectId: {e}")
-            raise HTTPException(status_code=400, detail="Invalid analysis id")
-
-        # Fetch analysis
-        app_logger.info(f"Fetching analysis with ObjectId: {oid}")
-        analysis = await AnalysisDoc.get(oid)
-        if not analysis:
-            app_logger.warning(f"Analysis not found: {oid}")
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        app_logger.info(f"Analysis found: {analysis.id}")
+    return await cached_analysis_stream(request, analysis_id, "export", lambda: _start_export(analysis_id))
 
-        # Fetch related events
-        app_logger.info("Fetching word events...")
-        try:
-            word_events = await WordEventDoc.find(WordEventDoc.analysis_id == analysis.id).to_list()
-            app_logger.info(f"Found {len(word_events)} word events")
-        except Exception as e:
-            app_logger.error(f"Error fetching word events: {e}")
-            word_events = []
-        
-        app_logger.info("Fetching pause events...")
-        try:
-            pause_events = await PauseEventDoc.find(PauseEventDoc.analysis_id == analysis.id).to_list()
-            app_logger.info(f"Found {len(pause_events)} pause events")
-        except Exception as e:
-            app_logger.error(f"Error fetching pause events: {e}")
-            pause_events = []
 
-        # Build response
-        app_logger.info("Building response...")
-        
-        # Convert documents to dicts and ensure ObjectId fields are strings
-        events_data = []
-        for we in word_events:
-            event_dict = we.dict()
-            event_dict["analysis_id"] = str(event_dict["analysis_id"])
-            
-            # Normalize sub_type if present
-            if "sub_type" in event_dict and event_dict["sub_type"]:
-                from app.services.alignment import normalize_sub_type
-                event_dict["sub_type"] = normalize_sub_type(event_dict["sub_type"])
-            
-            # Ensure char_diff and cer_local are included for substitution events
-            if event_dict.get("type") == "substitution":
-                if "char_diff" not in event_dict or event_dict["char_diff"] is None:
-                    # Calculate char_diff if missing
-                    ref_token = event_dict.get("ref_token", "")
-                    hyp_token = event_dict.get("hyp_token", "")
-                    if ref_token and hyp_token:
-                        from app.services.alignment import char_edit_stats
-                        char_diff = char_edit_stats(ref_token, hyp_token)[0]
-                        event_dict["char_diff"] = char_diff
-                        event_dict["cer_local"] = char_diff / max(len(ref_token), 1)
-            
-            events_data.append(event_dict)
-        
-        pauses_data = []
-        for pe in pause_events:
-            pause_dict = pe.dict()
-            pause_dict["analysis_id"] = str(pause_dict["analysis_id"])
-            pauses_data.append(pause_dict)
-        
-        # Validate summary consistency
-        from app.services.scoring import validate_summary_consistency
-        is_consistent = validate_summary_consistency(analysis.summary, word_events)
-        if not is_consistent:
-            app_logger.warning(f"Summary consistency validation failed for analysis {analysis_id}")
-        
-        # Get STT result for transcript
-        from app.models.documents import SttResultDoc
-        session = await ReadingSessionDoc.get(analysis.session_id)
-        transcript_text = None
-        app_logger.info(f"Getting STT result for session: {session.id if session else 'None'}")
-        if session:
-            stt_result = await SttResultDoc.find_one(SttResultDoc.session_id == session.id)
-            app_logger.info(f"STT result found: {stt_result is not None}")
-            if stt_result:
-                transcript_text = stt_result.transcript
-                app_logger.info(f"Transcript length: {len(transcript_text) if transcript_text else 0}")
-        
-        result = {
-            "analysis_id": str(analysis.id),
-            "text_id": str(analysis.session_id),
-            "events": events_data,
-            "pauses": pauses_data,
-            "summary": analysis.summary or {},
-            "metrics": analysis.summary.get("metrics", {}) if analysis.summary else {},
-            "transcript": transcript_text,
-            "validation": {
-                "summary_consistent": is_consistent
-            }
-        }
-        app_logger.info("Response built successfully")
-        return JSONResponse(content=result)
-        
-    except HTTPException:
-        raise
+async def _start_export(analysis_id: str):
+    """Export chunks and status of an analysis; raises before anything is streamed"""
+    try:
+        oid = ObjectId(analysis_id)
+    except Exception as e:
+        app_logger.error(f"Invalid ObjectId: {e}")
+        raise HTTPException(status_code=400, detail="Invalid analysis id")
+    
+    analysis = await AnalysisDoc.get_motor_collection().find_one({"_id": oid})
+    if not analysis:
+        app_logger.warning(f"Analysis not found: {oid}")
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    try:
+        transcript = await transcript_of(analysis.get("session_id"))
     except Exception as e:
         app_logger.error(f"Failed to export analysis {analysis_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to export analysis: {str(e)}")
+    return export_chunks(analysis, transcript), analysis.get("status")
 
 
 class AnalysisSummary(BaseModel):
@@ -148,7 +120,10 @@ class AnalysisSummary(BaseModel):
     created_at: str
     status: str
     text_title: str
+    text_id: Optional[str] = None
+    text_grade: Optional[int] = None
     student_id: Optional[str] = None
+    student_name: Optional[str] = None
     text: Optional[Dict[str, str]] = None
     wer: Optional[float] = None
     accuracy: Optional[float] = None
@@ -195,18 +170,42 @@ class AnalyzeResponse(BaseModel):
 async def get_analyses(
     limit: int = Query(20, ge=1, le=100),
     student_id: Optional[str] = Query(None, description="Filter analyses by student ID"),
+    text_id: Optional[str] = Query(None, description="Filter analyses by text ID"),
+    grade: Optional[int] = Query(None, ge=0, description="Filter analyses by text grade"),
+    date_from: Optional[datetime] = Query(None, description="Created at or after (UTC)"),
+    date_to: Optional[datetime] = Query(None, description="Created before (UTC)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: UserDoc = Depends(get_current_user)
 ):
     """
-    Get analyses list with pagination and lookups.
+    Get analyses list, newest first, with keyset pagination.
     - If student_id provided: requires analysis:read permission (student-specific)
     - If no student_id: requires analysis:read_all permission (all analyses)
+    - If the page is full, the X-Next-Cursor header holds the cursor of the next page
+    
+    Rows come from the analysis_list_view collection (services/list_view.py),
+    one indexed query without lookups.
     """
+    app_logger.info(f"GET /analyses called with limit={limit}, student_id={student_id}, text_id={text_id}, grade={grade}, cursor={cursor}")
+    
+    await _check_list_permission(current_user, student_id)
+    query_filter = _list_view_filter(student_id, text_id, grade, date_from, date_to)
+    try:
+        query_filter = keyset_filter(query_filter, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    from app.logging_config import app_logger
-    app_logger.info(f"DEBUG: GET /analyses called with limit={limit}, student_id={student_id}")
+    rows = await AnalysisListViewDoc.get_motor_collection().find(query_filter) \
+        .sort([("created_at", -1), ("_id", -1)]).limit(limit).to_list(length=limit)
+    headers = {}
+    if len(rows) == limit and rows[-1].get("created_at"):
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]["created_at"], rows[-1]["_id"])
     
-    # Permission check: different permissions for different access patterns
+    return typed_response(List[AnalysisSummary], [_list_view_summary(row) for row in rows], headers=headers)
+
+
+async def _check_list_permission(current_user: UserDoc, student_id: Optional[str]):
+    """analysis:read for one student's analyses, analysis:read_all for all of them"""
     if student_id:
         # Accessing specific student's analyses - requires analysis:read
         if not await current_user.has_any_permission(["analysis:read", "analysis:read_all", "*"]):
@@ -214,7 +213,6 @@ async def get_analyses(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied. Required permission: analysis:read"
             )
-        app_logger.info(f"DEBUG: User has permission to view student analyses")
     else:
         # Accessing all analyses - requires analysis:read_all
         if not await current_user.has_any_permission(["analysis:read_all", "*"]):
@@ -222,242 +220,214 @@ async def get_analyses(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied. Required permission: analysis:read_all"
             )
-        app_logger.info(f"DEBUG: User has permission to view all analyses")
-    
-    # Build query filter
+
+
+def _list_view_filter(student_id: Optional[str], text_id: Optional[str], grade: Optional[int],
+                      date_from: Optional[datetime], date_to: Optional[datetime]) -> Dict[str, Any]:
+    """analysis_list_view query of the list filters"""
     query_filter = {}
-    if student_id:
-        from bson import ObjectId
-        query_filter["student_id"] = ObjectId(student_id)
-        app_logger.info(f"DEBUG: Filtering by student_id: {student_id}")
-    
-    # Get analyses ordered by created_at desc
-    analyses = await AnalysisDoc.find(query_filter).sort("-created_at").limit(limit).to_list()
-    
-    app_logger.info(f"DEBUG: Found {len(analyses)} analyses")
-    print(f"STDOUT DEBUG: Found {len(analyses)} analyses")
-    
-    if not analyses:
-        app_logger.info("DEBUG: No analyses found, returning empty list")
-        print("STDOUT DEBUG: No analyses found, returning empty list")
-        return []
-    
-    # Get unique session IDs for batch lookup
-    session_ids = list(set(str(analysis.session_id) for analysis in analyses))
-    app_logger.info(f"DEBUG: Found {len(session_ids)} unique session IDs: {session_ids[:3]}...")
-    
-    # Convert session IDs to ObjectId for MongoDB query
-    from bson import ObjectId
-    session_object_ids = [ObjectId(sid) for sid in session_ids]
-    app_logger.info(f"DEBUG: Converted to ObjectIds: {session_object_ids[:3]}...")
-    
-    # Batch fetch sessions, texts and audios
-    sessions = await ReadingSessionDoc.find({"_id": {"$in": session_object_ids}}).to_list()
-    app_logger.info(f"DEBUG: Found {len(sessions)} sessions")
-    
-    text_ids = list(set(str(session.text_id) for session in sessions))
-    audio_ids = list(set(str(session.audio_id) for session in sessions))
-    app_logger.info(f"DEBUG: Found {len(text_ids)} text IDs, {len(audio_ids)} audio IDs")
-    
-    # Convert text and audio IDs to ObjectId for MongoDB query
-    text_object_ids = [ObjectId(tid) for tid in text_ids]
-    audio_object_ids = [ObjectId(aid) for aid in audio_ids]
-    
-    texts = await TextDoc.find({"_id": {"$in": text_object_ids}}).to_list()
-    audios = await AudioFileDoc.find({"_id": {"$in": audio_object_ids}}).to_list()
-    app_logger.info(f"DEBUG: Found {len(texts)} texts, {len(audios)} audios")
-    
-    # Create lookup dictionaries
-    session_lookup = {str(session.id): session for session in sessions}
-    text_lookup = {str(text.id): text for text in texts}
-    audio_lookup = {str(audio.id): audio for audio in audios}
-    
-    # Build response
-    result = []
-    skipped_count = 0
-    for analysis in analyses:
-        session = session_lookup.get(str(analysis.session_id))
-        if not session:
-            skipped_count += 1
-            continue  # Skip if session not found
-            
-        text = text_lookup.get(str(session.text_id))
-        audio = audio_lookup.get(str(session.audio_id))
-        
-        # Extract summary data
-        summary = analysis.summary or {}
-        counts = summary.get("counts", {})
-        
-        # Build base response
-        response_data = {
-            "id": str(analysis.id),
-            "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
-            "status": analysis.status,
-            "text_title": text.title if text else "Unknown",
-            "student_id": str(analysis.student_id) if analysis.student_id else None,
-            "text": {
-                "title": text.title if text else "Unknown",
-                "body": text.body if text else ""
-            },
-            "wer": summary.get("wer"),
-            "accuracy": summary.get("accuracy"),
-            "wpm": summary.get("wpm"),
-            "counts": counts,
-            "audio_id": str(session.audio_id),
-            "audio_name": audio.original_name if audio else None,
-            "audio_duration_sec": analysis.audio_duration_sec,
-            "audio_size_bytes": getattr(audio, 'size_bytes', None) if audio else None
+    for name, value in (("student_id", student_id), ("text_id", text_id)):
+        if value:
+            if not ObjectId.is_valid(value):
+                raise HTTPException(status_code=400, detail=f"Invalid {name} format")
+            query_filter[name] = ObjectId(value)
+    if grade is not None:
+        query_filter["text_grade"] = grade
+    if date_from or date_to:
+        query_filter["created_at"] = {
+            **({"$gte": date_from} if date_from else {}),
+            **({"$lt": date_to} if date_to else {})
         }
-        
-        # Debug audio duration
-        app_logger.info(f"DEBUG: audio object: {audio}")
-        app_logger.info(f"DEBUG: audio_duration_sec: {response_data.get('audio_duration_sec')}")
-        app_logger.info(f"DEBUG: response_data.student_id: {response_data.get('student_id')}")
-        
-        # Add DEBUG fields if enabled
-        if settings.debug:
-            # Add timings
-            timings = {}
-            if analysis.created_at:
-                timings["queued_at"] = analysis.created_at.isoformat()
-            if analysis.started_at:
-                timings["started_at"] = analysis.started_at.isoformat()
-            if analysis.finished_at:
-                timings["finished_at"] = analysis.finished_at.isoformat()
-                if analysis.started_at:
-                    total_ms = (analysis.finished_at - analysis.started_at).total_seconds() * 1000
-                    timings["total_ms"] = round(total_ms, 2)
-            
-            response_data["timings"] = timings if timings else None
-            
-            # Add direct counts
-            response_data["counts_direct"] = {
-                "correct": counts.get("correct", 0),
-                "missing": counts.get("missing", 0),
-                "extra": counts.get("extra", 0),
-                "diff": counts.get("diff", 0)
-            }
-        
-        result.append(AnalysisSummary(**response_data))
+    return query_filter
+
+
+def _list_view_summary(row: Dict[str, Any]) -> AnalysisSummary:
+    """AnalysisSummary of an analysis_list_view row"""
+    counts = row.get("counts") or {}
+    created_at = row.get("created_at")
+    text_title = row.get("text_title") or "Unknown"
+    
+    response_data = {
+        "id": str(row["_id"]),
+        "created_at": created_at.isoformat() if created_at else None,
+        "status": row.get("status", "queued"),
+        "text_title": text_title,
+        "text_id": str(row["text_id"]) if row.get("text_id") else None,
+        "text_grade": row.get("text_grade"),
+        "student_id": str(row["student_id"]) if row.get("student_id") else None,
+        "student_name": row.get("student_name"),
+        "text": {"title": text_title},
+        "wer": row.get("wer"),
+        "accuracy": row.get("accuracy"),
+        "wpm": row.get("wpm"),
+        "counts": counts,
+        "audio_id": str(row["audio_id"]) if row.get("audio_id") else "",
+        "audio_name": row.get("audio_name"),
+        "audio_duration_sec": row.get("audio_duration_sec"),
+        "audio_size_bytes": row.get("audio_size_bytes")
+    }
     
-    app_logger.info(f"DEBUG: Built {len(result)} results, skipped {skipped_count} analyses")
-    return result
+    # Add DEBUG fields if enabled
+    if settings.debug:
+        # Add timings
+        timings = {}
+        started_at, finished_at = row.get("started_at"), row.get("finished_at")
+        if created_at:
+            timings["queued_at"] = created_at.isoformat()
+        if started_at:
+            timings["started_at"] = started_at.isoformat()
+        if finished_at:
+            timings["finished_at"] = finished_at.isoformat()
+            if started_at:
+                total_ms = (finished_at - started_at).total_seconds() * 1000
+                timings["total_ms"] = round(total_ms, 2)
+        
+        response_data["timings"] = timings if timings else None
+        
+        # Add direct counts
+        response_data["counts_direct"] = {
+            "correct": counts.get("correct", 0),
+            "missing": counts.get("missing", 0),
+            "extra": counts.get("extra", 0),
+            "diff": counts.get("diff", 0)
+        }
+    
+    return AnalysisSummary(**response_data)
 
 
 @router.get("/{analysis_id}/word-events", response_model=List[WordEventResponse])
-async def get_analysis_word_events(analysis_id: str):
+async def get_analysis_word_events(analysis_id: str, request: Request):
     """Get word events for a specific analysis"""
     
-    try:
-        analysis = await AnalysisDoc.get(analysis_id)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        word_events = await WordEventDoc.find(WordEventDoc.analysis_id == analysis_id).to_list()
-        
-        app_logger.info(f"Retrieved {len(word_events)} word events for analysis {analysis_id}")
-        return word_events
-        
-    except Exception as e:
-        app_logger.error(f"Failed to get word events for analysis {analysis_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get word events: {str(e)}")
+    async def build():
+        try:
+            analysis = await AnalysisDoc.get(analysis_id)
+            if not analysis:
+                raise HTTPException(status_code=404, detail="Analysis not found")
+            
+            word_events, _ = await get_analysis_events(analysis.id, include_pauses=False)
+            
+            app_logger.info(f"Retrieved {len(word_events)} word events for analysis {analysis_id}")
+            return typed_json(List[WordEventResponse], [
+                {
+                    "id": str(event.id), "analysis_id": str(event.analysis_id), "position": event.position,
+                    "ref_token": event.ref_token, "hyp_token": event.hyp_token, "type": event.type,
+                    "sub_type": event.sub_type, "timing": event.timing, "char_diff": event.char_diff
+                }
+                for event in word_events
+            ]), analysis.status
+            
+        except Exception as e:
+            app_logger.error(f"Failed to get word events for analysis {analysis_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to get word events: {str(e)}")
+    
+    return await cached_analysis_response(request, analysis_id, "word-events", build)
 
 
 @router.get("/{analysis_id}/pause-events", response_model=List[PauseEventResponse])
-async def get_analysis_pause_events(analysis_id: str):
+async def get_analysis_pause_events(analysis_id: str, request: Request):
     """Get pause events for a specific analysis"""
     
-    try:
-        analysis = await AnalysisDoc.get(analysis_id)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        pause_events = await PauseEventDoc.find(PauseEventDoc.analysis_id == analysis_id).to_list()
-        
-        app_logger.info(f"Retrieved {len(pause_events)} pause events for analysis {analysis_id}")
-        return pause_events
-        
-    except Exception as e:
-        app_logger.error(f"Failed to get pause events for analysis {analysis_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get pause events: {str(e)}")
+    async def build():
+        try:
+            analysis = await AnalysisDoc.get(analysis_id)
+            if not analysis:
+                raise HTTPException(status_code=404, detail="Analysis not found")
+            
+            _, pause_events = await get_analysis_events(analysis.id, include_words=False)
+            
+            app_logger.info(f"Retrieved {len(pause_events)} pause events for analysis {analysis_id}")
+            return typed_json(List[PauseEventResponse], [
+                {
+                    "id": str(event.id), "analysis_id": str(event.analysis_id), "after_position": event.after_position,
+                    "duration_ms": event.duration_ms, "class_": event.class_, "start_ms": event.start_ms, "end_ms": event.end_ms
+                }
+                for event in pause_events
+            ]), analysis.status
+            
+        except Exception as e:
+            app_logger.error(f"Failed to get pause events for analysis {analysis_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to get pause events: {str(e)}")
+    
+    return await cached_analysis_response(request, analysis_id, "pause-events", build)
 
 
 @router.get("/{analysis_id}/metrics", response_model=MetricsResponse)
-async def get_analysis_metrics(analysis_id: str):
+async def get_analysis_metrics(analysis_id: str, request: Request):
     """Get aggregated metrics for a specific analysis"""
     
-    try:
-        analysis = await AnalysisDoc.get(analysis_id)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        # Get word events
-        word_events = await WordEventDoc.find(WordEventDoc.analysis_id == analysis_id).to_list()
-        
-        # Get pause events
-        pause_events = await PauseEventDoc.find(PauseEventDoc.analysis_id == analysis_id).to_list()
-        
-        # Calculate counts
-        counts = {
-            "correct": 0,
-            "missing": 0,
-            "extra": 0,
-            "diff": 0,
-            "total_words": len(word_events)
-        }
-        
-        for event in word_events:
-            if event.type == "correct":
-                counts["correct"] += 1
-            elif event.type == "missing":
-                counts["missing"] += 1
-            elif event.type == "extra":
-                counts["extra"] += 1
-            elif event.type in ["substitution", "diff"]:
-                counts["diff"] += 1
-        
-        # Calculate WER and accuracy
-        total_ref = counts["correct"] + counts["missing"] + counts["diff"]
-        if total_ref > 0:
-            wer = (counts["missing"] + counts["extra"] + counts["diff"]) / total_ref
-            accuracy = (counts["correct"] / total_ref) * 100
-        else:
-            wer = 0.0
-            accuracy = 0.0
-        
-        # Calculate WPM (words per minute)
-        wpm = 0.0
-        if analysis.summary and "wpm" in analysis.summary:
-            wpm = analysis.summary["wpm"]
-        
-        # Count long pauses
-        long_pauses = len([p for p in pause_events if p.class_ in ["long", "very_long"]])
-        
-        metrics_data = {
-            "analysis_id": analysis_id,
-            "counts": counts,
-            "wer": wer,
-            "accuracy": accuracy,
-            "wpm": wpm,
-            "long_pauses": {
-                "count": long_pauses,
-                "threshold_ms": 500
-            },
-            "error_types": {
-                "missing": counts["missing"],
-                "extra": counts["extra"],
-                "substitution": counts["diff"],
-                "repetition": counts.get("repetition", 0),
-                "pause_long": long_pauses
+    async def build():
+        try:
+            analysis = await AnalysisDoc.get(analysis_id)
+            if not analysis:
+                raise HTTPException(status_code=404, detail="Analysis not found")
+            
+            # Get word and pause events
+            word_events, pause_events = await get_analysis_events(analysis.id)
+            
+            # Calculate counts
+            counts = {
+                "correct": 0,
+                "missing": 0,
+                "extra": 0,
+                "diff": 0,
+                "total_words": len(word_events)
             }
-        }
-        
-        app_logger.info(f"Retrieved metrics for analysis {analysis_id}")
-        return MetricsResponse(**metrics_data)
-        
-    except Exception as e:
-        app_logger.error(f"Failed to get metrics for analysis {analysis_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get metrics: {str(e)}")
+            
+            for event in word_events:
+                if event.type == "correct":
+                    counts["correct"] += 1
+                elif event.type == "missing":
+                    counts["missing"] += 1
+                elif event.type == "extra":
+                    counts["extra"] += 1
+                elif event.type in ["substitution", "diff"]:
+                    counts["diff"] += 1
+            
+            # Calculate WER and accuracy
+            total_ref = counts["correct"] + counts["missing"] + counts["diff"]
+            if total_ref > 0:
+                wer = (counts["missing"] + counts["extra"] + counts["diff"]) / total_ref
+                accuracy = (counts["correct"] / total_ref) * 100
+            else:
+                wer = 0.0
+                accuracy = 0.0
+            
+            # Calculate WPM (words per minute)
+            wpm = 0.0
+            if analysis.summary and "wpm" in analysis.summary:
+                wpm = analysis.summary["wpm"]
+            
+            # Count long pauses
+            long_pauses = len([p for p in pause_events if p.class_ in ["long", "very_long"]])
+            
+            metrics_data = {
+                "analysis_id": analysis_id,
+                "counts": counts,
+                "wer": wer,
+                "accuracy": accuracy,
+                "wpm": wpm,
+                "long_pauses": {
+                    "count": long_pauses,
+                    "threshold_ms": 500
+                },
+                "error_types": {
+                    "missing": counts["missing"],
+                    "extra": counts["extra"],
+                    "substitution": counts["diff"],
+                    "repetition": counts.get("repetition", 0),
+                    "pause_long": long_pauses
+                }
+            }
+            
+            app_logger.info(f"Retrieved metrics for analysis {analysis_id}")
+            return MetricsResponse(**metrics_data), analysis.status
+            
+        except Exception as e:
+            app_logger.error(f"Failed to get metrics for analysis {analysis_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to get metrics: {str(e)}")
+    
+    return await cached_analysis_response(request, analysis_id, "metrics", build)
 
 
 @router.post("/file", response_model=AnalyzeResponse)
@@ -505,13 +475,12 @@ async def analyze_file(
     if not file.content_type or not file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Check file size (10MB limit)
+    # Check file size (10MB limit); the multipart parser has already counted it, nothing is read here
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    if file.size is not None and file.size > MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB")
     
-    if len(content) == 0:
+    if file.size == 0:
         raise HTTPException(status_code=400, detail="Empty file not allowed")
     
     # Handle text validation and creation
@@ -569,41 +538,23 @@ async def analyze_file(
             ).error("Failed to create custom text document")
             raise HTTPException(status_code=500, detail="Failed to create custom text document")
     
-    # Save file temporarily for processing
+    # Temp copy of the upload, kept for the duration probe
     temp_file_path = None
     try:
-        # Create temporary file for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Calculate duration (optional)
-        duration_sec = None
+        # Stream the file to a temp file and to GCS, hashing it on the way
         try:
-            data, sr = sf.read(temp_file_path)
-            duration_sec = len(data) / sr
-        except Exception as e:
-            app_logger.bind(
-                request_id=request_id,
-                error=str(e)
-            ).warning("Could not calculate audio duration")
-        
-        # Upload to GCS
-        try:
-            gcs_result = upload_audio_file(
-                text_id=text_id,  # Use text_id for blob naming, None for custom
-                original_name=file.filename,
-                file_path=temp_file_path,
-                content_type=file.content_type
-            )
+            gcs_result = await ingest_upload(file, text_id, max_bytes=MAX_FILE_SIZE)
+            temp_file_path = gcs_result["temp_path"]
             
             app_logger.bind(
                 request_id=request_id,
                 text_id=text_id,
                 original_filename=file.filename,
                 size_bytes=gcs_result["size_bytes"]
-            ).info("Audio file uploaded to GCS successfully")
+            ).info("Audio file streamed to GCS successfully")
             
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             app_logger.bind(
                 request_id=request_id,
@@ -611,6 +562,18 @@ async def analyze_file(
             ).error("Failed to upload to GCS")
             raise HTTPException(status_code=500, detail=f"Failed to upload to cloud storage: {str(e)}")
         
+        # Calculate duration (optional)
+        duration_sec = None
+        try:
+            duration_sec = (await probe_audio(temp_file_path)).duration_sec
+        except Exception as e:
+            app_logger.bind(
+                request_id=request_id,
+                error=str(e)
+            ).warning("Could not calculate audio duration")
+        
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.bind(
             request_id=request_id,
@@ -640,6 +603,7 @@ async def analyze_file(
             "content_type": file.content_type,
             "size_bytes": gcs_result["size_bytes"],
             "md5_hash": gcs_result["md5"],
+            "hash": {"md5": gcs_result["md5"], "sha256": gcs_result["sha256"]},
             "duration_sec": duration_sec,
             "uploaded_at": get_utc_now(),
             "uploaded_by": uploaded_by
@@ -691,6 +655,7 @@ async def analyze_file(
             status="queued"
         )
         await analysis_doc.insert()
+        await refresh_list_view(analysis_doc, session_doc, audio=audio_doc)
         
         app_logger.bind(
             request_id=request_id,
@@ -745,6 +710,8 @@ async def update_analysis(analysis_id: str, update_data: AnalysisUpdate):
         
         # Save changes
         await analysis.save()
+        await analysis_cache.invalidate(analysis_id)
+        await refresh_list_view(analysis)
         
         app_logger.info(f"Updated analysis {analysis_id}: status={update_data.status}, error={update_data.error_message}, student_id={update_data.student_id}")
         
@@ -781,11 +748,14 @@ async def get_analysis_audio_url(analysis_id: str, expiration_hours: int = Query
         if not audio:
             raise HTTPException(status_code=404, detail="Audio file not found")
         
-        # Generate signed URL
-        signed_url = generate_signed_url(
-            bucket_name=settings.gcs_bucket_name,
-            blob_name=audio.storage_name,
-            expiration_hours=expiration_hours
+        # Generate signed URL (the normalized copy if the original was not kept)
+        blob_name = audio.storage_name
+        if audio.original_deleted and audio.normalized:
+            blob_name = audio.normalized.storage_name
+        signed_url = await storage_service.signed_url(
+            blob_name,
+            expiration_hours=expiration_hours,
+            bucket_name=settings.gcs_bucket_name
         )
         
         return {
@@ -812,9 +782,13 @@ async def delete_analysis(analysis_id: str, current_user: UserDoc = Depends(get_
 
 @router.get("/{analysis_id}", response_model=AnalysisDetail)
 @require_permission("analysis:view")
-async def get_analysis(analysis_id: str, current_user: UserDoc = Depends(get_current_user)):
+async def get_analysis(analysis_id: str, request: Request, current_user: UserDoc = Depends(get_current_user)):
     """Get detailed analysis by ID"""
-    
+    return await cached_analysis_response(request, analysis_id, "detail", lambda: _build_analysis_detail(analysis_id))
+
+
+async def _build_analysis_detail(analysis_id: str):
+    """AnalysisDetail and status of an analysis"""
     try:
         analysis = await AnalysisDoc.get(analysis_id)
         if not analysis:
@@ -879,4 +853,4 @@ async def get_analysis(analysis_id: str, current_user: UserDoc = Depends(get_cur
             "audio_duration": audio.duration_sec
         }
     
-    return AnalysisDetail(**response_data)
+    return AnalysisDetail(**response_data), analysis.status
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query, Path
 from typing import List, Optional
 from app.schemas import AudioResponse, AudioListResponse, AudioUpdate
+from app.utils.fast_json import typed_response
 from app.crud import (
     get_audios, get_audio_by_id, update_audio, delete_audio,
     get_audios_by_text_id, get_audio_count_by_text_id,
@@ -32,7 +33,7 @@ async def get_audio_files(
         order_by=order_by
     )
     
-    return [
+    return typed_response(List[AudioListResponse], [
         AudioListResponse(
             id=str(audio.id),
             text_id=audio.text_id,
@@ -45,7 +46,7 @@ async def get_audio_files(
             uploaded_by=audio.uploaded_by
         )
         for audio in audio_docs
-    ]
+    ])
 
 
 @router.get("/{audio_id}", response_model=AudioResponse)
@@ -120,7 +121,7 @@ async def get_audio_files_by_text(
     if limit < len(audio_docs):
         audio_docs = audio_docs[:limit]
     
-    return [
+    return typed_response(List[AudioListResponse], [
         AudioListResponse(
             id=str(audio.id),
             text_id=audio.text_id,
@@ -133,7 +134,7 @@ async def get_audio_files_by_text(
             uploaded_by=audio.uploaded_by
         )
         for audio in audio_docs
-    ]
+    ])
 
 
 @router.get("/text/{text_id}/count")
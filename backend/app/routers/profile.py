@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from app.models.user import UserDoc, get_current_user, get_password_hash, verify_password
+from app.auth_cache import auth_cache
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -75,6 +76,7 @@ async def update_my_profile(
     
     # Save changes
     await current_user.save()
+    await auth_cache.invalidate(user_id=current_user.id)
     
     # Get updated role information
     role = await current_user.get_role()
@@ -121,6 +123,7 @@ async def change_my_password(
     current_user.password_hash = get_password_hash(password_data.new_password)
     current_user.updated_at = datetime.now(timezone.utc)
     await current_user.save()
+    await auth_cache.invalidate(user_id=current_user.id)
     
     return {
         "message": "Şifre başarıyla değiştirildi",
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from app.models.role import RoleDoc
 from app.models.user import UserDoc, get_current_user
 from app.models.rbac import require_permission
+from app.auth_cache import auth_cache
 from app.models.rbac import ALL_PERMISSIONS, DEFAULT_ROLE_PERMISSIONS, get_permission_display_name, group_permissions_by_category
 
 router = APIRouter()
@@ -194,6 +195,7 @@ async def update_role(
     
     # Save changes
     await role.save()
+    await auth_cache.invalidate(role_id=role.id)
     
     return RoleResponse(
         id=str(role.id),
@@ -232,6 +234,7 @@ async def delete_role(
     
     # Delete role
     await role.delete()
+    await auth_cache.invalidate(role_id=role.id)
     
     return {"message": "Role deleted successfully"}
 
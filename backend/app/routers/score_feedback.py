@@ -243,7 +243,8 @@ async def get_analysis_detailed_comments(
 ):
     """Get detailed comments for a specific analysis based on error counts and scores"""
     try:
-        from app.models.documents import AnalysisDoc, WordEventDoc, PauseEventDoc
+        from app.models.documents import AnalysisDoc
+        from app.crud import get_analysis_events
         from app.services.scoring import recompute_counts
         from beanie import PydanticObjectId
         
@@ -267,14 +268,13 @@ async def get_analysis_detailed_comments(
                 detail="No active score feedback configuration found"
             )
         
-        # Get word events for this analysis
-        word_events = await WordEventDoc.find({"analysis_id": PydanticObjectId(analysis_id)}).to_list()
+        # Get word and pause events for this analysis
+        word_events, pause_events = await get_analysis_events(analysis_id)
         
         # Calculate counts
         counts = recompute_counts(word_events)
         
         # Get pause events for long pauses
-        pause_events = await PauseEventDoc.find({"analysis_id": PydanticObjectId(analysis_id)}).to_list()
         long_pauses = len([p for p in pause_events if p.class_ in ["long", "very_long"]])
         
         # Use grade_score breakdown if available, otherwise calculate scores
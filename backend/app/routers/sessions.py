@@ -5,6 +5,7 @@ from app.utils.timezone import get_utc_now
 from app.models.documents import ReadingSessionDoc, AnalysisDoc, TextDoc, AudioFileDoc
 from app.schemas import SessionSummary, SessionDetail
 from app.logging_config import app_logger
+from app.utils.fast_json import FastJSONResponse, typed_response
 
 router = APIRouter()
 
@@ -42,10 +43,10 @@ async def get_sessions(
             "created_at": session.created_at.isoformat() if session.created_at else None,
             "completed_at": session.completed_at.isoformat() if session.completed_at else None
         }
-        result.append(SessionSummary(**session_data))
+        result.append(session_data)
     
     app_logger.info(f"Retrieved {len(result)} reading sessions")
-    return result
+    return typed_response(List[SessionSummary], result)
 
 
 @router.get("/{session_id}", response_model=SessionDetail)
@@ -118,22 +119,22 @@ async def get_session_analyses(
     if not analyses:
         return []
     
-    # Build response
+    # Build response; FastJSONResponse renders ids and datetimes itself
     result = []
     for analysis in analyses:
         analysis_data = {
-            "id": str(analysis.id),
-            "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+            "id": analysis.id,
+            "created_at": analysis.created_at,
             "status": analysis.status,
-            "started_at": analysis.started_at.isoformat() if analysis.started_at else None,
-            "finished_at": analysis.finished_at.isoformat() if analysis.finished_at else None,
+            "started_at": analysis.started_at,
+            "finished_at": analysis.finished_at,
             "error": analysis.error,
             "summary": analysis.summary or {}
         }
         result.append(analysis_data)
     
     app_logger.info(f"Retrieved {len(result)} analyses for session {session_id}")
-    return result
+    return FastJSONResponse(result)
 
 
 @router.put("/{session_id}/status")
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, status
 from typing import Optional
 from datetime import datetime, timezone
+import asyncio
+import re
 from app.models.student import (
     StudentDoc, 
     StudentCreate, 
@@ -10,119 +12,99 @@ from app.models.student import (
 )
 from app.models.user import UserDoc, get_current_user
 from app.models.rbac import require_permission
+from app.crud import update_student_in_list_view
+from app.utils.pagination import encode_cursor, keyset_filter
+from app.utils.fast_json import typed_response
+from app.utils.text_tokenizer import name_search_terms
 import math
 
 router = APIRouter()
 
+SORT_FIELDS = ["created_at", "first_name", "last_name", "grade", "is_active"]
+
+
 @router.get("/", response_model=StudentListResponse)
 @require_permission("student:read")
 async def get_students(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of students per page"),
     grade: Optional[int] = Query(None, ge=1, le=12, description="Filter by grade"),
-    search: Optional[str] = Query(None, description="Search in first_name and last_name"),
+    search: Optional[str] = Query(None, description="Name prefix search (Turkish letters and case ignored) or registration number"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     created_after: Optional[str] = Query(None, description="Filter by creation date (after)"),
     created_before: Optional[str] = Query(None, description="Filter by creation date (before)"),
     sort_by: Optional[str] = Query("created_at", description="Sort by field"),
     sort_order: Optional[str] = Query("desc", description="Sort order (asc/desc)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
     current_user: UserDoc = Depends(get_current_user)
 ):
     """
     Get list of students with pagination and filtering (Admin only)
+    
+    Pages are read with a keyset on (sort field, _id): pass next_cursor of
+    a page as cursor to get the next one. page still works for jumping, but
+    skips over the earlier pages.
     """
     try:
-        print(f"🔍 get_students called with: page={page}, page_size={page_size}, grade={grade}, search='{search}', is_active={is_active}, created_after={created_after}, created_before={created_before}, sort_by={sort_by}, sort_order={sort_order}")
-        
-        # Build query
+        # Build query; $or conditions are combined under $and, the top-level $or is the keyset's
         query = {}
+        conditions = []
         if grade is not None:
-            if grade == "other":
-                # For "other" grade, we'll use grade 0 or any grade > 6
-                query["$or"] = [
-                    {"grade": 0},
-                    {"grade": {"$gt": 6}}
-                ]
-            else:
-                query["grade"] = grade
+            query["grade"] = grade
         if is_active is not None:
             query["is_active"] = is_active
         
         # Handle date range filtering
-        if created_after or created_before:
-            date_query = {}
-            if created_after:
-                from datetime import datetime
+        date_query = {}
+        for name, value, op in (("created_after", created_after, "$gte"), ("created_before", created_before, "$lte")):
+            if value:
                 try:
-                    date_after = datetime.fromisoformat(created_after)
-                    date_query["$gte"] = date_after
+                    date_query[op] = datetime.fromisoformat(value)
                 except ValueError:
-                    print(f"❌ Invalid created_after date format: {created_after}")
-            if created_before:
-                from datetime import datetime
-                try:
-                    date_before = datetime.fromisoformat(created_before)
-                    date_query["$lte"] = date_before
-                except ValueError:
-                    print(f"❌ Invalid created_before date format: {created_before}")
-            
-            if date_query:
-                query["created_at"] = date_query
+                    print(f"❌ Invalid {name} date format: {value}")
+        if date_query:
+            query["created_at"] = date_query
         
-        # Handle search functionality
-        if search:
-            print(f"🔍 Processing search: '{search}'")
-            # Use MongoDB regex pattern for name search
-            or_conditions = [
-                {"first_name": {"$regex": search, "$options": "i"}},
-                {"last_name": {"$regex": search, "$options": "i"}}
+        # Search: every word must be a prefix of a name word, on the indexed name_search field
+        if search and search.strip():
+            name_conditions = [
+                {"name_search": {"$regex": "^" + re.escape(term)}}
+                for term in name_search_terms(search)
             ]
-            
-            # Add registration number search if search is numeric
-            if search.isdigit():
-                or_conditions.append({"registration_number": int(search)})
-            
-            query["$or"] = or_conditions
-            print(f"🔍 Final query with search: {query}")
-        else:
-            print(f"🔍 Final query without search: {query}")
-        
-        # Get total count
-        print(f"🔍 Getting total count...")
-        total = len(await StudentDoc.find(query).to_list())
-        print(f"🔍 Total count: {total}")
+            if search.strip().isdigit():
+                conditions.append({"$or": [{"registration_number": int(search.strip())}, *name_conditions]})
+            else:
+                conditions.extend(name_conditions)
+        if conditions:
+            query["$and"] = conditions
         
-        # Handle sorting
-        sort_field = sort_by if sort_by in ["created_at", "first_name", "last_name", "grade", "is_active"] else "created_at"
+        # Handle sorting; _id breaks ties so keyset pages never skip or repeat a student
+        sort_field = sort_by if sort_by in SORT_FIELDS else "created_at"
         sort_direction = -1 if sort_order == "desc" else 1
-        sort_criteria = [(sort_field, sort_direction)]
-        
-        # For name sorting, we need to sort by first_name + last_name
-        if sort_field == "name":
-            sort_criteria = [("first_name", sort_direction), ("last_name", sort_direction)]
+        sort_criteria = [(sort_field, sort_direction), ("_id", sort_direction)]
         
-        print(f"🔍 Sorting by: {sort_criteria}")
-        
-        # Get students with pagination and sorting
-        skip = (page - 1) * page_size
-        print(f"🔍 Getting students with skip={skip}, limit={page_size}")
-        students = await StudentDoc.find(query).sort(sort_criteria).skip(skip).limit(page_size).to_list()
-        print(f"🔍 Found {len(students)} students")
-        
-        # Convert to response format
-        student_responses = [StudentResponse.from_doc(student) for student in students]
+        collection = StudentDoc.get_motor_collection()
+        total, docs = await asyncio.gather(
+            collection.count_documents(query) if query else collection.estimated_document_count(),
+            _student_page(collection, query, sort_criteria, page, page_size, cursor)
+        )
         
-        # Calculate total pages
-        total_pages = math.ceil(total / page_size) if total > 0 else 1
+        next_cursor = None
+        if len(docs) == page_size:
+            next_cursor = encode_cursor(docs[-1][sort_field], docs[-1]["_id"])
         
-        return StudentListResponse(
-            students=student_responses,
-            total=total,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        # Convert to response format, straight from the raw documents
+        return typed_response(StudentListResponse, {
+            "students": [StudentResponse.from_row(doc) for doc in docs],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": math.ceil(total / page_size) if total > 0 else 1,
+            "next_cursor": next_cursor
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error in get_students: {str(e)}")
         import traceback
@@ -132,6 +114,20 @@ async def get_students(
             detail=f"Error fetching students: {str(e)}"
         )
 
+
+async def _student_page(collection, query, sort_criteria, page: int, page_size: int, cursor: Optional[str]):
+    """Raw student documents of one page, by cursor or by page number"""
+    field, direction = sort_criteria[0]
+    if cursor:
+        try:
+            query = keyset_filter(query, cursor, field, direction)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        find = collection.find(query).sort(sort_criteria)
+    else:
+        find = collection.find(query).sort(sort_criteria).skip((page - 1) * page_size)
+    return await find.limit(page_size).to_list(length=page_size)
+
 @router.post("/", response_model=StudentResponse, status_code=status.HTTP_201_CREATED)
 @require_permission("student:create")
 async def create_student(
@@ -238,6 +234,8 @@ async def update_student(
         
         student.updated_at = datetime.now(timezone.utc)
         await student.save()
+        if "first_name" in update_data or "last_name" in update_data:
+            await update_student_in_list_view(student)
         
         print(f"✅ Student updated successfully: {student.first_name} {student.last_name}, is_active: {student.is_active}")
         return StudentResponse.from_doc(student)
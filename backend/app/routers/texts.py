@@ -4,6 +4,8 @@ from typing import Optional, List
 from app.models.documents import TextDoc, CanonicalTokens
 from app.models.user import UserDoc, get_current_user
 from app.models.rbac import require_permission
+from app.crud import update_text_in_list_view, analysis_ids_of_text
+from app.response_cache import analysis_cache
 from app.utils.text_tokenizer import tokenize_turkish_text, normalize_turkish_text
 from typing import Union
 from loguru import logger
@@ -229,13 +231,16 @@ async def update_text(text_id: str, text_data: TextUpdate, current_user: UserDoc
         if not text:
             raise HTTPException(status_code=404, detail="Text not found")
         
+        renamed = (text.title, text.grade) != (text_data.title, text_data.grade)
+        
         # Update fields
         text.title = text_data.title
         text.grade = text_data.grade
         text.comment = text_data.comment
         
         # Update body and canonical tokens if body changed
-        if text.body != text_data.body:
+        body_changed = text.body != text_data.body
+        if body_changed:
             # Normalize and tokenize the new body
             normalized_body = normalize_turkish_text(text_data.body)
             tokenized_words = tokenize_turkish_text(normalized_body)
@@ -246,6 +251,11 @@ async def update_text(text_id: str, text_data: TextUpdate, current_user: UserDoc
             )
         
         await text.save()
+        if renamed:
+            await update_text_in_list_view(text)
+        if renamed or body_changed:
+            # Cached analysis responses embed the text's title, grade and body
+            await analysis_cache.invalidate_many(await analysis_ids_of_text(text.id))
         
         return TextResponse(
             id=str(text.id),
@@ -1,22 +1,22 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Union
 from typing import Optional
 import os
 import uuid
-import tempfile
 from datetime import datetime
-import soundfile as sf
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from app.config import settings
 from app.models.documents import AudioFileDoc, AnalysisDoc, TextDoc, ReadingSessionDoc
 from bson import ObjectId
 from app.db import redis_conn
+from app.progress import progress_hub, status_event, stream_progress, STATUS_FIELDS
 from app.logging_config import app_logger
-from app.storage import upload_audio_file, get_storage
-from app.crud import insert_audio
+from app.services.upload_ingest import ingest_upload, UploadTooLarge
+from app.services.audio_probe import probe_audio
+from app.crud import insert_audio, refresh_list_view
 from app.schemas import AudioResponse
 
 router = APIRouter()
@@ -28,7 +28,7 @@ class UploadResponse(BaseModel):
 
 
 @router.post("/", response_model=UploadResponse)
-@limiter.limit("5/minute")
+@limiter.limit(lambda: settings.upload_rate_limit)
 async def upload_audio(
     request: Request,
     file: UploadFile = File(...),
@@ -112,7 +112,7 @@ async def upload_audio(
             ).error("File type validation failed")
             raise HTTPException(status_code=400, detail="File validation failed")
         
-        # Save file temporarily for processing
+        # Stream the file to a temp file and to GCS, hashing it on the way
         temp_file_path = None
         gcs_result = None
         
@@ -120,40 +120,24 @@ async def upload_audio(
             app_logger.bind(request_id=request_id).info("Starting file processing")
             
             try:
-                content = await file.read()
+                gcs_result = await ingest_upload(file, text_id)
+                temp_file_path = gcs_result["temp_path"]
                 app_logger.bind(
                     request_id=request_id,
-                    content_size=len(content)
-                ).info("File content read successfully")
+                    text_id=text_id,
+                    original_filename=file.filename,
+                    gcs_uri=gcs_result["gs_uri"],
+                    size_bytes=gcs_result["size_bytes"]
+                ).info("Audio file streamed to GCS successfully")
             except Exception as e:
                 app_logger.bind(
                     request_id=request_id,
                     error=str(e),
-                    error_type=type(e).__name__
-                ).error("Failed to read file content")
-                raise
-            
-            # Create temporary file for processing
-            try:
-                app_logger.bind(
-                    request_id=request_id,
+                    error_type=type(e).__name__,
+                    text_id=text_id,
                     filename=file.filename
-                ).info("Creating temporary file")
-                
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1] if file.filename else '.wav') as temp_file:
-                    temp_file.write(content)
-                    temp_file_path = temp_file.name
-                app_logger.bind(
-                    request_id=request_id,
-                    temp_file_path=temp_file_path
-                ).info("Temporary file created successfully")
-            except Exception as e:
-                app_logger.bind(
-                    request_id=request_id,
-                    error=str(e),
-                    error_type=type(e).__name__
-                ).error(f"Failed to create temporary file: {str(e)}")
-                raise
+                ).error(f"Failed to upload to GCS: {str(e)}")
+                raise HTTPException(status_code=500, detail=f"Failed to upload to cloud storage: {str(e)}")
             
             # Extract audio metadata
             duration_ms = None
@@ -165,80 +149,24 @@ async def upload_audio(
                     temp_file_path=temp_file_path
                 ).info("Extracting audio metadata")
                 
-                # Try soundfile first (works for WAV, FLAC, OGG)
-                try:
-                    data, sr = sf.read(temp_file_path)
-                    duration_sec = len(data) / sr  # Duration in seconds
-                    duration_ms = int(duration_sec * 1000)  # Convert to milliseconds
-                    sample_rate = sr
-                    app_logger.bind(
-                        request_id=request_id,
-                        duration_sec=duration_sec,
-                        sample_rate=sample_rate,
-                        method="soundfile"
-                    ).info("Audio metadata extracted with soundfile")
-                except Exception as sf_error:
-                    # Fallback to ffprobe for M4A, MP3, AAC, etc.
-                    app_logger.bind(
-                        request_id=request_id,
-                        error=str(sf_error)
-                    ).info("Soundfile failed, trying ffprobe...")
-                    
-                    import subprocess
-                    result = subprocess.run([
-                        'ffprobe', '-v', 'error', '-show_entries',
-                        'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
-                        temp_file_path
-                    ], capture_output=True, text=True, check=True)
-                    
-                    duration_sec = float(result.stdout.strip())
-                    duration_ms = int(duration_sec * 1000)
-                    app_logger.bind(
-                        request_id=request_id,
-                        duration_sec=duration_sec,
-                        method="ffprobe"
-                    ).info("Audio metadata extracted with ffprobe")
-            except Exception as e:
+                # Container headers only; ffprobe (async) when they carry no duration
+                audio_info = await probe_audio(temp_file_path)
+                duration_sec = audio_info.duration_sec
+                duration_ms = audio_info.duration_ms
+                sample_rate = audio_info.sample_rate
                 app_logger.bind(
                     request_id=request_id,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    temp_file_path=temp_file_path
-                ).warning(f"Could not extract audio metadata: {str(e)}")
-            
-            # Upload to GCS
-            try:
-                app_logger.bind(
-                    request_id=request_id,
-                    text_id=text_id,
-                    temp_file_path=temp_file_path,
-                    content_type=file.content_type
-                ).info("Starting GCS upload")
-                
-                gcs_result = upload_audio_file(
-                    text_id=text_id,
-                    original_name=file.filename or "audio",
-                    file_path=temp_file_path,
-                    content_type=file.content_type
-                )
-                
-                app_logger.bind(
-                    request_id=request_id,
-                    text_id=text_id,
-                    original_filename=file.filename,
-                    gcs_uri=gcs_result["gs_uri"],
-                    size_bytes=gcs_result["size_bytes"]
-                ).info("Audio file uploaded to GCS successfully")
-                
+                    duration_sec=duration_sec,
+                    sample_rate=sample_rate,
+                    method=audio_info.method
+                ).info("Audio metadata extracted")
             except Exception as e:
                 app_logger.bind(
                     request_id=request_id,
                     error=str(e),
                     error_type=type(e).__name__,
-                    text_id=text_id,
-                    filename=file.filename
-                ).error(f"Failed to upload to GCS: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Failed to upload to cloud storage: {str(e)}")
+                    temp_file_path=temp_file_path
+                ).warning(f"Could not extract audio metadata: {str(e)}")
             
         except HTTPException:
             raise
@@ -282,7 +210,7 @@ async def upload_audio(
                 "uploaded_at": datetime.utcnow(),
                 "hash": {
                     "md5": gcs_result["md5"],
-                    "sha256": None  # Will be calculated later if needed
+                    "sha256": gcs_result["sha256"]
                 }
             }
             
@@ -356,6 +284,8 @@ async def upload_audio(
             
             analysis_doc = AnalysisDoc(**analysis_data)
             await analysis_doc.insert()
+            # Before the job is queued, so the worker finds the row to update
+            await refresh_list_view(analysis_doc, session_doc, text, audio_doc)
             app_logger.bind(
                 request_id=request_id,
                 analysis_id=str(analysis_doc.id),
@@ -392,6 +322,7 @@ async def upload_audio(
                 analysis_doc.status = "failed"
                 analysis_doc.error = f"Failed to queue job: {str(e)}"
                 await analysis_doc.save()
+                await refresh_list_view(analysis_doc, session_doc, text, audio_doc)
                 app_logger.bind(
                     request_id=request_id,
                     analysis_id=str(analysis_doc.id),
@@ -429,6 +360,11 @@ async def upload_audio(
 @router.get("/status/{analysis_id}")
 async def get_analysis_status(analysis_id: str):
     """Get analysis processing status"""
+    # The worker's latest progress event, when there is one, saves the Mongo read
+    event = await progress_hub.last_event(analysis_id) if ObjectId.is_valid(analysis_id) else None
+    if event:
+        return {field: event.get(field) for field in STATUS_FIELDS}
+    
     try:
         analysis = await AnalysisDoc.get(analysis_id)
         if not analysis:
@@ -437,6 +373,8 @@ async def get_analysis_status(analysis_id: str):
         return {
             "analysis_id": str(analysis.id),
             "status": analysis.status,
+            "stage": analysis.stage,
+            "percent": 100 if analysis.status == "done" else None,
             "started_at": analysis.started_at,
             "finished_at": analysis.finished_at,
             "error": analysis.error
@@ -445,6 +383,35 @@ async def get_analysis_status(analysis_id: str):
         raise HTTPException(status_code=400, detail="Invalid analysis ID")
 
 
+@router.get("/status/{analysis_id}/events")
+async def stream_analysis_status(analysis_id: str, request: Request):
+    """
+    Analysis progress as Server-Sent Events
+    
+    Sends the current state, then every status/stage change published by the
+    worker, and closes once the analysis is done or failed.
+    """
+    if not ObjectId.is_valid(analysis_id):
+        raise HTTPException(status_code=400, detail="Invalid analysis ID")
+    
+    # Watch before reading the current state, so no update in between is lost
+    progress_hub.ensure_started()
+    queue = progress_hub.watch(analysis_id)
+    initial = await progress_hub.last_event(analysis_id)
+    if initial is None:
+        analysis = await AnalysisDoc.get(analysis_id)
+        if not analysis:
+            progress_hub.unwatch(analysis_id, queue)
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        initial = status_event(analysis)
+    
+    return StreamingResponse(
+        stream_progress(progress_hub, analysis_id, queue, initial, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/audios", response_model=AudioResponse)
 @limiter.limit("10/minute")
 async def upload_standalone_audio(
@@ -477,13 +444,12 @@ async def upload_standalone_audio(
     if not file.content_type or not file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Check file size (10MB limit)
+    # Check file size (10MB limit); the multipart parser has already counted it, nothing is read here
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    if file.size is not None and file.size > MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB")
     
-    if len(content) == 0:
+    if file.size == 0:
         raise HTTPException(status_code=400, detail="Empty file not allowed")
     
     # Validate text_id if provided
@@ -500,63 +466,23 @@ async def upload_standalone_audio(
             ).error("Text validation failed")
             raise HTTPException(status_code=400, detail="Invalid text ID")
     
-    # Save file temporarily for processing
+    # Temp copy of the upload, kept for the duration probe
     temp_file_path = None
     try:
-        # Create temporary file for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Calculate duration (optional)
-        duration_sec = None
+        # Stream the file to a temp file and to GCS, hashing it on the way
         try:
-            # Try soundfile first (for WAV, FLAC, OGG)
-            try:
-                data, sr = sf.read(temp_file_path)
-                duration_sec = len(data) / sr
-                app_logger.bind(
-                    request_id=request_id,
-                    duration_sec=duration_sec,
-                    method="soundfile"
-                ).info("Duration calculated with soundfile")
-            except Exception as sf_error:
-                # Fallback to ffprobe for M4A, MP3, AAC, etc.
-                import subprocess
-                result = subprocess.run([
-                    'ffprobe', '-v', 'error', '-show_entries',
-                    'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
-                    temp_file_path
-                ], capture_output=True, text=True, check=True)
-                
-                duration_sec = float(result.stdout.strip())
-                app_logger.bind(
-                    request_id=request_id,
-                    duration_sec=duration_sec,
-                    method="ffprobe"
-                ).info("Duration calculated with ffprobe")
-        except Exception as e:
-            app_logger.bind(
-                request_id=request_id,
-                error=str(e)
-            ).warning("Could not calculate audio duration")
-        
-        # Upload to GCS
-        try:
-            gcs_result = upload_audio_file(
-                text_id=text_id,
-                original_name=file.filename,
-                file_path=temp_file_path,
-                content_type=file.content_type
-            )
+            gcs_result = await ingest_upload(file, text_id, max_bytes=MAX_FILE_SIZE)
+            temp_file_path = gcs_result["temp_path"]
             
             app_logger.bind(
                 request_id=request_id,
                 text_id=text_id,
                 original_filename=file.filename,
                 size_bytes=gcs_result["size_bytes"]
-            ).info("Audio file uploaded to GCS successfully")
+            ).info("Audio file streamed to GCS successfully")
             
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             app_logger.bind(
                 request_id=request_id,
@@ -564,6 +490,25 @@ async def upload_standalone_audio(
             ).error("Failed to upload to GCS")
             raise HTTPException(status_code=500, detail=f"Failed to upload to cloud storage: {str(e)}")
         
+        # Calculate duration (optional)
+        duration_sec = None
+        try:
+            # Container headers only; ffprobe (async) when they carry no duration
+            audio_info = await probe_audio(temp_file_path)
+            duration_sec = audio_info.duration_sec
+            app_logger.bind(
+                request_id=request_id,
+                duration_sec=duration_sec,
+                method=audio_info.method
+            ).info("Duration calculated")
+        except Exception as e:
+            app_logger.bind(
+                request_id=request_id,
+                error=str(e)
+            ).warning("Could not calculate audio duration")
+        
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.bind(
             request_id=request_id,
@@ -593,6 +538,7 @@ async def upload_standalone_audio(
             "content_type": file.content_type,
             "size_bytes": gcs_result["size_bytes"],
             "md5_hash": gcs_result["md5"],
+            "hash": {"md5": gcs_result["md5"], "sha256": gcs_result["sha256"]},
             "duration_sec": duration_sec,
             "uploaded_at": datetime.utcnow(),
             "uploaded_by": uploaded_by
@@ -616,7 +562,7 @@ async def upload_standalone_audio(
             "gcs_uri": audio_doc.gcs_uri,
             "content_type": audio_doc.content_type,
             "size_bytes": audio_doc.size_bytes,
-            "md5_hash": audio_doc.md5_hash,
+            "md5_hash": audio_doc.hash.md5,
             "duration_ms": int(audio_doc.duration_sec * 1000) if audio_doc.duration_sec else None,
             "duration_sec": audio_doc.duration_sec,
             "sr": None,  # Not calculated for standalone uploads
@@ -4,6 +4,7 @@ from typing import Optional, List
 from datetime import datetime, timezone
 from app.models.user import UserDoc, get_current_user, create_access_token, get_password_hash
 from app.models.rbac import require_permission
+from app.auth_cache import auth_cache
 import secrets
 import string
 
@@ -239,6 +240,7 @@ async def update_user(
         user.updated_at = datetime.now(timezone.utc)
         print(f"🔍 Saving user: {user.email}")
         await user.save()
+        await auth_cache.invalidate(user_id=user.id)
         
         # Fetch the role information for response
         role = await user.get_role()
@@ -291,6 +293,7 @@ async def delete_user(
         )
     
     await user.delete()
+    await auth_cache.invalidate(user_id=user.id)
     return {"message": "User deleted successfully"}
 
 def generate_random_password(length: int = 7) -> str:
@@ -333,6 +336,7 @@ async def reset_user_password(
     user.password_hash = get_password_hash(new_password)
     user.updated_at = datetime.now(timezone.utc)
     await user.save()
+    await auth_cache.invalidate(user_id=user.id)
     
     return {
         "message": "Şifre başarıyla sıfırlandı",
@@ -0,0 +1,147 @@
+"""
+Streaming analysis export
+
+An export is the analysis summary plus every word and pause event and the
+transcript. Instead of loading all events as documents and rendering one
+big dict, the JSON is written piece by piece while the events are read:
+from the columnar analysis_events document when the analysis has one,
+otherwise from a Motor cursor over word_events/pause_events. Events are
+serialized with orjson in batches of EXPORT_BATCH_SIZE.
+
+    {"analysis_id", "text_id", "events": [...], "pauses": [...],
+     "summary", "metrics", "transcript", "validation": {"summary_consistent"}}
+
+GET /v1/analyses/{id}/export streams one such object; GET /v1/analyses/export
+streams many as NDJSON, one object per line, holding at most one analysis
+and one batch of ids in memory at a time.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional
+import orjson
+from bson import ObjectId
+
+from app.models.documents import AnalysisEventsDoc, WordEventDoc, PauseEventDoc, SttResultDoc
+from app.services.alignment import normalize_sub_type, char_edit_stats
+from app.services.event_columns import decode_events
+from app.services.scoring import validate_summary_consistency
+
+EXPORT_BATCH_SIZE = 500
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes, ObjectIds as strings"""
+    return orjson.dumps(value, default=_default)
+
+
+def word_event_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Export shape of a word event row (word_events document or decoded column row)
+
+    sub_type is normalized; substitutions without char_diff get char_diff
+    and cer_local computed from their tokens.
+    """
+    event = {
+        "id": str(row.get("id", row.get("_id"))),
+        "analysis_id": str(row["analysis_id"]),
+        "position": row["position"],
+        "ref_token": row.get("ref_token"),
+        "hyp_token": row.get("hyp_token"),
+        "type": row["type"],
+        "sub_type": normalize_sub_type(row["sub_type"]) if row.get("sub_type") else row.get("sub_type"),
+        "timing": row.get("timing"),
+        "char_diff": row.get("char_diff")
+    }
+    if event["type"] == "substitution" and event["char_diff"] is None:
+        ref_token, hyp_token = event["ref_token"] or "", event["hyp_token"] or ""
+        if ref_token and hyp_token:
+            char_diff = char_edit_stats(ref_token, hyp_token)[0]
+            event["char_diff"] = char_diff
+            event["cer_local"] = char_diff / max(len(ref_token), 1)
+    return event
+
+
+def pause_event_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Export shape of a pause event row"""
+    return {
+        "id": str(row.get("id", row.get("_id"))),
+        "analysis_id": str(row["analysis_id"]),
+        "after_position": row["after_position"],
+        "duration_ms": row["duration_ms"],
+        "class_": row["class_"],
+        "start_ms": row["start_ms"],
+        "end_ms": row["end_ms"]
+    }
+
+
+async def _event_rows(analysis_id: ObjectId, columnar: Optional[Dict[str, Any]], pauses: bool) -> AsyncIterator[Dict[str, Any]]:
+    """Raw word or pause rows of an analysis in position order"""
+    if columnar:
+        word_rows, pause_rows = decode_events(columnar)
+        prefix, key, rows = ("p", "after_position", pause_rows) if pauses else ("w", "position", word_rows)
+        for row in rows:
+            yield {"id": f"{analysis_id}-{prefix}{row[key]}", **row}
+        return
+
+    document, key = (PauseEventDoc, "after_position") if pauses else (WordEventDoc, "position")
+    cursor = document.get_motor_collection().find({"analysis_id": analysis_id}) \
+        .sort(key, 1).batch_size(EXPORT_BATCH_SIZE)
+    async for row in cursor:
+        yield row
+
+
+async def _json_array(rows: AsyncIterator[Dict[str, Any]], shape, seen: Optional[List[Dict[str, Any]]] = None) -> AsyncIterator[bytes]:
+    """JSON array of rows, in chunks of EXPORT_BATCH_SIZE serialized rows"""
+    yield b"["
+    batch, first = [], True
+    async for row in rows:
+        if seen is not None:
+            seen.append({"type": row["type"], "sub_type": row.get("sub_type")})
+        batch.append(dumps(shape(row)))
+        if len(batch) == EXPORT_BATCH_SIZE:
+            yield (b"" if first else b",") + b",".join(batch)
+            batch, first = [], False
+    if batch:
+        yield (b"" if first else b",") + b",".join(batch)
+    yield b"]"
+
+
+async def transcript_of(session_id) -> Optional[str]:
+    """Transcript of the STT result of a reading session"""
+    if session_id is None:
+        return None
+    stt_result = await SttResultDoc.get_motor_collection().find_one({"session_id": session_id}, {"transcript": 1})
+    return stt_result.get("transcript") if stt_result else None
+
+
+async def export_chunks(analysis: Dict[str, Any], transcript: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    JSON export of one analysis, in chunks
+
+    Args:
+        analysis: Raw analyses document
+        transcript: Transcript of its STT result, see transcript_of
+    """
+    analysis_id = analysis["_id"]
+    summary = analysis.get("summary") or {}
+    columnar = await AnalysisEventsDoc.get_motor_collection().find_one({"analysis_id": analysis_id})
+
+    yield b'{"analysis_id":' + dumps(str(analysis_id)) + b',"text_id":' + dumps(str(analysis.get("session_id"))) + b',"events":'
+    # Type and sub type of each word are kept for the summary check at the end
+    words: List[Dict[str, Any]] = []
+    async for chunk in _json_array(_event_rows(analysis_id, columnar, pauses=False), word_event_row, words):
+        yield chunk
+    yield b',"pauses":'
+    async for chunk in _json_array(_event_rows(analysis_id, columnar, pauses=True), pause_event_row):
+        yield chunk
+
+    yield b"," + dumps({
+        "summary": summary,
+        "metrics": summary.get("metrics", {}),
+        "transcript": transcript,
+        "validation": {"summary_consistent": validate_summary_consistency(summary, words)}
+    })[1:]
@@ -0,0 +1,314 @@
+"""
+Audio metadata from container headers
+
+The upload endpoints used to get a duration with soundfile.read(), which
+decodes the whole recording into a NumPy array, and fell back to a blocking
+ffprobe subprocess inside the request handler. probe_audio() reads headers
+only, picking the parser from the first bytes of the file:
+
+    RIFF/WAVE, fLaC, OggS, FORM   sf.info (libsndfile header parse)
+    ....ftyp (m4a/mp4/3gp)        moov/trak boxes: mdhd duration, stsd sample rate
+    ID3 / MPEG frame sync (mp3)   Xing/Info/VBRI frame count, else CBR bitrate
+    anything else                 sf.info
+
+Only when that finds nothing does it run ffprobe, as an asyncio subprocess.
+probe_headers() also takes any seekable binary file object, e.g. a GCS
+BlobReader, so the duration backfill reads a few ranged chunks per blob
+instead of downloading it.
+"""
+import asyncio
+import json
+import os
+import shutil
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Union
+
+import soundfile as sf
+
+
+SNIFF_BYTES = 12
+MP3_SYNC_WINDOW = 64 * 1024  # bytes searched for the first MPEG frame after the ID3 tag
+
+
+class ProbeError(Exception):
+    """No header parser matched and ffprobe is missing or failed"""
+
+
+@dataclass
+class AudioInfo:
+    """Duration and sample rate of a recording, and which parser found them"""
+    duration_sec: float
+    sample_rate: Optional[int]
+    method: str
+
+    @property
+    def duration_ms(self) -> int:
+        return int(self.duration_sec * 1000)
+
+
+# MP4 / M4A
+
+def _boxes(f: BinaryIO, start: int, end: int):
+    """(type, payload_start, payload_end) of the boxes in [start, end)"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield kind, position + header_size, min(position + size, end)
+        position += size
+
+
+def _child(f: BinaryIO, start: int, end: int, kind: bytes):
+    for child_kind, child_start, child_end in _boxes(f, start, end):
+        if child_kind == kind:
+            return child_start, child_end
+    return None
+
+
+def _timescale_duration(f: BinaryIO, start: int):
+    """timescale and duration of an mvhd/mdhd full box"""
+    f.seek(start)
+    version = f.read(4)[0]
+    if version == 1:
+        f.seek(start + 4 + 16)
+        timescale, duration = struct.unpack(">IQ", f.read(12))
+    else:
+        f.seek(start + 4 + 8)
+        timescale, duration = struct.unpack(">II", f.read(8))
+    return timescale, duration
+
+
+def _audio_sample_rate(f: BinaryIO, stbl) -> Optional[int]:
+    """Sample rate of the first stsd sample entry (16.16 fixed point)"""
+    stsd = _child(f, stbl[0], stbl[1], b"stsd")
+    if not stsd:
+        return None
+    # full box header + entry count, then the entry's own 8 byte box header
+    entry = stsd[0] + 8 + 8
+    f.seek(entry + 24)
+    raw = f.read(4)
+    return struct.unpack(">I", raw)[0] >> 16 if len(raw) == 4 else None
+
+
+def _probe_mp4(f: BinaryIO, size: int) -> Optional[AudioInfo]:
+    moov = _child(f, 0, size, b"moov")
+    if not moov:
+        return None
+    for kind, trak_start, trak_end in _boxes(f, moov[0], moov[1]):
+        if kind != b"trak":
+            continue
+        mdia = _child(f, trak_start, trak_end, b"mdia")
+        hdlr = mdia and _child(f, mdia[0], mdia[1], b"hdlr")
+        if not hdlr:
+            continue
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b"soun":
+            continue
+        mdhd = _child(f, mdia[0], mdia[1], b"mdhd")
+        if not mdhd:
+            continue
+        timescale, duration = _timescale_duration(f, mdhd[0])
+        if not timescale or not duration:
+            continue
+        minf = _child(f, mdia[0], mdia[1], b"minf")
+        stbl = minf and _child(f, minf[0], minf[1], b"stbl")
+        sample_rate = (_audio_sample_rate(f, stbl) if stbl else None) or timescale
+        return AudioInfo(duration / timescale, sample_rate, "mp4")
+    mvhd = _child(f, moov[0], moov[1], b"mvhd")
+    if mvhd:
+        timescale, duration = _timescale_duration(f, mvhd[0])
+        if timescale and duration:
+            return AudioInfo(duration / timescale, None, "mp4")
+    return None
+
+
+# MP3
+
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+_MP3_LAYERS = {3: 1, 2: 2, 1: 3}  # header bits -> layer
+
+
+def _mp3_frame(header: bytes):
+    """Fields of a 4 byte MPEG audio frame header, None if it is not one"""
+    if len(header) < 4:
+        return None
+    value = int.from_bytes(header, "big")
+    version_bits, layer_bits = (value >> 19) & 3, (value >> 17) & 3
+    bitrate_index, rate_index = (value >> 12) & 15, (value >> 10) & 3
+    if (value >> 21) != 0x7FF or version_bits == 1 or layer_bits == 0 or rate_index == 3 \
+            or bitrate_index in (0, 15):
+        return None
+    mpeg1 = version_bits == 3
+    layer = _MP3_LAYERS[layer_bits]
+    bitrate = _MP3_BITRATES[(1 if mpeg1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    padding = (value >> 9) & 1
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "mpeg1": mpeg1, "mono": (value >> 6) & 3 == 3, "bitrate": bitrate,
+        "sample_rate": sample_rate, "samples": samples, "length": length
+    }
+
+
+def _probe_mp3(f: BinaryIO, size: int) -> Optional[AudioInfo]:
+    f.seek(0)
+    head = f.read(10)
+    start = 0
+    if head[:3] == b"ID3" and len(head) == 10:
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+    f.seek(start)
+    window = f.read(MP3_SYNC_WINDOW)
+
+    offset = frame = None
+    for candidate in range(max(0, len(window) - 4)):
+        if window[candidate] != 0xFF:
+            continue
+        frame = _mp3_frame(window[candidate:candidate + 4])
+        if frame is None:
+            continue
+        # Require a second frame right after the first when it is in the window
+        following = window[candidate + frame["length"]:candidate + frame["length"] + 4]
+        if len(following) < 4 or _mp3_frame(following):
+            offset = candidate
+            break
+    if offset is None:
+        return None
+
+    side_info = (17 if frame["mono"] else 32) if frame["mpeg1"] else (9 if frame["mono"] else 17)
+    xing = window[offset + 4 + side_info:offset + 4 + side_info + 12]
+    frames = None
+    if xing[:4] in (b"Xing", b"Info") and len(xing) == 12 and struct.unpack(">I", xing[4:8])[0] & 1:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    elif window[offset + 36:offset + 40] == b"VBRI":
+        frames = struct.unpack(">I", window[offset + 50:offset + 54])[0]
+    if frames:
+        return AudioInfo(frames * frame["samples"] / frame["sample_rate"], frame["sample_rate"], "mp3")
+
+    # Constant bitrate: audio bytes / byte rate, without a trailing ID3v1 tag
+    end = size
+    if size >= 128:
+        f.seek(size - 128)
+        if f.read(3) == b"TAG":
+            end -= 128
+    audio_bytes = end - (start + offset)
+    if audio_bytes <= 0:
+        return None
+    return AudioInfo(audio_bytes * 8 / frame["bitrate"], frame["sample_rate"], "mp3")
+
+
+# Dispatch
+
+def _probe_soundfile(source) -> Optional[AudioInfo]:
+    try:
+        info = sf.info(source)
+    except Exception:
+        return None
+    if info.samplerate and info.frames > 0:
+        return AudioInfo(info.frames / info.samplerate, info.samplerate, "soundfile")
+    return None
+
+
+def _probe_file(f: BinaryIO) -> Optional[AudioInfo]:
+    f.seek(0)
+    head = f.read(SNIFF_BYTES)
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    try:
+        if head[4:8] == b"ftyp":
+            return _probe_mp4(f, size)
+        if head[:3] == b"ID3" or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+            return _probe_mp3(f, size)
+    except (struct.error, IndexError, ZeroDivisionError):
+        return None
+    return _probe_soundfile(f)
+
+
+def probe_headers(source: Union[str, BinaryIO]) -> Optional[AudioInfo]:
+    """
+    Duration and sample rate from the headers of a file path or seekable file object
+
+    Blocking; reads a few KB (plus the moov box of an m4a). None when the
+    container is unknown or its headers carry no duration.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return _probe_file(f)
+    return _probe_file(source)
+
+
+def ffprobe_available() -> bool:
+    """True if an ffprobe binary is on PATH"""
+    return shutil.which("ffprobe") is not None
+
+
+async def probe_ffprobe(path: str, timeout_sec: float = 30) -> AudioInfo:
+    """
+    Duration and sample rate from ffprobe, without blocking the loop
+
+    Raises:
+        ProbeError: ffprobe missing, failed, timed out or printed no duration
+    """
+    if not ffprobe_available():
+        raise ProbeError("ffprobe not found on PATH")
+    process = await asyncio.create_subprocess_exec(
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "format=duration:stream=sample_rate", "-of", "json", path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout_sec)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise ProbeError(f"ffprobe timed out after {timeout_sec}s")
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", "replace").strip()[-500:]
+        raise ProbeError(f"ffprobe exited with {process.returncode}: {message}")
+    try:
+        data = json.loads(stdout)
+        duration_sec = float(data["format"]["duration"])
+    except (ValueError, KeyError, TypeError):
+        raise ProbeError("ffprobe printed no duration")
+    streams = data.get("streams") or [{}]
+    sample_rate = streams[0].get("sample_rate")
+    return AudioInfo(duration_sec, int(sample_rate) if sample_rate else None, "ffprobe")
+
+
+async def probe_audio(path: str, timeout_sec: float = 30) -> AudioInfo:
+    """
+    Duration and sample rate of a local audio file: headers first, ffprobe as fallback
+
+    Raises:
+        ProbeError: neither the headers nor ffprobe gave a duration
+    """
+    info = await asyncio.to_thread(probe_headers, path)
+    if info is not None:
+        return info
+    return await probe_ffprobe(path, timeout_sec)
@@ -0,0 +1,166 @@
+"""
+Columnar encoding of word and pause events
+
+One `analysis_events` document per analysis replaces the per-word
+WordEventDoc/PauseEventDoc documents. Events are stored as parallel
+columns; tokens and sub types are indices into a per-analysis string table,
+and numeric columns are little-endian int32 arrays packed into bytes.
+
+    {
+        "analysis_id": ObjectId, "version": 1, "strings": [...],
+        "words":  {"count", "position", "type", "sub_type", "ref", "hyp",
+                   "start_ms", "end_ms", "char_diff"},
+        "pauses": {"count", "after_position", "class", "duration_ms",
+                   "start_ms", "end_ms"}
+    }
+
+-1 marks a missing value (no token, no sub type, no timing, no char_diff).
+Times are stored with millisecond resolution.
+
+This module is duplicated in worker/services/event_columns.py.
+"""
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+FORMAT_VERSION = 1
+NONE = -1
+
+WORD_TYPES = ["correct", "missing", "extra", "substitution", "repetition", "diff"]  # "diff": legacy substitution
+PAUSE_CLASSES = ["short", "medium", "long", "very_long"]
+
+
+def _pack(values: List[int]) -> bytes:
+    """int32 little-endian bytes"""
+    packed = array('i', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(data: bytes) -> List[int]:
+    """Inverse of _pack"""
+    unpacked = array('i')
+    unpacked.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _ms(value: Optional[float]) -> int:
+    return NONE if value is None else int(round(value))
+
+
+class _StringTable:
+    """Deduplicated strings, referenced by index"""
+
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def ref(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        if value not in self._index:
+            self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return self._index[value]
+
+
+def encode_events(analysis_id, word_rows: List[Dict[str, Any]], pause_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build an analysis_events document from word_events/pause_events rows
+
+    Args:
+        analysis_id: ObjectId of the analysis
+        word_rows: Rows shaped like WordEventDoc (dicts)
+        pause_rows: Rows shaped like PauseEventDoc (dicts)
+
+    Returns:
+        Document ready to be stored in analysis_events
+    """
+    table = _StringTable()
+    word_rows = sorted(word_rows, key=lambda row: row["position"])
+    pause_rows = sorted(pause_rows, key=lambda row: row["after_position"])
+
+    timings = [row.get("timing") or {} for row in word_rows]
+    words = {
+        "count": len(word_rows),
+        "position": _pack([row["position"] for row in word_rows]),
+        "type": _pack([WORD_TYPES.index(row["type"]) for row in word_rows]),
+        "sub_type": _pack([table.ref(row.get("sub_type")) for row in word_rows]),
+        "ref": _pack([table.ref(row.get("ref_token")) for row in word_rows]),
+        "hyp": _pack([table.ref(row.get("hyp_token")) for row in word_rows]),
+        "start_ms": _pack([_ms(timing.get("start_ms")) for timing in timings]),
+        "end_ms": _pack([_ms(timing.get("end_ms")) for timing in timings]),
+        "char_diff": _pack([NONE if row.get("char_diff") is None else row["char_diff"] for row in word_rows]),
+    }
+    pauses = {
+        "count": len(pause_rows),
+        "after_position": _pack([row["after_position"] for row in pause_rows]),
+        "class": _pack([PAUSE_CLASSES.index(row["class_"]) for row in pause_rows]),
+        "duration_ms": _pack([_ms(row["duration_ms"]) for row in pause_rows]),
+        "start_ms": _pack([_ms(row["start_ms"]) for row in pause_rows]),
+        "end_ms": _pack([_ms(row["end_ms"]) for row in pause_rows]),
+    }
+
+    return {
+        "analysis_id": analysis_id,
+        "version": FORMAT_VERSION,
+        "strings": table.strings,
+        "words": words,
+        "pauses": pauses,
+    }
+
+
+def decode_events(doc: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Rows in the WordEventDoc/PauseEventDoc shape from an analysis_events document
+
+    Returns:
+        (word rows, pause rows), ordered by position
+    """
+    strings = doc.get("strings", [])
+    analysis_id = doc["analysis_id"]
+
+    def string(index: int) -> Optional[str]:
+        return None if index == NONE else strings[index]
+
+    words = doc["words"]
+    word_rows = []
+    if words["count"]:
+        columns = zip(*(_unpack(words[name]) for name in (
+            "position", "type", "sub_type", "ref", "hyp", "start_ms", "end_ms", "char_diff"
+        )))
+        for position, type_code, sub_type, ref, hyp, start_ms, end_ms, char_diff in columns:
+            word_rows.append({
+                "analysis_id": analysis_id,
+                "position": position,
+                "ref_token": string(ref),
+                "hyp_token": string(hyp),
+                "type": WORD_TYPES[type_code],
+                "sub_type": string(sub_type),
+                "timing": None if start_ms == NONE else {
+                    "start_ms": float(start_ms),
+                    "end_ms": None if end_ms == NONE else float(end_ms)
+                },
+                "char_diff": None if char_diff == NONE else char_diff
+            })
+
+    pauses = doc["pauses"]
+    pause_rows = []
+    if pauses["count"]:
+        columns = zip(*(_unpack(pauses[name]) for name in (
+            "after_position", "class", "duration_ms", "start_ms", "end_ms"
+        )))
+        for after_position, class_code, duration_ms, start_ms, end_ms in columns:
+            pause_rows.append({
+                "analysis_id": analysis_id,
+                "after_position": after_position,
+                "duration_ms": float(duration_ms),
+                "class_": PAUSE_CLASSES[class_code],
+                "start_ms": float(start_ms),
+                "end_ms": float(end_ms)
+            })
+
+    return word_rows, pause_rows
@@ -0,0 +1,96 @@
+"""
+analysis_list_view rows: the analyses list as one denormalized document per analysis
+
+The list endpoint (GET /v1/analyses/) reads only this collection, so every
+row carries what AnalysisSummary shows: text title and grade, student name,
+audio name/size/duration, status, timings and the summary scores. The
+worker writes the full row when an analysis completes and keeps its status
+in step on every transition; the API creates rows on upload and updates
+them when a text or student is renamed.
+scripts/migrate_analysis_list_view.py backfills them.
+
+Rows are built from Beanie documents or raw Motor dicts alike.
+
+This module is duplicated in worker/services/list_view.py.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+COLLECTION = "analysis_list_view"
+
+
+def _field(doc, name: str, default=None):
+    if doc is None:
+        return default
+    if isinstance(doc, dict):
+        value = doc.get("_id" if name == "id" else name, default)
+    else:
+        value = getattr(doc, name, default)
+    return default if value is None else value
+
+
+def student_name(student) -> Optional[str]:
+    """"First Last" of a student document"""
+    if student is None:
+        return None
+    return f"{_field(student, 'first_name', '')} {_field(student, 'last_name', '')}".strip() or None
+
+
+def list_view_row(analysis, session, text=None, audio=None, student=None) -> Dict[str, Any]:
+    """
+    analysis_list_view document of one analysis
+
+    Args:
+        analysis: AnalysisDoc or analyses document
+        session: ReadingSessionDoc of the analysis
+        text, audio, student: Related documents, None if missing
+    """
+    summary = _field(analysis, "summary", {})
+    return {
+        "_id": _field(analysis, "id"),
+        "session_id": _field(analysis, "session_id"),
+        "student_id": _field(analysis, "student_id"),
+        "student_name": student_name(student),
+        "text_id": _field(session, "text_id"),
+        "text_title": _field(text, "title"),
+        "text_grade": _field(text, "grade"),
+        "audio_id": _field(session, "audio_id"),
+        "audio_name": _field(audio, "original_name"),
+        "audio_size_bytes": _field(audio, "size_bytes"),
+        "audio_duration_sec": _field(analysis, "audio_duration_sec") or _field(audio, "duration_sec"),
+        "status": _field(analysis, "status", "queued"),
+        "created_at": _field(analysis, "created_at"),
+        "started_at": _field(analysis, "started_at"),
+        "finished_at": _field(analysis, "finished_at"),
+        **score_fields(summary),
+        "updated_at": datetime.now(timezone.utc)
+    }
+
+
+def score_fields(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a row taken from the analysis summary (rewritten by recomputes)"""
+    return {
+        "wer": summary.get("wer"),
+        "accuracy": summary.get("accuracy"),
+        "wpm": summary.get("wpm"),
+        "counts": summary.get("counts", {})
+    }
+
+
+def status_fields(analysis) -> Dict[str, Any]:
+    """Fields of a row that change with every status transition"""
+    return {
+        "status": _field(analysis, "status", "queued"),
+        "started_at": _field(analysis, "started_at"),
+        "finished_at": _field(analysis, "finished_at"),
+        "updated_at": datetime.now(timezone.utc)
+    }
+
+
+async def upsert_row(collection, row: Dict[str, Any]):
+    await collection.replace_one({"_id": row["_id"]}, row, upsert=True)
+
+
+async def update_status(collection, analysis):
+    """Status and timings of an existing row; analyses without a row are left to the backfill"""
+    await collection.update_one({"_id": _field(analysis, "id")}, {"$set": status_fields(analysis)})
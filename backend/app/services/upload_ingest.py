@@ -0,0 +1,95 @@
+"""
+Streaming upload ingest
+
+POST /v1/upload/, /v1/upload/audios and /v1/analyses/file used to read the
+whole recording into memory, write it to a temp file, then read the temp
+file again for the MD5 and once more for the GCS upload. ingest_upload()
+makes one pass over the uploaded file instead, settings.upload_chunk_bytes
+at a time. Each chunk is:
+
+    - appended to a local temp file (kept for the audio metadata probe)
+    - fed to incremental MD5 and SHA-256 hashes
+    - written to a resumable GCS upload, which sends it once a chunk is full
+
+so an upload holds about two chunks in memory whatever the file size.
+File and GCS writes are blocking and run on the storage thread pool
+(app/storage/service.py), timed as open_upload/upload_chunk/upload_finalize.
+When anything fails, including the size limit, the resumable upload is
+cancelled (no blob is created) and the temp file is removed.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.storage import get_storage
+from app.storage.service import storage_service
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeded max_bytes"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File too large. Maximum size is {max_bytes // (1024 * 1024)}MB")
+        self.max_bytes = max_bytes
+
+
+def _suffix(filename: Optional[str]) -> str:
+    return os.path.splitext(filename)[1] if filename and os.path.splitext(filename)[1] else ".wav"
+
+
+def _write_chunk(chunk: bytes, temp_file, writer, md5, sha256):
+    temp_file.write(chunk)
+    md5.update(chunk)
+    sha256.update(chunk)
+    writer.write(chunk)
+
+
+async def ingest_upload(file, text_id: Optional[str], max_bytes: Optional[int] = None,
+                        storage=None) -> Dict[str, Any]:
+    """
+    Stream an UploadFile to a temp file and to GCS, hashing it on the way.
+
+    Returns the upload_file() result (bucket, blob_name, gs_uri, size_bytes,
+    md5) plus "sha256" and "temp_path". The caller removes temp_path.
+    Raises UploadTooLarge past max_bytes.
+    """
+    storage = storage or get_storage()
+    chunk_bytes = settings.upload_chunk_bytes
+    blob_name, writer = await storage_service.run(
+        "open_upload", storage.open_upload, text_id, file.filename or "audio", file.content_type, chunk_bytes
+    )
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=_suffix(file.filename))
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+    size_bytes = 0
+    try:
+        while True:
+            chunk = await file.read(chunk_bytes)
+            if not chunk:
+                break
+            size_bytes += len(chunk)
+            if max_bytes is not None and size_bytes > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await storage_service.run("upload_chunk", _write_chunk, chunk, temp_file, writer, md5, sha256)
+        temp_file.close()
+        # Sends the last partial chunk and finalizes the blob
+        await storage_service.run("upload_finalize", writer.close)
+    except BaseException:
+        temp_file.close()
+        os.unlink(temp_file.name)
+        try:
+            await storage_service.run("upload_cancel", writer.terminate)
+        except Exception:
+            pass
+        raise
+
+    return {
+        "bucket": storage.bucket_name,
+        "blob_name": blob_name,
+        "gs_uri": f"gs://{storage.bucket_name}/{blob_name}",
+        "size_bytes": size_bytes,
+        "md5": md5.hexdigest(),
+        "sha256": sha256.hexdigest(),
+        "temp_path": temp_file.name
+    }
@@ -1,6 +1,6 @@
 import os
 from typing import Any, Dict, Optional
-from .gcs import upload_file, build_blob_name, delete_file, get_file_info
+from .gcs import upload_file, open_upload, build_blob_name, delete_file, get_file_info
 
 
 class GCSStorage:
@@ -21,6 +21,12 @@ class GCSStorage:
             make_public=make_public
         )
     
+    def open_upload(self, text_id: str, original_name: str, content_type: Optional[str] = None,
+                    chunk_size: int = 1024 * 1024):
+        """Open a resumable upload with automatic naming; returns (blob_name, writer)."""
+        blob_name = build_blob_name(text_id, original_name)
+        return blob_name, open_upload(self.bucket_name, blob_name, content_type, chunk_size)
+    
     def delete(self, blob_name: str) -> bool:
         """Delete file by blob name."""
         return delete_file(self.bucket_name, blob_name)
@@ -1,15 +1,33 @@
 import os
 import uuid
 import hashlib
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, Optional
+import requests
 from google.cloud import storage
 from google.cloud.exceptions import NotFound
 from loguru import logger
 
 
-def get_client() -> storage.Client:
-    """Get GCS client using service account JSON or default credentials."""
+UPLOAD_CHUNK_MULTIPLE = 256 * 1024
+
+_client: Optional[storage.Client] = None
+_client_lock = threading.Lock()
+
+
+def _pool_connections(client: storage.Client, pool_size: int) -> storage.Client:
+    """Let the client's HTTP session keep one connection per storage worker thread."""
+    try:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        client._http.mount("https://", adapter)
+    except Exception as e:
+        logger.warning(f"Could not resize GCS connection pool: {e}")
+    return client
+
+
+def _create_client() -> storage.Client:
+    """Create a GCS client using service account JSON or default credentials."""
     try:
         from app.config import settings
         credentials_path = settings.gcs_credentials_path
@@ -20,7 +38,7 @@ def get_client() -> storage.Client:
             try:
                 client = storage.Client.from_service_account_json(credentials_path)
                 logger.info("GCS client created from service account JSON")
-                return client
+                return _pool_connections(client, settings.gcs_max_workers)
             except Exception as e:
                 logger.error(f"Failed to create GCS client from service account JSON: {e}")
                 raise
@@ -30,7 +48,7 @@ def get_client() -> storage.Client:
             try:
                 client = storage.Client()
                 logger.info("GCS client created with default credentials")
-                return client
+                return _pool_connections(client, settings.gcs_max_workers)
             except Exception as e:
                 logger.error(f"Failed to create GCS client with default credentials: {e}")
                 raise
@@ -40,6 +58,29 @@ def get_client() -> storage.Client:
         raise
 
 
+def get_client() -> storage.Client:
+    """
+    Process-wide GCS client, created on first use.
+    
+    Creating a client loads credentials and opens a new HTTP session, so it
+    is done once per process instead of once per call. The client is shared
+    by the storage worker threads (see app/storage/service.py).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def reset_client():
+    """Drop the shared client; the next get_client() creates a new one."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
 def slugify_filename(name: str) -> str:
     """Normalize Turkish characters and spaces in filename."""
     # Turkish character mappings
@@ -199,9 +240,11 @@ def upload_file(
         
         # Calculate MD5 hash
         try:
+            md5 = hashlib.md5()
             with open(file_path, 'rb') as f:
-                file_content = f.read()
-                md5_hash = hashlib.md5(file_content).hexdigest()
+                for chunk in iter(lambda: f.read(UPLOAD_CHUNK_MULTIPLE), b''):
+                    md5.update(chunk)
+            md5_hash = md5.hexdigest()
             logger.info(f"MD5 hash calculated: {md5_hash}")
         except Exception as e:
             logger.error(f"Failed to calculate MD5 hash: {e}")
@@ -240,6 +283,40 @@ def upload_file(
         raise
 
 
+def open_upload(
+    bucket_name: str,
+    blob_name: str,
+    content_type: Optional[str] = None,
+    chunk_size: int = 1024 * 1024
+):
+    """
+    Open a resumable upload to a GCS blob.
+    
+    Data written to the returned writer is sent to GCS in chunk_size pieces
+    as it arrives, so only one chunk is buffered. close() finalizes the blob;
+    terminate() cancels the upload and nothing is created.
+    
+    Args:
+        bucket_name: GCS bucket name
+        blob_name: Blob name within the bucket
+        content_type: MIME type of the file
+        chunk_size: Bytes per request, rounded up to a multiple of 256 KiB
+    
+    Returns:
+        google.cloud.storage.fileio.BlobWriter
+    """
+    try:
+        logger.info(f"Opening resumable upload: {bucket_name}/{blob_name}")
+        client = get_client()
+        blob = client.bucket(bucket_name).blob(blob_name)
+        # Resumable upload chunks must be multiples of 256 KiB
+        chunk_size = max(1, -(-chunk_size // UPLOAD_CHUNK_MULTIPLE)) * UPLOAD_CHUNK_MULTIPLE
+        return blob.open("wb", chunk_size=chunk_size, content_type=content_type)
+    except Exception as e:
+        logger.error(f"Failed to open resumable upload {bucket_name}/{blob_name}: {e}")
+        raise
+
+
 def delete_file(bucket_name: str, blob_name: str) -> bool:
     """Delete file from GCS bucket."""
     try:
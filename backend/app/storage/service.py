@@ -0,0 +1,125 @@
+"""
+Async storage service
+
+The google-cloud-storage SDK is synchronous: every call blocks on HTTP.
+Called from an async route it stalls the event loop, and with it every
+other request of the process, for the whole round trip. StorageService
+runs those calls on a bounded thread pool (settings.gcs_max_workers) that
+shares the process-wide client from gcs.get_client(), and records the
+latency of each operation:
+
+    url = await storage_service.signed_url(blob_name, expiration_hours=1)
+    info = await storage_service.get_info(blob_name)
+    await storage_service.run("upload_chunk", writer.write, chunk)
+
+metrics() returns count, errors and p50/p95/p99/max (ms) per operation
+over the last settings.gcs_metrics_window calls; GET /v1/_storage serves it.
+"""
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.config import settings
+from . import get_storage
+from .gcs import generate_signed_url
+
+
+class OperationMetrics:
+    """Latencies of one storage operation"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool):
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.latencies_ms.append(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+
+        def rank(p):
+            if not ordered:
+                return None
+            index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+            return round(ordered[index], 3)
+
+        return {
+            "count": self.count, "errors": self.errors,
+            "p50_ms": rank(50), "p95_ms": rank(95), "p99_ms": rank(99),
+            "max_ms": round(ordered[-1], 3) if ordered else None
+        }
+
+
+class StorageService:
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.gcs_max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.operations: Dict[str, OperationMetrics] = {}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gcs")
+        return self.executor
+
+    async def run(self, operation: str, fn: Callable, *args, **kwargs):
+        """Run a blocking storage call on the storage thread pool, timing it as `operation`"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await loop.run_in_executor(self._executor(), functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics = self.operations.get(operation)
+            if metrics is None:
+                metrics = self.operations[operation] = OperationMetrics(settings.gcs_metrics_window)
+            metrics.record(elapsed_ms, failed)
+
+    async def upload(self, text_id: Optional[str], original_name: str, file_path: str,
+                     content_type: Optional[str] = None) -> Dict[str, Any]:
+        """Upload a local file with automatic naming (see GCSStorage.upload)"""
+        return await self.run("upload", get_storage().upload, text_id, original_name, file_path, content_type)
+
+    async def delete(self, blob_name: str) -> bool:
+        return await self.run("delete", get_storage().delete, blob_name)
+
+    async def get_info(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        return await self.run("get_info", get_storage().get_info, blob_name)
+
+    async def signed_url(self, blob_name: str, expiration_hours: int = 1, method: str = "GET",
+                         bucket_name: Optional[str] = None) -> str:
+        """V4 signed URL of a blob; raises NotFound if it does not exist"""
+        bucket_name = bucket_name or os.getenv("GCS_BUCKET", "doky_ai_audio_storage")
+        return await self.run(
+            "signed_url", generate_signed_url,
+            bucket_name=bucket_name, blob_name=blob_name, expiration_hours=expiration_hours, method=method
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "operations": {name: metrics.snapshot() for name, metrics in sorted(self.operations.items())}
+        }
+
+    def shutdown(self):
+        """Wait for running storage calls and stop the thread pool"""
+        if self.executor is not None:
+            logger.info("🛑 Shutting down storage thread pool")
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+storage_service = StorageService()
@@ -0,0 +1,84 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor marks the last document of a page by its sort key, a sort field
+plus _id as tie-breaker, e.g. (created_at, _id). The next page is everything
+strictly after it in sort order, which an index on (field, _id) serves
+without skipping over earlier pages. Clients get the cursor as an opaque
+URL-safe token and send it back unchanged.
+"""
+import base64
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+
+
+def _encode_value(value: Any) -> str:
+    # bool before int: bool is an int subclass
+    if isinstance(value, bool):
+        return "b" + ("1" if value else "0")
+    if isinstance(value, int):
+        return "i" + str(value)
+    if isinstance(value, datetime):
+        return "d" + value.isoformat()
+    if isinstance(value, str):
+        return "s" + value
+    raise ValueError(f"Unsupported cursor value: {value!r}")
+
+
+def _decode_value(raw: str) -> Any:
+    tag, text = raw[0], raw[1:]
+    if tag == "b":
+        return text == "1"
+    if tag == "i":
+        return int(text)
+    if tag == "d":
+        return datetime.fromisoformat(text)
+    if tag == "s":
+        return text
+    raise ValueError(f"Unknown cursor value type: {tag}")
+
+
+def encode_cursor(value: Any, doc_id: ObjectId) -> str:
+    """Opaque token for the position after (value, doc_id)"""
+    raw = f"{_encode_value(value)}|{doc_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, ObjectId]:
+    """
+    (sort value, _id) of a cursor token
+
+    Raises:
+        ValueError: If the token was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        value, doc_id = raw.rsplit("|", 1)
+        return _decode_value(value), ObjectId(doc_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def keyset_filter(query: Dict[str, Any], cursor: Optional[str], field: str = "created_at",
+                  direction: int = -1) -> Dict[str, Any]:
+    """
+    Add the "after cursor" condition for a (field, _id) sort to a query
+
+    Args:
+        query: Filter of the listing; must not have a top-level $or
+        cursor: Token of the last document of the previous page, None for the first page
+        field: Sort field
+        direction: -1 for descending, 1 for ascending (applies to both field and _id)
+    """
+    if not cursor:
+        return query
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        **query,
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: doc_id}}
+        ]
+    }
@@ -140,3 +140,42 @@ def get_reading_time_estimate(text: str, wpm: int = 200) -> float:
     word_count = get_word_count(text)
     return word_count / wpm
 
+
+
+# Turkish dotted/dotless I first, then letters with diacritics to their ASCII base
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_TURKISH_FOLD = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+
+def fold_turkish(text: str) -> str:
+    """
+    Lowercase with Turkish casing rules and fold letters to ASCII, for search
+    
+    Examples:
+        "IŞIK" → "isik", "İpek" → "ipek", "Gülşen" → "gulsen"
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Folded text
+    """
+    return text.translate(_TURKISH_LOWER).lower().translate(_TURKISH_FOLD)
+
+
+def name_search_terms(*names: str) -> List[str]:
+    """
+    Folded words of a person's names, prefix-searched by the name search index
+    
+    Args:
+        *names: Name fields, e.g. first and last name
+        
+    Returns:
+        Unique folded words in order of appearance
+    """
+    terms = []
+    for name in names:
+        for word in re.split(r"[\s\-'’]+", fold_turkish(name or "")):
+            if word and word not in terms:
+                terms.append(word)
+    return terms
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 """
 Script to update audio file durations in the database.
-This script reads audio files from GCS and updates their duration_sec field.
+This script reads audio file headers from GCS and updates their duration_sec,
+duration_ms and sr fields.
+
+Headers are read through a ranged GCS reader (app/services/audio_probe.py),
+so most files cost a few small range requests instead of a full download.
+Only files whose headers carry no duration are downloaded and run through
+ffprobe. Up to --concurrency files are processed at the same time.
+
+Usage:
+    python backend/scripts/update_audio_durations.py
+    python backend/scripts/update_audio_durations.py --concurrency 16 --dry-run
 """
 
+import argparse
 import asyncio
 import sys
 import os
@@ -14,19 +25,48 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from google.cloud.exceptions import NotFound
 from app.config import settings
 from app.storage.gcs import get_client
-import subprocess
+from app.services.audio_probe import probe_headers, probe_ffprobe
 import tempfile
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Range request size of the header reader; most containers fit in the first one
+PROBE_CHUNK_BYTES = 256 * 1024
+
+
+def read_blob_headers(bucket, storage_name: str):
+    """Header probe of a blob through a ranged reader (blocking); raises NotFound"""
+    blob = bucket.blob(storage_name)
+    blob.reload()
+    with blob.open("rb", chunk_size=PROBE_CHUNK_BYTES) as reader:
+        return probe_headers(reader)
+
+
+async def probe_blob(bucket, storage_name: str):
+    """AudioInfo of a blob: ranged header read, full download + ffprobe as fallback"""
+    info = await asyncio.to_thread(read_blob_headers, bucket, storage_name)
+    if info is not None:
+        return info
 
-async def update_audio_durations():
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(storage_name)[1], delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+    try:
+        await asyncio.to_thread(bucket.blob(storage_name).download_to_filename, tmp_path)
+        return await probe_ffprobe(tmp_path)
+    finally:
+        # Clean up temporary file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+async def update_audio_durations(concurrency: int = 8, dry_run: bool = False):
     """Update duration_sec for all audio files that don't have it set"""
-    
+
     # Connect to MongoDB - use environment variable or Docker service name
     mongo_url = os.getenv("MONGO_URI", settings.mongo_url or settings.mongo_uri)
     mongo_db = os.getenv("MONGO_DB", settings.mongo_db)
@@ -34,89 +74,77 @@ async def update_audio_durations():
     mongo_client = AsyncIOMotorClient(mongo_url)
     db = mongo_client[mongo_db]
     audio_files = db["audio_files"]
-    
+
     # Get GCS client
     gcs_client = get_client()
     bucket = gcs_client.bucket(settings.gcs_bucket_name)
-    
+
     # Find all audio files without duration_sec
     query = {"$or": [{"duration_sec": None}, {"duration_sec": {"$exists": False}}]}
-    cursor = audio_files.find(query)
-    
+    cursor = audio_files.find(query, {"storage_name": 1, "sr": 1})
+
     count = await audio_files.count_documents(query)
-    logger.info(f"Found {count} audio files without duration_sec")
-    
-    updated = 0
-    failed = 0
-    
-    async for audio_doc in cursor:
+    logger.info(f"Found {count} audio files without duration_sec (concurrency={concurrency})")
+
+    stats = {"updated": 0, "failed": 0, "methods": {}}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def process(audio_doc):
+        audio_id = str(audio_doc["_id"])
+        storage_name = audio_doc.get("storage_name", "")
         try:
-            audio_id = str(audio_doc["_id"])
-            gcs_uri = audio_doc.get("gcs_uri", "")
-            storage_name = audio_doc.get("storage_name", "")
-            
             logger.info(f"Processing audio {audio_id}: {storage_name}")
-            
-            # Download audio from GCS
-            blob = bucket.blob(storage_name)
-            if not blob.exists():
-                logger.warning(f"Blob not found in GCS: {storage_name}")
-                failed += 1
-                continue
-            
-            # Download audio data to temporary file
-            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(storage_name)[1], delete=False) as tmp_file:
-                blob.download_to_filename(tmp_file.name)
-                tmp_path = tmp_file.name
-            
-            # Get duration using ffprobe
-            try:
-                result = subprocess.run(
-                    [
-                        'ffprobe', '-v', 'error', '-show_entries',
-                        'format=duration', '-of',
-                        'default=noprint_wrappers=1:nokey=1', tmp_path
-                    ],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    check=True
-                )
-                duration_sec = float(result.stdout.strip())
-                
-                # Update database
-                update_result = await audio_files.update_one(
-                    {"_id": audio_doc["_id"]},
-                    {"$set": {"duration_sec": duration_sec}}
-                )
-                
-                if update_result.modified_count > 0:
-                    logger.info(f"✅ Updated audio {audio_id}: duration_sec={duration_sec:.2f}")
-                    updated += 1
-                else:
-                    logger.warning(f"❌ Failed to update audio {audio_id}")
-                    failed += 1
-                    
-            except Exception as e:
-                logger.error(f"❌ Error getting duration for {audio_id}: {e}")
-                failed += 1
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                
+            info = await probe_blob(bucket, storage_name)
+            stats["methods"][info.method] = stats["methods"].get(info.method, 0) + 1
+
+            update = {"duration_sec": info.duration_sec, "duration_ms": info.duration_ms}
+            if info.sample_rate and not audio_doc.get("sr"):
+                update["sr"] = info.sample_rate
+            if dry_run:
+                logger.info(f"🔍 Would update audio {audio_id}: duration_sec={info.duration_sec:.2f} ({info.method})")
+                stats["updated"] += 1
+                return
+
+            # Update database
+            update_result = await audio_files.update_one({"_id": audio_doc["_id"]}, {"$set": update})
+            if update_result.modified_count > 0:
+                logger.info(f"✅ Updated audio {audio_id}: duration_sec={info.duration_sec:.2f} ({info.method})")
+                stats["updated"] += 1
+            else:
+                logger.warning(f"❌ Failed to update audio {audio_id}")
+                stats["failed"] += 1
+        except NotFound:
+            logger.warning(f"Blob not found in GCS: {storage_name}")
+            stats["failed"] += 1
         except Exception as e:
-            logger.error(f"❌ Error processing audio: {e}")
-            failed += 1
-    
-    logger.info(f"\n✅ Updated: {updated}")
-    logger.info(f"❌ Failed: {failed}")
+            logger.error(f"❌ Error getting duration for {audio_id}: {e}")
+            stats["failed"] += 1
+        finally:
+            slots.release()
+
+    # At most `concurrency` files in flight; the cursor is read as slots free up
+    tasks = set()
+    async for audio_doc in cursor:
+        await slots.acquire()
+        task = asyncio.create_task(process(audio_doc))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    logger.info(f"\n✅ Updated: {stats['updated']}")
+    logger.info(f"❌ Failed: {stats['failed']}")
     logger.info(f"📊 Total: {count}")
-    
+    logger.info(f"🔎 Methods: {stats['methods']}")
+
     # Close MongoDB connection
     mongo_client.close()
+    return stats
 
 
 if __name__ == "__main__":
-    asyncio.run(update_audio_durations())
-
+    parser = argparse.ArgumentParser(description="Fill missing audio durations from GCS file headers")
+    parser.add_argument("--concurrency", type=int, default=8, help="Files probed at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="Probe but do not write")
+    args = parser.parse_args()
+    asyncio.run(update_audio_durations(args.concurrency, args.dry_run))
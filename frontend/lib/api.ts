@@ -127,12 +127,23 @@ export interface TextUpdate {
 }
 
 
+export interface AnalysisListFilters {
+  studentId?: string;
+  textId?: string;
+  grade?: number;
+  dateFrom?: string; // ISO date/time, inclusive
+  dateTo?: string;   // ISO date/time, exclusive
+}
+
 export interface AnalysisSummary {
   id: string;
   created_at: string;
   status: string;
   text_title: string;
+  text_id?: string;
+  text_grade?: number;
   student_id?: string;
+  student_name?: string;
   wer?: number;
   accuracy?: number;
   wpm?: number;
@@ -442,6 +453,14 @@ export interface UploadResponse {
   analysis_id: string;
 }
 
+export interface AnalysisProgress {
+  analysis_id: string;
+  status: string;
+  stage?: string | null;
+  percent?: number | null;
+  error?: string | null;
+}
+
 // Auth interfaces
 export interface LoginRequest {
   email: string;
@@ -547,6 +566,11 @@ export const apiClient = {
     return response.data;
   },
 
+  // Server-Sent Events with the progress of an analysis (EventSource, no auth header needed)
+  getAnalysisEventsUrl(analysisId: string): string {
+    return `${API_BASE}/v1/upload/status/${analysisId}/events`;
+  },
+
   // Audio URL
   async getAnalysisAudioUrl(analysisId: string, expirationHours: number = 1): Promise<{
     analysis_id: string;
@@ -572,6 +596,22 @@ export const apiClient = {
     return response.data;
   },
 
+  // Keyset pages: pass the previous page's nextCursor to get the page after it
+  async getAnalysesPage(limit: number = 20, cursor?: string, filters: AnalysisListFilters = {}): Promise<{ items: AnalysisSummary[]; nextCursor: string | null }> {
+    const params = new URLSearchParams();
+    params.append('limit', limit.toString());
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+    if (filters.studentId) params.append('student_id', filters.studentId);
+    if (filters.textId) params.append('text_id', filters.textId);
+    if (filters.grade !== undefined) params.append('grade', filters.grade.toString());
+    if (filters.dateFrom) params.append('date_from', filters.dateFrom);
+    if (filters.dateTo) params.append('date_to', filters.dateTo);
+    const response = await api.get(`/v1/analyses/?${params.toString()}`);
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  },
+
   async getAnalysis(id: string): Promise<AnalysisDetail> {
     const response = await api.get(`/v1/analyses/${id}`);
     return response.data;
@@ -625,6 +665,18 @@ export const apiClient = {
     return response.data;
   },
 
+  // Bulk export: one AnalysisExport JSON object per line (NDJSON)
+  async exportAnalyses(filters: AnalysisListFilters = {}): Promise<Blob> {
+    const params = new URLSearchParams();
+    if (filters.studentId) params.append('student_id', filters.studentId);
+    if (filters.textId) params.append('text_id', filters.textId);
+    if (filters.grade !== undefined) params.append('grade', filters.grade.toString());
+    if (filters.dateFrom) params.append('date_from', filters.dateFrom);
+    if (filters.dateTo) params.append('date_to', filters.dateTo);
+    const response = await api.get(`/v1/analyses/export?${params.toString()}`, { responseType: 'blob' });
+    return response.data;
+  },
+
   // Auth
   async login(email: string, password: string): Promise<LoginResponse> {
     const response = await api.post('/v1/auth/login', { email, password });
@@ -1,13 +1,15 @@
 import { create } from 'zustand';
-import { AnalysisSummary } from './api';
+import { AnalysisSummary, AnalysisProgress, apiClient } from './api';
 
 interface AnalysisStore {
   analyses: AnalysisSummary[];
   pollingIntervals: Map<string, NodeJS.Timeout>;
+  eventSources: Map<string, EventSource>;
   setAnalyses: (analyses: AnalysisSummary[]) => void;
   addAnalysis: (analysis: AnalysisSummary) => void;
   updateAnalysis: (id: string, updates: Partial<AnalysisSummary>) => void;
   startPolling: (id: string, callback: () => Promise<void>) => void;
+  startPollingInterval: (id: string, callback: () => Promise<void>) => void;
   stopPolling: (id: string) => void;
   stopAllPolling: () => void;
 }
@@ -15,6 +17,7 @@ interface AnalysisStore {
 export const useAnalysisStore = create<AnalysisStore>((set, get) => ({
   analyses: [],
   pollingIntervals: new Map(),
+  eventSources: new Map(),
   
   setAnalyses: (analyses) => set({ analyses }),
   
@@ -29,14 +32,60 @@ export const useAnalysisStore = create<AnalysisStore>((set, get) => ({
   })),
   
   startPolling: (id, callback) => {
-    const { pollingIntervals } = get();
+    const { pollingIntervals, eventSources } = get();
     
     // Stop existing polling for this ID
     if (pollingIntervals.has(id)) {
       clearInterval(pollingIntervals.get(id)!);
     }
+    eventSources.get(id)?.close();
     
-    // Start new polling
+    // Prefer progress events pushed by the server: the callback runs once per
+    // status/stage change instead of every second
+    if (typeof EventSource !== 'undefined') {
+      const source = new EventSource(apiClient.getAnalysisEventsUrl(id));
+      let lastStatus: string | null = null;
+      
+      source.addEventListener('progress', async (message) => {
+        const progress: AnalysisProgress = JSON.parse((message as MessageEvent).data);
+        get().updateAnalysis(id, { status: progress.status });
+        if (progress.status === lastStatus && progress.status !== 'done' && progress.status !== 'failed') {
+          return;
+        }
+        lastStatus = progress.status;
+        try {
+          await callback();
+        } catch (error) {
+          console.error(`Progress error for analysis ${id}:`, error);
+        }
+      });
+      
+      source.onerror = () => {
+        // Closed after a final status, or no SSE support on the way: fall back to polling
+        if (!get().eventSources.has(id)) {
+          return;
+        }
+        source.close();
+        set((state) => {
+          const newSources = new Map(state.eventSources);
+          newSources.delete(id);
+          return { eventSources: newSources };
+        });
+        if (lastStatus !== 'done' && lastStatus !== 'failed') {
+          get().startPollingInterval(id, callback);
+        }
+      };
+      
+      set((state) => ({
+        eventSources: new Map(state.eventSources).set(id, source)
+      }));
+      return;
+    }
+    
+    get().startPollingInterval(id, callback);
+  },
+  
+  startPollingInterval: (id, callback) => {
     const interval = setInterval(async () => {
       try {
         await callback();
@@ -51,8 +100,18 @@ export const useAnalysisStore = create<AnalysisStore>((set, get) => ({
   },
   
   stopPolling: (id) => {
-    const { pollingIntervals } = get();
+    const { pollingIntervals, eventSources } = get();
     const interval = pollingIntervals.get(id);
+    const source = eventSources.get(id);
+    
+    if (source) {
+      source.close();
+      set((state) => {
+        const newSources = new Map(state.eventSources);
+        newSources.delete(id);
+        return { eventSources: newSources };
+      });
+    }
     
     if (interval) {
       clearInterval(interval);
@@ -65,12 +124,15 @@ export const useAnalysisStore = create<AnalysisStore>((set, get) => ({
   },
   
   stopAllPolling: () => {
-    const { pollingIntervals } = get();
+    const { pollingIntervals, eventSources } = get();
     
     pollingIntervals.forEach((interval) => {
       clearInterval(interval);
     });
+    eventSources.forEach((source) => {
+      source.close();
+    });
     
-    set({ pollingIntervals: new Map() });
+    set({ pollingIntervals: new Map(), eventSources: new Map() });
   },
 }));
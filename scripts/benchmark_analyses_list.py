@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of the analyses list (GET /v1/analyses/)
+
+Seeds a throwaway database with N analyses (default 100k), their sessions,
+texts, audios and analysis_list_view rows, creates the model indexes, and
+times the list endpoint walking the first --pages pages with its cursor:
+
+    keyset    get_analyses() as served: one query on analysis_list_view
+              with the (created_at, _id) cursor
+    legacy    the original implementation: full analyses, sessions, texts
+              (bodies included) and audios, page N reached with skip()
+
+Both are run --runs times per page; p50/p95/p99 per mode and for the first
+and the last page are reported and saved as JSON. The endpoint function is
+called directly (no HTTP, no auth), so the numbers are database plus
+response building time.
+
+The seeded database is dropped afterwards unless --keep is given; reuse it
+with --skip-seed. Never point --mongo-db at a real database.
+
+Usage:
+    python scripts/benchmark_analyses_list.py
+    python scripts/benchmark_analyses_list.py --analyses 100000 --pages 20 --limit 50 --keep
+    python scripts/benchmark_analyses_list.py --skip-seed --student --output list_benchmark.json
+"""
+
+import asyncio
+import argparse
+import inspect
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from bson import ObjectId
+
+# Add project root and backend to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "backend"))
+
+# App imports set up the app's logging; the script's own setup below replaces it
+from app.routers.analyses import get_analyses
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+from worker.services import list_view
+
+SEED_BATCH = 10000
+TEXT_BODY = "Ali okula gitti. Annesi ona kitap aldı. " * 60  # ~2.4 KB, typical reading text
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99, mean and max"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p):
+        index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+        return round(ordered[index], 2)
+
+    return {
+        "p50": rank(50), "p95": rank(95), "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 2), "max": round(ordered[-1], 2)
+    }
+
+
+async def seed(db, analyses: int, students: int, texts: int):
+    """Analyses with one session and audio each, spread over a year; some share a created_at"""
+    text_docs = [
+        {"_id": ObjectId(), "title": f"Metin {i}", "body": TEXT_BODY, "grade": i % 4 + 1, "slug": f"metin-{i}"}
+        for i in range(texts)
+    ]
+    await db.texts.insert_many(text_docs)
+    texts_by_id = {doc["_id"]: doc for doc in text_docs}
+    student_ids = [ObjectId() for _ in range(students)]
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+
+    for offset in range(0, analyses, SEED_BATCH):
+        audios, sessions, rows = [], [], []
+        for i in range(offset, min(offset + SEED_BATCH, analyses)):
+            audio_id, session_id = ObjectId(), ObjectId()
+            # Whole seconds: every 5th analysis shares its created_at with the previous one
+            created_at = start + timedelta(seconds=(i - (i % 5 == 4)) * 300)
+            audios.append({
+                "_id": audio_id, "original_name": f"kayit_{i}.m4a", "size_bytes": random.randint(200_000, 2_000_000),
+                "storage_name": f"bench/{audio_id}.m4a", "gcs_uri": f"gs://bench/{audio_id}.m4a"
+            })
+            sessions.append({"_id": session_id, "text_id": random.choice(text_docs)["_id"], "audio_id": audio_id, "status": "completed"})
+            rows.append({
+                "session_id": session_id, "student_id": random.choice(student_ids), "status": "done",
+                "created_at": created_at, "started_at": created_at, "finished_at": created_at + timedelta(seconds=20),
+                "audio_duration_sec": round(random.uniform(30, 120), 1),
+                "summary": {
+                    "wer": round(random.random() * 0.3, 4), "accuracy": round(70 + random.random() * 30, 2),
+                    "wpm": round(random.uniform(40, 120), 1),
+                    "counts": {"correct": 80, "missing": 3, "extra": 2, "diff": 5, "substitution": 4,
+                               "repetition": 1, "total_words": 95, "total_pauses": 6}
+                },
+                "pipeline": {"completed": ["download", "transcribe", "align", "persist"]}
+            })
+        await db.audio_files.insert_many(audios, ordered=False)
+        await db.reading_sessions.insert_many(sessions, ordered=False)
+        result = await db.analyses.insert_many(rows, ordered=False)
+        view_rows = [
+            list_view.list_view_row({**row, "_id": analysis_id}, session, texts_by_id[session["text_id"]], audio)
+            for row, analysis_id, session, audio in zip(rows, result.inserted_ids, sessions, audios)
+        ]
+        await db[list_view.COLLECTION].insert_many(view_rows, ordered=False)
+        logger.info(f"🌱 Seeded {offset + len(rows)}/{analyses} analyses")
+
+    return student_ids
+
+
+async def legacy_page(limit: int, page: int, student_id: Optional[ObjectId]):
+    """The list as it was built before keyset pagination (skip() for later pages)"""
+    from app.models.documents import AnalysisDoc, ReadingSessionDoc, TextDoc, AudioFileDoc
+
+    query = {"student_id": student_id} if student_id else {}
+    analyses = await AnalysisDoc.find(query).sort("-created_at").skip(page * limit).limit(limit).to_list()
+    sessions = await ReadingSessionDoc.find({"_id": {"$in": list({a.session_id for a in analyses})}}).to_list()
+    texts = await TextDoc.find({"_id": {"$in": list({s.text_id for s in sessions})}}).to_list()
+    audios = await AudioFileDoc.find({"_id": {"$in": list({s.audio_id for s in sessions})}}).to_list()
+    return analyses, sessions, texts, audios
+
+
+def endpoint_defaults(endpoint) -> Dict[str, Any]:
+    """Default values of an endpoint's Query() parameters, for calling it as a plain function"""
+    return {
+        name: param.default.default for name, param in inspect.signature(endpoint).parameters.items()
+        if hasattr(param.default, "default")
+    }
+
+
+async def measure(pages: int, runs: int, limit: int, student_id: Optional[ObjectId], user):
+    """Per-page latencies (ms) of both modes"""
+
+    keyset = [[] for _ in range(pages)]
+    legacy = [[] for _ in range(pages)]
+    for run in range(runs):
+        cursor = None
+        for page in range(pages):
+            started = time.perf_counter()
+            response = await get_analyses(**{
+                **endpoint_defaults(get_analyses), "limit": limit,
+                "student_id": str(student_id) if student_id else None, "cursor": cursor, "current_user": user
+            })
+            keyset[page].append((time.perf_counter() - started) * 1000)
+            cursor = response.headers.get("x-next-cursor")
+
+            started = time.perf_counter()
+            await legacy_page(limit, page, student_id)
+            legacy[page].append((time.perf_counter() - started) * 1000)
+
+            if not cursor:
+                break
+        logger.info(f"⏱️ Run {run + 1}/{runs} done")
+    return keyset, legacy
+
+
+class BenchmarkUser:
+    """Stands in for the authenticated user; the benchmark measures the query, not RBAC"""
+
+    async def has_any_permission(self, permissions):
+        return True
+
+
+async def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Benchmark the analyses list on a seeded database")
+    parser.add_argument("--analyses", type=int, default=100000, help="Analyses to seed")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--texts", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50, help="Page size")
+    parser.add_argument("--pages", type=int, default=20, help="Pages to walk per run")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--student", action="store_true", help="List the analyses of one student")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--keep", action="store_true", help="Do not drop the seeded database")
+    parser.add_argument("--mongo-uri", default=settings.mongo_uri, help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi_benchmark", help="Throwaway database to seed")
+    parser.add_argument("--output", default="analyses_list_benchmark.json", help="Where to save the results")
+
+    args = parser.parse_args()
+
+    if args.mongo_db == settings.mongo_db:
+        logger.error(f"❌ Refusing to seed the application database {args.mongo_db}")
+        sys.exit(1)
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from app.models.documents import AnalysisDoc, AnalysisListViewDoc, ReadingSessionDoc, TextDoc, AudioFileDoc
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+    settings.debug = False
+
+    try:
+        if args.skip_seed:
+            student_ids = await db.analyses.distinct("student_id")
+        else:
+            logger.info(f"🔄 Seeding {args.analyses} analyses into {args.mongo_db}")
+            student_ids = await seed(db, args.analyses, args.students, args.texts)
+        # init_beanie creates the model indexes, the keyset ones included
+        await init_beanie(database=db, document_models=[AnalysisDoc, AnalysisListViewDoc, ReadingSessionDoc, TextDoc, AudioFileDoc])
+
+        student_id = random.choice(student_ids) if args.student else None
+        total = await db.analyses.count_documents({"student_id": student_id} if student_id else {})
+        logger.info(f"🔄 Walking {args.pages} pages of {args.limit} ({total} analyses), {args.runs} runs")
+        keyset, legacy = await measure(args.pages, args.runs, args.limit, student_id, BenchmarkUser())
+
+        pages = [page for page in range(args.pages) if keyset[page]]
+        summary = {
+            "analyses": total,
+            "keyset": percentiles([ms for page in pages for ms in keyset[page]]),
+            "legacy": percentiles([ms for page in pages for ms in legacy[page]]),
+            "keyset_first_page": percentiles(keyset[0]),
+            "legacy_first_page": percentiles(legacy[0]),
+            "keyset_last_page": percentiles(keyset[pages[-1]]),
+            "legacy_last_page": percentiles(legacy[pages[-1]])
+        }
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "settings": {"limit": args.limit, "pages": len(pages), "runs": args.runs, "student": args.student},
+            "summary": summary,
+            "pages": [{"page": page, "keyset": percentiles(keyset[page]), "legacy": percentiles(legacy[page])} for page in pages]
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        logger.info("📊 Summary (ms):")
+        for key, value in summary.items():
+            logger.info(f"  {key}: {value}")
+        logger.info(f"✅ Results saved to {args.output}")
+    finally:
+        if not args.keep and not args.skip_seed:
+            await client.drop_database(args.mongo_db)
+            logger.info(f"🗑️ Dropped {args.mongo_db}")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
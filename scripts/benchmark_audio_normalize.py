@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark: original vs normalized audio for STT
+
+For every sample file, transcodes to each requested format (see
+worker/services/audio_normalize.py) and records bytes and transcode time.
+With --stt, both versions are also sent to ElevenLabs (ELEVENLABS_API_KEY)
+and the request latency, its phases and the word count are compared.
+
+Results are saved as JSON (per file + totals) so runs can be compared.
+
+Usage:
+    python scripts/benchmark_audio_normalize.py samples/
+    python scripts/benchmark_audio_normalize.py samples/*.m4a --formats opus flac
+    python scripts/benchmark_audio_normalize.py samples/ --stt --output normalize_benchmark.json
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.services import audio_normalize
+from worker.services.audio_source import AudioSource
+from worker.services.elevenlabs_stt import ElevenLabsSTT
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+AUDIO_EXTENSIONS = {".m4a", ".mp3", ".wav", ".aac", ".ogg", ".flac", ".webm", ".mp4", ".3gp"}
+
+
+def collect_samples(paths):
+    """Audio files from the given files and directories"""
+    samples = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                    samples.append(os.path.join(path, name))
+        else:
+            samples.append(path)
+    return samples
+
+
+async def measure_stt(stt_client, source):
+    """Latency, phases and word count of one STT request"""
+    phases = {}
+    start = time.time()
+    result = await stt_client.transcribe_source_async(source, phases=phases)
+    words = stt_client.extract_raw_words(result.get("words", []))
+    return {
+        "latency_ms": round((time.time() - start) * 1000, 2),
+        "phases_ms": phases,
+        "words": len(words),
+        "transcript": stt_client.get_transcript_text(result)
+    }
+
+
+async def benchmark_file(path, formats, sample_rate, bitrate, stt_client):
+    """Measurements for one sample file"""
+    entry = {"file": os.path.basename(path), "original_bytes": os.path.getsize(path), "formats": {}}
+
+    with AudioSource.from_path(path) as original:
+        if stt_client:
+            entry["stt_original"] = await measure_stt(stt_client, original)
+
+        for fmt in formats:
+            report = await audio_normalize.normalize(original, fmt, sample_rate, bitrate)
+            with report.pop("source") as normalized:
+                if stt_client:
+                    report["stt"] = await measure_stt(stt_client, normalized)
+                    report["stt"]["latency_saved_ms"] = round(
+                        entry["stt_original"]["latency_ms"] - report["stt"]["latency_ms"], 2
+                    )
+                    report["stt"]["same_transcript"] = report["stt"]["transcript"] == entry["stt_original"]["transcript"]
+            entry["formats"][fmt] = report
+
+    return entry
+
+
+def summarize(results, formats):
+    """Totals across all samples per format"""
+    summary = {"files": len(results), "original_bytes": sum(r["original_bytes"] for r in results)}
+    for fmt in formats:
+        rows = [r["formats"][fmt] for r in results if fmt in r["formats"]]
+        normalized = sum(row["normalized_bytes"] for row in rows)
+        summary[fmt] = {
+            "normalized_bytes": normalized,
+            "bytes_saved": summary["original_bytes"] - normalized,
+            "ratio": round(normalized / summary["original_bytes"], 4) if summary["original_bytes"] else 0.0,
+            "transcode_ms_total": round(sum(row["transcode_ms"] for row in rows), 2)
+        }
+        stt_rows = [row["stt"] for row in rows if "stt" in row]
+        if stt_rows:
+            summary[fmt]["stt_latency_saved_ms_mean"] = round(
+                sum(row["latency_saved_ms"] for row in stt_rows) / len(stt_rows), 2
+            )
+            summary[fmt]["same_transcript"] = sum(1 for row in stt_rows if row["same_transcript"])
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio normalization (bytes and STT latency)")
+    parser.add_argument("paths", nargs="+", help="Sample audio files or directories")
+    parser.add_argument("--formats", nargs="+", default=["opus", "flac"], choices=sorted(audio_normalize.FORMATS))
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--bitrate", default="24k", help="Opus bitrate")
+    parser.add_argument("--stt", action="store_true", help="Also transcribe original and normalized audio")
+    parser.add_argument("--output", default="audio_normalize_benchmark.json", help="Where to save the results")
+
+    args = parser.parse_args()
+
+    if not audio_normalize.ffmpeg_available():
+        logger.error("❌ ffmpeg not found on PATH")
+        sys.exit(1)
+
+    stt_client = None
+    if args.stt:
+        api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not api_key:
+            logger.error("❌ ELEVENLABS_API_KEY is required for --stt")
+            sys.exit(1)
+        stt_client = ElevenLabsSTT(api_key, model=os.getenv("ELEVENLABS_MODEL", "scribe_v1"))
+
+    samples = collect_samples(args.paths)
+    logger.info(f"🔄 Benchmarking {len(samples)} samples, formats={args.formats}, stt={args.stt}")
+
+    results = []
+    try:
+        for path in samples:
+            try:
+                results.append(await benchmark_file(path, args.formats, args.sample_rate, args.bitrate, stt_client))
+            except Exception as e:
+                logger.error(f"❌ {path}: {e}")
+    finally:
+        if stt_client:
+            await stt_client.aclose()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {"formats": args.formats, "sample_rate": args.sample_rate, "bitrate": args.bitrate, "stt": args.stt},
+        "summary": summarize(results, args.formats),
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    logger.info("📊 Summary:")
+    for key, value in report["summary"].items():
+        logger.info(f"  {key}: {value}")
+    logger.info(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
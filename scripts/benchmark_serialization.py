@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark: response serialization, FastAPI default path vs. fast path
+
+Times turning already-loaded rows into response bytes, no database and no
+HTTP, for the two heaviest responses:
+
+    word-events     GET /v1/analyses/{id}/word-events with --events events
+                    before: model_dump() + WordEventResponse(**) per event,
+                            jsonable_encoder + json.dumps (the response cache body)
+                    after:  plain dicts, one precompiled TypeAdapter validate + dump_json
+    analyses-list   GET /v1/analyses/ with --rows rows
+                    before: AnalysisSummary per row, FastAPI's serialize_response
+                            against response_model + JSONResponse.render
+                    after:  AnalysisSummary per row, typed_json (app/utils/fast_json.py)
+
+Both paths are checked to produce the same JSON before timing. p50/p95/p99
+per path are reported and saved as JSON.
+
+Usage:
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --events 5000 --rows 100 --runs 200
+    python scripts/benchmark_serialization.py --output serialization_benchmark.json
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from loguru import logger
+
+# Add project root and backend to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "backend"))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+# App imports set up the app's logging; the script's own setup below replaces it
+from app.models.documents import WordEventDoc
+from app.routers.analyses import AnalysisSummary, _list_view_summary
+from app.schemas import WordEventResponse
+from app.utils.fast_json import typed_json
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99, mean and max"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p):
+        index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+        return round(ordered[index], 3)
+
+    return {
+        "p50": rank(50), "p95": rank(95), "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 3), "max": round(ordered[-1], 3)
+    }
+
+
+def word_events(count: int):
+    """WordEventDoc objects shaped as get_analysis_events returns them"""
+    analysis_id = ObjectId()
+    kinds = ["correct"] * 7 + ["missing", "extra", "substitution"]
+    return [
+        WordEventDoc.model_construct(
+            id=f"{analysis_id}-w{position}", analysis_id=analysis_id, position=position,
+            ref_token=f"kelime{position}", hyp_token=f"kelime{position}", type=kinds[position % len(kinds)],
+            sub_type="harf_değiştirme" if position % 10 == 9 else None,
+            timing={"start_ms": position * 400.0, "end_ms": position * 400.0 + 350.0},
+            char_diff=1 if position % 10 == 9 else None
+        )
+        for position in range(count)
+    ]
+
+
+def list_rows(count: int):
+    """analysis_list_view rows"""
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "_id": ObjectId(), "student_id": ObjectId(), "student_name": "Ayşe Yılmaz", "text_id": ObjectId(),
+            "text_title": "Kırmızı Top", "text_grade": 2, "audio_id": ObjectId(), "audio_name": f"kayit_{i}.m4a",
+            "audio_size_bytes": 1024 * 1024, "audio_duration_sec": 61.5, "status": "done",
+            "created_at": created_at - timedelta(minutes=i), "wer": 0.12, "accuracy": 88.0, "wpm": 74.5,
+            "counts": {"correct": 90, "missing": 4, "extra": 2, "substitution": 4}
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_json_body(content) -> bytes:
+    """Response cache body before app/utils/fast_json.py"""
+    return json.dumps(
+        jsonable_encoder(content, custom_encoder={ObjectId: str}),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+async def measure(events: int, rows: int, runs: int):
+    """Latencies (ms) per path"""
+    docs = word_events(events)
+    view_rows = list_rows(rows)
+    list_field = create_response_field(name="Response_get_analyses", type_=List[AnalysisSummary], mode="serialization")
+
+    def words_before():
+        return legacy_json_body([
+            WordEventResponse(**{**event.model_dump(), "id": str(event.id), "analysis_id": str(event.analysis_id)})
+            for event in docs
+        ])
+
+    def words_after():
+        return typed_json(List[WordEventResponse], [
+            {
+                "id": str(event.id), "analysis_id": str(event.analysis_id), "position": event.position,
+                "ref_token": event.ref_token, "hyp_token": event.hyp_token, "type": event.type,
+                "sub_type": event.sub_type, "timing": event.timing, "char_diff": event.char_diff
+            }
+            for event in docs
+        ])
+
+    async def list_before():
+        content = await serialize_response(field=list_field, response_content=[_list_view_summary(row) for row in view_rows])
+        return JSONResponse(content).body
+
+    async def list_after():
+        return typed_json(List[AnalysisSummary], [_list_view_summary(row) for row in view_rows])
+
+    if json.loads(words_before()) != json.loads(words_after()):
+        raise RuntimeError("word-events bodies differ")
+    if json.loads(await list_before()) != json.loads(await list_after()):
+        raise RuntimeError("analyses-list bodies differ")
+
+    results: Dict[str, List[float]] = {}
+    for run in range(runs):
+        for name, path in (("word_events_before", words_before), ("word_events_after", words_after)):
+            started = time.perf_counter()
+            path()
+            results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        for name, path in (("analyses_list_before", list_before), ("analyses_list_after", list_after)):
+            started = time.perf_counter()
+            await path()
+            results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization before/after the fast JSON path")
+    parser.add_argument("--events", type=int, default=2000, help="Word events of the word-events response")
+    parser.add_argument("--rows", type=int, default=100, help="Rows of the analyses-list response")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--output", default="serialization_benchmark.json", help="Where to save the results")
+
+    args = parser.parse_args()
+
+    logger.info(f"🔄 Measuring {args.runs} runs: {args.events} word events, {args.rows} list rows")
+    results = await measure(args.events, args.rows, args.runs)
+
+    summary = {name: percentiles(values) for name, values in results.items()}
+    for name in ("word_events", "analyses_list"):
+        before, after = summary[f"{name}_before"]["p50"], summary[f"{name}_after"]["p50"]
+        summary[f"{name}_speedup_p50"] = round(before / after, 2) if after else None
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {"events": args.events, "rows": args.rows, "runs": args.runs},
+        "summary": summary
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    logger.info("📊 Summary (ms):")
+    for key, value in summary.items():
+        logger.info(f"  {key}: {value}")
+    logger.info(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
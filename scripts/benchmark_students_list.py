@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of the students list (GET /v1/students/)
+
+Seeds a throwaway database with N students (default 100k) with Turkish
+names, creates the StudentDoc indexes and times, --runs times each:
+
+    count       total of an unfiltered and a filtered list:
+                count_documents / estimated count vs. loading every match
+    search      name search: name_search prefix vs. the previous
+                unanchored case-insensitive $regex on first/last name
+    pages       walking --pages pages: keyset cursor vs. skip()
+    endpoint    get_students() as served, first page and a search
+
+p50/p95/p99 per measurement are reported and saved as JSON. The endpoint
+function is called directly (no HTTP, no RBAC).
+
+The seeded database is dropped afterwards unless --keep is given; reuse it
+with --skip-seed. Never point --mongo-db at a real database.
+
+Usage:
+    python scripts/benchmark_students_list.py
+    python scripts/benchmark_students_list.py --students 100000 --runs 20 --keep
+    python scripts/benchmark_students_list.py --skip-seed --output students_benchmark.json
+"""
+
+import asyncio
+import argparse
+import inspect
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+# Add project root and backend to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "backend"))
+
+# App imports set up the app's logging; the script's own setup below replaces it
+from app.routers.students import get_students
+from app.utils.text_tokenizer import name_search_terms
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+SEED_BATCH = 10000
+FIRST_NAMES = ["Ayşe", "Fatma", "Zeynep", "Elif", "Şeyma", "Gülşen", "İpek", "Öykü", "Ümran", "Çağla",
+               "Mehmet", "Ahmet", "Mustafa", "Ömer", "İbrahim", "Çağrı", "Uğur", "Işık", "Gökhan", "Barış"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Özdemir", "Arslan",
+              "Doğan", "Kılıç", "Aslan", "Çetin", "Koç", "Kurt", "Özkan", "Şimşek", "Güneş", "Işıklı"]
+SEARCHES = ["ayş", "ÇAĞ", "isik", "yıl", "öz", "mehmet kay"]
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99, mean and max"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p):
+        index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+        return round(ordered[index], 2)
+
+    return {
+        "p50": rank(50), "p95": rank(95), "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 2), "max": round(ordered[-1], 2)
+    }
+
+
+def endpoint_defaults(endpoint) -> Dict[str, Any]:
+    """Default values of an endpoint's Query() parameters, for calling it as a plain function"""
+    return {
+        name: param.default.default for name, param in inspect.signature(endpoint).parameters.items()
+        if hasattr(param.default, "default")
+    }
+
+
+async def seed(db, students: int):
+    """Students spread over two years, name_search filled as StudentDoc does on save"""
+    start = datetime.now(timezone.utc) - timedelta(days=730)
+    for offset in range(0, students, SEED_BATCH):
+        rows = []
+        for i in range(offset, min(offset + SEED_BATCH, students)):
+            first_name, last_name = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+            rows.append({
+                "first_name": first_name, "last_name": last_name, "grade": random.randint(0, 6),
+                "registration_number": i, "created_by": "benchmark", "is_active": random.random() > 0.1,
+                "created_at": start + timedelta(minutes=i * 10), "updated_at": None,
+                "name_search": name_search_terms(first_name, last_name)
+            })
+        await db.students.insert_many(rows, ordered=False)
+        logger.info(f"🌱 Seeded {offset + len(rows)}/{students} students")
+
+
+async def timed(results: Dict[str, List[float]], name: str, coroutine):
+    started = time.perf_counter()
+    value = await coroutine
+    results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    return value
+
+
+async def measure(db, runs: int, pages: int, page_size: int, user):
+    """Latencies (ms) per measurement"""
+    import re
+
+    endpoint = get_students.__wrapped__  # without require_permission
+    defaults = endpoint_defaults(endpoint)
+    results: Dict[str, List[float]] = {}
+    filtered = {"grade": 3, "is_active": True}
+
+    for run in range(runs):
+        await timed(results, "count_all_legacy", db.students.find({}, {"_id": 1}).to_list(None))
+        await timed(results, "count_all_estimated", db.students.estimated_document_count())
+        await timed(results, "count_filtered_legacy", db.students.find(filtered).to_list(None))
+        await timed(results, "count_filtered", db.students.count_documents(filtered))
+
+        for search in SEARCHES:
+            legacy = {"$or": [{"first_name": {"$regex": search, "$options": "i"}},
+                              {"last_name": {"$regex": search, "$options": "i"}}]}
+            await timed(results, "search_legacy", db.students.find(legacy).sort("created_at", -1).limit(page_size).to_list(None))
+            prefix = {"$and": [{"name_search": {"$regex": "^" + re.escape(term)}} for term in name_search_terms(search)]}
+            await timed(results, "search_prefix", db.students.find(prefix).sort([("created_at", -1), ("_id", -1)]).limit(page_size).to_list(None))
+
+        cursor = None
+        for page in range(1, pages + 1):
+            await timed(results, "page_skip", db.students.find({}).sort("created_at", -1).skip((page - 1) * page_size).limit(page_size).to_list(None))
+            response = await timed(results, "page_keyset_endpoint", endpoint(
+                **{**defaults, "page_size": page_size, "cursor": cursor, "current_user": user}))
+            cursor = json.loads(response.body)["next_cursor"]
+            if not cursor:
+                break
+
+        await timed(results, "endpoint_first_page", endpoint(**{**defaults, "page_size": page_size, "current_user": user}))
+        for search in SEARCHES:
+            await timed(results, "endpoint_search", endpoint(**{**defaults, "page_size": page_size, "search": search, "current_user": user}))
+        logger.info(f"⏱️ Run {run + 1}/{runs} done")
+    return results
+
+
+async def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Benchmark the students list on a seeded database")
+    parser.add_argument("--students", type=int, default=100000, help="Students to seed")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50, help="Pages to walk per run")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--keep", action="store_true", help="Do not drop the seeded database")
+    parser.add_argument("--mongo-uri", default=settings.mongo_uri, help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi_benchmark", help="Throwaway database to seed")
+    parser.add_argument("--output", default="students_list_benchmark.json", help="Where to save the results")
+
+    args = parser.parse_args()
+
+    if args.mongo_db == settings.mongo_db:
+        logger.error(f"❌ Refusing to seed the application database {args.mongo_db}")
+        sys.exit(1)
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from app.models.student import StudentDoc
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+
+    try:
+        if not args.skip_seed:
+            logger.info(f"🔄 Seeding {args.students} students into {args.mongo_db}")
+            await seed(db, args.students)
+        # init_beanie creates the model indexes, name_search and the keyset ones included
+        await init_beanie(database=db, document_models=[StudentDoc])
+
+        total = await db.students.estimated_document_count()
+        logger.info(f"🔄 Measuring on {total} students, {args.runs} runs")
+        results = await measure(db, args.runs, args.pages, args.page_size, user=None)
+
+        summary = {name: percentiles(values) for name, values in results.items()}
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "settings": {"students": total, "page_size": args.page_size, "pages": args.pages, "runs": args.runs},
+            "summary": summary
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        logger.info("📊 Summary (ms):")
+        for key, value in summary.items():
+            logger.info(f"  {key}: {value}")
+        logger.info(f"✅ Results saved to {args.output}")
+    finally:
+        if not args.keep and not args.skip_seed:
+            await client.drop_database(args.mongo_db)
+            logger.info(f"🗑️ Dropped {args.mongo_db}")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Bulk re-analysis: recompute word/pause events and summaries of stored analyses
+
+recompute_analysis.py --all-done loads every analysis with Beanie and
+recomputes it one round trip at a time. This tool is for full recomputes
+after an alignment or scoring change:
+
+- analysis ids are streamed from a Motor cursor in _id order, so memory
+  stays flat however many analyses there are
+- sessions, STT results and texts are fetched per batch with $in queries,
+  texts are cached for the whole run
+- alignment runs in a spawn process pool (worker/services/analysis.py,
+  the same code the worker runs), while the next batch is being read
+- each batch is written with unordered bulk operations: delete_many +
+  insert_many for word_events/pause_events, ReplaceOne upserts for
+  analysis_events and UpdateOne $set for the summaries and the scores in
+  analysis_list_view
+- after every batch the last _id is saved to a checkpoint file; --resume
+  continues after it
+- cached API responses of every rewritten analysis are invalidated
+  (content version in Redis, see backend/app/response_cache.py)
+- --max-per-sec caps the analyses recomputed per second to protect the
+  production database
+
+Usage:
+    python scripts/bulk_reanalyze.py --dry-run
+    python scripts/bulk_reanalyze.py --processes 8 --batch-size 200 --max-per-sec 100
+    python scripts/bulk_reanalyze.py --text-id 64f... --event-storage both
+    python scripts/bulk_reanalyze.py --resume          # continue after the last checkpoint
+"""
+
+import asyncio
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.services import analysis, alignment, event_columns, list_view
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+EVENT_STORAGES = ("documents", "columnar", "both")
+ANALYSIS_VERSION_KEY_PREFIX = "analysis:version:"  # backend/app/response_cache.py
+
+
+def _quiet_process():
+    """Pool initializer: the per-analysis INFO/DEBUG logs of the scoring code would dominate the runtime"""
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+
+class RateLimiter:
+    """Spaces out batches so that on average at most `rate` items start per second"""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self.next_at = 0.0
+
+    async def acquire(self, count: int) -> float:
+        """Wait until `count` more items may start; returns the seconds waited"""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self.next_at = max(self.next_at, now)
+        wait = self.next_at - now
+        self.next_at += count / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class Checkpoint:
+    """Last processed analysis _id and running counters, saved as JSON after every batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state = {"last_id": None, "processed": 0, "failed": 0, "failed_ids": []}
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            self.state.update(json.load(f))
+        return True
+
+    @property
+    def last_id(self) -> Optional[ObjectId]:
+        return ObjectId(self.state["last_id"]) if self.state["last_id"] else None
+
+    def save(self, last_id, processed: int, failed_ids: List[str]):
+        self.state.update({
+            "last_id": str(last_id),
+            "processed": self.state["processed"] + processed,
+            "failed": self.state["failed"] + len(failed_ids),
+            "failed_ids": self.state["failed_ids"] + failed_ids,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+        # Write-then-rename, so an interrupted run never leaves a truncated checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BulkReanalyzer:
+    def __init__(self, db, executor, batch_size: int = 100, event_storage: str = "documents",
+                 long_pause_ms: int = 500, max_per_sec: Optional[float] = None, dry_run: bool = False,
+                 checkpoint: Optional[Checkpoint] = None, redis=None):
+        self.db = db
+        self.redis = redis
+        self.executor = executor
+        self.batch_size = batch_size
+        self.per_event = event_storage in ("documents", "both")
+        self.columnar = event_storage in ("columnar", "both")
+        self.long_pause_ms = long_pause_ms
+        self.limiter = RateLimiter(max_per_sec)
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint
+        self.texts = {}
+        self.stats = {
+            'analyses_recomputed': 0,
+            'analyses_skipped': 0,
+            'analyses_failed': 0,
+            'word_events_written': 0,
+            'pause_events_written': 0,
+            'batches': 0,
+            'rate_limited_sec': 0.0,
+            'analyses_per_sec': 0.0
+        }
+
+    def query(self, status: str = "done", session_ids=None) -> Dict[str, Any]:
+        """Filter of the analyses to recompute, after the checkpoint if there is one"""
+        query = {"status": status}
+        if session_ids is not None:
+            query["session_id"] = {"$in": session_ids}
+        if self.checkpoint and self.checkpoint.last_id:
+            query["_id"] = {"$gt": self.checkpoint.last_id}
+        return query
+
+    async def batches(self, query: Dict[str, Any]):
+        """Analyses from a cursor in _id order, `batch_size` at a time"""
+        cursor = self.db.analyses.find(query, {"_id": 1, "session_id": 1, "pipeline.stt_result_id": 1})
+        cursor = cursor.sort("_id", 1).batch_size(self.batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _reference(self, text_ids) -> None:
+        """Fill the text cache with reference tokens and grades"""
+        missing = [text_id for text_id in set(text_ids) if text_id not in self.texts]
+        if not missing:
+            return
+        async for text in self.db.texts.find({"_id": {"$in": missing}}, {"canonical.tokens": 1, "body": 1, "grade": 1}):
+            # Same fallback as the worker when canonical tokens are missing
+            tokens = (text.get("canonical") or {}).get("tokens") or alignment.tokenize_tr(text.get("body") or "")
+            self.texts[text["_id"]] = {"tokens": tokens, "grade": text.get("grade")}
+
+    async def load_inputs(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Reference tokens and STT words of a batch, with one $in query per collection
+
+        Returns:
+            [{"analysis_id", "ref_tokens", "words", "grade"}, ...]; analyses
+            without session, STT result or text are counted as skipped
+        """
+        sessions = {}
+        async for session in self.db.reading_sessions.find({"_id": {"$in": [a["session_id"] for a in batch]}}, {"text_id": 1}):
+            sessions[session["_id"]] = session
+
+        # The STT result the analysis was built from, else the session's latest
+        pinned = [ObjectId(a["pipeline"]["stt_result_id"]) for a in batch if (a.get("pipeline") or {}).get("stt_result_id")]
+        by_id, by_session = {}, {}
+        if pinned:
+            async for stt in self.db.stt_results.find({"_id": {"$in": pinned}}, {"words": 1}):
+                by_id[stt["_id"]] = stt
+        unpinned = [a["session_id"] for a in batch if not (a.get("pipeline") or {}).get("stt_result_id")]
+        if unpinned:
+            cursor = self.db.stt_results.find({"session_id": {"$in": unpinned}}, {"session_id": 1, "words": 1})
+            async for stt in cursor.sort("created_at", 1):
+                by_session[stt["session_id"]] = stt
+
+        await self._reference(session["text_id"] for session in sessions.values())
+
+        inputs = []
+        for doc in batch:
+            session = sessions.get(doc["session_id"])
+            stt_result_id = (doc.get("pipeline") or {}).get("stt_result_id")
+            stt = by_id.get(ObjectId(stt_result_id)) if stt_result_id else by_session.get(doc["session_id"])
+            text = self.texts.get(session["text_id"]) if session else None
+            if not (session and stt and text):
+                self.stats['analyses_skipped'] += 1
+                logger.warning(f"⚠️ Skipping analysis {doc['_id']}: missing {'session' if not session else 'STT result' if not stt else 'text'}")
+                continue
+            inputs.append({
+                "analysis_id": doc["_id"],
+                "ref_tokens": text["tokens"],
+                "words": [{"word": w["word"], "start": w["start"], "end": w["end"], "confidence": w.get("confidence")}
+                          for w in stt.get("words", [])],
+                "grade": text["grade"]
+            })
+        return inputs
+
+    async def compute(self, inputs: List[Dict[str, Any]]):
+        """Run analysis.reanalyze for a batch in the process pool"""
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, analysis.reanalyze, item["analysis_id"], item["ref_tokens"],
+                                 item["words"], self.long_pause_ms, item["grade"])
+            for item in inputs
+        ), return_exceptions=True)
+
+        done, failed_ids = [], []
+        for item, result in zip(inputs, results):
+            if isinstance(result, Exception):
+                failed_ids.append(str(item["analysis_id"]))
+                logger.error(f"❌ Failed to recompute analysis {item['analysis_id']}: {result}")
+            else:
+                done.append((item["analysis_id"], result))
+        return done, failed_ids
+
+    async def write(self, results) -> None:
+        """Write the events and summaries of a batch with bulk operations"""
+        if not results:
+            return
+        analysis_ids = [analysis_id for analysis_id, _ in results]
+        word_rows = [row for _, result in results for row in result["word_rows"]]
+        pause_rows = [row for _, result in results for row in result["pause_rows"]]
+        now = datetime.now(timezone.utc)
+
+        async def replace(collection, rows):
+            await collection.delete_many({"analysis_id": {"$in": analysis_ids}})
+            if rows:
+                await collection.insert_many(rows, ordered=False)
+
+        writes = []
+        if self.per_event:
+            writes += [replace(self.db.word_events, word_rows), replace(self.db.pause_events, pause_rows)]
+        if self.columnar:
+            operations = []
+            for analysis_id, result in results:
+                doc = event_columns.encode_events(analysis_id, result["word_rows"], result["pause_rows"])
+                doc["created_at"] = now
+                operations.append(ReplaceOne({"analysis_id": analysis_id}, doc, upsert=True))
+            writes.append(self.db.analysis_events.bulk_write(operations, ordered=False))
+        else:
+            # The API reads the columnar copy first, so an old one would hide the new events
+            writes.append(self.db.analysis_events.delete_many({"analysis_id": {"$in": analysis_ids}}))
+        writes.append(self.db.analyses.bulk_write([
+            UpdateOne({"_id": analysis_id}, {"$set": {"summary": result["summary"], "pipeline.recomputed_at": now}})
+            for analysis_id, result in results
+        ], ordered=False))
+        writes.append(self.db.analysis_list_view.bulk_write([
+            UpdateOne({"_id": analysis_id}, {"$set": list_view.score_fields(result["summary"])})
+            for analysis_id, result in results
+        ], ordered=False))
+        await asyncio.gather(*writes)
+        await self.invalidate(analysis_ids)
+
+        self.stats['word_events_written'] += len(word_rows)
+        self.stats['pause_events_written'] += len(pause_rows)
+
+    async def invalidate(self, analysis_ids) -> None:
+        """Bump the response cache version of rewritten analyses"""
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for analysis_id in analysis_ids:
+                pipe.incr(ANALYSIS_VERSION_KEY_PREFIX + str(analysis_id))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not invalidate cached responses: {e}")
+
+    async def run(self, query: Dict[str, Any]):
+        total = await self.db.analyses.count_documents(query)
+        logger.info(f"🔄 Recomputing {total} analyses in batches of {self.batch_size}...")
+
+        # Reading (cursor + $in lookups) of the next batch overlaps alignment and writes of this one
+        queue = asyncio.Queue(maxsize=2)
+
+        async def read():
+            try:
+                async for batch in self.batches(query):
+                    await queue.put((batch, await self.load_inputs(batch)))
+            finally:
+                await queue.put(None)
+
+        reader = asyncio.create_task(read())
+        start = time.monotonic()
+        processed = 0
+        try:
+            while (item := await queue.get()) is not None:
+                batch, inputs = item
+                self.stats['rate_limited_sec'] += await self.limiter.acquire(len(batch))
+
+                results, failed_ids = await self.compute(inputs)
+                if not self.dry_run:
+                    await self.write(results)
+                    if self.checkpoint:
+                        self.checkpoint.save(batch[-1]["_id"], len(batch), failed_ids)
+
+                processed += len(batch)
+                self.stats['batches'] += 1
+                self.stats['analyses_recomputed'] += len(results)
+                self.stats['analyses_failed'] += len(failed_ids)
+
+                elapsed = time.monotonic() - start
+                rate = processed / elapsed if elapsed else 0.0
+                self.stats['analyses_per_sec'] = round(rate, 2)
+                eta = (total - processed) / rate if rate else 0.0
+                logger.info(f"  {processed}/{total} analyses, {rate:.1f}/s, ETA {eta:.0f}s")
+        finally:
+            reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+        logger.info("📊 Re-analysis Statistics:")
+        for key, value in self.stats.items():
+            logger.info(f"  {key}: {round(value, 2) if isinstance(value, float) else value}")
+
+        if self.dry_run:
+            logger.info("🔍 DRY RUN COMPLETED - No changes were made to the database")
+        else:
+            logger.info("✅ Re-analysis completed successfully!")
+
+
+async def main():
+    from worker.config import settings
+
+    parser = argparse.ArgumentParser(description="Recompute events and summaries of stored analyses in bulk")
+    parser.add_argument("--dry-run", action="store_true", help="Recompute but write nothing")
+    parser.add_argument("--status", default="done", help="Status of the analyses to recompute")
+    parser.add_argument("--text-id", help="Only analyses of sessions reading this text")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="Alignment processes")
+    parser.add_argument("--batch-size", type=int, default=100, help="Analyses per read/write batch")
+    parser.add_argument("--max-per-sec", type=float, help="Upper bound on analyses recomputed per second")
+    parser.add_argument("--event-storage", choices=EVENT_STORAGES, default=settings.event_storage,
+                        help="Where events are written (default: EVENT_STORAGE of the worker)")
+    parser.add_argument("--checkpoint", default="bulk_reanalyze.checkpoint.json", help="Checkpoint file")
+    parser.add_argument("--resume", action="store_true", help="Continue after the last checkpointed analysis")
+    parser.add_argument("--redis-url", default=settings.redis_url or "redis://redis:6379/0",
+                        help="Redis of the API, for response cache invalidation")
+    parser.add_argument("--mongo-uri", default=settings.mongo_uri, help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default=settings.mongo_db, help="MongoDB database name")
+
+    args = parser.parse_args()
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+    import redis.asyncio as aioredis
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+    redis = aioredis.from_url(args.redis_url)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.resume:
+        if checkpoint.load():
+            logger.info(f"⏩ Resuming after analysis {checkpoint.state['last_id']} ({checkpoint.state['processed']} done)")
+        else:
+            logger.warning(f"⚠️ No checkpoint at {args.checkpoint}, starting from the beginning")
+    elif os.path.exists(args.checkpoint) and not args.dry_run:
+        logger.error(f"❌ Checkpoint {args.checkpoint} exists; use --resume or remove it")
+        sys.exit(1)
+
+    # spawn: no forked copies of the Motor client's sockets and threads
+    executor = ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_quiet_process)
+    try:
+        reanalyzer = BulkReanalyzer(
+            db, executor, batch_size=args.batch_size, event_storage=args.event_storage,
+            long_pause_ms=settings.long_pause_ms, max_per_sec=args.max_per_sec, dry_run=args.dry_run,
+            checkpoint=checkpoint, redis=redis
+        )
+        session_ids = None
+        if args.text_id:
+            session_ids = await db.reading_sessions.distinct("_id", {"text_id": ObjectId(args.text_id)})
+        await reanalyzer.run(reanalyzer.query(args.status, session_ids=session_ids))
+    finally:
+        executor.shutdown()
+        client.close()
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: uploads -> RQ -> worker -> finished analyses
+
+Pushes N uploads through POST /v1/upload/ with C in flight at a time and
+polls GET /v1/upload/status/{id} until every analysis is done or failed.
+Reports throughput and p50/p95/p99 of:
+
+    upload_ms       POST /v1/upload/ round trip (GCS upload + enqueue)
+    end_to_end_ms   upload start -> status "done" seen by the poller
+    processing_ms   analysis started_at -> finished_at (worker clock)
+
+Run it against a stack whose worker talks to scripts/stt_standin.py
+(ELEVENLABS_API_URL) so no ElevenLabs quota is used. With --standin the
+reference text is registered there as the default text and the stand-in's
+counters are included in the report. Set STT_CACHE_ENABLED=false on the
+worker when reusing the same sample files, otherwise repeated audio is
+served from the STT cache. The upload endpoint is rate limited per IP;
+raise UPLOAD_RATE_LIMIT on the API (e.g. "10000/minute") for the test.
+
+Usage:
+    python scripts/load_test.py samples/ --text-id 64f... -n 100 -c 10 --standin http://localhost:8900
+    python scripts/load_test.py samples/a.m4a --text-id 64f... --text-file metin.txt -n 20 --output load.json
+"""
+
+import asyncio
+import argparse
+import json
+import mimetypes
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from loguru import logger
+
+import httpx
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+AUDIO_EXTENSIONS = {".m4a", ".mp3", ".wav", ".aac", ".ogg", ".flac", ".webm", ".mp4", ".3gp"}
+FINAL_STATUSES = {"done", "failed"}
+
+
+def collect_samples(paths):
+    """Audio files from the given files and directories"""
+    samples = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                    samples.append(os.path.join(path, name))
+        else:
+            samples.append(path)
+    return samples
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99, mean and max"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p):
+        index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+        return round(ordered[index], 2)
+
+    return {
+        "p50": rank(50), "p95": rank(95), "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 2), "max": round(ordered[-1], 2)
+    }
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def run_one(client: httpx.AsyncClient, index: int, sample: Dict, text_id: str,
+                  poll_interval: float, timeout: float) -> Dict:
+    """Upload one sample and wait until its analysis is finished"""
+    entry = {"index": index, "file": sample["name"]}
+    start = time.time()
+    try:
+        response = await client.post(
+            "/v1/upload/",
+            data={"text_id": text_id},
+            files={"file": (sample["name"], sample["content"], sample["content_type"])}
+        )
+        entry["upload_ms"] = round((time.time() - start) * 1000, 2)
+        if response.status_code != 200:
+            entry.update({"status": "upload_failed", "error": f"{response.status_code}: {response.text[:200]}"})
+            return entry
+        analysis_id = response.json()["analysis_id"]
+        entry["analysis_id"] = analysis_id
+
+        status = {}
+        while time.time() - start < timeout:
+            await asyncio.sleep(poll_interval)
+            poll = await client.get(f"/v1/upload/status/{analysis_id}")
+            if poll.status_code != 200:
+                continue
+            status = poll.json()
+            if status.get("status") in FINAL_STATUSES:
+                break
+
+        entry["status"] = status.get("status", "unknown")
+        if entry["status"] not in FINAL_STATUSES:
+            entry.update({"status": "timeout", "error": f"not finished after {timeout}s (last status {status.get('status')})"})
+            return entry
+        entry["end_to_end_ms"] = round((time.time() - start) * 1000, 2)
+        started, finished = _parse_time(status.get("started_at")), _parse_time(status.get("finished_at"))
+        if started and finished:
+            entry["processing_ms"] = round((finished - started).total_seconds() * 1000, 2)
+        if status.get("error"):
+            entry["error"] = status["error"]
+    except httpx.HTTPError as e:
+        entry.update({"status": "request_failed", "error": str(e)})
+    return entry
+
+
+def summarize(results: List[Dict], wall_sec: float) -> Dict:
+    """Throughput, status counts and latency percentiles"""
+    done = [r for r in results if r.get("status") == "done"]
+    counts = {}
+    for r in results:
+        counts[r.get("status", "unknown")] = counts.get(r.get("status", "unknown"), 0) + 1
+    return {
+        "uploads": len(results),
+        "statuses": counts,
+        "wall_sec": round(wall_sec, 2),
+        "throughput_per_min": round(len(done) / wall_sec * 60, 2) if wall_sec else 0.0,
+        "upload_ms": percentiles([r["upload_ms"] for r in results if "upload_ms" in r]),
+        "end_to_end_ms": percentiles([r["end_to_end_ms"] for r in done]),
+        "processing_ms": percentiles([r["processing_ms"] for r in done if "processing_ms" in r])
+    }
+
+
+async def fetch_text(client: httpx.AsyncClient, text_id: str, token: Optional[str]) -> Optional[str]:
+    """Body of the reference text (needs a token with text:view)"""
+    if not token:
+        return None
+    response = await client.get(f"/v1/texts/{text_id}", headers={"Authorization": f"Bearer {token}"})
+    if response.status_code != 200:
+        logger.warning(f"⚠️ Could not fetch text {text_id}: {response.status_code}")
+        return None
+    return response.json().get("body")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test through upload, RQ and the worker")
+    parser.add_argument("paths", nargs="+", help="Sample audio files or directories")
+    parser.add_argument("--api", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--text-id", required=True, help="Text the uploads are analyzed against")
+    parser.add_argument("-n", "--uploads", type=int, default=50, help="Total uploads")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="Uploads in flight at a time")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=900.0, help="Per-analysis timeout in seconds")
+    parser.add_argument("--standin", help="STT stand-in base URL, e.g. http://localhost:8900")
+    parser.add_argument("--text-file", help="Reference text for the stand-in (default: fetched with --token)")
+    parser.add_argument("--token", default=os.getenv("LOAD_TEST_TOKEN"), help="Bearer token to fetch the text body")
+    parser.add_argument("--output", default="load_test.json", help="Where to save the results")
+
+    args = parser.parse_args()
+
+    samples = []
+    for path in collect_samples(args.paths):
+        with open(path, "rb") as f:
+            samples.append({
+                "name": os.path.basename(path),
+                "content": f.read(),
+                "content_type": mimetypes.guess_type(path)[0] or "audio/mpeg"
+            })
+    if not samples:
+        logger.error("❌ No sample audio files found")
+        sys.exit(1)
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.api, timeout=120.0, limits=limits) as client:
+        standin = None
+        if args.standin:
+            standin = httpx.AsyncClient(base_url=args.standin, timeout=10.0)
+            text = None
+            if args.text_file:
+                with open(args.text_file, encoding="utf-8") as f:
+                    text = f.read()
+            else:
+                text = await fetch_text(client, args.text_id, args.token)
+            if text:
+                await standin.put("/standin/text", json={"text": text})
+                logger.info(f"📝 Registered reference text ({len(text.split())} words) with the stand-in")
+            await standin.post("/standin/stats/reset")
+
+        logger.info(f"🔄 {args.uploads} uploads of {len(samples)} samples, {args.concurrency} in flight, against {args.api}")
+        semaphore = asyncio.Semaphore(args.concurrency)
+        finished = 0
+
+        async def bounded(index):
+            nonlocal finished
+            async with semaphore:
+                entry = await run_one(client, index, samples[index % len(samples)], args.text_id,
+                                      args.poll_interval, args.timeout)
+            finished += 1
+            if finished % max(1, args.uploads // 10) == 0 or entry["status"] != "done":
+                logger.info(f"  {finished}/{args.uploads} finished (#{index}: {entry['status']}{', ' + entry['error'] if entry.get('error') else ''})")
+            return entry
+
+        start = time.time()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.uploads)))
+        wall_sec = time.time() - start
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "settings": {"api": args.api, "text_id": args.text_id, "uploads": args.uploads,
+                         "concurrency": args.concurrency, "samples": [s["name"] for s in samples]},
+            "summary": summarize(results, wall_sec),
+            "results": results
+        }
+        if standin:
+            report["standin"] = (await standin.get("/standin/stats")).json()
+            await standin.aclose()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    logger.info("📊 Summary:")
+    for key, value in report["summary"].items():
+        logger.info(f"  {key}: {value}")
+    logger.info(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
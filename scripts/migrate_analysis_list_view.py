@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Migration: build the analysis_list_view read model
+
+Writes one analysis_list_view document per analysis (see
+worker/services/list_view.py) from the analyses, reading_sessions, texts,
+audio_files and students collections. GET /v1/analyses/ reads only this
+collection, so run it once when deploying the read model; afterwards the
+worker and the API keep the rows up to date. Re-running it repairs rows
+that a failed best-effort write left stale.
+
+Analyses are read in _id order in batches; the related documents of a
+batch are fetched with projected $in queries and the rows are written with
+one unordered bulk_write of ReplaceOne upserts.
+
+Usage:
+    python scripts/migrate_analysis_list_view.py --dry-run
+    python scripts/migrate_analysis_list_view.py --batch-size 1000
+    python scripts/migrate_analysis_list_view.py --prune   # also drop rows of deleted analyses
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from loguru import logger
+
+from pymongo import ReplaceOne
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.services import list_view
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+ANALYSIS_PROJECTION = {
+    "session_id": 1, "student_id": 1, "status": 1, "created_at": 1, "started_at": 1, "finished_at": 1,
+    "audio_duration_sec": 1, "summary.wer": 1, "summary.accuracy": 1, "summary.wpm": 1, "summary.counts": 1
+}
+
+
+class ListViewMigrator:
+    def __init__(self, db, batch_size: int = 500, dry_run: bool = False):
+        self.db = db
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.texts = {}  # shared by all batches, there are few texts
+        self.stats = {
+            'rows_written': 0,
+            'analyses_without_session': 0,
+            'rows_pruned': 0,
+            'batches': 0
+        }
+
+    async def _lookup(self, collection, ids, projection):
+        ids = list({doc_id for doc_id in ids if doc_id is not None})
+        if not ids:
+            return {}
+        docs = await collection.find({"_id": {"$in": ids}}, projection).to_list(None)
+        return {doc["_id"]: doc for doc in docs}
+
+    async def rows(self, analyses):
+        """list_view rows of a batch of analyses"""
+        sessions = await self._lookup(self.db.reading_sessions, [a["session_id"] for a in analyses],
+                                      {"text_id": 1, "audio_id": 1})
+        missing_texts = [s["text_id"] for s in sessions.values() if s.get("text_id") not in self.texts]
+        self.texts.update(await self._lookup(self.db.texts, missing_texts, {"title": 1, "grade": 1}))
+        audios = await self._lookup(self.db.audio_files, [s.get("audio_id") for s in sessions.values()],
+                                    {"original_name": 1, "size_bytes": 1, "duration_sec": 1})
+        students = await self._lookup(self.db.students, [a.get("student_id") for a in analyses],
+                                      {"first_name": 1, "last_name": 1})
+
+        rows = []
+        for analysis in analyses:
+            session = sessions.get(analysis["session_id"])
+            if session is None:
+                self.stats['analyses_without_session'] += 1
+                continue
+            rows.append(list_view.list_view_row(
+                analysis, session, self.texts.get(session.get("text_id")),
+                audios.get(session.get("audio_id")), students.get(analysis.get("student_id"))
+            ))
+        return rows
+
+    async def write(self, rows):
+        self.stats['rows_written'] += len(rows)
+        if rows and not self.dry_run:
+            await self.db[list_view.COLLECTION].bulk_write(
+                [ReplaceOne({"_id": row["_id"]}, row, upsert=True) for row in rows], ordered=False
+            )
+
+    async def prune(self):
+        """Remove rows whose analysis no longer exists"""
+        analysis_ids = set(await self.db.analyses.distinct("_id"))
+        stale = [row_id for row_id in await self.db[list_view.COLLECTION].distinct("_id") if row_id not in analysis_ids]
+        self.stats['rows_pruned'] = len(stale)
+        if stale and not self.dry_run:
+            await self.db[list_view.COLLECTION].delete_many({"_id": {"$in": stale}})
+
+    async def run(self, prune: bool = False):
+        total = await self.db.analyses.count_documents({})
+        logger.info(f"🔄 Building list view rows of {total} analyses in batches of {self.batch_size}...")
+
+        batch = []
+        async for analysis in self.db.analyses.find({}, ANALYSIS_PROJECTION).sort("_id", 1).batch_size(self.batch_size):
+            batch.append(analysis)
+            if len(batch) == self.batch_size:
+                await self.write(await self.rows(batch))
+                self.stats['batches'] += 1
+                logger.info(f"⏳ {self.stats['rows_written']}/{total} rows")
+                batch = []
+        if batch:
+            await self.write(await self.rows(batch))
+            self.stats['batches'] += 1
+
+        if prune:
+            await self.prune()
+
+        logger.info("📊 Migration Statistics:")
+        for key, value in self.stats.items():
+            logger.info(f"  {key}: {value}")
+
+        if self.dry_run:
+            logger.info("🔍 DRY RUN COMPLETED - No changes were made to the database")
+        else:
+            logger.info("✅ Migration completed successfully!")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build the analysis_list_view read model")
+    parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode (no changes)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Analyses per read/write batch")
+    parser.add_argument("--prune", action="store_true", help="Delete rows of analyses that no longer exist")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi", help="MongoDB database name")
+
+    args = parser.parse_args()
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+
+    try:
+        migrator = ListViewMigrator(db, batch_size=args.batch_size, dry_run=args.dry_run)
+        await migrator.run(prune=args.prune)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
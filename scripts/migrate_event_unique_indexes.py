@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Migration: unique (analysis_id, position) indexes for word and pause events
+
+Retried analyses used to insert their events a second time. Workers now
+upsert events by position, backed by unique indexes:
+
+    word_events   (analysis_id, position)        word_events_analysis_position_asc
+    pause_events  (analysis_id, after_position)  pause_events_analysis_after_position_asc
+
+Run this once before deploying the new backend/worker. It removes duplicate
+events (keeping the first inserted one) and replaces the old non-unique
+word_events index, otherwise index creation at startup fails.
+
+Usage:
+    python scripts/migrate_event_unique_indexes.py --dry-run
+    python scripts/migrate_event_unique_indexes.py --mongo-uri mongodb://localhost:27017
+"""
+
+import asyncio
+import argparse
+from loguru import logger
+from pymongo import ASCENDING, IndexModel
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+EVENT_INDEXES = {
+    "word_events": ("position", "word_events_analysis_position_asc"),
+    "pause_events": ("after_position", "pause_events_analysis_after_position_asc"),
+}
+
+
+async def remove_duplicates(collection, position_field: str, dry_run: bool) -> int:
+    """Delete all but the first event per (analysis_id, position)"""
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": {"analysis_id": "$analysis_id", "position": f"${position_field}"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+
+    removed = 0
+    async for group in collection.aggregate(pipeline, allowDiskUse=True):
+        duplicate_ids = group["ids"][1:]
+        removed += len(duplicate_ids)
+        if not dry_run:
+            await collection.delete_many({"_id": {"$in": duplicate_ids}})
+
+    logger.info(f"{collection.name}: {removed} duplicate events {'would be ' if dry_run else ''}removed")
+    return removed
+
+
+async def ensure_unique_index(collection, position_field: str, index_name: str, dry_run: bool):
+    """Replace a non-unique index on (analysis_id, position) with a unique one"""
+    indexes = await collection.index_information()
+    key = [("analysis_id", ASCENDING), (position_field, ASCENDING)]
+
+    for name, info in indexes.items():
+        if info["key"] == key and not info.get("unique"):
+            logger.info(f"{collection.name}: dropping non-unique index {name}")
+            if not dry_run:
+                await collection.drop_index(name)
+        elif info["key"] == key and info.get("unique"):
+            logger.info(f"{collection.name}: unique index {name} already exists")
+            return
+
+    logger.info(f"{collection.name}: creating unique index {index_name}")
+    if not dry_run:
+        await collection.create_indexes([IndexModel(key, name=index_name, unique=True)])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Deduplicate events and create unique event indexes")
+    parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode (no changes)")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi", help="MongoDB database name")
+
+    args = parser.parse_args()
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+
+    try:
+        for collection_name, (position_field, index_name) in EVENT_INDEXES.items():
+            collection = db[collection_name]
+            await remove_duplicates(collection, position_field, args.dry_run)
+            await ensure_unique_index(collection, position_field, index_name, args.dry_run)
+
+        if args.dry_run:
+            logger.info("🔍 DRY RUN COMPLETED - No changes were made to the database")
+        else:
+            logger.info("✅ Event indexes migrated successfully!")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Migration: per-word word_events/pause_events -> columnar analysis_events
+
+Builds one analysis_events document per analysis (see
+worker/services/event_columns.py) from its WordEventDoc/PauseEventDoc
+documents. The API reads analysis_events first and falls back to the old
+collections, so this can run while the system is live. Set
+EVENT_STORAGE=columnar on the workers afterwards to stop writing the
+per-word documents.
+
+Usage:
+    python scripts/migrate_events_columnar.py --dry-run
+    python scripts/migrate_events_columnar.py --concurrency 8
+    python scripts/migrate_events_columnar.py --delete-source   # also remove migrated per-word documents
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.services import event_columns
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+class ColumnarMigrator:
+    def __init__(self, db, dry_run: bool = False, delete_source: bool = False, overwrite: bool = False):
+        self.db = db
+        self.dry_run = dry_run
+        self.delete_source = delete_source
+        self.overwrite = overwrite
+        self.stats = {
+            'analyses_migrated': 0,
+            'analyses_skipped': 0,
+            'word_events_migrated': 0,
+            'pause_events_migrated': 0,
+            'approx_bytes_before': 0,
+            'approx_bytes_after': 0,
+            'errors': 0
+        }
+
+    async def migrate_analysis(self, analysis_id):
+        """Build and store the columnar document of one analysis"""
+        if not self.overwrite and await self.db.analysis_events.count_documents({"analysis_id": analysis_id}, limit=1):
+            self.stats['analyses_skipped'] += 1
+            return
+
+        word_rows = await self.db.word_events.find({"analysis_id": analysis_id}, {"_id": 0}).to_list(None)
+        pause_rows = await self.db.pause_events.find({"analysis_id": analysis_id}, {"_id": 0}).to_list(None)
+
+        doc = event_columns.encode_events(analysis_id, word_rows, pause_rows)
+        doc["created_at"] = datetime.now(timezone.utc)
+
+        # Round trip check before anything is written
+        decoded_words, decoded_pauses = event_columns.decode_events(doc)
+        if len(decoded_words) != len(word_rows) or len(decoded_pauses) != len(pause_rows):
+            raise ValueError(f"Round trip mismatch for analysis {analysis_id}")
+
+        self.stats['approx_bytes_before'] += sum(len(str(row)) for row in word_rows + pause_rows)
+        self.stats['approx_bytes_after'] += sum(len(doc["words"][k]) for k in doc["words"] if k != "count")
+        self.stats['approx_bytes_after'] += sum(len(doc["pauses"][k]) for k in doc["pauses"] if k != "count")
+        self.stats['approx_bytes_after'] += sum(len(s) for s in doc["strings"])
+
+        if not self.dry_run:
+            await self.db.analysis_events.replace_one({"analysis_id": analysis_id}, doc, upsert=True)
+            if self.delete_source:
+                await self.db.word_events.delete_many({"analysis_id": analysis_id})
+                await self.db.pause_events.delete_many({"analysis_id": analysis_id})
+
+        self.stats['analyses_migrated'] += 1
+        self.stats['word_events_migrated'] += len(word_rows)
+        self.stats['pause_events_migrated'] += len(pause_rows)
+
+    async def run(self, concurrency: int):
+        analysis_ids = await self.db.word_events.distinct("analysis_id")
+        logger.info(f"🔄 Migrating events of {len(analysis_ids)} analyses (concurrency={concurrency})...")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def migrate(analysis_id):
+            async with semaphore:
+                try:
+                    await self.migrate_analysis(analysis_id)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"❌ Failed to migrate analysis {analysis_id}: {e}")
+
+        await asyncio.gather(*(migrate(analysis_id) for analysis_id in analysis_ids))
+
+        logger.info("📊 Migration Statistics:")
+        for key, value in self.stats.items():
+            logger.info(f"  {key}: {value}")
+
+        if self.dry_run:
+            logger.info("🔍 DRY RUN COMPLETED - No changes were made to the database")
+        else:
+            logger.info("✅ Migration completed successfully!")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migrate word/pause events to columnar analysis_events")
+    parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode (no changes)")
+    parser.add_argument("--delete-source", action="store_true", help="Delete migrated word_events/pause_events documents")
+    parser.add_argument("--overwrite", action="store_true", help="Rebuild analyses that already have analysis_events")
+    parser.add_argument("--concurrency", type=int, default=4, help="Analyses migrated at the same time")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi", help="MongoDB database name")
+
+    args = parser.parse_args()
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+
+    try:
+        migrator = ColumnarMigrator(db, dry_run=args.dry_run, delete_source=args.delete_source, overwrite=args.overwrite)
+        await migrator.run(args.concurrency)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Migration: fill students.name_search for the indexed name search
+
+GET /v1/students/?search= matches name prefixes on name_search, the
+Turkish-folded lowercase words of first and last name (see
+backend/app/utils/text_tokenizer.py). StudentDoc keeps it up to date on
+every write; this fills it in for students saved before the field existed,
+with batched UpdateOne operations. Students whose field is already correct
+are left alone, so it is safe to re-run.
+
+Usage:
+    python scripts/migrate_student_name_search.py --dry-run
+    python scripts/migrate_student_name_search.py --batch-size 1000
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from loguru import logger
+
+from pymongo import UpdateOne
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app.utils.text_tokenizer import name_search_terms
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+class NameSearchMigrator:
+    def __init__(self, db, batch_size: int = 500, dry_run: bool = False):
+        self.db = db
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = {
+            'students_checked': 0,
+            'students_updated': 0
+        }
+
+    async def flush(self, operations):
+        self.stats['students_updated'] += len(operations)
+        if operations and not self.dry_run:
+            await self.db.students.bulk_write(operations, ordered=False)
+
+    async def run(self):
+        total = await self.db.students.estimated_document_count()
+        logger.info(f"🔄 Checking name_search of ~{total} students...")
+
+        operations = []
+        projection = {"first_name": 1, "last_name": 1, "name_search": 1}
+        async for student in self.db.students.find({}, projection).batch_size(self.batch_size):
+            self.stats['students_checked'] += 1
+            terms = name_search_terms(student.get("first_name", ""), student.get("last_name", ""))
+            if student.get("name_search") != terms:
+                operations.append(UpdateOne({"_id": student["_id"]}, {"$set": {"name_search": terms}}))
+            if len(operations) == self.batch_size:
+                await self.flush(operations)
+                operations = []
+        await self.flush(operations)
+
+        logger.info("📊 Migration Statistics:")
+        for key, value in self.stats.items():
+            logger.info(f"  {key}: {value}")
+
+        if self.dry_run:
+            logger.info("🔍 DRY RUN COMPLETED - No changes were made to the database")
+        else:
+            logger.info("✅ Migration completed successfully!")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fill students.name_search for the indexed name search")
+    parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode (no changes)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Students per bulk write")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="MongoDB connection URI")
+    parser.add_argument("--mongo-db", default="okuma_analizi", help="MongoDB database name")
+
+    args = parser.parse_args()
+
+    # Import here to avoid issues if not installed
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.mongo_db]
+
+    try:
+        await NameSearchMigrator(db, batch_size=args.batch_size, dry_run=args.dry_run).run()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,6 +9,8 @@ Usage:
     python scripts/recompute_analysis.py --analysis-id <analysis_id>
     python scripts/recompute_analysis.py --session-id <session_id>
     python scripts/recompute_analysis.py --all-done  # Recompute all done analyses
+
+For full recomputes use scripts/bulk_reanalyze.py (batched, parallel, resumable).
 """
 
 import asyncio
@@ -24,11 +26,22 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from backend.app.models.documents import (
-    AnalysisDoc, SttResultDoc, WordEventDoc, ReadingSessionDoc, TextDoc
+    AnalysisDoc, SttResultDoc, WordEventDoc, ReadingSessionDoc, TextDoc, AnalysisEventsDoc
 )
-from worker.services import alignment, scoring
+from worker.services import alignment, scoring, event_columns, list_view
 from worker.config import settings
 
+ANALYSIS_VERSION_KEY_PREFIX = "analysis:version:"  # backend/app/response_cache.py
+
+
+def invalidate_cached_responses(analysis_id):
+    """Bump the API response cache version of a recomputed analysis"""
+    try:
+        from redis import Redis
+        Redis.from_url(settings.redis_url or "redis://redis:6379/0").incr(ANALYSIS_VERSION_KEY_PREFIX + str(analysis_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached responses of analysis {analysis_id}: {str(e)}")
+
 
 async def init_database():
     """Initialize Beanie with MongoDB"""
@@ -40,7 +53,7 @@ async def init_database():
     await init_beanie(
         database=db,
         document_models=[
-            AnalysisDoc, SttResultDoc, WordEventDoc, ReadingSessionDoc, TextDoc
+            AnalysisDoc, SttResultDoc, WordEventDoc, ReadingSessionDoc, TextDoc, AnalysisEventsDoc
         ]
     )
     
@@ -148,6 +161,16 @@ async def recompute_analysis(analysis_id: str):
             await WordEventDoc.insert_many(new_word_events)
             logger.info(f"Saved {len(new_word_events)} new word events")
         
+        # Keep the columnar copy (read first by the API) in sync, pauses are unchanged
+        columnar = await AnalysisEventsDoc.get_motor_collection().find_one({"analysis_id": analysis.id})
+        if columnar:
+            _, pause_rows = event_columns.decode_events(columnar)
+            word_rows = [event.model_dump(exclude={"id", "revision_id"}) for event in new_word_events]
+            doc = event_columns.encode_events(analysis.id, word_rows, pause_rows)
+            doc["created_at"] = columnar.get("created_at")
+            await AnalysisEventsDoc.get_motor_collection().replace_one({"_id": columnar["_id"]}, doc)
+            logger.info("Updated columnar analysis_events document")
+        
         # Count alignment results
         subs = sum(1 for a in alignment_result if a[0] == "replace")
         dels = sum(1 for a in alignment_result if a[0] == "delete")
@@ -181,6 +204,10 @@ async def recompute_analysis(analysis_id: str):
         # Update analysis
         analysis.updated_at = datetime.utcnow()
         await analysis.save()
+        await AnalysisDoc.get_motor_collection().database[list_view.COLLECTION].update_one(
+            {"_id": analysis.id}, {"$set": list_view.score_fields(analysis.summary)}
+        )
+        invalidate_cached_responses(analysis.id)
         logger.info(f"Updated analysis summary with new metrics")
         
         logger.info(f"Successfully recomputed analysis {analysis_id}")
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ElevenLabs speech-to-text API
+
+Implements the POST /v1/speech-to-text contract used by ElevenLabsSTT
+(multipart `file` + form fields, `xi-api-key` header, word-level response),
+so the worker can be load-tested without paying for or being throttled by
+the real API. Point the worker at it with
+ELEVENLABS_API_URL=http://localhost:8900/v1/speech-to-text.
+
+Every request is answered from, in order:
+
+    replay      <recordings>/<audio sha256>.json (see --record)
+    record      with --record, misses are proxied to ElevenLabs
+                (ELEVENLABS_API_KEY) and the response is saved for replay
+    synthesize  word list built from the reference text registered for the
+                audio hash, or the default text, with configurable
+                substitution/deletion/repetition/filler rates
+
+Synthesized responses are deterministic per audio hash and --seed. Latency
+is drawn from a lognormal distribution (--latency-median-ms, --latency-sigma)
+plus --latency-per-mb-ms, and a fraction of requests can be failed with 429
+or 503 to exercise the retry path.
+
+Control endpoints (used by scripts/load_test.py):
+    PUT  /standin/text            {"text": ...}  default reference text
+    PUT  /standin/texts/{sha256}  {"text": ...}  reference text of one audio
+    GET  /standin/stats                          request counters
+    POST /standin/stats/reset
+
+Usage:
+    python scripts/stt_standin.py --text-file samples/metin.txt
+    python scripts/stt_standin.py --recordings stt_recordings/ --latency-median-ms 4000
+    python scripts/stt_standin.py --recordings stt_recordings/ --record   # fill recordings from the real API
+"""
+
+import asyncio
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.services.elevenlabs_stt import DEFAULT_API_URL
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+DEFAULT_TEXT = "Ali okula gitti. Annesi ona bir kitap aldı. Kitap çok güzeldi."
+FILLERS = ["ııı", "eee", "hmm"]
+TURKISH_VOWELS = "aeıioöuü"
+
+
+@dataclass
+class SynthesisConfig:
+    """Reading errors and timing of synthesized transcripts"""
+    substitution_rate: float = 0.05  # word misread (one letter changed)
+    deletion_rate: float = 0.03  # word skipped
+    repetition_rate: float = 0.03  # word read twice
+    filler_rate: float = 0.02  # filler inserted before a word
+    long_pause_rate: float = 0.05  # pause of 0.8-2.5 s before a word
+    sec_per_char: float = 0.07
+    gap_median_sec: float = 0.15
+
+
+@dataclass
+class LatencyModel:
+    """Response time: lognormal around a median plus a per-MB upload share"""
+    median_ms: float = 1500.0
+    sigma: float = 0.5
+    per_mb_ms: float = 0.0
+
+    def sample(self, rng: random.Random, size_bytes: int) -> float:
+        base = self.median_ms * math.exp(rng.gauss(0.0, self.sigma)) if self.median_ms > 0 else 0.0
+        return base + self.per_mb_ms * size_bytes / (1024 * 1024)
+
+
+def _misread(word: str, rng: random.Random) -> str:
+    """The word with one letter changed, keeping trailing punctuation"""
+    core = word.rstrip(".,;:!?\"'")
+    tail = word[len(core):]
+    if len(core) < 2:
+        return word
+    i = rng.randrange(len(core))
+    pool = TURKISH_VOWELS if core[i].lower() in TURKISH_VOWELS else "bcçdfgğhjklmnprsştvyz"
+    replacement = rng.choice([ch for ch in pool if ch != core[i].lower()])
+    return core[:i] + replacement + core[i + 1:] + tail
+
+
+def synthesize(text: str, audio_sha256: str, config: SynthesisConfig, seed: int = 0) -> Dict[str, Any]:
+    """
+    ElevenLabs-shaped transcript of `text` read with errors
+
+    Deterministic for the same text, audio hash, config and seed.
+    """
+    rng = random.Random(f"{seed}:{audio_sha256}")
+    spoken = []
+    for word in text.split():
+        if rng.random() < config.deletion_rate:
+            continue
+        if rng.random() < config.filler_rate:
+            spoken.append((rng.choice(FILLERS), False))
+        if rng.random() < config.repetition_rate:
+            spoken.append((word, True))
+        spoken.append((_misread(word, rng) if rng.random() < config.substitution_rate else word, True))
+
+    words = []
+    position = round(rng.uniform(0.2, 0.8), 3)
+    for text_part, is_word in spoken:
+        if rng.random() < config.long_pause_rate:
+            gap = rng.uniform(0.8, 2.5)
+        else:
+            gap = config.gap_median_sec * math.exp(rng.gauss(0.0, 0.4))
+        start = position + (gap if words else 0.0)
+        end = start + max(0.15, config.sec_per_char * len(text_part))
+        if words:
+            words.append({"text": " ", "start": round(position, 3), "end": round(start, 3), "type": "spacing", "speaker_id": "speaker_0", "logprob": 0.0})
+        words.append({
+            "text": text_part, "start": round(start, 3), "end": round(end, 3), "type": "word",
+            "speaker_id": "speaker_0", "logprob": round(rng.uniform(-0.6, 0.0) if is_word else rng.uniform(-2.0, -0.6), 4)
+        })
+        position = end
+
+    return {
+        "language_code": "tur",
+        "language_probability": 0.99,
+        "text": "".join(w["text"] for w in words),
+        "words": words
+    }
+
+
+class TextBody(BaseModel):
+    text: str
+
+
+class StandIn:
+    """Request handling and counters of the stand-in"""
+
+    def __init__(self, recordings_dir: Optional[str] = None, record: bool = False,
+                 upstream_url: str = DEFAULT_API_URL, upstream_api_key: str = "",
+                 default_text: str = DEFAULT_TEXT, synthesis: Optional[SynthesisConfig] = None,
+                 latency: Optional[LatencyModel] = None, rate_429: float = 0.0, rate_503: float = 0.0,
+                 retry_after_sec: int = 5, seed: int = 0):
+        self.recordings_dir = recordings_dir
+        self.record = record
+        self.upstream_url = upstream_url
+        self.upstream_api_key = upstream_api_key
+        self.default_text = default_text
+        self.texts: Dict[str, str] = {}
+        self.synthesis = synthesis or SynthesisConfig()
+        self.latency = latency or LatencyModel()
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.retry_after_sec = retry_after_sec
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            "requests": 0, "replayed": 0, "recorded": 0, "synthesized": 0,
+            "rate_limited": 0, "unavailable": 0, "bytes_received": 0,
+            "in_flight": 0, "max_in_flight": 0, "latency_ms_total": 0.0
+        }
+
+    def _recording_path(self, audio_sha256: str) -> Optional[str]:
+        if not self.recordings_dir:
+            return None
+        return os.path.join(self.recordings_dir, f"{audio_sha256}.json")
+
+    def replay(self, audio_sha256: str) -> Optional[Dict[str, Any]]:
+        path = self._recording_path(audio_sha256)
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return None
+
+    async def record_upstream(self, audio_sha256: str, filename: str, content_type: str, audio: bytes,
+                              form: Dict[str, str]) -> Dict[str, Any]:
+        """Proxy one request to ElevenLabs and save the response for replay"""
+        async with httpx.AsyncClient(timeout=300.0) as client:
+            response = await client.post(
+                self.upstream_url,
+                headers={"xi-api-key": self.upstream_api_key},
+                data=form,
+                files={"file": (filename, audio, content_type)}
+            )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+        result = response.json()
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        with open(self._recording_path(audio_sha256), "w") as f:
+            json.dump(result, f, ensure_ascii=False)
+        logger.info(f"📼 Recorded {audio_sha256[:12]} ({len(result.get('words', []))} elements)")
+        return result
+
+    async def transcribe(self, filename: str, content_type: str, audio: bytes, form: Dict[str, str]):
+        """Response for one speech-to-text request"""
+        self.stats["requests"] += 1
+        self.stats["bytes_received"] += len(audio)
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            latency_ms = self.latency.sample(self.rng, len(audio))
+            self.stats["latency_ms_total"] += latency_ms
+            await asyncio.sleep(latency_ms / 1000)
+
+            roll = self.rng.random()
+            if roll < self.rate_429:
+                self.stats["rate_limited"] += 1
+                return JSONResponse(
+                    status_code=429, headers={"retry-after": str(self.retry_after_sec)},
+                    content={"detail": {"status": "too_many_concurrent_requests", "message": "stand-in rate limit"}}
+                )
+            if roll < self.rate_429 + self.rate_503:
+                self.stats["unavailable"] += 1
+                return JSONResponse(status_code=503, content={"detail": {"status": "service_unavailable"}})
+
+            audio_sha256 = hashlib.sha256(audio).hexdigest()
+            result = self.replay(audio_sha256)
+            if result is not None:
+                self.stats["replayed"] += 1
+                return result
+            if self.record:
+                result = await self.record_upstream(audio_sha256, filename, content_type, audio, form)
+                self.stats["recorded"] += 1
+                return result
+
+            self.stats["synthesized"] += 1
+            text = self.texts.get(audio_sha256, self.default_text)
+            return synthesize(text, audio_sha256, self.synthesis, self.seed)
+        finally:
+            self.stats["in_flight"] -= 1
+
+
+def create_app(standin: StandIn) -> FastAPI:
+    """FastAPI app serving the speech-to-text contract and control endpoints"""
+    app = FastAPI(title="ElevenLabs STT stand-in")
+
+    @app.post("/v1/speech-to-text")
+    async def speech_to_text(
+        file: UploadFile = File(...),
+        model_id: str = Form(...),
+        language_code: Optional[str] = Form(None),
+        timestamps_granularity: str = Form("word"),
+        tag_audio_events: str = Form("true"),
+        diarize: str = Form("false"),
+        temperature: Optional[str] = Form(None),
+        seed: Optional[str] = Form(None),
+        remove_filler_words: str = Form("false"),
+        remove_disfluencies: str = Form("false"),
+        xi_api_key: Optional[str] = Header(None)
+    ):
+        if not xi_api_key:
+            raise HTTPException(status_code=401, detail={"status": "invalid_api_key", "message": "xi-api-key header missing"})
+        audio = await file.read()
+        if not audio:
+            raise HTTPException(status_code=400, detail={"status": "invalid_file", "message": "Empty audio file"})
+        form = {
+            "model_id": model_id, "language_code": language_code or "", "timestamps_granularity": timestamps_granularity,
+            "tag_audio_events": tag_audio_events, "diarize": diarize, "temperature": temperature or "0.0",
+            "seed": seed or "", "remove_filler_words": remove_filler_words, "remove_disfluencies": remove_disfluencies
+        }
+        return await standin.transcribe(file.filename or "audio", file.content_type or "application/octet-stream", audio, form)
+
+    @app.put("/standin/text")
+    async def set_default_text(body: TextBody):
+        standin.default_text = body.text
+        return {"words": len(body.text.split())}
+
+    @app.put("/standin/texts/{audio_sha256}")
+    async def set_text(audio_sha256: str, body: TextBody):
+        standin.texts[audio_sha256] = body.text
+        return {"audio_sha256": audio_sha256, "words": len(body.text.split())}
+
+    @app.get("/standin/stats")
+    async def get_stats():
+        return {**standin.stats, "texts": len(standin.texts), "synthesis": asdict(standin.synthesis), "latency": asdict(standin.latency)}
+
+    @app.post("/standin/stats/reset")
+    async def reset_stats():
+        standin.reset_stats()
+        return standin.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ElevenLabs speech-to-text stand-in for load tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--recordings", help="Directory of recorded responses (<audio sha256>.json)")
+    parser.add_argument("--record", action="store_true", help="Proxy misses to ElevenLabs and save them (needs --recordings)")
+    parser.add_argument("--upstream-url", default=DEFAULT_API_URL)
+    parser.add_argument("--text-file", help="Default reference text for synthesized transcripts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--substitution-rate", type=float, default=SynthesisConfig.substitution_rate)
+    parser.add_argument("--deletion-rate", type=float, default=SynthesisConfig.deletion_rate)
+    parser.add_argument("--repetition-rate", type=float, default=SynthesisConfig.repetition_rate)
+    parser.add_argument("--filler-rate", type=float, default=SynthesisConfig.filler_rate)
+    parser.add_argument("--long-pause-rate", type=float, default=SynthesisConfig.long_pause_rate)
+    parser.add_argument("--latency-median-ms", type=float, default=LatencyModel.median_ms)
+    parser.add_argument("--latency-sigma", type=float, default=LatencyModel.sigma, help="Lognormal sigma (0 = constant)")
+    parser.add_argument("--latency-per-mb-ms", type=float, default=LatencyModel.per_mb_ms)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=5, help="Retry-After seconds sent with 429")
+
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.recordings:
+            logger.error("❌ --record needs --recordings")
+            sys.exit(1)
+        if not os.getenv("ELEVENLABS_API_KEY"):
+            logger.error("❌ ELEVENLABS_API_KEY is required for --record")
+            sys.exit(1)
+
+    default_text = DEFAULT_TEXT
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            default_text = f.read()
+
+    standin = StandIn(
+        recordings_dir=args.recordings,
+        record=args.record,
+        upstream_url=args.upstream_url,
+        upstream_api_key=os.getenv("ELEVENLABS_API_KEY", ""),
+        default_text=default_text,
+        synthesis=SynthesisConfig(
+            substitution_rate=args.substitution_rate, deletion_rate=args.deletion_rate,
+            repetition_rate=args.repetition_rate, filler_rate=args.filler_rate, long_pause_rate=args.long_pause_rate
+        ),
+        latency=LatencyModel(args.latency_median_ms, args.latency_sigma, args.latency_per_mb_ms),
+        rate_429=args.rate_429,
+        rate_503=args.rate_503,
+        retry_after_sec=args.retry_after,
+        seed=args.seed
+    )
+
+    recordings = len([n for n in os.listdir(args.recordings) if n.endswith(".json")]) if args.recordings and os.path.isdir(args.recordings) else 0
+    logger.info(f"🎙️ STT stand-in on http://{args.host}:{args.port}/v1/speech-to-text "
+                f"({recordings} recordings, record={args.record}, latency median {args.latency_median_ms}ms)")
+    uvicorn.run(create_app(standin), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Test keyset pagination and filters of the analyses list
+"""
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.models.user import get_current_user
+from app.services import list_view
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+            if "$gte" in condition and not (value is not None and value >= condition["$gte"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+
+class AllowAll:
+    async def has_any_permission(self, permissions):
+        return True
+
+
+@pytest.fixture
+def db():
+    """Seven analyses of two students; three share one created_at"""
+    text = {"_id": ObjectId(), "title": "Kırmızı Top", "body": "Uzun metin " * 100, "grade": 2}
+    base = datetime(2026, 1, 1)
+    rows = []
+    for i in range(7):
+        session = {"_id": ObjectId(), "text_id": text["_id"], "audio_id": ObjectId()}
+        audio = {"_id": session["audio_id"], "original_name": f"kayit_{i}.m4a", "size_bytes": 1000 + i}
+        analysis = {
+            "_id": ObjectId(), "session_id": session["_id"], "student_id": ObjectId("0" * 23 + str(i % 2)),
+            "status": "done", "created_at": base + timedelta(minutes=min(i, 4)), "audio_duration_sec": 42.0,
+            "summary": {"wer": 0.1, "accuracy": 90.0, "wpm": 80.0, "counts": {"correct": 9}}
+        }
+        rows.append(list_view.list_view_row(analysis, session, text, audio, {"first_name": "Ada", "last_name": f"Y{i}"}))
+    view = FakeCollection(rows)
+    with patch("app.routers.analyses.AnalysisListViewDoc.get_motor_collection", lambda: view):
+        yield view
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: AllowAll()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def _walk(client, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get("/v1/analyses/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+class TestCursor:
+
+    def test_round_trip(self):
+        created_at, doc_id = datetime(2026, 1, 1, 12, 30, 0, 123000), ObjectId()
+        token = encode_cursor(created_at, doc_id)
+        assert "=" not in token and "|" not in token
+        assert decode_cursor(token) == (created_at, doc_id)
+
+    def test_invalid(self):
+        for token in ("", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), ObjectId())[:-4]):
+            with pytest.raises(ValueError):
+                decode_cursor(token)
+
+    def test_filter(self):
+        assert keyset_filter({"student_id": 1}, None) == {"student_id": 1}
+        created_at, doc_id = datetime(2026, 1, 1), ObjectId()
+        query = keyset_filter({"student_id": 1}, encode_cursor(created_at, doc_id))
+        assert query["student_id"] == 1
+        assert query["$or"] == [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "_id": {"$lt": doc_id}}]
+
+
+class TestAnalysesList:
+
+    def test_pages_cover_every_analysis_once(self, client, db):
+        pages = _walk(client, limit=2)
+        ids = [row["id"] for page in pages for row in page]
+        expected = sorted(db.docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+        assert ids == [str(d["_id"]) for d in expected]
+
+    def test_student_filter(self, client, db):
+        student_id = "0" * 23 + "1"
+        ids = [row["id"] for page in _walk(client, limit=2, student_id=student_id) for row in page]
+        assert sorted(ids) == sorted(str(d["_id"]) for d in db.docs if str(d["student_id"]) == student_id)
+
+    def test_text_grade_and_date_filters(self, client, db):
+        text_id = str(db.docs[0]["text_id"])
+        assert len(client.get("/v1/analyses/", params={"text_id": text_id, "grade": 2}).json()) == 7
+        assert client.get("/v1/analyses/", params={"grade": 3}).json() == []
+        rows = client.get("/v1/analyses/", params={"date_from": "2026-01-01T00:01:00", "date_to": "2026-01-01T00:04:00"}).json()
+        assert sorted(row["created_at"] for row in rows) == ["2026-01-01T00:01:00", "2026-01-01T00:02:00", "2026-01-01T00:03:00"]
+
+    def test_row_fields(self, client, db):
+        row = client.get("/v1/analyses/", params={"limit": 1}).json()[0]
+        assert row["text"] == {"title": "Kırmızı Top"}
+        assert row["text_title"] == "Kırmızı Top" and row["text_grade"] == 2
+        assert row["student_name"].startswith("Ada ")
+        assert row["audio_name"].startswith("kayit_") and row["audio_size_bytes"] >= 1000
+        assert row["wer"] == 0.1 and row["counts"] == {"correct": 9}
+
+    def test_invalid_parameters(self, client, db):
+        assert client.get("/v1/analyses/", params={"cursor": "garbage"}).status_code == 400
+        assert client.get("/v1/analyses/", params={"text_id": "nope"}).status_code == 400
@@ -0,0 +1,254 @@
+"""
+Test the streaming analysis export (single JSON and bulk NDJSON)
+"""
+import pytest
+import sys
+import json
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.models.user import get_current_user
+from app.response_cache import analysis_cache
+from app.services import analysis_export
+from app.services.event_columns import encode_events
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gte" in condition and not (value is not None and value >= condition["$gte"]):
+                return False
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=None):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for name, order in reversed(keys):
+            self.docs = sorted(self.docs, key=lambda d: d[name], reverse=order < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+    def __aiter__(self):
+        self.iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class AllowAll:
+    email = "admin@example.com"
+    role_id = None
+
+    async def get_effective_permissions(self):
+        return ["*"]
+
+    async def has_any_permission(self, permissions):
+        return True
+
+
+def _analysis(student_id, created_at, columnar=False):
+    analysis = {
+        "_id": ObjectId(), "session_id": ObjectId(), "student_id": student_id, "status": "done",
+        "created_at": created_at,
+        "summary": {"wer": 0.25, "counts": {"correct": 2, "missing": 1, "extra": 0, "substitution": 1},
+                    "error_types": {"substitution": 1}, "metrics": {"correct": 2}}
+    }
+    words = [
+        {"_id": ObjectId(), "analysis_id": analysis["_id"], "position": position, "ref_token": ref, "hyp_token": hyp,
+         "type": kind, "sub_type": sub_type, "timing": {"start_ms": 100.0 * position, "end_ms": 100.0 * position + 90},
+         "char_diff": None}
+        for position, ref, hyp, kind, sub_type in [
+            (2, "top", None, "missing", None), (0, "kırmızı", "kırmızı", "correct", None),
+            (1, "top", "tip", "substitution", "harf_değiştirme"), (3, "at", "at", "correct", None)
+        ]
+    ]
+    pauses = [{"_id": ObjectId(), "analysis_id": analysis["_id"], "after_position": 1, "duration_ms": 800.0,
+               "class_": "long", "start_ms": 190.0, "end_ms": 990.0}]
+    if columnar:
+        return analysis, [], [], [encode_events(analysis["_id"], words, pauses)]
+    return analysis, words, pauses, []
+
+
+@pytest.fixture
+def db():
+    """Three analyses of two students, one stored with columnar events"""
+    base = datetime(2026, 1, 1)
+    students = [ObjectId(), ObjectId()]
+    built = [_analysis(students[i % 2], base + timedelta(minutes=i), columnar=(i == 2)) for i in range(3)]
+    collections = {
+        "analyses": FakeCollection([b[0] for b in built]),
+        "word_events": FakeCollection([w for b in built for w in b[1]]),
+        "pause_events": FakeCollection([p for b in built for p in b[2]]),
+        "analysis_events": FakeCollection([c for b in built for c in b[3]]),
+        "stt_results": FakeCollection([{"session_id": built[0][0]["session_id"], "transcript": "kırmızı tip at"}]),
+        "analysis_list_view": FakeCollection([
+            {"_id": b[0]["_id"], "student_id": b[0]["student_id"], "created_at": b[0]["created_at"]} for b in built
+        ])
+    }
+    patches = [
+        patch("app.routers.analyses.AnalysisDoc.get_motor_collection", lambda *args: collections["analyses"]),
+        patch("app.services.analysis_export.WordEventDoc.get_motor_collection", lambda *args: collections["word_events"]),
+        patch("app.services.analysis_export.PauseEventDoc.get_motor_collection", lambda *args: collections["pause_events"]),
+        patch("app.services.analysis_export.AnalysisEventsDoc.get_motor_collection", lambda *args: collections["analysis_events"]),
+        patch("app.services.analysis_export.SttResultDoc.get_motor_collection", lambda *args: collections["stt_results"]),
+        patch("app.routers.analyses.AnalysisListViewDoc.get_motor_collection", lambda *args: collections["analysis_list_view"]),
+    ]
+    for p in patches:
+        p.start()
+    yield {"students": students, **collections}
+    for p in patches:
+        p.stop()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: AllowAll()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def no_cache():
+    with patch.object(analysis_cache, "version", lambda analysis_id: _none()):
+        yield
+
+
+async def _none():
+    return None
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class TestExportChunks:
+
+    def test_events_in_order_with_char_diff(self, db):
+        analysis = db["analyses"].docs[0]
+        chunks = asyncio.run(_collect(analysis_export.export_chunks(analysis, "kırmızı tip at")))
+        data = json.loads(b"".join(chunks))
+
+        assert data["analysis_id"] == str(analysis["_id"])
+        assert data["text_id"] == str(analysis["session_id"])
+        assert [e["position"] for e in data["events"]] == [0, 1, 2, 3]
+        substitution = data["events"][1]
+        assert substitution["char_diff"] == 1 and substitution["cer_local"] == 1 / 3
+        assert all(e["analysis_id"] == str(analysis["_id"]) for e in data["events"])
+        assert data["pauses"][0]["class_"] == "long"
+        assert data["metrics"] == {"correct": 2}
+        assert data["transcript"] == "kırmızı tip at"
+        assert data["validation"] == {"summary_consistent": True}
+
+    def test_columnar_events_match(self, db):
+        per_event, columnar = db["analyses"].docs[0], db["analyses"].docs[2]
+        from_documents = json.loads(b"".join(asyncio.run(_collect(analysis_export.export_chunks(per_event, None)))))
+        from_columns = json.loads(b"".join(asyncio.run(_collect(analysis_export.export_chunks(columnar, None)))))
+
+        def strip(events):
+            return [{k: v for k, v in e.items() if k not in ("id", "analysis_id")} for e in events]
+        assert strip(from_columns["events"]) == strip(from_documents["events"])
+        assert strip(from_columns["pauses"]) == strip(from_documents["pauses"])
+        assert from_columns["events"][0]["id"] == f"{columnar['_id']}-w0"
+
+    def test_events_are_batched(self, db):
+        analysis = db["analyses"].docs[0]
+        with patch.object(analysis_export, "EXPORT_BATCH_SIZE", 3):
+            chunks = asyncio.run(_collect(analysis_export.export_chunks(analysis, None)))
+        data = json.loads(b"".join(chunks))
+        assert len(data["events"]) == 4
+        assert len(chunks) == 10  # head, [, 3 events, 1 event, ], "pauses" key, [, 1 pause, ], tail
+        assert chunks[2].count(b'"position"') == 3
+
+
+class TestEndpoints:
+
+    def test_single_export_streams(self, client, db, no_cache):
+        analysis = db["analyses"].docs[0]
+        response = client.get(f"/v1/analyses/{analysis['_id']}/export")
+        assert response.status_code == 200
+        assert response.json()["transcript"] == "kırmızı tip at"
+        assert response.headers["cache-control"] == "no-store"
+        assert client.get(f"/v1/analyses/{ObjectId()}/export").status_code == 404
+        assert client.get("/v1/analyses/nope/export").status_code == 400
+
+    def test_streamed_export_fills_cache(self, client, db):
+        analysis_id = str(db["analyses"].docs[0]["_id"])
+        with patch.object(analysis_cache, "redis", FakeRedis()), patch.object(analysis_cache, "lru", OrderedDict()):
+            first = client.get(f"/v1/analyses/{analysis_id}/export")
+            assert "etag" not in first.headers
+            second = client.get(f"/v1/analyses/{analysis_id}/export")
+            assert second.content == first.content and second.headers["etag"]
+            revalidated = client.get(f"/v1/analyses/{analysis_id}/export", headers={"If-None-Match": second.headers["etag"]})
+            assert revalidated.status_code == 304
+
+    def test_bulk_export_ndjson(self, client, db):
+        response = client.get("/v1/analyses/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.content.splitlines()]
+        newest_first = sorted(db["analyses"].docs, key=lambda d: d["created_at"], reverse=True)
+        assert [line["analysis_id"] for line in lines] == [str(d["_id"]) for d in newest_first]
+        assert all(len(line["events"]) == 4 for line in lines)
+
+    def test_bulk_export_filters_and_batches(self, client, db):
+        student_id = db["students"][0]
+        with patch("app.routers.analyses.EXPORT_BATCH_SIZE", 1):
+            response = client.get("/v1/analyses/export", params={"student_id": str(student_id)})
+        ids = [json.loads(line)["analysis_id"] for line in response.content.splitlines()]
+        assert sorted(ids) == sorted(str(d["_id"]) for d in db["analyses"].docs if d["student_id"] == student_id)
+
+        empty = client.get("/v1/analyses/export", params={"date_from": "2027-01-01T00:00:00"})
+        assert empty.status_code == 200 and empty.content == b""
+        assert client.get("/v1/analyses/export", params={"text_id": "nope"}).status_code == 400
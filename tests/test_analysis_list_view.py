@@ -0,0 +1,252 @@
+"""
+Test the analysis_list_view read model: row building, worker/API writes and the backfill
+"""
+import pytest
+import sys
+import asyncio
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app import crud
+from app.services import list_view as api_list_view
+from worker.services import list_view, persistence
+
+
+def _load_script(name):
+    """scripts/<name>.py (backend/scripts shadows the `scripts` package name)"""
+    spec = importlib.util.spec_from_file_location(name, project_root / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+    def __aiter__(self):
+        self.iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """The Motor collection calls made on the read model and its sources"""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.projections = []
+
+    def find(self, query, projection=None):
+        self.projections.append(projection)
+        return FakeCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    async def distinct(self, key):
+        return list({d[key] for d in self.docs})
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs = [d for d in self.docs if not _matches(d, query)] + [dict(doc)]
+
+    async def update_one(self, query, update):
+        await self.update_many(query, update, limit=1)
+
+    async def update_many(self, query, update, limit=None):
+        matched = [d for d in self.docs if _matches(d, query)][:limit]
+        for doc in matched:
+            doc.update(update["$set"])
+        return SimpleNamespace(modified_count=len(matched))
+
+    async def delete_many(self, query):
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+
+    async def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            await self.replace_one(op._filter, op._doc)
+
+
+class FakeDb:
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+TEXT = {"_id": ObjectId(), "title": "Kırmızı Top", "grade": 2, "body": "uzun metin"}
+STUDENT = {"_id": ObjectId(), "first_name": "Ada", "last_name": "Yılmaz"}
+
+
+def _documents():
+    session = {"_id": ObjectId(), "text_id": TEXT["_id"], "audio_id": ObjectId()}
+    audio = {"_id": session["audio_id"], "original_name": "kayit.m4a", "size_bytes": 2048, "duration_sec": 61.5}
+    analysis = {
+        "_id": ObjectId(), "session_id": session["_id"], "student_id": STUDENT["_id"], "status": "done",
+        "created_at": datetime(2026, 1, 1), "started_at": datetime(2026, 1, 1), "finished_at": datetime(2026, 1, 1, 0, 1),
+        "audio_duration_sec": None, "summary": {"wer": 0.1, "accuracy": 90.0, "wpm": 75.0, "counts": {"correct": 9}}
+    }
+    return analysis, session, audio
+
+
+def _strip_time(row):
+    return {key: value for key, value in row.items() if key != "updated_at"}
+
+
+class TestRow:
+
+    def test_modules_are_duplicates(self):
+        worker_lines = (project_root / "worker/services/list_view.py").read_text().splitlines()
+        api_lines = (project_root / "backend/app/services/list_view.py").read_text().splitlines()
+        differing = [(w, a) for w, a in zip(worker_lines, api_lines) if w != a]
+        assert len(worker_lines) == len(api_lines)
+        assert len(differing) == 1 and "This module is duplicated in" in differing[0][0]
+
+    def test_row_from_documents_and_dicts(self):
+        analysis, session, audio = _documents()
+        from_dicts = list_view.list_view_row(analysis, session, TEXT, audio, STUDENT)
+        as_objects = [SimpleNamespace(id=analysis["_id"], **{k: v for k, v in analysis.items() if k != "_id"}),
+                      SimpleNamespace(**session), SimpleNamespace(**TEXT), SimpleNamespace(**audio), SimpleNamespace(**STUDENT)]
+        assert _strip_time(list_view.list_view_row(*as_objects)) == _strip_time(from_dicts)
+
+        assert from_dicts["_id"] == analysis["_id"]
+        assert from_dicts["student_name"] == "Ada Yılmaz"
+        assert (from_dicts["text_title"], from_dicts["text_grade"]) == ("Kırmızı Top", 2)
+        assert from_dicts["audio_duration_sec"] == 61.5  # from the audio until the worker sets it
+        assert (from_dicts["wer"], from_dicts["counts"]) == (0.1, {"correct": 9})
+
+    def test_missing_related_documents(self):
+        analysis, session, _ = _documents()
+        row = list_view.list_view_row({**analysis, "status": None, "summary": {}}, session)
+        assert row["status"] == "queued"
+        assert row["text_title"] is None and row["student_name"] is None
+        assert row["counts"] == {} and row["wer"] is None
+
+
+class TestWorkerWrites:
+
+    def test_completion_writes_row(self):
+        analysis, session, audio = _documents()
+        analyses, sessions, view = FakeCollection([analysis]), FakeCollection([session]), FakeCollection()
+        row = list_view.list_view_row(analysis, session, TEXT, audio, STUDENT)
+        asyncio.run(persistence.write_completion(
+            analyses, sessions, analysis["_id"], {"status": "done"}, session["_id"], {"status": "completed"},
+            list_view_collection=view, list_view_row=row
+        ))
+        assert view.docs == [row]
+        assert sessions.docs[0]["status"] == "completed"
+
+    def test_status_update(self):
+        analysis, session, audio = _documents()
+        view = FakeCollection([list_view.list_view_row({**analysis, "status": "queued"}, session, TEXT, audio)])
+        asyncio.run(list_view.update_status(view, SimpleNamespace(id=analysis["_id"], status="failed",
+                                                                  started_at=None, finished_at=datetime(2026, 1, 2))))
+        assert view.docs[0]["status"] == "failed"
+        assert view.docs[0]["finished_at"] == datetime(2026, 1, 2)
+
+
+class TestApiWrites:
+
+    @pytest.fixture
+    def view(self):
+        analysis, session, audio = _documents()
+        collection = FakeCollection([api_list_view.list_view_row(analysis, session, TEXT, audio, STUDENT)])
+        with patch("app.crud.AnalysisListViewDoc.get_motor_collection", lambda: collection):
+            yield collection
+
+    def test_text_rename(self, view):
+        text = SimpleNamespace(id=TEXT["_id"], title="Mavi Top", grade=3)
+        assert asyncio.run(crud.update_text_in_list_view(text)) == 1
+        assert (view.docs[0]["text_title"], view.docs[0]["text_grade"]) == ("Mavi Top", 3)
+
+    def test_student_rename(self, view):
+        student = SimpleNamespace(id=STUDENT["_id"], first_name="Ada", last_name="Kaya")
+        assert asyncio.run(crud.update_student_in_list_view(student)) == 1
+        assert view.docs[0]["student_name"] == "Ada Kaya"
+
+    def test_refresh_loads_projected_documents(self, view):
+        analysis, session, audio = _documents()
+        texts, audios, students = FakeCollection([TEXT]), FakeCollection([audio]), FakeCollection([STUDENT])
+        doc = SimpleNamespace(id=analysis["_id"], **{k: v for k, v in analysis.items() if k != "_id"})
+        with patch("app.crud.TextDoc.get_motor_collection", lambda: texts), \
+                patch("app.crud.AudioFileDoc.get_motor_collection", lambda: audios), \
+                patch("app.crud.StudentDoc.get_motor_collection", lambda: students):
+            asyncio.run(crud.refresh_list_view(doc, SimpleNamespace(**session)))
+
+        row = next(d for d in view.docs if d["_id"] == analysis["_id"])
+        assert row["text_title"] == "Kırmızı Top" and row["student_name"] == "Ada Yılmaz"
+        assert "body" not in texts.projections[-1]
+
+    def test_refresh_is_best_effort(self, view):
+        analysis, _, _ = _documents()
+        doc = SimpleNamespace(id=analysis["_id"], session_id=analysis["session_id"])
+        with patch("app.crud.ReadingSessionDoc.get", AsyncMock(side_effect=ConnectionError("down"))):
+            asyncio.run(crud.refresh_list_view(doc))
+
+
+class TestBackfill:
+
+    def test_builds_rows_in_batches(self):
+        migrate = _load_script("migrate_analysis_list_view")
+        docs = [_documents() for _ in range(5)]
+        orphan = {**docs[0][0], "_id": ObjectId(), "session_id": ObjectId()}
+        stale = {"_id": ObjectId(), "status": "done"}
+        db = FakeDb(
+            analyses=FakeCollection([d[0] for d in docs] + [orphan]),
+            reading_sessions=FakeCollection([d[1] for d in docs]),
+            audio_files=FakeCollection([d[2] for d in docs]),
+            texts=FakeCollection([TEXT]), students=FakeCollection([STUDENT]),
+            analysis_list_view=FakeCollection([stale])
+        )
+        migrator = migrate.ListViewMigrator(db, batch_size=2)
+        asyncio.run(migrator.run(prune=True))
+
+        assert migrator.stats["rows_written"] == 5
+        assert migrator.stats["analyses_without_session"] == 1
+        assert migrator.stats["rows_pruned"] == 1
+        assert migrator.stats["batches"] == 3
+        assert sorted(row["_id"] for row in db.analysis_list_view.docs) == sorted(d[0]["_id"] for d in docs)
+        assert all(row["student_name"] == "Ada Yılmaz" for row in db.analysis_list_view.docs)
+        assert len(db.texts.projections) == 1  # texts are fetched once and cached
@@ -0,0 +1,191 @@
+"""
+Test analysis progress events: worker publishing, the API fan-out and the SSE endpoint
+"""
+import pytest
+import os
+import sys
+import json
+import asyncio
+import subprocess
+from pathlib import Path
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+worker_dir = project_root / "worker"
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.config import settings
+from app.progress import ProgressHub, progress_hub, stream_progress, CHANNEL_PREFIX
+
+
+def _event(analysis_id, status, stage=None, percent=None):
+    return {"analysis_id": analysis_id, "status": status, "stage": stage, "percent": percent,
+            "started_at": None, "finished_at": None, "error": None}
+
+
+def _parse_sse(body):
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+async def _collect(generator):
+    return [chunk async for chunk in generator]
+
+
+async def _never_disconnected():
+    return False
+
+
+class TestWorkerPublish:
+
+    def test_publishes_event_and_latest_state(self):
+        code = (
+            "import json, progress\n"
+            "from types import SimpleNamespace\n"
+            "class FakeRedis:\n"
+            "    def __init__(self): self.calls = []\n"
+            "    def pipeline(self, transaction=True): return self\n"
+            "    def set(self, key, value, ex=None): self.calls.append(['set', key, json.loads(value), ex])\n"
+            "    def publish(self, channel, value): self.calls.append(['publish', channel, json.loads(value)])\n"
+            "    def execute(self): pass\n"
+            "redis = FakeRedis()\n"
+            "analysis = SimpleNamespace(id='a1', status='running', stage='align', error=None, started_at=None,\n"
+            "                           finished_at=None, pipeline={'completed': ['download', 'transcribe']})\n"
+            "progress.publish(analysis, redis)\n"
+            "class BrokenRedis:\n"
+            "    def pipeline(self, transaction=True): raise ConnectionError('down')\n"
+            "progress.publish(analysis, BrokenRedis())\n"
+            "print(json.dumps(redis.calls))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=str(worker_dir), capture_output=True, text=True, timeout=60,
+            env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING"}
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        (set_call, publish_call) = json.loads(result.stdout.strip().splitlines()[-1])
+
+        assert set_call[:2] == ["set", "analysis:progress:last:a1"] and set_call[3] == 3600
+        assert publish_call[:2] == ["publish", "analysis:progress:a1"]
+        assert publish_call[2]["status"] == "running" and publish_call[2]["percent"] == 75
+        assert set_call[2] == publish_call[2]
+
+
+class TestProgressHub:
+
+    def test_dispatch_to_watchers_of_the_analysis(self):
+        async def run():
+            hub = ProgressHub()
+            first, second, other = hub.watch("a1"), hub.watch("a1"), hub.watch("a2")
+            delivered = hub.dispatch(CHANNEL_PREFIX + "a1", json.dumps(_event("a1", "running")))
+            hub.unwatch("a1", first)
+            hub.unwatch("a1", second)
+            return delivered, first.qsize(), second.qsize(), other.qsize(), hub.watchers
+
+        delivered, first, second, other, watchers = asyncio.run(run())
+        assert (delivered, first, second, other) == (2, 1, 1, 0)
+        assert list(watchers) == ["a2"]
+
+    def test_stalled_client_keeps_latest(self):
+        async def run():
+            hub = ProgressHub()
+            queue = hub.watch("a1")
+            for percent in range(settings.progress_queue_size + 5):
+                hub.dispatch(CHANNEL_PREFIX + "a1", json.dumps(_event("a1", "running", percent=percent)))
+            return [queue.get_nowait()["percent"] for _ in range(queue.qsize())]
+
+        percents = asyncio.run(run())
+        assert len(percents) == settings.progress_queue_size
+        assert percents[-1] == settings.progress_queue_size + 4
+
+
+class TestStream:
+
+    def test_stream_ends_on_final_status(self):
+        async def run():
+            hub = ProgressHub()
+            hub.task = asyncio.create_task(asyncio.sleep(60))  # stands in for a live subscription
+            queue = hub.watch("a1")
+            for event in (_event("a1", "running", "align", 75), _event("a1", "done", "persist", 100)):
+                hub.dispatch(CHANNEL_PREFIX + "a1", json.dumps(event))
+            chunks = await _collect(stream_progress(hub, "a1", queue, _event("a1", "running", "transcribe", 15), _never_disconnected))
+            hub.task.cancel()
+            return chunks, hub.watchers
+
+        chunks, watchers = asyncio.run(run())
+        assert chunks[0].startswith("retry: ")
+        assert [e["status"] for e in _parse_sse("".join(chunks))] == ["running", "running", "done"]
+        assert watchers == {}
+
+    def test_keepalive_and_disconnect(self):
+        async def run():
+            hub = ProgressHub()
+            hub.task = asyncio.create_task(asyncio.sleep(60))
+            hub.last_event = AsyncMock(return_value=_event("a1", "running", "transcribe", 15))
+            checks = []
+
+            async def disconnected():
+                checks.append(True)
+                return len(checks) > 1
+
+            with patch.object(settings, "progress_keepalive_sec", 0.01):
+                chunks = await _collect(stream_progress(hub, "a1", hub.watch("a1"), _event("a1", "queued"), disconnected))
+            hub.task.cancel()
+            return chunks
+
+        chunks = asyncio.run(run())
+        assert chunks[-1] == ": keepalive\n\n"
+        assert len(_parse_sse("".join(chunks))) == 1
+
+    def test_missed_final_event_ends_stream(self):
+        async def run():
+            hub = ProgressHub()
+            hub.task = asyncio.create_task(asyncio.sleep(60))
+            # "done" was published while the subscription was down, only the latest state has it
+            hub.last_event = AsyncMock(return_value=_event("a1", "done", "persist", 100))
+            with patch.object(settings, "progress_keepalive_sec", 0.01):
+                chunks = await _collect(stream_progress(hub, "a1", hub.watch("a1"), _event("a1", "running"), _never_disconnected))
+            hub.task.cancel()
+            return chunks, hub.watchers
+
+        chunks, watchers = asyncio.run(run())
+        assert [e["status"] for e in _parse_sse("".join(chunks))] == ["running", "done"]
+        assert watchers == {}
+
+    def test_without_subscription_sends_state_and_closes(self):
+        hub = ProgressHub()
+
+        async def run():
+            return await _collect(stream_progress(hub, "a1", hub.watch("a1"), _event("a1", "running"), _never_disconnected))
+
+        assert [e["status"] for e in _parse_sse("".join(asyncio.run(run())))] == ["running"]
+
+
+class TestEndpoints:
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_status_from_latest_event(self, client):
+        analysis_id = str(ObjectId())
+        event = {**_event(analysis_id, "running", "transcribe", 15), "at": "2026-01-01T00:00:00+00:00"}
+        with patch.object(progress_hub, "last_event", AsyncMock(return_value=event)):
+            response = client.get(f"/v1/upload/status/{analysis_id}")
+        assert response.status_code == 200
+        assert response.json() == _event(analysis_id, "running", "transcribe", 15)
+
+    def test_events_of_finished_analysis(self, client):
+        analysis_id = str(ObjectId())
+        with patch.object(progress_hub, "last_event", AsyncMock(return_value=_event(analysis_id, "done", "persist", 100))), \
+                patch.object(progress_hub, "ensure_started"):
+            response = client.get(f"/v1/upload/status/{analysis_id}/events")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [e["status"] for e in _parse_sse(response.text)] == ["done"]
+        assert progress_hub.watchers == {}
+
+    def test_events_invalid_id(self, client):
+        assert client.get("/v1/upload/status/not-an-id/events").status_code == 400
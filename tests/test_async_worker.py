@@ -0,0 +1,127 @@
+"""
+Test the CPU-bound analysis step used by the async worker and its RQ job bookkeeping
+"""
+import pytest
+import os
+import sys
+import json
+import pickle
+import subprocess
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+worker_dir = project_root / "worker"
+
+from worker.services.analysis import align_transcript
+
+
+WORDS = [
+    {"word": "Bu", "start": 0.0, "end": 0.4},
+    {"word": "bir", "start": 0.5, "end": 0.8},
+    {"word": "test", "start": 1.9, "end": 2.3},
+]
+
+
+class TestAlignTranscript:
+    """align_transcript must be self-contained so it can run in a process pool"""
+    
+    def test_counts_and_metrics(self):
+        """Exact reading yields only correct events and zero WER"""
+        result = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        
+        assert result["ops"]["correct"] == 3
+        assert result["metrics"]["wer"] == 0
+        assert len(result["word_events"]) == 3
+        assert all(e["type"] == "correct" for e in result["word_events"])
+        assert result["ref_count"] == 3
+        assert result["hyp_count"] == 3
+    
+    def test_pause_detection_included(self):
+        """The 1.1s gap before 'test' is reported as a pause"""
+        result = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        
+        assert len(result["pause_events"]) == 1
+        assert result["pause_events"][0]["after_word_idx"] == 1
+    
+    def test_result_is_picklable(self):
+        """Results cross process boundaries"""
+        result = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        assert pickle.loads(pickle.dumps(result)) == result
+    
+    def test_runs_in_process_pool(self):
+        """Same output inline and in a worker process"""
+        inline = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            pooled = executor.submit(align_transcript, ["Bu", "bir", "test"], WORDS, 500).result()
+        
+        assert pooled["word_events"] == inline["word_events"]
+        assert pooled["metrics"] == inline["metrics"]
+
+
+# async_worker.py uses the worker's flat imports, so it runs in a subprocess from the worker directory
+PERFORM_CODE = """
+import asyncio, json, sys
+from types import SimpleNamespace
+import jobs
+from async_worker import AsyncWorker
+
+calls = []
+
+async def run_analysis(analysis_id, **kwargs):
+    await asyncio.sleep({sleep})
+    if {fail}:
+        raise ValueError("alignment failed")
+
+async def fail_analysis(analysis_id, error):
+    calls.append(["fail_analysis", analysis_id, error])
+
+jobs.run_analysis, jobs.fail_analysis = run_analysis, fail_analysis
+worker = AsyncWorker("redis://localhost:1/0", ["main"], concurrency=1, cpu_processes=1)
+worker._start = lambda job: calls.append(["start", job.id])
+worker._finish = lambda job: calls.append(["finish", job.id])
+worker._fail = lambda job, exc_string: calls.append(["fail", job.id, exc_string.strip().splitlines()[-1]])
+job = SimpleNamespace(id="j1", func_name="main.analyze_audio", args=["a1"], timeout={timeout})
+
+async def main():
+    semaphore = asyncio.Semaphore(1)
+    await semaphore.acquire()
+    await worker._perform(job, semaphore)
+    return semaphore.locked()
+
+locked = asyncio.run(main())
+print(json.dumps({{"calls": calls, "released": not locked}}))
+"""
+
+
+def _perform(sleep=0.0, fail=False, timeout=180):
+    result = subprocess.run(
+        [sys.executable, "-c", PERFORM_CODE.format(sleep=sleep, fail=fail, timeout=timeout)],
+        cwd=str(worker_dir), capture_output=True, text=True, timeout=120,
+        env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING"}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestJobRegistries:
+    """Jobs are registered as started and end up finished or failed, like under rq worker"""
+
+    def test_finished(self):
+        report = _perform()
+        assert report["calls"] == [["start", "j1"], ["finish", "j1"]]
+        assert report["released"]
+
+    def test_failed(self):
+        report = _perform(fail=True)
+        assert report["calls"] == [["start", "j1"], ["fail", "j1", "ValueError: alignment failed"]]
+
+    def test_timeout_fails_job_and_analysis(self):
+        report = _perform(sleep=5, timeout=0.2)
+        start, fail_analysis, fail = report["calls"]
+        assert start == ["start", "j1"]
+        assert fail_analysis[:2] == ["fail_analysis", "a1"] and "timeout" in fail_analysis[2]
+        assert fail[:2] == ["fail", "j1"] and "timeout" in fail[2]
+        assert report["released"]
@@ -0,0 +1,123 @@
+"""
+Test the ffmpeg audio normalization used before STT
+"""
+import pytest
+import sys
+import io
+import os
+import wave
+import math
+import struct
+import asyncio
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from worker.services import audio_normalize
+from worker.services.audio_source import AudioSource
+
+
+def _stereo_wav(seconds: float = 1.0, sample_rate: int = 44100) -> bytes:
+    """A 440 Hz stereo tone, like an uncompressed phone recording"""
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        value = int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate))
+        frames += struct.pack("<hh", value, value)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+class TestCommand:
+    """ffmpeg arguments for mono speech output on stdout"""
+
+    def test_opus_command(self):
+        command = audio_normalize.ffmpeg_command("/tmp/in.m4a", "opus", 16000, "24k")
+        assert command[0] == "ffmpeg"
+        assert command[command.index("-i") + 1] == "/tmp/in.m4a"
+        assert command[command.index("-ac") + 1] == "1"
+        assert command[command.index("-ar") + 1] == "16000"
+        assert command[command.index("-c:a") + 1] == "libopus"
+        assert command[command.index("-b:a") + 1] == "24k"
+        assert command[-1] == "pipe:1"
+
+    def test_flac_command(self):
+        command = audio_normalize.ffmpeg_command("/tmp/in.wav", "flac")
+        assert command[command.index("-c:a") + 1] == "flac"
+        assert "-b:a" not in command
+
+    def test_output_is_bitexact(self):
+        command = audio_normalize.ffmpeg_command("/tmp/in.m4a")
+        # Output options: after the input, before the output target
+        assert command.index("-i") < command.index("-fflags") < command.index("pipe:1")
+        assert command[command.index("-fflags") + 1] == "+bitexact"
+        assert command[command.index("-flags:a") + 1] == "+bitexact"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            audio_normalize.ffmpeg_command("/tmp/in.wav", "mp3")
+
+    def test_blob_name_next_to_original(self):
+        assert audio_normalize.normalized_blob_name("audio/t1/kayit.m4a") == "audio/t1/kayit.16k.ogg"
+        assert audio_normalize.normalized_blob_name("audio/t1/kayit.wav", "flac", 16000) == "audio/t1/kayit.16k.flac"
+
+
+class TestInputPath:
+    """ffmpeg always gets a seekable file"""
+
+    def test_file_source_is_used_in_place(self, tmp_path):
+        path = tmp_path / "kayit.wav"
+        path.write_bytes(b"RIFF")
+        with AudioSource.from_path(str(path)) as source:
+            with audio_normalize._input_path(source, str(tmp_path)) as input_path:
+                assert input_path == str(path)
+
+    def test_memory_source_is_copied_and_removed(self, tmp_path):
+        with AudioSource.from_bytes(b"audio-bytes", name="kayit.m4a") as source:
+            with audio_normalize._input_path(source, str(tmp_path)) as input_path:
+                assert input_path.endswith(".m4a")
+                assert Path(input_path).read_bytes() == b"audio-bytes"
+            assert not os.path.exists(input_path)
+
+
+class TestTranscode:
+
+    def test_missing_ffmpeg(self, monkeypatch):
+        monkeypatch.setattr(audio_normalize.shutil, "which", lambda name: None)
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(audio_normalize.TranscodeError):
+                asyncio.run(audio_normalize.transcode(source))
+
+    @pytest.mark.skipif(not audio_normalize.ffmpeg_available(), reason="ffmpeg not installed")
+    @pytest.mark.parametrize("fmt", ["opus", "flac"])
+    def test_stereo_wav_shrinks(self, fmt, tmp_path):
+        with AudioSource.from_bytes(_stereo_wav(), name="kayit.wav", scratch_dir=str(tmp_path)) as source:
+            report = asyncio.run(audio_normalize.normalize(source, fmt, scratch_dir=str(tmp_path)))
+            with report.pop("source") as normalized:
+                assert normalized.name == f"kayit{audio_normalize.FORMATS[fmt]['extension']}"
+                assert normalized.content_type == audio_normalize.FORMATS[fmt]["content_type"]
+                assert 0 < normalized.size < source.size
+        assert report["original_bytes"] > report["normalized_bytes"]
+
+    @pytest.mark.skipif(not audio_normalize.ffmpeg_available(), reason="ffmpeg not installed")
+    @pytest.mark.parametrize("fmt", ["opus", "flac"])
+    def test_same_input_same_hash(self, fmt, tmp_path):
+        """The STT cache is keyed on the normalized audio's SHA-256"""
+        hashes = []
+        for _ in range(2):
+            with AudioSource.from_bytes(_stereo_wav(), name="kayit.wav", scratch_dir=str(tmp_path)) as source:
+                with asyncio.run(audio_normalize.transcode(source, fmt, scratch_dir=str(tmp_path))) as normalized:
+                    hashes.append(normalized.sha256)
+        assert hashes[0] == hashes[1]
+
+    @pytest.mark.skipif(not audio_normalize.ffmpeg_available(), reason="ffmpeg not installed")
+    def test_invalid_audio(self, tmp_path):
+        with AudioSource.from_bytes(b"not audio at all", name="bozuk.m4a", scratch_dir=str(tmp_path)) as source:
+            with pytest.raises(audio_normalize.TranscodeError):
+                asyncio.run(audio_normalize.transcode(source, scratch_dir=str(tmp_path)))
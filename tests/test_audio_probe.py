@@ -0,0 +1,194 @@
+"""
+Test the header-only audio metadata probe and the duration backfill built on it
+"""
+import pytest
+import sys
+import asyncio
+import importlib.util
+import io
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.audio_probe import AudioInfo, ProbeError, probe_audio, probe_headers
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _full_box(kind: bytes, payload: bytes, version: int = 0) -> bytes:
+    return _box(kind, bytes([version, 0, 0, 0]) + payload)
+
+
+def m4a_bytes(duration_sec: float, sample_rate: int = 44100, mdat_bytes: int = 200000) -> bytes:
+    """ftyp, mdat, then moov at the end, as phones write them"""
+    mdhd = _full_box(b"mdhd", struct.pack(">IIII", 0, 0, sample_rate, int(duration_sec * sample_rate)) + b"\0" * 4)
+    hdlr = _full_box(b"hdlr", b"\0" * 4 + b"soun" + b"\0" * 12 + b"SoundHandler\0")
+    mp4a = _box(b"mp4a", b"\0" * 6 + struct.pack(">H", 1) + b"\0" * 8 + struct.pack(">HHHHI", 1, 16, 0, 0, sample_rate << 16))
+    stsd = _full_box(b"stsd", struct.pack(">I", 1) + mp4a)
+    trak = _box(b"trak", _box(b"mdia", mdhd + hdlr + _box(b"minf", _box(b"stbl", stsd))))
+    mvhd = _full_box(b"mvhd", struct.pack(">IIII", 0, 0, 1000, int(duration_sec * 1000)) + b"\0" * 80)
+    return _box(b"ftyp", b"M4A \0\0\0\0isomM4A ") + _box(b"mdat", b"\0" * mdat_bytes) + _box(b"moov", mvhd + trak)
+
+
+MP3_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])  # MPEG1 layer III, 128 kbit/s, 44.1 kHz, stereo
+MP3_FRAME_BYTES = 417
+
+
+def mp3_bytes(frames: int, xing_frames=None, id3: bool = True) -> bytes:
+    data = b""
+    if id3:
+        data += b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\0" * 20
+    first = bytearray(MP3_HEADER + b"\0" * (MP3_FRAME_BYTES - 4))
+    if xing_frames is not None:
+        first[4 + 32:4 + 32 + 12] = b"Xing" + struct.pack(">II", 1, xing_frames)
+    data += bytes(first)
+    data += (MP3_HEADER + b"\0" * (MP3_FRAME_BYTES - 4)) * (frames - 1)
+    return data
+
+
+class CountingReader(io.BytesIO):
+    """Seekable file object that counts the bytes read"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class TestProbeHeaders:
+
+    def test_wav(self, tmp_path):
+        path = tmp_path / "kayit.wav"
+        sf.write(path, np.zeros(24000, dtype="float32"), 16000)
+        info = probe_headers(str(path))
+        assert info == AudioInfo(1.5, 16000, "soundfile")
+        assert info.duration_ms == 1500
+
+    def test_m4a_reads_only_boxes(self):
+        reader = CountingReader(m4a_bytes(61.5, mdat_bytes=2 * 1024 * 1024))
+        info = probe_headers(reader)
+        assert info == AudioInfo(61.5, 44100, "mp4")
+        assert reader.bytes_read < 2048
+
+    def test_mp3_xing(self):
+        info = probe_headers(io.BytesIO(mp3_bytes(10, xing_frames=1000)))
+        assert info.method == "mp3" and info.sample_rate == 44100
+        assert info.duration_sec == pytest.approx(1000 * 1152 / 44100)
+
+    def test_mp3_cbr(self):
+        data = mp3_bytes(100) + b"TAG" + b"\0" * 125
+        info = probe_headers(io.BytesIO(data))
+        assert info.duration_sec == pytest.approx(100 * 1152 / 44100, rel=0.01)
+
+    def test_m4a_without_duration(self):
+        """Fragmented/streamed recordings leave the moov durations at zero"""
+        assert probe_headers(io.BytesIO(m4a_bytes(0.0))) is None
+
+    def test_unknown(self):
+        assert probe_headers(io.BytesIO(b"not audio at all" * 100)) is None
+
+
+class TestProbeAudio:
+
+    def test_falls_back_to_ffprobe(self, tmp_path):
+        path = tmp_path / "kayit.aac"
+        path.write_bytes(b"\0" * 1000)
+        calls = []
+
+        async def ffprobe(p, timeout_sec=30):
+            calls.append(p)
+            return AudioInfo(3.0, 22050, "ffprobe")
+        with patch("app.services.audio_probe.probe_ffprobe", ffprobe):
+            assert asyncio.run(probe_audio(str(path))).method == "ffprobe"
+        assert calls == [str(path)]
+
+    def test_zero_mp4_duration_uses_ffprobe(self, tmp_path):
+        path = tmp_path / "kayit.m4a"
+        path.write_bytes(m4a_bytes(0.0))
+
+        async def ffprobe(p, timeout_sec=30):
+            return AudioInfo(7.5, 44100, "ffprobe")
+        with patch("app.services.audio_probe.probe_ffprobe", ffprobe):
+            assert asyncio.run(probe_audio(str(path))) == AudioInfo(7.5, 44100, "ffprobe")
+
+    def test_headers_skip_ffprobe(self, tmp_path):
+        path = tmp_path / "kayit.m4a"
+        path.write_bytes(m4a_bytes(12.0))
+
+        async def ffprobe(p, timeout_sec=30):
+            raise AssertionError("ffprobe called")
+        with patch("app.services.audio_probe.probe_ffprobe", ffprobe):
+            assert asyncio.run(probe_audio(str(path))).duration_sec == 12.0
+
+    def test_no_ffprobe(self, tmp_path):
+        path = tmp_path / "kayit.aac"
+        path.write_bytes(b"\0" * 1000)
+        with patch("app.services.audio_probe.ffprobe_available", lambda: False), pytest.raises(ProbeError):
+            asyncio.run(probe_audio(str(path)))
+
+
+class FakeBlob:
+    def __init__(self, data):
+        self.data = data
+        self.downloaded = False
+
+    def reload(self):
+        pass
+
+    def open(self, mode, chunk_size=None):
+        return io.BytesIO(self.data)
+
+    def download_to_filename(self, path):
+        self.downloaded = True
+        with open(path, "wb") as f:
+            f.write(self.data)
+
+
+class FakeBucket:
+    def __init__(self, blobs):
+        self.blobs = blobs
+
+    def blob(self, name):
+        return self.blobs[name]
+
+
+def _load_backfill():
+    """backend/scripts/update_audio_durations.py"""
+    spec = importlib.util.spec_from_file_location(
+        "update_audio_durations", project_root / "backend" / "scripts" / "update_audio_durations.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestBackfill:
+
+    def test_headers_without_download(self):
+        backfill = _load_backfill()
+        blob = FakeBlob(m4a_bytes(30.0))
+        info = asyncio.run(backfill.probe_blob(FakeBucket({"a.m4a": blob}), "a.m4a"))
+        assert info.duration_sec == 30.0 and not blob.downloaded
+
+    def test_download_for_ffprobe(self):
+        backfill = _load_backfill()
+        blob = FakeBlob(b"\0" * 1000)
+
+        async def ffprobe(path, timeout_sec=30):
+            return AudioInfo(4.0, None, "ffprobe")
+        with patch.object(backfill, "probe_ffprobe", ffprobe):
+            info = asyncio.run(backfill.probe_blob(FakeBucket({"a.aac": blob}), "a.aac"))
+        assert info.method == "ffprobe" and blob.downloaded
@@ -0,0 +1,87 @@
+"""
+Test the in-memory / spill-to-scratch audio source used for STT uploads
+"""
+import pytest
+import sys
+import os
+import io
+import hashlib
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from worker.services.audio_source import AudioSource, cleanup_scratch_dir
+
+
+class TestAudioSource:
+    """AudioSource keeps small audio in memory and cleans up spill files"""
+
+    def test_small_audio_stays_in_memory(self, tmp_path):
+        """Data below the limit never touches the scratch directory"""
+        data = b"x" * 1000
+        with AudioSource.from_bytes(data, name="a.mp3", max_memory_bytes=4096, scratch_dir=str(tmp_path)) as source:
+            assert not source.spilled
+            assert source.size == len(data)
+            assert source.sha256 == hashlib.sha256(data).hexdigest()
+            assert list(tmp_path.iterdir()) == []
+
+            # fileno() must not force a rollover to disk
+            with pytest.raises(io.UnsupportedOperation):
+                source.open().fileno()
+            assert not source.spilled
+
+    def test_large_audio_spills_and_is_removed(self, tmp_path):
+        """Data above the limit spills to the scratch dir and is deleted on close"""
+        source = AudioSource(name="big.mp3", max_memory_bytes=1024, scratch_dir=str(tmp_path))
+        for _ in range(10):
+            source.write(b"y" * 512)
+
+        assert source.spilled
+        assert source.size == 5120
+        assert source.read() == b"y" * 5120
+
+        source.close()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_open_rewinds_for_retries(self, tmp_path):
+        """Every open() starts at the beginning and close() keeps the buffer usable"""
+        with AudioSource.from_bytes(b"abcdef", scratch_dir=str(tmp_path)) as source:
+            with source.open() as f:
+                assert f.read(3) == b"abc"
+            with source.open() as f:
+                assert f.read() == b"abcdef"
+
+    def test_from_path_reads_in_place(self, tmp_path):
+        """Local files are read directly and left untouched"""
+        path = tmp_path / "local.wav"
+        path.write_bytes(b"RIFF1234")
+
+        with AudioSource.from_path(str(path), scratch_dir=str(tmp_path / "scratch")) as source:
+            assert source.name == "local.wav"
+            assert source.size == 8
+            assert source.read() == b"RIFF1234"
+            assert source.sha256 == hashlib.sha256(b"RIFF1234").hexdigest()
+
+        assert path.exists()
+
+
+class TestCleanupScratchDir:
+    """Stale spill files from killed workers are removed"""
+
+    def test_removes_only_old_files(self, tmp_path):
+        old_file = tmp_path / "audio-old"
+        new_file = tmp_path / "audio-new"
+        old_file.write_bytes(b"1")
+        new_file.write_bytes(b"2")
+        past = time.time() - 7200
+        os.utime(old_file, (past, past))
+
+        assert cleanup_scratch_dir(str(tmp_path), max_age_sec=3600) == 1
+        assert not old_file.exists()
+        assert new_file.exists()
+
+    def test_missing_dir(self, tmp_path):
+        assert cleanup_scratch_dir(str(tmp_path / "missing")) == 0
@@ -0,0 +1,188 @@
+"""
+Test the per-token auth context cache and its pub/sub invalidation
+"""
+import pytest
+import sys
+import asyncio
+import json
+import time
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.security import HTTPAuthorizationCredentials
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.auth_cache import CHANNEL, AuthContextCache
+from app.models.role import RoleDoc
+from app.models.user import UserDoc, create_access_token, get_current_user
+
+
+class FakeRedis:
+    """The redis.asyncio publish call of the cache"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.published = []
+
+    async def publish(self, channel, data):
+        if self.fail:
+            raise ConnectionError("down")
+        self.published.append((channel, json.loads(data)))
+
+
+def _user(role_id=None, extra=None):
+    return UserDoc.model_construct(
+        id=ObjectId(), email="ogretmen@example.com", username="ogretmen", password_hash="x",
+        role_id=role_id or ObjectId(), extra_permissions=extra or [], is_active=True
+    )
+
+
+def _cache():
+    cache = AuthContextCache()
+    cache.subscribed = True
+    cache.redis = FakeRedis()
+    return cache
+
+
+class TestAuthContextCache:
+
+    def test_hit_and_miss(self):
+        cache = _cache()
+        user = _user()
+        assert cache.get("token") is None
+        cache.put("token", user, frozenset({"student:read"}), None)
+        cached = cache.get("token")
+        assert cached.id == user.id and cached is not user
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    def test_bypassed_while_not_subscribed(self):
+        cache = _cache()
+        cache.put("token", _user(), frozenset(), None)
+        cache.subscribed = False
+        assert cache.get("token") is None
+        cache.put("other", _user(), frozenset(), None)
+        assert "other" not in cache.contexts
+
+    def test_expiry_capped_by_token(self):
+        cache = _cache()
+        cache.put("token", _user(), frozenset(), time.time() - 1)
+        assert cache.get("token") is None
+        assert "token" not in cache.contexts
+
+    def test_lru_limit(self):
+        cache = _cache()
+        with patch("app.auth_cache.settings.auth_cache_size", 2):
+            for token in ("a", "b", "c"):
+                cache.put(token, _user(), frozenset(), None)
+        assert list(cache.contexts) == ["b", "c"]
+
+    def test_copies_are_isolated(self):
+        cache = _cache()
+        cache.put("token", _user(), frozenset({"student:read"}), None)
+        cached = cache.get("token")
+        cached.username = "değişti"
+        assert cache.get("token").username == "ogretmen"
+
+    def test_cached_permissions_skip_role_lookup(self):
+        cache = _cache()
+        cache.put("token", _user(), frozenset({"student:read"}), None)
+        cached = cache.get("token")
+
+        async def get_role():
+            raise AssertionError("role read")
+        with patch.object(UserDoc, "get_role", lambda self: get_role()):
+            assert asyncio.run(cached.has_permission("student:read"))
+            assert not asyncio.run(cached.has_permission("user:delete"))
+
+    def test_drop_by_user_and_role(self):
+        cache = _cache()
+        role_id = ObjectId()
+        first, second, other = _user(role_id), _user(role_id), _user()
+        cache.put("first", first, frozenset(), None)
+        cache.put("second", second, frozenset(), None)
+        cache.put("other", other, frozenset(), None)
+        assert cache.drop(user_id=str(first.id)) == 1
+        assert cache.drop(role_id=str(role_id)) == 1
+        assert list(cache.contexts) == ["other"]
+
+    def test_invalidate_publishes(self):
+        cache = _cache()
+        user = _user()
+        cache.put("token", user, frozenset(), None)
+        asyncio.run(cache.invalidate(user_id=user.id))
+        assert cache.contexts == {}
+        assert cache.redis.published == [(CHANNEL, {"user_id": str(user.id), "role_id": None})]
+
+    def test_dispatch(self):
+        cache = _cache()
+        user = _user()
+        cache.put("token", user, frozenset(), None)
+        assert cache.dispatch(json.dumps({"user_id": None, "role_id": str(user.role_id)})) == 1
+        assert cache.get("token") is None
+
+    def test_publish_failure_disables_cache(self):
+        cache = _cache()
+        cache.redis = FakeRedis(fail=True)
+        cache.put("token", _user(), frozenset(), None)
+        asyncio.run(cache.invalidate(role_id=ObjectId()))
+        assert not cache.active
+        assert cache.contexts == {}
+
+
+class TestEffectivePermissions:
+
+    def test_role_read_once(self):
+        user = _user(extra=["text:read"])
+        role = RoleDoc.model_construct(permissions=["student:read"])
+        calls = []
+
+        async def get(role_id):
+            calls.append(role_id)
+            return role
+        with patch("app.models.role.RoleDoc.get", get):
+            assert asyncio.run(user.has_permission("student:read"))
+            assert asyncio.run(user.has_all_permissions(["student:read", "text:read"]))
+            assert len(calls) == 1
+            user.extra_permissions = ["text:read", "user:read"]
+            assert asyncio.run(user.has_permission("user:read"))
+            assert len(calls) == 2
+
+
+class TestGetCurrentUser:
+
+    def test_second_request_uses_cache(self):
+        cache = _cache()
+        user = _user()
+        role = RoleDoc.model_construct(permissions=["student:read"])
+        calls = {"user": 0, "role": 0}
+
+        async def get_user(user_id):
+            calls["user"] += 1
+            return user.model_copy(deep=True)
+
+        async def get_role(role_id):
+            calls["role"] += 1
+            return role
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(str(user.id), "teacher"))
+        with patch("app.models.user.auth_cache", cache), \
+                patch("app.models.user.UserDoc.get", get_user), \
+                patch("app.models.role.RoleDoc.get", get_role):
+            for _ in range(3):
+                current = asyncio.run(get_current_user(credentials))
+                assert asyncio.run(current.has_permission("student:read"))
+            assert calls == {"user": 1, "role": 1}
+
+            asyncio.run(cache.invalidate(user_id=user.id))
+            asyncio.run(get_current_user(credentials))
+            assert calls["user"] == 2
+
+    def test_invalid_token_not_cached(self):
+        from fastapi import HTTPException
+        cache = _cache()
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-token")
+        with patch("app.models.user.auth_cache", cache), pytest.raises(HTTPException):
+            asyncio.run(get_current_user(credentials))
+        assert cache.contexts == {}
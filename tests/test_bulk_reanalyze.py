@@ -0,0 +1,271 @@
+"""
+Test the bulk re-analysis tool against an in-memory stand-in for the Motor database
+"""
+import pytest
+import sys
+import time
+import asyncio
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from worker.services import analysis, event_columns
+
+
+def _load_script(name):
+    """scripts/<name>.py (backend/scripts shadows the `scripts` package name)"""
+    spec = importlib.util.spec_from_file_location(name, project_root / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bulk_reanalyze = _load_script("bulk_reanalyze")
+BulkReanalyzer, Checkpoint, RateLimiter = bulk_reanalyze.BulkReanalyzer, bulk_reanalyze.Checkpoint, bulk_reanalyze.RateLimiter
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        value = doc
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gt" in condition and not (value is not None and value > condition["$gt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        self.iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """The Motor collection calls the tool makes"""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.bulk_writes = 0
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    async def delete_many(self, query):
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+
+    async def insert_many(self, rows, ordered=True):
+        self.docs += [dict(row) for row in rows]
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes += 1
+        for op in operations:
+            matched = [d for d in self.docs if _matches(d, op._filter)]
+            if "$set" in op._doc:
+                for doc in matched:
+                    for key, value in op._doc["$set"].items():
+                        target = doc
+                        *path, last = key.split(".")
+                        for part in path:
+                            target = target.setdefault(part, {})
+                        target[last] = value
+            else:
+                self.docs = [d for d in self.docs if d not in matched] + [dict(op._doc)]
+
+
+class FakeDb:
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+TEXT_ID = ObjectId()
+REF_TOKENS = ["ali", "okula", "gitti", "annesi", "ona", "kitap", "aldı"]
+READ_WORDS = ["ali", "okula", "okula", "gitti", "annesi", "bir", "kitap", "aldı"]
+
+
+def _words(tokens, gap_after=None):
+    words, t = [], 0.0
+    for i, token in enumerate(tokens):
+        words.append({"word": token, "start": t, "end": t + 0.4, "confidence": 0.9})
+        t += 0.5 + (1.5 if i == gap_after else 0)
+    return words
+
+
+def _database(count=5):
+    sessions, analyses, stt_results = [], [], []
+    for i in range(count):
+        session_id = ObjectId()
+        sessions.append({"_id": session_id, "text_id": TEXT_ID})
+        stt_id = ObjectId()
+        stt_results.append({"_id": stt_id, "session_id": session_id, "created_at": i, "words": _words(READ_WORDS, gap_after=2)})
+        # Half of the analyses point at their STT result, the rest are matched by session
+        pipeline = {"stt_result_id": str(stt_id)} if i % 2 else {}
+        analyses.append({"_id": ObjectId(), "session_id": session_id, "status": "done", "summary": {}, "pipeline": pipeline})
+    analyses.append({"_id": ObjectId(), "session_id": ObjectId(), "status": "done", "summary": {}, "pipeline": {}})
+    return FakeDb(
+        analyses=FakeCollection(analyses),
+        reading_sessions=FakeCollection(sessions),
+        stt_results=FakeCollection(stt_results),
+        texts=FakeCollection([{"_id": TEXT_ID, "body": "Ali okula gitti. Annesi ona kitap aldı.", "canonical": {"tokens": REF_TOKENS}, "grade": 2}]),
+        word_events=FakeCollection([{"analysis_id": a["_id"], "position": 0, "type": "stale"} for a in analyses])
+    )
+
+
+def _run(reanalyzer, query):
+    asyncio.run(reanalyzer.run(query))
+
+
+class TestReanalyze:
+    """Bulk recomputes produce what the worker persists"""
+
+    def test_summary_matches_worker_alignment(self):
+        words = _words(READ_WORDS, gap_after=2)
+        result = analysis.reanalyze("a1", REF_TOKENS, words, 500, 2)
+        aligned = analysis.align_transcript(REF_TOKENS, words, 500)
+        assert len(result["word_rows"]) == len(aligned["word_events"])
+        assert result["summary"]["counts"]["repetition"] == 1
+        assert result["summary"]["counts"]["extra"] == 1
+        assert result["summary"]["long_pauses"] == {"count": 1, "threshold_ms": 500}
+        assert result["summary"]["wpm"] == aligned["wpm"]
+        assert all(row["analysis_id"] == "a1" for row in result["word_rows"] + result["pause_rows"])
+
+    def test_missing_grade_scores_as_grade_one(self):
+        words = _words(READ_WORDS)
+        assert analysis.reanalyze("a1", REF_TOKENS, words, 500, None)["summary"]["grade_score"] == \
+            analysis.reanalyze("a1", REF_TOKENS, words, 500, 1)["summary"]["grade_score"]
+
+
+class TestBulkReanalyzer:
+
+    def test_recomputes_in_batches(self, tmp_path):
+        db = _database(5)
+        checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+        with ThreadPoolExecutor(2) as executor:
+            reanalyzer = BulkReanalyzer(db, executor, batch_size=2, event_storage="both", checkpoint=checkpoint)
+            _run(reanalyzer, reanalyzer.query())
+
+        assert reanalyzer.stats["analyses_recomputed"] == 5
+        assert reanalyzer.stats["analyses_skipped"] == 1  # no session
+        assert reanalyzer.stats["batches"] == 3
+        assert db.analyses.bulk_writes == 3
+
+        expected = analysis.reanalyze(None, REF_TOKENS, _words(READ_WORDS, gap_after=2), 500, 2)
+        for doc in db.analyses.docs[:5]:
+            assert doc["summary"] == expected["summary"]
+            assert "recomputed_at" in doc["pipeline"]
+            rows = [row for row in db.word_events.docs if row["analysis_id"] == doc["_id"]]
+            assert [row["type"] for row in rows] == [row["type"] for row in expected["word_rows"]]
+            columnar = next(d for d in db.analysis_events.docs if d["analysis_id"] == doc["_id"])
+            assert len(event_columns.decode_events(columnar)[0]) == len(expected["word_rows"])
+
+        assert checkpoint.state["last_id"] == str(db.analyses.docs[-1]["_id"])
+        assert checkpoint.state["processed"] == 6
+
+    def test_documents_only_drops_stale_columnar(self):
+        db = _database(2)
+        db.analysis_events.docs = [
+            event_columns.encode_events(doc["_id"], [], [])
+            for doc in db.analyses.docs
+        ]
+        with ThreadPoolExecutor(2) as executor:
+            reanalyzer = BulkReanalyzer(db, executor, batch_size=10, event_storage="documents")
+            _run(reanalyzer, reanalyzer.query())
+
+        assert reanalyzer.stats["analyses_recomputed"] == 2
+        # Only the skipped analysis (no session) keeps its columnar copy
+        assert [d["analysis_id"] for d in db.analysis_events.docs] == [db.analyses.docs[-1]["_id"]]
+
+    def test_resume_after_checkpoint(self, tmp_path):
+        db = _database(5)
+        path = str(tmp_path / "checkpoint.json")
+        Checkpoint(path).save(db.analyses.docs[2]["_id"], 3, [])
+
+        checkpoint = Checkpoint(path)
+        assert checkpoint.load()
+        with ThreadPoolExecutor(2) as executor:
+            reanalyzer = BulkReanalyzer(db, executor, batch_size=10, checkpoint=checkpoint)
+            _run(reanalyzer, reanalyzer.query())
+
+        assert [bool(doc["summary"]) for doc in db.analyses.docs[:5]] == [False, False, False, True, True]
+        assert checkpoint.state["processed"] == 6
+
+    def test_dry_run_writes_nothing(self):
+        db = _database(3)
+        with ThreadPoolExecutor(2) as executor:
+            reanalyzer = BulkReanalyzer(db, executor, batch_size=2, dry_run=True)
+            _run(reanalyzer, reanalyzer.query())
+        assert reanalyzer.stats["analyses_recomputed"] == 3
+        assert all(doc["summary"] == {} for doc in db.analyses.docs)
+        assert all(row["type"] == "stale" for row in db.word_events.docs)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+
+    async def execute(self):
+        pass
+
+
+class TestCacheInvalidation:
+
+    def test_rewritten_analyses_get_new_version(self):
+        db, redis = _database(2), FakeRedis()
+        with ThreadPoolExecutor(2) as executor:
+            reanalyzer = BulkReanalyzer(db, executor, batch_size=10, redis=redis)
+            _run(reanalyzer, reanalyzer.query())
+        assert redis.data == {f"analysis:version:{doc['_id']}": 1 for doc in db.analyses.docs[:2]}
+
+
+class TestRateLimiter:
+
+    def test_spaces_out_batches(self):
+        async def run():
+            limiter = RateLimiter(100)
+            start = time.monotonic()
+            for _ in range(3):
+                await limiter.acquire(5)
+            return time.monotonic() - start
+
+        # 5 start immediately, the next two batches wait 50ms each
+        assert 0.09 <= asyncio.run(run()) < 0.5
+
+    def test_unlimited(self):
+        assert asyncio.run(RateLimiter(None).acquire(1000)) == 0.0
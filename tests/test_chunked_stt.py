@@ -0,0 +1,254 @@
+"""
+Test silence-split chunked transcription and timestamp stitching
+"""
+import pytest
+import sys
+import io
+import math
+import wave
+import array
+import asyncio
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from worker.services import chunked_stt
+from worker.services.audio_normalize import ffmpeg_available
+from worker.services.audio_source import AudioSource
+from worker.services.chunked_stt import Chunk, parse_silencedetect, plan_chunks, stitch
+
+
+SILENCEDETECT_OUTPUT = """Input #0, wav, from 'kayit.wav':
+  Duration: 00:02:05.50, bitrate: 256 kb/s
+  Stream #0:0: Audio: pcm_s16le, 16000 Hz, mono, s16, 256 kb/s
+[silencedetect @ 0x55] silence_start: 3.21
+[silencedetect @ 0x55] silence_end: 3.98 | silence_duration: 0.77
+[silencedetect @ 0x55] silence_start: 61.5
+[silencedetect @ 0x55] silence_end: 62.7 | silence_duration: 1.2
+[silencedetect @ 0x55] silence_start: 124.9
+size=N/A time=00:02:05.49 bitrate=N/A speed= 512x
+"""
+
+
+def _words(*entries):
+    """Provider-shaped words list from (text, start, end) with spacing between"""
+    words = []
+    for text, start, end in entries:
+        if words:
+            words.append({"type": "spacing", "text": " ", "start": words[-1]["end"], "end": start})
+        words.append({"type": "word", "text": text, "start": start, "end": end})
+    return words
+
+
+class TestParse:
+    """ffmpeg silencedetect output"""
+
+    def test_silences_and_duration(self):
+        silences, duration = parse_silencedetect(SILENCEDETECT_OUTPUT)
+        assert duration == pytest.approx(125.5)
+        # The trailing silence runs until the end of the recording
+        assert silences == [(3.21, 3.98), (61.5, 62.7), (124.9, 125.5)]
+
+    def test_duration_from_progress(self):
+        _silences, duration = parse_silencedetect("size=N/A time=00:01:02.50 bitrate=N/A\n")
+        assert duration == pytest.approx(62.5)
+
+
+class TestPlan:
+    """Cuts at silences, bounded chunk length"""
+
+    def test_short_recording_is_one_chunk(self):
+        chunks = plan_chunks(40.0, [(10.0, 11.0)], max_chunk_sec=60)
+        assert len(chunks) == 1
+        assert (chunks[0].start, chunks[0].end) == (0.0, 40.0)
+
+    def test_cuts_at_longest_silence_in_window(self):
+        silences = [(20.0, 20.4), (40.0, 41.5), (55.0, 55.5), (100.0, 101.0)]
+        chunks = plan_chunks(150.0, silences, max_chunk_sec=60, overlap_sec=0.5)
+        assert chunks[0].own_end == pytest.approx(40.75)
+        assert chunks[1].own_start == pytest.approx(40.75)
+        assert chunks[1].own_end == pytest.approx(100.5)
+        assert chunks[0].end == pytest.approx(41.25)
+        assert chunks[1].start == pytest.approx(40.25)
+
+    def test_hard_cut_without_silence(self):
+        chunks = plan_chunks(130.0, [], max_chunk_sec=60, overlap_sec=1.0)
+        assert [chunk.own_end for chunk in chunks[:-1]] == [60.0, 120.0]
+        assert chunks[1].start == 59.0 and chunks[1].end == 121.0
+        assert chunks[-1].end == 130.0
+
+    def test_owned_parts_cover_recording(self):
+        silences = [(s, s + 0.5) for s in range(7, 300, 13)]
+        chunks = plan_chunks(300.0, silences, max_chunk_sec=45)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert previous.own_end == chunk.own_start
+            assert previous.own_end - max(previous.own_start, 0.0) <= 45
+        assert 300.0 - chunks[-1].own_start <= 45
+        assert chunks[0].own_start == -math.inf and chunks[-1].own_end == math.inf
+
+
+class TestStitch:
+    """Chunk offsets applied, overlap words kept once"""
+
+    def test_offsets_and_overlap(self):
+        first = Chunk(index=0, start=0.0, end=10.5, own_start=-math.inf, own_end=10.0)
+        second = Chunk(index=1, start=9.5, end=20.0, own_start=10.0, own_end=math.inf)
+        results = [
+            (second, {"language_code": "tur", "language_probability": 0.8,
+                      "words": _words(("okula", 0.2, 0.45), ("gitti", 0.7, 1.1), ("sonra", 2.0, 2.4))}),
+            (first, {"language_code": "tur", "language_probability": 1.0,
+                     "words": _words(("Ali", 1.0, 1.3), ("okula", 9.7, 9.95), ("git", 10.2, 10.5))}),
+        ]
+        stitched = stitch(results)
+
+        words = [w for w in stitched["words"] if w["type"] == "word"]
+        assert [w["text"] for w in words] == ["Ali", "okula", "gitti", "sonra"]
+        assert words[2]["start"] == pytest.approx(10.2)
+        assert words[3]["start"] == pytest.approx(11.5)
+        assert stitched["text"] == "Ali okula gitti sonra"
+        assert stitched["language_code"] == "tur"
+        assert stitched["language_probability"] == pytest.approx(0.9)
+        assert [c["words"] for c in stitched["chunks"]] == [2, 2]
+
+    def test_duplicate_word_at_join(self):
+        # Both chunks heard "kitap", with timestamps on either side of the cut
+        first = Chunk(index=0, start=0.0, end=5.5, own_start=-math.inf, own_end=5.0)
+        second = Chunk(index=1, start=4.5, end=10.0, own_start=5.0, own_end=math.inf)
+        stitched = stitch([
+            (first, {"words": _words(("bir", 4.0, 4.3), ("kitap", 4.5, 4.95))}),
+            (second, {"words": _words(("Kitap", 0.55, 0.9), ("okudu", 1.0, 1.4))}),
+        ])
+        assert stitched["text"] == "bir kitap okudu"
+
+    def test_same_word_later_is_kept(self):
+        first = Chunk(index=0, start=0.0, end=5.5, own_start=-math.inf, own_end=5.0)
+        second = Chunk(index=1, start=4.5, end=10.0, own_start=5.0, own_end=math.inf)
+        stitched = stitch([
+            (first, {"words": _words(("çok", 4.0, 4.3))}),
+            (second, {"words": _words(("çok", 1.5, 1.8))}),
+        ])
+        assert stitched["text"] == "çok çok"
+
+
+# Deterministic local STT stand-in: every "word" is a tone burst whose
+# frequency encodes its index, so the stand-in can name the words it hears.
+RATE = 8000
+BASE_HZ, STEP_HZ = 400, 40
+WORD_SEC, WORD_GAP_SEC, SENTENCE_GAP_SEC = 0.4, 0.2, 1.0
+
+
+def _reading(sentences: int = 6, words_per_sentence: int = 4):
+    """WAV bytes plus the true (text, start, end) of every word"""
+    samples = array.array("h")
+    truth = []
+    position = 0.0
+    for s in range(sentences):
+        for w in range(words_per_sentence):
+            k = s * words_per_sentence + w
+            frequency = BASE_HZ + STEP_HZ * k
+            for i in range(int(WORD_SEC * RATE)):
+                samples.append(int(10000 * math.sin(2 * math.pi * frequency * i / RATE)))
+            truth.append((f"w{k}", position, position + WORD_SEC))
+            position += WORD_SEC
+            gap = WORD_GAP_SEC if w < words_per_sentence - 1 else SENTENCE_GAP_SEC
+            samples.extend([0] * int(gap * RATE))
+            position += gap
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue(), truth
+
+
+def _hear(audio: bytes):
+    """Words of a chunk: tone bursts, named by their frequency"""
+    pcm = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(RATE), "pipe:1"],
+        input=audio, capture_output=True, check=True
+    ).stdout
+    samples = array.array("h", pcm)
+    frame = RATE // 100
+    loud = [max(abs(v) for v in samples[i:i + frame] or [0]) > 2000 for i in range(0, len(samples), frame)]
+
+    bursts, start = [], None
+    for i, is_loud in enumerate(loud + [False]):
+        if is_loud and start is None:
+            start = i
+        elif not is_loud and start is not None:
+            if i - start >= 5:
+                bursts.append((start * frame, i * frame))
+            start = None
+
+    words = []
+    for first, last in bursts:
+        segment = samples[first:last]
+        crossings = sum(1 for a, b in zip(segment, segment[1:]) if (a < 0) != (b < 0))
+        frequency = crossings / 2 / (len(segment) / RATE)
+        k = round((frequency - BASE_HZ) / STEP_HZ)
+        words.append((f"w{k}", round(first / RATE, 3), round(last / RATE, 3)))
+    return {"language_code": "tur", "language_probability": 1.0, "text": " ".join(w[0] for w in words), "words": _words(*words)}
+
+
+class _StandIn:
+    """Async STT stand-in counting requests and their concurrency"""
+
+    def __init__(self):
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, source: AudioSource):
+        self.requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            with source.open() as f:
+                audio = f.read()
+            await asyncio.sleep(0.05)
+            return await asyncio.to_thread(_hear, audio)
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+class TestTranscribeChunked:
+    """End to end against the stand-in: same words and timestamps as the whole recording"""
+
+    def _run(self, tmp_path, **kwargs):
+        audio, truth = _reading()
+        stand_in = _StandIn()
+        with AudioSource.from_bytes(audio, name="kayit.wav", scratch_dir=str(tmp_path)) as source:
+            result = asyncio.run(chunked_stt.transcribe_chunked(
+                source, stand_in, min_audio_sec=0, scratch_dir=str(tmp_path), **kwargs
+            ))
+        return result, truth, stand_in
+
+    def _assert_matches(self, result, truth):
+        words = [w for w in result["words"] if w["type"] == "word"]
+        assert [w["text"] for w in words] == [t[0] for t in truth]
+        for word, (_text, start, end) in zip(words, truth):
+            assert word["start"] == pytest.approx(start, abs=0.06)
+            assert word["end"] == pytest.approx(end, abs=0.06)
+
+    def test_split_at_silences(self, tmp_path):
+        result, truth, stand_in = self._run(tmp_path, max_chunk_sec=5.0, concurrency=3, min_silence_sec=0.5)
+        assert len(result["chunks"]) > 2
+        assert stand_in.requests == len(result["chunks"])
+        assert 1 < stand_in.max_active <= 3
+        self._assert_matches(result, truth)
+
+    def test_hard_cuts_inside_words(self, tmp_path):
+        # No silence is long enough, so chunks are cut mid-sentence and the
+        # overlap makes both neighbours hear the words at the cut
+        result, truth, _stand_in = self._run(tmp_path, max_chunk_sec=3.3, overlap_sec=0.5, min_silence_sec=5.0)
+        self._assert_matches(result, truth)
+
+    def test_short_recording_is_not_split(self, tmp_path):
+        result, _truth, stand_in = self._run(tmp_path, max_chunk_sec=60.0)
+        assert result is None
+        assert stand_in.requests == 0
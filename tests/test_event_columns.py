@@ -0,0 +1,81 @@
+"""
+Test the columnar analysis_events encoding and its read adapter shape
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId, BSON
+from worker.services import event_columns, persistence
+from worker.services.analysis import align_transcript
+from app.services import event_columns as backend_event_columns
+
+
+WORDS = [
+    {"word": "Bu", "start": 0.0, "end": 0.4},
+    {"word": "bır", "start": 0.5, "end": 0.8},
+    {"word": "test", "start": 1.9, "end": 2.3},
+    {"word": "test", "start": 2.4, "end": 2.9},
+]
+
+
+def _rows():
+    analysis_id = ObjectId()
+    aligned = align_transcript(["Bu", "bir", "test", "cümlesi"], WORDS, 500)
+    return (
+        analysis_id,
+        persistence.word_event_rows(analysis_id, aligned["word_events"]),
+        persistence.pause_event_rows(analysis_id, aligned["pause_events"])
+    )
+
+
+class TestEventColumns:
+    """encode_events/decode_events must round trip the per-event rows"""
+
+    def test_round_trip(self):
+        analysis_id, word_rows, pause_rows = _rows()
+        doc = event_columns.encode_events(analysis_id, word_rows, pause_rows)
+
+        # Must survive a BSON round trip (packed columns are stored as binary)
+        doc = BSON.encode(doc).decode()
+        decoded_words, decoded_pauses = event_columns.decode_events(doc)
+
+        assert decoded_words == word_rows
+        # Times are kept with millisecond resolution
+        assert len(decoded_pauses) == len(pause_rows)
+        for decoded, row in zip(decoded_pauses, pause_rows):
+            assert decoded == {**row, "duration_ms": pytest.approx(row["duration_ms"], abs=0.5)}
+
+    def test_strings_are_deduplicated(self):
+        analysis_id, word_rows, pause_rows = _rows()
+        doc = event_columns.encode_events(analysis_id, word_rows, pause_rows)
+
+        assert doc["strings"].count("test") == 1
+        assert doc["words"]["count"] == len(word_rows)
+        assert len(doc["words"]["start_ms"]) == 4 * len(word_rows)
+
+    def test_missing_values(self):
+        analysis_id = ObjectId()
+        rows = [{
+            "analysis_id": analysis_id, "position": 0, "ref_token": "kedi", "hyp_token": None,
+            "type": "missing", "sub_type": None, "timing": None, "char_diff": None
+        }]
+        decoded, pauses = event_columns.decode_events(event_columns.encode_events(analysis_id, rows, []))
+        assert decoded == rows
+        assert pauses == []
+
+    def test_empty_analysis(self):
+        analysis_id = ObjectId()
+        assert event_columns.decode_events(event_columns.encode_events(analysis_id, [], [])) == ([], [])
+
+    def test_backend_copy_is_compatible(self):
+        """Worker writes, backend reads - both copies must agree on the format"""
+        analysis_id, word_rows, pause_rows = _rows()
+        doc = event_columns.encode_events(analysis_id, word_rows, pause_rows)
+        assert backend_event_columns.decode_events(doc) == event_columns.decode_events(doc)
+        assert backend_event_columns.WORD_TYPES == event_columns.WORD_TYPES
+        assert backend_event_columns.PAUSE_CLASSES == event_columns.PAUSE_CLASSES
@@ -0,0 +1,97 @@
+"""
+Test raw event rows and unordered bulk writes used by the worker
+"""
+import pytest
+import sys
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from pymongo import ReplaceOne
+from worker.services import persistence
+from worker.services.analysis import align_transcript
+
+
+WORDS = [
+    {"word": "Bu", "start": 0.0, "end": 0.4},
+    {"word": "bir", "start": 0.5, "end": 0.8},
+    {"word": "test", "start": 1.9, "end": 2.3},
+]
+
+
+class TestEventRows:
+    """Rows must have the same fields as WordEventDoc/PauseEventDoc"""
+
+    def test_word_event_rows(self):
+        analysis_id = ObjectId()
+        aligned = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        rows = persistence.word_event_rows(analysis_id, aligned["word_events"])
+
+        assert [row["position"] for row in rows] == [0, 1, 2]
+        assert all(row["analysis_id"] == analysis_id for row in rows)
+        assert set(rows[0]) == {"analysis_id", "position", "ref_token", "hyp_token", "type", "sub_type", "timing", "char_diff"}
+        assert rows[1]["timing"] == {"start_ms": 500.0, "end_ms": 800.0}
+
+    def test_pause_event_rows(self):
+        analysis_id = ObjectId()
+        aligned = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        rows = persistence.pause_event_rows(analysis_id, aligned["pause_events"])
+
+        assert len(rows) == 1
+        assert rows[0]["after_position"] == 1
+        assert rows[0]["class_"] == "very_long"
+        assert "class" not in rows[0]
+
+
+class TestBulkWrites:
+    """Events are written as one unordered bulk of upserts per collection"""
+
+    def test_upsert_rows_unordered(self):
+        collection = AsyncMock()
+        analysis_id = ObjectId()
+        rows = [{"analysis_id": analysis_id, "position": i} for i in range(3)]
+
+        written = asyncio.run(persistence.upsert_rows(collection, rows, "position"))
+
+        assert written == 3
+        collection.bulk_write.assert_awaited_once()
+        operations = collection.bulk_write.call_args.args[0]
+        assert collection.bulk_write.call_args.kwargs == {"ordered": False}
+        assert all(isinstance(op, ReplaceOne) for op in operations)
+        assert operations[2]._filter == {"analysis_id": analysis_id, "position": 2}
+
+    def test_empty_rows_skip_round_trip(self):
+        collection = AsyncMock()
+        assert asyncio.run(persistence.upsert_rows(collection, [], "position")) == 0
+        collection.bulk_write.assert_not_awaited()
+
+    def test_write_events_reports_latency(self):
+        words, pauses = AsyncMock(), AsyncMock()
+        analysis_id = ObjectId()
+        written_words, written_pauses, latency = asyncio.run(persistence.write_events(
+            [{"analysis_id": analysis_id, "position": 0}], [],
+            word_collection=words, pause_collection=pauses
+        ))
+        assert (written_words, written_pauses) == (1, 0)
+        assert latency >= 0
+        words.bulk_write.assert_awaited_once()
+        pauses.bulk_write.assert_not_awaited()
+
+    def test_write_events_columnar_only(self):
+        columnar = AsyncMock()
+        analysis_id = ObjectId()
+        aligned = align_transcript(["Bu", "bir", "test"], WORDS, 500)
+        asyncio.run(persistence.write_events(
+            persistence.word_event_rows(analysis_id, aligned["word_events"]),
+            persistence.pause_event_rows(analysis_id, aligned["pause_events"]),
+            columnar_collection=columnar
+        ))
+        columnar.replace_one.assert_awaited_once()
+        doc = columnar.replace_one.call_args.args[1]
+        assert doc["analysis_id"] == analysis_id
+        assert doc["words"]["count"] == 3
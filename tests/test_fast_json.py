@@ -0,0 +1,115 @@
+"""
+Test the orjson response class and the precompiled TypeAdapter responses
+"""
+import pytest
+import sys
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.models.documents import AnalysisDoc, ReadingSessionDoc
+from app.schemas import SessionSummary, WordEventResponse
+from app.utils.fast_json import FastJSONResponse, dumps, type_adapter, typed_json, typed_response
+
+
+class FakeQuery:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def to_list(self):
+        return self.docs
+
+
+class TestDumps:
+
+    def test_types(self):
+        oid = ObjectId()
+        content = {
+            "id": oid, "at": datetime(2026, 1, 1, 12, 30, 0, 250000), "utc": datetime(2026, 1, 1, tzinfo=timezone.utc),
+            "price": Decimal("1.5"), "tags": {"a"}, "tr": "ığüşöç", 1: "non-str key"
+        }
+        assert json.loads(dumps(content)) == {
+            "id": str(oid), "at": "2026-01-01T12:30:00.250000", "utc": "2026-01-01T00:00:00+00:00",
+            "price": 1.5, "tags": ["a"], "tr": "ığüşöç", "1": "non-str key"
+        }
+        assert content["at"].isoformat() == "2026-01-01T12:30:00.250000"
+
+    def test_models(self):
+        event = WordEventResponse(id="e1", analysis_id="a1", position=0, type="correct")
+        assert json.loads(dumps([event])) == [event.model_dump()]
+
+    def test_unknown_type(self):
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+
+    def test_response_class(self):
+        assert FastJSONResponse({"id": ObjectId("0" * 24)}).body == b'{"id":"000000000000000000000000"}'
+        assert app.router.default_response_class is FastJSONResponse
+
+
+class TestTypedJson:
+
+    def test_validates_dicts_once_per_type(self):
+        rows = [{"id": "e1", "analysis_id": "a1", "position": 0, "type": "correct", "timing": {"start_ms": 1}}]
+        body = typed_json(List[WordEventResponse], rows)
+        assert json.loads(body)[0]["timing"] == {"start_ms": 1.0}
+        assert type_adapter(List[WordEventResponse]) is type_adapter(List[WordEventResponse])
+
+    def test_invalid_content(self):
+        with pytest.raises(ValidationError):
+            typed_json(List[WordEventResponse], [{"id": "e1"}])
+
+    def test_response(self):
+        response = typed_response(List[int], [1, 2], headers={"X-Next-Cursor": "abc"})
+        assert response.body == b"[1,2]"
+        assert response.headers["x-next-cursor"] == "abc"
+        assert response.media_type == "application/json"
+
+
+class TestEndpoints:
+
+    def test_sessions_list(self):
+        session = ReadingSessionDoc.model_construct(
+            id=ObjectId(), text_id=ObjectId(), audio_id=ObjectId(), reader_id=None, status="completed",
+            created_at=datetime(2026, 1, 1), completed_at=None
+        )
+        with patch("app.routers.sessions.ReadingSessionDoc.find", lambda query: FakeQuery([session])):
+            rows = TestClient(app).get("/v1/sessions/").json()
+        assert rows == [SessionSummary(
+            id=str(session.id), text_id=str(session.text_id), audio_id=str(session.audio_id),
+            status="completed", created_at="2026-01-01T00:00:00"
+        ).model_dump()]
+
+    def test_session_analyses_render_ids_and_dates(self):
+        session = ReadingSessionDoc.model_construct(id=ObjectId())
+        analysis = AnalysisDoc.model_construct(
+            id=ObjectId(), session_id=session.id, status="done", created_at=datetime(2026, 1, 1, 9, 5),
+            started_at=None, finished_at=datetime(2026, 1, 1, 9, 6), error=None, summary={"wer": 0.1}
+        )
+
+        async def get(session_id):
+            return session
+        with patch("app.routers.sessions.ReadingSessionDoc.get", get), \
+                patch("app.routers.sessions.AnalysisDoc.find", lambda query: FakeQuery([analysis])):
+            rows = TestClient(app).get(f"/v1/sessions/{session.id}/analyses").json()
+        assert rows == [{
+            "id": str(analysis.id), "created_at": "2026-01-01T09:05:00", "status": "done", "started_at": None,
+            "finished_at": "2026-01-01T09:06:00", "error": None, "summary": {"wer": 0.1}
+        }]
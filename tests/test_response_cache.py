@@ -0,0 +1,247 @@
+"""
+Test the response cache for finished analyses (ETags, LRU, Redis versions)
+"""
+import pytest
+import sys
+import asyncio
+from datetime import datetime
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.models.documents import AnalysisDoc, AudioFileDoc, ReadingSessionDoc, TextDoc, WordEventDoc
+from app.models.user import get_current_user
+from app.response_cache import (
+    AnalysisResponseCache, analysis_cache, cached_analysis_response, etag_matches, json_body, make_etag
+)
+
+
+class FakeRedis:
+    """The redis.asyncio calls of the cache"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.keys = []
+
+    def incr(self, key):
+        self.keys.append(key)
+
+    async def execute(self):
+        self.redis.executed = getattr(self.redis, "executed", 0) + 1
+        for key in self.keys:
+            await self.redis.incr(key)
+
+
+class AllowAll:
+    email = "admin@example.com"
+    role_id = None
+
+    async def get_effective_permissions(self):
+        return ["*"]
+
+    async def has_any_permission(self, permissions):
+        return True
+
+
+class FakeCollection:
+    def __init__(self, ids):
+        self.ids = ids
+
+    async def distinct(self, key, query):
+        return self.ids
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("down")
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def _builder(content, status="done"):
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return content, status
+    return build, calls
+
+
+@pytest.fixture
+def cache():
+    """Module cache with a fake Redis and an empty LRU"""
+    fake = FakeRedis()
+    with patch.object(analysis_cache, "redis", fake), patch.object(analysis_cache, "lru", OrderedDict()):
+        yield fake
+
+
+class TestHelpers:
+
+    def test_etag_matching(self):
+        etag = make_etag(b"{}")
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_json_body(self):
+        oid = ObjectId()
+        assert json_body({"id": oid, "tr": "ığüşöç"}) == f'{{"id":"{oid}","tr":"ığüşöç"}}'.encode()
+
+
+class TestCachedResponse:
+
+    def test_done_analysis_cached_with_etag(self, cache):
+        analysis_id = str(ObjectId())
+        build, calls = _builder({"wer": 0.1})
+
+        async def run():
+            first = await cached_analysis_response(_request(), analysis_id, "metrics", build)
+            second = await cached_analysis_response(_request(), analysis_id, "metrics", build)
+            analysis_cache.lru.clear()  # another API process: served from Redis
+            third = await cached_analysis_response(_request(), analysis_id, "metrics", build)
+            revalidated = await cached_analysis_response(_request(first.headers["etag"]), analysis_id, "metrics", build)
+            return first, second, third, revalidated
+
+        first, second, third, revalidated = asyncio.run(run())
+        assert len(calls) == 1
+        assert first.body == second.body == third.body == b'{"wer":0.1}'
+        assert first.headers["etag"] == third.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert revalidated.status_code == 304 and revalidated.body == b""
+        assert analysis_cache.stats["redis_hits"] >= 1
+
+    def test_invalidate_starts_new_version(self, cache):
+        analysis_id = str(ObjectId())
+        content = {"wer": 0.1}
+        build, calls = _builder(content)
+
+        async def run():
+            first = await cached_analysis_response(_request(), analysis_id, "metrics", build)
+            content["wer"] = 0.2
+            await analysis_cache.invalidate(analysis_id)
+            second = await cached_analysis_response(_request(first.headers["etag"]), analysis_id, "metrics", build)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert len(calls) == 2
+        assert second.status_code == 200 and second.body == b'{"wer":0.2}'
+        assert second.headers["etag"] != first.headers["etag"]
+
+    def test_unfinished_analysis_not_cached(self, cache):
+        analysis_id = str(ObjectId())
+        build, calls = _builder({"status": "running"}, status="running")
+
+        async def run():
+            return [await cached_analysis_response(_request(), analysis_id, "detail", build) for _ in range(2)]
+
+        responses = asyncio.run(run())
+        assert len(calls) == 2
+        assert "etag" not in responses[0].headers
+        assert responses[0].headers["cache-control"] == "no-store"
+
+    def test_without_redis_builds_every_time(self):
+        analysis_id = str(ObjectId())
+        build, calls = _builder({"wer": 0.1})
+        broken = AnalysisResponseCache()
+        broken.redis = BrokenRedis()
+
+        async def run():
+            return [await cached_analysis_response(_request(), analysis_id, "metrics", build) for _ in range(2)]
+
+        with patch("app.response_cache.analysis_cache", broken):
+            responses = asyncio.run(run())
+        assert len(calls) == 2
+        assert responses[0].headers["etag"] == responses[1].headers["etag"]
+
+
+class TestEndpoints:
+
+    def test_word_events_revalidate(self, cache):
+        analysis_id = ObjectId()
+        event = WordEventDoc.model_construct(
+            id=f"{analysis_id}-w0", analysis_id=analysis_id, position=0, ref_token="ali", hyp_token="ali",
+            type="correct", sub_type=None, timing={"start_ms": 0.0, "end_ms": 300.0}, char_diff=None
+        )
+        events = AsyncMock(return_value=([event], []))
+        analysis = SimpleNamespace(id=analysis_id, status="done")
+        client = TestClient(app)
+
+        with patch("app.routers.analyses.AnalysisDoc.get", AsyncMock(return_value=analysis)), \
+                patch("app.routers.analyses.get_analysis_events", events):
+            first = client.get(f"/v1/analyses/{analysis_id}/word-events")
+            second = client.get(f"/v1/analyses/{analysis_id}/word-events", headers={"If-None-Match": first.headers["etag"]})
+
+        assert first.status_code == 200
+        assert first.json()[0]["analysis_id"] == str(analysis_id)
+        assert first.json()[0]["ref_token"] == "ali"
+        assert second.status_code == 304
+        assert events.await_count == 1
+
+    def test_text_edit_invalidates_analysis_detail(self, cache):
+        text = TextDoc.model_construct(
+            id=ObjectId(), slug="kirmizi-top", grade=2, title="Kırmızı Top", body="ali topu attı",
+            comment=None, active=True, canonical=None
+        )
+        session = ReadingSessionDoc.model_construct(id=ObjectId(), text_id=text.id, audio_id=ObjectId())
+        analysis = AnalysisDoc.model_construct(
+            id=ObjectId(), session_id=session.id, status="done", student_id=None, summary={"wer": 0.1},
+            created_at=datetime(2026, 1, 1), started_at=None, finished_at=None, error=None, audio_duration_sec=12.0
+        )
+        audio = AudioFileDoc.model_construct(id=session.audio_id)
+        client = TestClient(app)
+        app.dependency_overrides[get_current_user] = lambda: AllowAll()
+        try:
+            with patch("app.routers.analyses.AnalysisDoc.get", AsyncMock(return_value=analysis)), \
+                    patch("app.routers.analyses.ReadingSessionDoc.get", AsyncMock(return_value=session)), \
+                    patch("app.routers.analyses.TextDoc.get", AsyncMock(return_value=text)), \
+                    patch("app.routers.analyses.AudioFileDoc.get", AsyncMock(return_value=audio)), \
+                    patch("app.routers.texts.TextDoc.get", AsyncMock(return_value=text)), \
+                    patch.object(TextDoc, "save", AsyncMock()), \
+                    patch("app.routers.texts.update_text_in_list_view", AsyncMock(return_value=1)), \
+                    patch("app.crud.ReadingSessionDoc.get_motor_collection", lambda *args: FakeCollection([session.id])), \
+                    patch("app.crud.AnalysisDoc.get_motor_collection", lambda *args: FakeCollection([analysis.id])):
+                first = client.get(f"/v1/analyses/{analysis.id}")
+                edited = client.put(f"/v1/texts/{text.id}", json={"title": "Mavi Top", "grade": 3, "body": "ali topu tuttu"})
+                second = client.get(f"/v1/analyses/{analysis.id}", headers={"If-None-Match": first.headers["etag"]})
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert first.json()["text"]["title"] == "Kırmızı Top"
+        assert edited.status_code == 200
+        assert cache.executed == 1
+        assert second.status_code == 200
+        assert second.json()["text"] == {"title": "Mavi Top", "body": "ali topu tuttu", "grade": 3}
+        assert second.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,180 @@
+"""
+Test the staged pipeline: audio handoff between the download and transcribe stages and STT retries
+
+pipeline.py uses the worker's flat imports (config, jobs), so it is run in a
+subprocess with the worker directory as working directory, like rq does.
+"""
+import pytest
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+worker_dir = project_root / "worker"
+
+HANDOFF_CODE = """
+import asyncio, json
+from types import SimpleNamespace
+import pipeline
+from services.audio_source import AudioSource
+
+calls = []
+stored = SimpleNamespace(gcs_uri="gs://b/a.16k.ogg", sha256="{sha256}", size_bytes=4)
+audio = SimpleNamespace(id="au1", gcs_uri="gs://b/a.m4a", hash=SimpleNamespace(sha256="orig"), size_bytes=1000,
+                        normalized=None)
+normalized_audio = SimpleNamespace(**{{**vars(audio), "normalized": stored}})
+docs = {{"audio": audio}}
+
+class NoRedis:
+    def __getattr__(self, name):
+        raise AssertionError("audio must not go through Redis")
+
+async def load_session_docs(analysis):
+    return SimpleNamespace(id="s1"), docs["audio"], None
+
+def open_audio_source(a):
+    calls.append(["open", a.normalized.gcs_uri if a.normalized else a.gcs_uri])
+    return AudioSource.from_bytes(b"opus" if a.normalized else b"original audio")
+
+async def normalize_audio(a, source):
+    if a.normalized:
+        return source
+    calls.append(["normalize"])
+    docs["audio"] = normalized_audio
+    source.close()
+    return AudioSource.from_bytes(b"opus")
+
+async def get_audio(audio_id):
+    return docs["audio"]
+
+class Client:
+    def extract_raw_words(self, words):
+        return words
+    async def aclose(self):
+        calls.append(["aclose"])
+
+async def transcribe_cached(client, source, phases=None):
+    calls.append(["stt", source.sha256])
+    return {{"words": [{{"word": "a", "start": 0, "end": 1}}]}}, False
+
+async def save_stt_result(session, client, result, words):
+    return SimpleNamespace(id="stt1")
+
+async def checkpoint(analysis, stage, **fields):
+    analysis.pipeline.update(fields)
+
+pipeline._redis = NoRedis
+pipeline._load_session_docs = load_session_docs
+pipeline.open_audio_source = open_audio_source
+pipeline.normalize_audio = normalize_audio
+pipeline.AudioFileDoc = SimpleNamespace(get=get_audio)
+pipeline.create_stt_client = Client
+pipeline.transcribe_cached = transcribe_cached
+pipeline._save_stt_result = save_stt_result
+pipeline.checkpoint = checkpoint
+
+analysis = SimpleNamespace(id="an1", pipeline={{}})
+asyncio.run(pipeline._download(analysis))
+handoff = dict(analysis.pipeline)
+asyncio.run(pipeline._transcribe(analysis))
+print(json.dumps({{"calls": calls, "handoff": handoff, "pipeline": analysis.pipeline}}))
+"""
+
+
+def _run_handoff():
+    import hashlib
+    sha256 = hashlib.sha256(b"opus").hexdigest()
+    result = subprocess.run(
+        [sys.executable, "-c", HANDOFF_CODE.format(sha256=sha256)], cwd=str(worker_dir), capture_output=True,
+        text=True, timeout=120, env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING"}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return sha256, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestAudioHandoff:
+    """The transcribe stage reopens the stored copy instead of reading bytes from Redis"""
+
+    def test_download_hands_over_stored_copy(self):
+        sha256, report = _run_handoff()
+        assert report["handoff"] == {"audio_gcs_uri": "gs://b/a.16k.ogg", "audio_sha256": sha256, "audio_size_bytes": 4}
+
+    def test_transcribe_reopens_stored_copy(self):
+        sha256, report = _run_handoff()
+        assert report["calls"] == [
+            ["open", "gs://b/a.m4a"], ["normalize"],
+            ["open", "gs://b/a.16k.ogg"], ["stt", sha256], ["aclose"]
+        ]
+        assert report["pipeline"]["stt_result_id"] == "stt1"
+
+
+RETRY_CODE = """
+import asyncio, json
+from types import SimpleNamespace
+import pipeline
+from services.elevenlabs_stt import SttUnavailable
+
+calls = []
+job = SimpleNamespace(id="j1", retries_left=3)
+analysis = SimpleNamespace(id="an1", status="queued", stage=None, started_at=None, error=None, finished_at=None,
+                           pipeline={{}})
+
+async def noop(*args, **kwargs):
+    pass
+
+async def save():
+    calls.append(["save", analysis.status])
+analysis.save = save
+
+async def get_analysis(analysis_id):
+    return analysis
+
+async def transcribe(a):
+    raise SttUnavailable("STT circuit breaker open, retry in 120s", retry_after=120)
+
+async def reschedule(analysis_id, error, current_job):
+    calls.append(["reschedule", analysis_id, error.retry_after, current_job.id])
+    return {rescheduled}
+
+pipeline.connect_to_mongo = pipeline.close_mongo_connection = pipeline.sync_list_view = noop
+pipeline.progress = SimpleNamespace(publish=lambda a: None)
+pipeline.AnalysisDoc = SimpleNamespace(get=get_analysis)
+pipeline.STAGE_HANDLERS = {{"transcribe": transcribe}}
+pipeline.get_current_job = lambda: job
+pipeline._reschedule_analysis = reschedule
+
+try:
+    asyncio.run(pipeline._run_stage("an1", "transcribe"))
+    raised = False
+except SttUnavailable:
+    raised = True
+print(json.dumps({{"calls": calls, "raised": raised, "retries_left": job.retries_left, "status": analysis.status}}))
+"""
+
+
+def _run_retry(rescheduled):
+    result = subprocess.run(
+        [sys.executable, "-c", RETRY_CODE.format(rescheduled=rescheduled)], cwd=str(worker_dir), capture_output=True,
+        text=True, timeout=120, env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING"}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestTranscribeRetries:
+    """Retryable STT failures follow the STT retry policy, not the stage's fixed RQ Retry"""
+
+    def test_rescheduled_with_retry_after(self):
+        report = _run_retry(rescheduled=True)
+        assert ["reschedule", "an1", 120, "j1"] in report["calls"]
+        assert not report["raised"]
+        assert report["retries_left"] == 3
+
+    def test_attempts_exhausted_fails_without_rq_retry(self):
+        report = _run_retry(rescheduled=False)
+        assert report["raised"]
+        assert report["retries_left"] == 0
+        assert report["status"] == "failed"
@@ -0,0 +1,143 @@
+"""
+Test the process-wide GCS client and the async storage service (thread pool + latency metrics)
+"""
+import pytest
+import sys
+import asyncio
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+import requests
+from fastapi.testclient import TestClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.main import app
+from app.storage import gcs
+from app.storage.service import OperationMetrics, StorageService, storage_service
+
+
+class TestSharedClient:
+
+    def test_created_once(self):
+        created = []
+
+        def create():
+            time.sleep(0.01)
+            created.append(1)
+            return object()
+        gcs.reset_client()
+        try:
+            with patch("app.storage.gcs._create_client", create):
+                threads = [threading.Thread(target=gcs.get_client) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                client = gcs.get_client()
+                assert gcs.get_client() is client
+            assert len(created) == 1
+        finally:
+            gcs.reset_client()
+
+    def test_connection_pool_sized(self):
+        client = SimpleNamespace(_http=requests.Session())
+        gcs._pool_connections(client, 12)
+        assert client._http.get_adapter("https://storage.googleapis.com")._pool_maxsize == 12
+
+
+class TestStorageService:
+
+    def test_runs_off_the_event_loop(self):
+        service = StorageService(max_workers=2)
+        try:
+            name = asyncio.run(service.run("whoami", lambda: threading.current_thread().name))
+        finally:
+            service.shutdown()
+        assert name.startswith("gcs")
+
+    def test_bounded_pool_does_not_block_loop(self):
+        service = StorageService(max_workers=2)
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        async def run():
+            ticks = 0
+            calls = asyncio.gather(*(service.run("slow", slow) for _ in range(6)))
+            while not calls.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            await calls
+            return ticks
+        try:
+            ticks = asyncio.run(run())
+        finally:
+            service.shutdown()
+        assert peak[0] == 2
+        assert ticks >= 5  # the loop kept running while the calls blocked
+
+    def test_metrics(self):
+        service = StorageService(max_workers=1)
+
+        def fail():
+            raise ConnectionError("down")
+
+        async def run():
+            await service.run("get_info", lambda: None)
+            await service.run("get_info", lambda: None)
+            with pytest.raises(ConnectionError):
+                await service.run("delete", fail)
+        try:
+            asyncio.run(run())
+        finally:
+            service.shutdown()
+        operations = service.metrics()["operations"]
+        assert operations["get_info"]["count"] == 2 and operations["get_info"]["errors"] == 0
+        assert operations["get_info"]["p50_ms"] is not None
+        assert operations["delete"] == {**operations["delete"], "count": 1, "errors": 1}
+
+    def test_window(self):
+        metrics = OperationMetrics(window=3)
+        for elapsed in (100.0, 1.0, 2.0, 3.0):
+            metrics.record(elapsed, failed=False)
+        assert metrics.snapshot() == {
+            "count": 4, "errors": 0, "p50_ms": 2.0, "p95_ms": 3.0, "p99_ms": 3.0, "max_ms": 3.0
+        }
+
+    def test_signed_url(self):
+        calls = []
+
+        def sign(**kwargs):
+            calls.append(kwargs)
+            return "https://signed"
+        service = StorageService(max_workers=1)
+        with patch("app.storage.service.generate_signed_url", sign):
+            try:
+                url = asyncio.run(service.signed_url("2026/a.m4a", expiration_hours=2, bucket_name="b"))
+            finally:
+                service.shutdown()
+        assert url == "https://signed"
+        assert calls == [{"bucket_name": "b", "blob_name": "2026/a.m4a", "expiration_hours": 2, "method": "GET"}]
+        assert service.metrics()["operations"]["signed_url"]["count"] == 1
+
+
+class TestStorageEndpoint:
+
+    def test_metrics_endpoint(self):
+        with patch.object(storage_service, "operations", {"signed_url": OperationMetrics(10)}):
+            storage_service.operations["signed_url"].record(12.5, failed=False)
+            body = TestClient(app).get("/v1/_storage").json()
+        assert body["operations"]["signed_url"]["p99_ms"] == 12.5
+        assert body["max_workers"] == storage_service.max_workers
@@ -0,0 +1,40 @@
+"""
+Test the STT cache key: same audio + same parameters -> same key
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from worker.services.elevenlabs_stt import ElevenLabsSTT
+
+
+AUDIO_HASH = "a" * 64
+
+
+class TestSttCacheKey:
+    """Every parameter that changes the transcription must change the key"""
+
+    def test_key_is_stable(self):
+        assert ElevenLabsSTT("k1").cache_key(AUDIO_HASH) == ElevenLabsSTT("k2").cache_key(AUDIO_HASH)
+
+    def test_api_key_not_in_params(self):
+        assert "k1" not in str(ElevenLabsSTT("k1").cache_params())
+
+    def test_audio_changes_key(self):
+        client = ElevenLabsSTT("k")
+        assert client.cache_key(AUDIO_HASH) != client.cache_key("b" * 64)
+
+    @pytest.mark.parametrize("kwargs", [
+        {"model": "scribe_v1_experimental"},
+        {"language": "en"},
+        {"temperature": 0.2},
+        {"seed": 1},
+        {"remove_filler_words": True},
+        {"remove_disfluencies": True},
+    ])
+    def test_parameters_change_key(self, kwargs):
+        assert ElevenLabsSTT("k", **kwargs).cache_key(AUDIO_HASH) != ElevenLabsSTT("k").cache_key(AUDIO_HASH)
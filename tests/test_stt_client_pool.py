@@ -0,0 +1,166 @@
+"""
+Test the pooled STT client against a local stub STT server
+"""
+import pytest
+import sys
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from worker.services.audio_source import AudioSource
+from worker.services.elevenlabs_stt import ElevenLabsSTT, SttClientError, SttRateLimited, SttRetryableError
+
+
+STT_RESPONSE = {
+    "language_code": "tr",
+    "language_probability": 0.99,
+    "text": "Bu bir test",
+    "words": [
+        {"type": "word", "text": "Bu", "start": 0.0, "end": 0.4},
+        {"type": "spacing", "text": " ", "start": 0.4, "end": 0.5},
+        {"type": "word", "text": "bir", "start": 0.5, "end": 0.8},
+    ]
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.requests.append({
+            "client_port": self.client_address[1],
+            "api_key": self.headers.get("xi-api-key"),
+            "content_type": self.headers.get("Content-Type"),
+            "body": body
+        })
+
+        status, headers, payload = self.server.responses.pop(0) if self.server.responses else (200, {}, STT_RESPONSE)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server) -> ElevenLabsSTT:
+    client = ElevenLabsSTT("test-key")
+    client.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1/speech-to-text"
+    return client
+
+
+class TestPooledClient:
+    """Consecutive requests reuse one keep-alive connection"""
+
+    def test_sync_reuses_connection(self, stub_server):
+        client = _client(stub_server)
+        first, second = {}, {}
+        with AudioSource.from_bytes(b"audio" * 100) as source:
+            assert client.transcribe_source(source, phases=first) == STT_RESPONSE
+            assert client.transcribe_source(source, phases=second) == STT_RESPONSE
+        client.close()
+
+        ports = {request["client_port"] for request in stub_server.requests}
+        assert len(stub_server.requests) == 2
+        assert len(ports) == 1
+        assert stub_server.requests[0]["api_key"] == "test-key"
+        assert set(first) == {"connect", "upload", "server", "download"}
+        assert first["connect"] > 0
+        assert second["connect"] == 0
+
+    def test_async_reuses_connection(self, stub_server):
+        client = _client(stub_server)
+
+        async def run():
+            phases = []
+            with AudioSource.from_bytes(b"audio" * 100) as source:
+                for _ in range(3):
+                    phases.append({})
+                    await client.transcribe_source_async(source, phases=phases[-1])
+            await client.aclose()
+            return phases
+
+        phases = asyncio.run(run())
+        assert len({request["client_port"] for request in stub_server.requests}) == 1
+        assert phases[0]["connect"] > 0
+        assert phases[2]["connect"] == 0
+
+    def test_new_loop_gets_new_async_client(self, stub_server):
+        """rq jobs run each analysis in a fresh asyncio.run loop"""
+        client = _client(stub_server)
+
+        async def run():
+            with AudioSource.from_bytes(b"audio") as source:
+                return await client.transcribe_source_async(source)
+
+        assert asyncio.run(run()) == STT_RESPONSE
+        assert asyncio.run(run()) == STT_RESPONSE
+        assert len(stub_server.requests) == 2
+
+
+class TestStreamedUpload:
+    """The multipart body is streamed from the AudioSource handle"""
+
+    def test_body_contains_audio_and_form_fields(self, stub_server):
+        audio = bytes(range(256)) * 2048  # 512 KiB
+        client = _client(stub_server)
+        with AudioSource.from_bytes(audio, name="kayit.mp3") as source:
+            client.transcribe_source(source)
+            assert not source.spilled
+        client.close()
+
+        request = stub_server.requests[0]
+        assert request["content_type"].startswith("multipart/form-data")
+        assert audio in request["body"]
+        assert b'filename="kayit.mp3"' in request["body"]
+        assert b'name="model_id"' in request["body"]
+
+
+class TestStubErrors:
+    """Status codes from the server map to the STT error types"""
+
+    def test_rate_limited(self, stub_server):
+        stub_server.responses.append((429, {"Retry-After": "3"}, {"detail": {"status": "system_busy"}}))
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttRateLimited) as exc:
+                _client(stub_server).transcribe_source(source)
+        assert exc.value.retry_after == 3.0
+
+    def test_client_error(self, stub_server):
+        stub_server.responses.append((400, {}, {"detail": "invalid audio"}))
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttClientError):
+                _client(stub_server).transcribe_source(source)
+
+    def test_connection_refused_is_retryable(self, stub_server):
+        client = _client(stub_server)
+        stub_server.shutdown()
+        stub_server.server_close()
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttRetryableError):
+                client.transcribe_source(source)
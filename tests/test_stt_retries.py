@@ -0,0 +1,207 @@
+"""
+Test STT error classification, retry delays and the rate limit/breaker guard
+"""
+import pytest
+import os
+import sys
+import json
+import asyncio
+import subprocess
+import threading
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+worker_dir = project_root / "worker"
+
+import httpx
+from worker.services.audio_source import AudioSource
+from worker.services.elevenlabs_stt import (
+    ElevenLabsSTT, SttClientError, SttRetryableError, SttRateLimited, SttUnavailable
+)
+from worker.services.stt_guard import SttGuard, retry_delay, throttled_delay
+
+
+def _respond(status_code, text="", headers=None, body=None):
+    return ElevenLabsSTT("k")._handle_response(status_code, headers or {}, text, lambda: body)
+
+
+class TestResponseClassification:
+    """Only transient failures may be retried"""
+
+    def test_success(self):
+        assert _respond(200, body={"words": []}) == {"words": []}
+
+    def test_429_is_rate_limited(self):
+        with pytest.raises(SttRateLimited) as exc:
+            _respond(429, text="{}", headers={"retry-after": "12"}, body={"detail": {"status": "system_busy"}})
+        assert exc.value.retryable
+        assert exc.value.retry_after == 12.0
+
+    @pytest.mark.parametrize("status_code", [500, 502, 503, 408])
+    def test_server_errors_are_retryable(self, status_code):
+        with pytest.raises(SttRetryableError) as exc:
+            _respond(status_code, text="busy")
+        assert exc.value.status_code == status_code
+
+    @pytest.mark.parametrize("status_code", [400, 401, 403, 413, 422])
+    def test_client_errors_are_not_retryable(self, status_code):
+        with pytest.raises(SttClientError) as exc:
+            _respond(status_code, text="bad request")
+        assert not exc.value.retryable
+
+    def test_connection_error_is_retryable_without_sleeping(self, monkeypatch):
+        calls = []
+
+        def fail(*args, **kwargs):
+            calls.append(1)
+            raise httpx.ConnectError("connection reset")
+
+        client = ElevenLabsSTT("k")
+        monkeypatch.setattr(client.session(), "post", fail)
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttRetryableError):
+                client.transcribe_source(source)
+        assert len(calls) == 1
+
+
+class TestRetryDelay:
+    """Exponential backoff with jitter, Retry-After as a lower bound"""
+
+    def test_grows_and_is_capped(self):
+        assert 2.5 <= retry_delay(1, 5, 300) <= 5
+        assert 20 <= retry_delay(4, 5, 300) <= 40
+        assert retry_delay(20, 5, 300) <= 300
+
+    def test_respects_retry_after(self):
+        assert retry_delay(1, 5, 300, retry_after=60) == 60
+        assert retry_delay(1, 5, 30, retry_after=60) == 30
+
+    def test_throttled_delay_is_retry_after_with_jitter(self):
+        assert 30 <= throttled_delay(30) <= 45
+        assert 1 <= throttled_delay(None) <= 1.5
+
+    def test_throttling_does_not_use_attempts(self):
+        """stt_limits uses the worker's flat imports, so run it like the worker does"""
+        code = (
+            "import json\n"
+            "from services.elevenlabs_stt import SttRetryableError, SttUnavailable\n"
+            "from stt_limits import next_retry_delay\n"
+            "print(json.dumps([\n"
+            "    next_retry_delay(SttUnavailable('breaker open', retry_after=30), 99),\n"
+            "    next_retry_delay(SttRetryableError('503', status_code=503), 1),\n"
+            "    next_retry_delay(SttRetryableError('503', status_code=503), 5),\n"
+            "]))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=str(worker_dir), capture_output=True, text=True, timeout=60,
+            env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING", "STT_MAX_ATTEMPTS": "5"}
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        throttled, provider_failure, exhausted = json.loads(result.stdout.strip().splitlines()[-1])
+        assert 30 <= throttled <= 45
+        assert provider_failure is not None
+        assert exhausted is None
+
+
+class _Bucket:
+    def __init__(self, waits):
+        self.waits = list(waits)
+        self.paused = None
+
+    def acquire(self):
+        return self.waits.pop(0) if self.waits else 0.0
+
+    def pause(self, seconds):
+        self.paused = seconds
+
+
+class _Breaker:
+    def __init__(self, retry_after=0.0):
+        self.retry_after_sec = retry_after
+        self.failures = 0
+        self.successes = 0
+
+    def allow(self):
+        return self.retry_after_sec
+
+    def record_failure(self):
+        self.failures += 1
+
+    def record_success(self):
+        self.successes += 1
+
+
+def _guard(bucket=None, breaker=None):
+    return SttGuard(bucket or _Bucket([]), breaker or _Breaker(), max_wait_sec=1.0, rate_limit_pause_sec=5.0)
+
+
+class TestSttGuard:
+    """Breaker and shared bucket decide whether a call goes out at all"""
+
+    def test_success_closes_breaker(self):
+        breaker = _Breaker()
+
+        async def call():
+            return {"words": []}
+
+        assert asyncio.run(_guard(breaker=breaker).call(call)) == {"words": []}
+        assert breaker.successes == 1
+
+    def test_open_breaker_skips_call(self):
+        async def call():
+            raise AssertionError("must not be called")
+
+        with pytest.raises(SttUnavailable) as exc:
+            asyncio.run(_guard(breaker=_Breaker(retry_after=20)).call(call))
+        assert exc.value.retry_after == 20
+
+    def test_long_rate_limit_wait_reschedules(self):
+        async def call():
+            raise AssertionError("must not be called")
+
+        with pytest.raises(SttUnavailable) as exc:
+            asyncio.run(_guard(bucket=_Bucket([30.0])).call(call))
+        assert exc.value.retry_after == 30.0
+
+    def test_redis_calls_run_off_the_loop(self):
+        threads = []
+
+        class Breaker(_Breaker):
+            def allow(self):
+                threads.append(threading.current_thread())
+                return 0.0
+
+        async def call():
+            return "ok"
+
+        assert asyncio.run(_guard(breaker=Breaker()).call(call)) == "ok"
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_short_rate_limit_wait_is_awaited(self):
+        async def call():
+            return "ok"
+
+        assert asyncio.run(_guard(bucket=_Bucket([0.01])).call(call)) == "ok"
+
+    def test_429_pauses_all_workers(self):
+        bucket, breaker = _Bucket([]), _Breaker()
+
+        async def call():
+            raise SttRateLimited("429", retry_after=7)
+
+        with pytest.raises(SttRateLimited):
+            asyncio.run(_guard(bucket, breaker).call(call))
+        assert bucket.paused == 7
+        assert breaker.failures == 1
+
+    def test_client_error_does_not_trip_breaker(self):
+        breaker = _Breaker()
+
+        async def call():
+            raise SttClientError("401", status_code=401)
+
+        with pytest.raises(SttClientError):
+            asyncio.run(_guard(breaker=breaker).call(call))
+        assert breaker.failures == 0
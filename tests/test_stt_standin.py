@@ -0,0 +1,138 @@
+"""
+Test the local STT stand-in against the real ElevenLabsSTT client
+"""
+import pytest
+import sys
+import json
+import time
+import socket
+import hashlib
+import threading
+import importlib.util
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import uvicorn
+from worker.services.audio_source import AudioSource
+from worker.services.elevenlabs_stt import ElevenLabsSTT, SttClientError, SttRateLimited
+
+
+def _load_script(name):
+    """scripts/<name>.py (backend/scripts shadows the `scripts` package name)"""
+    spec = importlib.util.spec_from_file_location(name, project_root / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+stt_standin = _load_script("stt_standin")
+StandIn, SynthesisConfig, LatencyModel = stt_standin.StandIn, stt_standin.SynthesisConfig, stt_standin.LatencyModel
+create_app, synthesize = stt_standin.create_app, stt_standin.synthesize
+percentiles = _load_script("load_test").percentiles
+
+TEXT = "Ali okula gitti. Annesi ona bir kitap aldı."
+NO_ERRORS = SynthesisConfig(substitution_rate=0, deletion_rate=0, repetition_rate=0, filler_rate=0, long_pause_rate=0)
+
+
+@pytest.fixture
+def serve():
+    """Run a StandIn on a free local port; yields a client factory"""
+    servers = []
+
+    def start(standin: StandIn, api_key: str = "test-key") -> ElevenLabsSTT:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(create_app(standin), log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        port = sock.getsockname()[1]
+        return ElevenLabsSTT(api_key, base_url=f"http://127.0.0.1:{port}/v1/speech-to-text")
+
+    yield start
+
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def _words(result):
+    return [w["text"] for w in result["words"] if w["type"] == "word"]
+
+
+class TestSynthesize:
+    """Deterministic word lists from the reference text"""
+
+    def test_without_errors_reads_the_text(self):
+        result = synthesize(TEXT, "abc", NO_ERRORS)
+        assert _words(result) == TEXT.split()
+        assert result["text"] == TEXT
+        starts = [w["start"] for w in result["words"]]
+        assert starts == sorted(starts)
+
+    def test_same_audio_same_transcript(self):
+        config = SynthesisConfig(substitution_rate=0.3, deletion_rate=0.2, repetition_rate=0.2, filler_rate=0.2)
+        assert synthesize(TEXT * 5, "abc", config) == synthesize(TEXT * 5, "abc", config)
+        assert synthesize(TEXT * 5, "abc", config) != synthesize(TEXT * 5, "def", config)
+
+    def test_error_rates_change_the_reading(self):
+        config = SynthesisConfig(substitution_rate=0, deletion_rate=1.0, repetition_rate=0, filler_rate=0)
+        assert _words(synthesize(TEXT, "abc", config)) == []
+        config = SynthesisConfig(substitution_rate=0, deletion_rate=0, repetition_rate=1.0, filler_rate=0)
+        assert len(_words(synthesize(TEXT, "abc", config))) == 2 * len(TEXT.split())
+
+
+class TestContract:
+    """The worker's STT client works unchanged against the stand-in"""
+
+    def test_synthesized_transcription(self, serve):
+        standin = StandIn(default_text=TEXT, synthesis=NO_ERRORS, latency=LatencyModel(median_ms=0))
+        client = serve(standin)
+        with AudioSource.from_bytes(b"audio-bytes", name="kayit.ogg", content_type="audio/ogg") as source:
+            result = client.transcribe_source(source)
+        assert [w["word"] for w in client.extract_raw_words(result["words"])] == TEXT.split()
+        assert standin.stats["synthesized"] == 1
+
+    def test_text_registered_per_audio_hash(self, serve):
+        standin = StandIn(default_text=TEXT, synthesis=NO_ERRORS, latency=LatencyModel(median_ms=0))
+        standin.texts[hashlib.sha256(b"other-audio").hexdigest()] = "Kedi uyudu."
+        client = serve(standin)
+        with AudioSource.from_bytes(b"other-audio") as source:
+            assert client.get_transcript_text(client.transcribe_source(source)) == "Kedi uyudu."
+
+    def test_replays_recording(self, serve, tmp_path):
+        recorded = {"language_code": "tur", "text": "kayıttan", "words": [{"text": "kayıttan", "start": 0.1, "end": 0.6, "type": "word"}]}
+        (tmp_path / f"{hashlib.sha256(b'recorded-audio').hexdigest()}.json").write_text(json.dumps(recorded))
+        standin = StandIn(recordings_dir=str(tmp_path), latency=LatencyModel(median_ms=0))
+        client = serve(standin)
+        with AudioSource.from_bytes(b"recorded-audio") as source:
+            assert client.transcribe_source(source) == recorded
+        assert standin.stats["replayed"] == 1
+
+    def test_injected_429(self, serve):
+        standin = StandIn(latency=LatencyModel(median_ms=0), rate_429=1.0, retry_after_sec=7)
+        client = serve(standin)
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttRateLimited) as exc:
+                client.transcribe_source(source)
+        assert exc.value.retry_after == 7
+
+    def test_missing_api_key(self, serve):
+        client = serve(StandIn(latency=LatencyModel(median_ms=0)), api_key="")
+        with AudioSource.from_bytes(b"audio") as source:
+            with pytest.raises(SttClientError) as exc:
+                client.transcribe_source(source)
+        assert exc.value.status_code == 401
+
+
+class TestLoadReport:
+
+    def test_percentiles(self):
+        report = percentiles([float(v) for v in range(1, 101)])
+        assert (report["p50"], report["p95"], report["p99"], report["max"]) == (50.0, 95.0, 99.0, 100.0)
+        assert percentiles([])["p50"] is None
@@ -0,0 +1,249 @@
+"""
+Test the students list: Turkish-folded name search, counting and keyset pagination
+"""
+import pytest
+import re
+import sys
+import asyncio
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bson import ObjectId
+from app.main import app
+from app.models.student import StudentDoc
+from app.models.user import get_current_user
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.utils.text_tokenizer import fold_turkish, name_search_terms
+
+
+def _load_script(name):
+    """scripts/<name>.py (backend/scripts shadows the `scripts` package name)"""
+    spec = importlib.util.spec_from_file_location(name, project_root / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _compare(value, op, operand):
+    if op == "$regex":
+        return any(re.search(operand, item) for item in value) if isinstance(value, list) else False
+    if value is None:
+        return False
+    return {"$lt": value < operand, "$gt": value > operand, "$gte": value >= operand, "$lte": value <= operand}[op]
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+        elif key == "$and":
+            if not all(_matches(doc, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_compare(doc.get(key), op, operand) for op, operand in condition.items()):
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+    def __aiter__(self):
+        self.iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.counted = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    async def count_documents(self, query):
+        self.counted.append("count_documents")
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    async def estimated_document_count(self):
+        self.counted.append("estimated_document_count")
+        return len(self.docs)
+
+    async def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            doc = next(d for d in self.docs if d["_id"] == op._filter["_id"])
+            doc.update(op._doc["$set"])
+
+
+class AllowAll:
+    email = "admin@example.com"
+    role_id = None
+
+    async def get_effective_permissions(self):
+        return ["student:read"]
+
+    async def has_any_permission(self, permissions):
+        return True
+
+
+NAMES = [("Ayşe", "Yılmaz"), ("IŞIK", "Çelik"), ("İpek", "Öztürk"), ("Mehmet Ali", "Kaya"), ("Gülşen", "Işıklı")]
+
+
+def _student(i, first_name, last_name, created_at):
+    return {
+        "_id": ObjectId(), "first_name": first_name, "last_name": last_name, "grade": 1 + i % 3,
+        "registration_number": 1000 + i, "created_by": "test", "is_active": True,
+        "created_at": created_at, "updated_at": None, "name_search": name_search_terms(first_name, last_name)
+    }
+
+
+@pytest.fixture
+def students():
+    """Seven students; three share one created_at"""
+    base = datetime(2026, 1, 1)
+    docs = [_student(i, *NAMES[i % len(NAMES)], base + timedelta(minutes=min(i, 4))) for i in range(7)]
+    collection = FakeCollection(docs)
+    with patch("app.routers.students.StudentDoc.get_motor_collection", lambda *args: collection):
+        yield collection
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: AllowAll()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def _walk(client, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get("/v1/students/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            return pages
+
+
+class TestNameTerms:
+
+    def test_fold_turkish(self):
+        assert fold_turkish("IŞIK") == "isik"
+        assert fold_turkish("İpek Öztürk") == "ipek ozturk"
+        assert fold_turkish("Gülşen Çağla") == "gulsen cagla"
+
+    def test_name_search_terms(self):
+        assert name_search_terms("Mehmet Ali", "Kaya-Işık") == ["mehmet", "ali", "kaya", "isik"]
+        assert name_search_terms("Ayşe", "Ayşe") == ["ayse"]
+        assert name_search_terms("", None) == []
+
+    def test_document_keeps_terms_current(self):
+        student = StudentDoc.model_construct(first_name="Işık", last_name="O'Neil")
+        student.refresh_name_search()
+        assert student.name_search == ["isik", "o", "neil"]
+
+
+class TestCursorValues:
+
+    def test_round_trip(self):
+        doc_id = ObjectId()
+        for value in (datetime(2026, 1, 1, 12, 30), 3, True, "Ayşe|Kaya"):
+            assert decode_cursor(encode_cursor(value, doc_id)) == (value, doc_id)
+
+    def test_ascending_filter(self):
+        doc_id = ObjectId()
+        query = keyset_filter({"grade": 2}, encode_cursor("Ayşe", doc_id), "first_name", 1)
+        assert query["$or"] == [{"first_name": {"$gt": "Ayşe"}}, {"first_name": "Ayşe", "_id": {"$gt": doc_id}}]
+
+
+class TestStudentsList:
+
+    def test_pages_cover_every_student_once(self, client, students):
+        pages = _walk(client, page_size=2)
+        ids = [row["id"] for page in pages for row in page["students"]]
+        expected = sorted(students.docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+        assert ids == [str(d["_id"]) for d in expected]
+        assert all(page["total"] == 7 for page in pages)
+
+    def test_ascending_name_sort(self, client, students):
+        pages = _walk(client, page_size=3, sort_by="first_name", sort_order="asc")
+        names = [row["first_name"] for page in pages for row in page["students"]]
+        assert names == sorted(d["first_name"] for d in students.docs)
+
+    def test_page_numbers_still_work(self, client, students):
+        first = client.get("/v1/students/", params={"page_size": 3}).json()
+        second = client.get("/v1/students/", params={"page_size": 3, "page": 2}).json()
+        by_cursor = client.get("/v1/students/", params={"page_size": 3, "cursor": first["next_cursor"]}).json()
+        assert second["students"] == by_cursor["students"]
+        assert first["total_pages"] == 3
+
+    def test_search_ignores_case_and_turkish_letters(self, client, students):
+        def found(search):
+            rows = client.get("/v1/students/", params={"search": search}).json()["students"]
+            return sorted({(row["first_name"], row["last_name"]) for row in rows})
+
+        assert found("isik") == [("Gülşen", "Işıklı"), ("IŞIK", "Çelik")]
+        assert found("ÇEL") == [("IŞIK", "Çelik")]
+        assert found("ipek öz") == [("İpek", "Öztürk")]
+        assert found("ali kay") == [("Mehmet Ali", "Kaya")]
+        assert found("lmaz") == []  # prefixes only
+        assert found("1003") == [("Mehmet Ali", "Kaya")]
+
+    def test_unfiltered_total_is_estimated(self, client, students):
+        client.get("/v1/students/")
+        client.get("/v1/students/", params={"grade": 2})
+        assert students.counted == ["estimated_document_count", "count_documents"]
+
+    def test_invalid_cursor(self, client, students):
+        assert client.get("/v1/students/", params={"cursor": "garbage"}).status_code == 400
+
+
+class TestBackfill:
+
+    def test_fills_missing_terms(self, students):
+        migrate = _load_script("migrate_student_name_search")
+        for doc in students.docs[:3]:
+            doc.pop("name_search")
+        db = SimpleNamespace(students=students)
+        migrator = migrate.NameSearchMigrator(db, batch_size=2)
+        asyncio.run(migrator.run())
+
+        assert migrator.stats == {"students_checked": 7, "students_updated": 3}
+        assert all(d["name_search"] == name_search_terms(d["first_name"], d["last_name"]) for d in students.docs)
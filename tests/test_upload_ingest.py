@@ -0,0 +1,162 @@
+"""
+Test the streaming upload ingest (chunked temp file + resumable GCS upload + hashes)
+"""
+import pytest
+import sys
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers, UploadFile
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.main import app
+from app.services.upload_ingest import UploadTooLarge, ingest_upload
+from app.storage import GCSStorage
+from app.storage.gcs import open_upload
+
+
+class FakeWriter:
+    """The BlobWriter calls of the ingest"""
+
+    def __init__(self, fail_at=None):
+        self.writes = []
+        self.closed = False
+        self.terminated = False
+        self.fail_at = fail_at
+
+    def write(self, chunk):
+        if self.fail_at is not None and len(self.writes) == self.fail_at:
+            raise ConnectionError("upload failed")
+        self.writes.append(bytes(chunk))
+
+    def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.terminated = True
+
+
+class FakeStorage:
+    bucket_name = "test-bucket"
+
+    def __init__(self, writer=None):
+        self.writer = writer or FakeWriter()
+        self.opened = []
+
+    def open_upload(self, text_id, original_name, content_type=None, chunk_size=None):
+        self.opened.append((text_id, original_name, content_type, chunk_size))
+        return f"2026/01/01/texts/uuid_{original_name}", self.writer
+
+
+def _upload(content: bytes, filename="kayit.wav"):
+    return UploadFile(
+        io.BytesIO(content), size=len(content), filename=filename,
+        headers=Headers({"content-type": "audio/wav"})
+    )
+
+
+class TestIngestUpload:
+
+    def test_streams_in_chunks_and_hashes(self):
+        content = os.urandom(2500)
+        storage = FakeStorage()
+        with patch("app.services.upload_ingest.settings.upload_chunk_bytes", 1000):
+            result = asyncio.run(ingest_upload(_upload(content), "t1", storage=storage))
+        try:
+            assert [len(chunk) for chunk in storage.writer.writes] == [1000, 1000, 500]
+            assert storage.writer.closed and not storage.writer.terminated
+            assert storage.opened == [("t1", "kayit.wav", "audio/wav", 1000)]
+            assert result["md5"] == hashlib.md5(content).hexdigest()
+            assert result["sha256"] == hashlib.sha256(content).hexdigest()
+            assert result["size_bytes"] == 2500
+            assert result["gs_uri"] == "gs://test-bucket/2026/01/01/texts/uuid_kayit.wav"
+            assert result["temp_path"].endswith(".wav")
+            with open(result["temp_path"], "rb") as f:
+                assert f.read() == content
+        finally:
+            os.unlink(result["temp_path"])
+
+    def test_too_large_cancels_upload(self):
+        storage = FakeStorage()
+        created = []
+        real = tempfile.NamedTemporaryFile
+
+        def named_temporary_file(**kwargs):
+            temp = real(**kwargs)
+            created.append(temp.name)
+            return temp
+        with patch("app.services.upload_ingest.settings.upload_chunk_bytes", 1000), \
+                patch("app.services.upload_ingest.tempfile.NamedTemporaryFile", named_temporary_file), \
+                pytest.raises(UploadTooLarge):
+            asyncio.run(ingest_upload(_upload(b"x" * 2500), None, max_bytes=1500, storage=storage))
+        assert storage.writer.terminated and not storage.writer.closed
+        assert not os.path.exists(created[0])
+
+    def test_gcs_failure_removes_temp_file(self):
+        storage = FakeStorage(FakeWriter(fail_at=1))
+        with patch("app.services.upload_ingest.settings.upload_chunk_bytes", 1000), \
+                pytest.raises(ConnectionError):
+            asyncio.run(ingest_upload(_upload(b"x" * 2500), None, storage=storage))
+        assert storage.writer.terminated
+
+
+class TestOpenUpload:
+
+    def test_chunk_size_rounded_to_256k(self):
+        calls = []
+
+        class Blob:
+            def open(self, mode, **kwargs):
+                calls.append((mode, kwargs))
+                return "writer"
+        client = SimpleNamespace(bucket=lambda name: SimpleNamespace(blob=lambda blob_name: Blob()))
+        with patch("app.storage.gcs.get_client", lambda: client):
+            assert open_upload("b", "x.wav", "audio/wav", chunk_size=1000 * 1000) == "writer"
+        assert calls == [("wb", {"chunk_size": 4 * 256 * 1024, "content_type": "audio/wav"})]
+
+    def test_storage_names_blob(self):
+        with patch("app.storage.open_upload", lambda bucket, blob_name, content_type, chunk_size: (bucket, blob_name)):
+            blob_name, writer = GCSStorage("b").open_upload("t1", "Şarkı.wav", "audio/wav")
+        assert writer == ("b", blob_name)
+        assert blob_name.endswith("_Sarki.wav") and "/texts/" in blob_name
+
+
+class TestStandaloneAudioEndpoint:
+
+    def test_stores_hashes(self):
+        content = b"RIFF" + os.urandom(4000)
+        storage = FakeStorage()
+        payloads = []
+
+        async def insert_audio(payload):
+            payloads.append(payload)
+            raise RuntimeError("stop after payload")
+        with patch("app.services.upload_ingest.get_storage", lambda: storage), \
+                patch("app.routers.upload.insert_audio", insert_audio):
+            response = TestClient(app).post(
+                "/v1/upload/audios", files={"file": ("kayit.wav", content, "audio/wav")}
+            )
+        assert response.status_code == 500
+        assert payloads[0]["hash"] == {
+            "md5": hashlib.md5(content).hexdigest(), "sha256": hashlib.sha256(content).hexdigest()
+        }
+        assert payloads[0]["size_bytes"] == len(content)
+        assert b"".join(storage.writer.writes) == content
+
+    def test_too_large_rejected_before_reading(self):
+        storage = FakeStorage()
+        with patch("app.services.upload_ingest.get_storage", lambda: storage):
+            response = TestClient(app).post(
+                "/v1/upload/audios", files={"file": ("kayit.wav", b"x" * (10 * 1024 * 1024 + 1), "audio/wav")}
+            )
+        assert response.status_code == 413
+        assert storage.opened == []
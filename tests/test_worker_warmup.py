@@ -0,0 +1,79 @@
+"""
+Test worker preloading, the import profile and the readiness signal
+
+warmup.py uses the worker's flat imports (config, jobs), so it is run in a
+subprocess with the worker directory as working directory, like rq does.
+"""
+import pytest
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+worker_dir = project_root / "worker"
+
+
+def _run_in_worker(code: str, **env):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=str(worker_dir), capture_output=True, text=True, timeout=120,
+        env={**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING", **env}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestPreload:
+
+    def test_job_modules_loaded_before_first_job(self):
+        report = _run_in_worker(
+            "import sys, json, warmup\n"
+            "before = 'jobs' in sys.modules\n"
+            "timings = warmup.preload()\n"
+            "print(json.dumps({'before': before, 'after': [m for m in warmup.PRELOAD_MODULES if m in sys.modules], 'timings': timings}))",
+            AUDIO_NORMALIZE_ENABLED="false"
+        )
+        assert report["before"] is False
+        assert "jobs" in report["after"] and "main" in report["after"]
+        assert report["timings"]["total"] >= report["timings"]["import:main"]
+        assert "ffmpeg" not in report["timings"]
+
+    def test_import_profile(self):
+        report = _run_in_worker("import json, warmup\nprint(json.dumps(warmup.profile_imports('main', top=10)))")
+        assert report["target"] == "main"
+        assert report["total_ms"] > 0
+        assert report["modules"][0]["module"] == "main"
+        assert any(m["module"] == "jobs" for m in report["modules"])
+
+
+class TestReadiness:
+
+    def test_ready_key_and_file(self, tmp_path):
+        ready_file = tmp_path / "worker-ready"
+        report = _run_in_worker(
+            "import json, os, warmup\n"
+            "class FakeRedis:\n"
+            "    def __init__(self): self.data, self.ttl = {}, {}\n"
+            "    def set(self, key, value, ex=None): self.data[key] = value; self.ttl[key] = ex\n"
+            "    def expire(self, key, ttl): self.ttl[key] = ttl\n"
+            "    def delete(self, *keys): [self.data.pop(k, None) for k in keys]\n"
+            "    def scan_iter(self, match): return [k for k in self.data if k.startswith(match.rstrip('*'))]\n"
+            "    def get(self, key): return self.data.get(key)\n"
+            "redis = FakeRedis()\n"
+            "warmup.mark_ready(redis, 'w1', {'total': 12.5}, 480)\n"
+            "file_written = os.path.exists(os.environ['WORKER_READY_FILE'])\n"
+            "warmup.refresh_ready(redis, 'w1', 600)\n"
+            "ready = warmup.warm_workers(redis)\n"
+            "ttl = redis.ttl['worker:ready:w1']\n"
+            "warmup.mark_not_ready(redis, 'w1')\n"
+            "print(json.dumps({'ready': ready, 'ttl': ttl, 'file_written': file_written,\n"
+            "                  'after': warmup.warm_workers(redis), 'file_after': os.path.exists(os.environ['WORKER_READY_FILE'])}))",
+            WORKER_READY_FILE=str(ready_file)
+        )
+        assert [w["name"] for w in report["ready"]] == ["w1"]
+        assert report["ready"][0]["preload_ms"] == {"total": 12.5}
+        assert report["ttl"] == 600
+        assert report["file_written"] and not report["file_after"]
+        assert report["after"] == []
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Asyncio-native worker for audio analysis
+
+Pulls jobs from the same RQ queue as `rq worker` but runs up to
+ASYNC_WORKER_CONCURRENCY analyses at once in a single process. GCS and
+ElevenLabs I/O run without blocking the event loop and alignment is
+offloaded to a process pool.
+
+Jobs are tracked in RQ's registries like `rq worker` does: a running job
+sits in StartedJobRegistry until timeout + 60s, so after a crash or
+redeploy RQ's registry cleanup moves it to FailedJobRegistry instead of
+losing it; failed jobs go to FailedJobRegistry and analyses are cancelled
+after job.timeout.
+
+It also runs the RQ scheduler for its queues (STT retries are rescheduled
+jobs), cleans the registries of its queues and stops dequeueing while the
+STT circuit breaker is open. Job
+modules and clients are preloaded before the first dequeue and the worker
+then announces itself as ready (see warmup.py).
+
+Usage:
+    python async_worker.py
+    python async_worker.py --concurrency 8 --cpu-processes 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loguru import logger
+from redis import Redis
+from rq import Queue
+from rq.defaults import DEFAULT_MAINTENANCE_TASK_INTERVAL, DEFAULT_RESULT_TTL
+from rq.exceptions import DequeueTimeout
+from rq.job import JobStatus
+from rq.registry import clean_registries
+from rq.utils import utcnow
+
+from config import settings
+
+ANALYZE_FUNC_NAMES = ("main.analyze_audio", "jobs.analyze_audio")
+
+
+class AsyncWorker:
+    """Runs RQ analysis jobs concurrently on one event loop"""
+
+    def __init__(self, redis_url: str, queue_names, concurrency: int, cpu_processes: int,
+                 dequeue_timeout: int = 5):
+        self.redis = Redis.from_url(redis_url)
+        self.queues = [Queue(name, connection=self.redis) for name in queue_names]
+        self.concurrency = concurrency
+        self.cpu_processes = cpu_processes
+        self.dequeue_timeout = dequeue_timeout
+        self.cpu_executor = None
+        self.stt_client = None
+        self.name = f"async:{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+
+    def stop(self):
+        """Stop taking new jobs; running analyses are allowed to finish"""
+        if not self._stopping:
+            logger.info("Async worker stopping, waiting for running analyses...")
+        self._stopping = True
+
+    def _dequeue(self):
+        """Blocking pop of the next job (run in a thread)"""
+        try:
+            result = Queue.dequeue_any(self.queues, self.dequeue_timeout, connection=self.redis)
+        except DequeueTimeout:
+            return None
+        if result is None:
+            return None
+        job, _queue = result
+        return job
+
+    def _start(self, job):
+        """Mark the job started and add it to StartedJobRegistry (run in a thread)"""
+        # Expires timeout + 60s after the start, like rq's own workers
+        ttl = job.timeout + 60 if job.timeout and job.timeout > 0 else -1
+        with self.redis.pipeline() as pipeline:
+            job.prepare_for_execution(self.name, pipeline=pipeline)
+            job.heartbeat(utcnow(), ttl, pipeline=pipeline)
+            pipeline.execute()
+
+    def _finish(self, job):
+        """Move the job from StartedJobRegistry to FinishedJobRegistry (run in a thread)"""
+        result_ttl = job.result_ttl if job.result_ttl is not None else DEFAULT_RESULT_TTL
+        with self.redis.pipeline() as pipeline:
+            job.set_status(JobStatus.FINISHED, pipeline=pipeline)
+            job.started_job_registry.remove(job, pipeline=pipeline)
+            if result_ttl != 0:
+                job.finished_job_registry.add(job, result_ttl, pipeline=pipeline)
+            pipeline.execute()
+
+    def _fail(self, job, exc_string: str):
+        """Move the job from StartedJobRegistry to FailedJobRegistry (run in a thread)"""
+        with self.redis.pipeline() as pipeline:
+            job.set_status(JobStatus.FAILED, pipeline=pipeline)
+            job.started_job_registry.remove(job, pipeline=pipeline)
+            job.failed_job_registry.add(job, ttl=job.failure_ttl, exc_string=exc_string, pipeline=pipeline)
+            pipeline.execute()
+
+    async def _perform(self, job, semaphore: asyncio.Semaphore):
+        """Run one job and record its status in RQ"""
+        from jobs import run_analysis, fail_analysis
+
+        try:
+            await asyncio.to_thread(self._start, job)
+            if job.func_name in ANALYZE_FUNC_NAMES:
+                timeout = job.timeout if job.timeout and job.timeout > 0 else None
+                try:
+                    await asyncio.wait_for(
+                        run_analysis(job.args[0], stt_client=self.stt_client, cpu_executor=self.cpu_executor, job=job),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    error = f"Job exceeded maximum timeout value ({timeout} seconds)"
+                    await fail_analysis(job.args[0], error)
+                    raise Exception(error)
+            else:
+                # Unknown job type - run it the way rq would, without blocking the loop
+                await asyncio.to_thread(job.perform)
+            await asyncio.to_thread(self._finish, job)
+            logger.info(f"Job {job.id} finished")
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            try:
+                await asyncio.to_thread(self._fail, job, traceback.format_exc())
+            except Exception as redis_error:
+                # Still in StartedJobRegistry; the registry cleanup fails it once the TTL runs out
+                logger.error(f"Could not record failure of job {job.id}: {str(redis_error)}")
+        finally:
+            semaphore.release()
+
+    async def _schedule_loop(self):
+        """Move due scheduled jobs (rescheduled STT retries) back onto their queues and clean the registries"""
+        from rq.scheduler import RQScheduler
+
+        scheduler = RQScheduler(self.queues, connection=self.redis)
+        cleaned_at = 0.0
+        try:
+            while not self._stopping:
+                if scheduler.should_reacquire_locks:
+                    await asyncio.to_thread(scheduler.acquire_locks)
+                if scheduler.acquired_locks:
+                    await asyncio.to_thread(scheduler.enqueue_scheduled_jobs)
+                    await asyncio.to_thread(scheduler.heartbeat)
+                if time.monotonic() - cleaned_at >= DEFAULT_MAINTENANCE_TASK_INTERVAL:
+                    # Fails jobs left in StartedJobRegistry by a worker that died
+                    for queue in self.queues:
+                        await asyncio.to_thread(clean_registries, queue)
+                    cleaned_at = time.monotonic()
+                await asyncio.sleep(scheduler.interval)
+        finally:
+            scheduler.release_locks()
+
+    async def _ready_loop(self):
+        """Keep the readiness key alive while the worker runs"""
+        from warmup import refresh_ready
+
+        ttl = settings.worker_ready_ttl_sec
+        while not self._stopping:
+            await asyncio.sleep(min(ttl / 3, 5))
+            await asyncio.to_thread(refresh_ready, self.redis, self.name, ttl)
+
+    async def _wait_for_stt_breaker(self):
+        """Don't take new jobs while the STT circuit breaker is open"""
+        from stt_limits import stt_guard
+
+        retry_after = await asyncio.to_thread(stt_guard().breaker.retry_after)
+        if retry_after:
+            logger.warning(f"STT circuit breaker open, pausing dequeue for {retry_after:.0f}s")
+            await asyncio.sleep(min(retry_after, self.dequeue_timeout))
+        return retry_after
+
+    async def run(self):
+        """Main loop: dequeue while a concurrency slot is free"""
+        # Import jobs here so spawned pool processes don't repeat logging/GCS setup
+        from warmup import preload, preload_cpu_process, warm_process_pool, mark_ready, mark_not_ready
+        timings = preload() if settings.worker_preload_enabled else {}
+        from jobs import create_stt_client
+        from db import connect_to_mongo, close_mongo_connection
+
+        # Spawn (not fork) so pool processes never inherit the Motor client or loop threads
+        self.cpu_executor = ProcessPoolExecutor(
+            max_workers=self.cpu_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=preload_cpu_process
+        )
+        if settings.worker_preload_enabled:
+            timings["cpu_pool"] = await warm_process_pool(self.cpu_executor, self.cpu_processes)
+        self.stt_client = create_stt_client()
+        await connect_to_mongo()
+        await asyncio.to_thread(mark_ready, self.redis, self.name, timings, settings.worker_ready_ttl_sec)
+        logger.info(f"Async worker started: queues={[q.name for q in self.queues]}, concurrency={self.concurrency}, cpu_processes={self.cpu_processes}")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        scheduler_task = asyncio.create_task(self._schedule_loop())
+        ready_task = asyncio.create_task(self._ready_loop())
+        try:
+            while not self._stopping:
+                await semaphore.acquire()
+                if await self._wait_for_stt_breaker():
+                    semaphore.release()
+                    continue
+                job = await asyncio.to_thread(self._dequeue)
+                if job is None:
+                    semaphore.release()
+                    continue
+
+                logger.info(f"Dequeued job {job.id} ({job.func_name}), running={len(tasks) + 1}")
+                task = asyncio.create_task(self._perform(job, semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await scheduler_task
+            await ready_task
+        finally:
+            await asyncio.to_thread(mark_not_ready, self.redis, self.name)
+            await self.stt_client.aclose()
+            self.cpu_executor.shutdown(wait=True)
+            await close_mongo_connection()
+            logger.info("Async worker stopped")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run analyses concurrently from the RQ queue")
+    parser.add_argument("--redis-url", default=settings.redis_url or "redis://redis:6379/0")
+    parser.add_argument("--queues", default=settings.async_worker_queues, help="Comma separated queue names")
+    parser.add_argument("--concurrency", type=int, default=settings.async_worker_concurrency)
+    parser.add_argument("--cpu-processes", type=int, default=settings.async_worker_cpu_processes)
+    args = parser.parse_args()
+
+    worker = AsyncWorker(
+        redis_url=args.redis_url,
+        queue_names=[name.strip() for name in args.queues.split(",") if name.strip()],
+        concurrency=args.concurrency,
+        cpu_processes=args.cpu_processes
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     elevenlabs_seed: int = 12456  # Random seed for reproducibility
     elevenlabs_remove_filler_words: bool = False  # Keep filler words for analysis
     elevenlabs_remove_disfluencies: bool = False  # Keep disfluencies (repetitions, false starts)
+    elevenlabs_api_url: str = "https://api.elevenlabs.io/v1/speech-to-text"  # scripts/stt_standin.py for load tests
     
     # Database settings
     mongo_uri: str = "mongodb://mongodb:27017"
@@ -32,6 +33,68 @@ class Settings(BaseSettings):
     log_file: str = "./logs/worker.log"
     trace_slow_ms: int = 250
     
+    # Async worker settings (python async_worker.py)
+    async_worker_concurrency: int = 4  # analyses running at the same time in one process
+    async_worker_cpu_processes: int = 2  # process pool size for alignment
+    async_worker_queues: str = "main"  # comma separated RQ queue names
+    
+    # Staged pipeline settings (download -> transcribe -> align -> persist queues)
+    analysis_pipeline_mode: str = "single"  # "single" (one job) or "staged"
+    pipeline_workers_download: int = 2
+    pipeline_workers_transcribe: int = 4
+    pipeline_workers_align: int = 2
+    pipeline_workers_persist: int = 2
+    
+    # Audio handling (GCS -> STT upload)
+    audio_memory_max_bytes: int = 32 * 1024 * 1024  # larger files spill to audio_scratch_dir
+    audio_scratch_dir: str = ""  # empty = <system temp>/okuma-audio
+    audio_scratch_max_age_sec: int = 3600  # stale spill files are removed at worker start
+    
+    # Audio normalization before STT (ffmpeg): mono, AUDIO_NORMALIZE_SAMPLE_RATE, opus or flac
+    audio_normalize_enabled: bool = True
+    audio_normalize_format: str = "opus"  # "opus" (smallest) or "flac" (lossless)
+    audio_normalize_sample_rate: int = 16000
+    audio_normalize_bitrate: str = "24k"  # opus only
+    audio_keep_original: bool = True  # False deletes the original blob once the normalized copy is stored
+    
+    # STT result cache (audio sha256 + model parameters)
+    stt_cache_enabled: bool = True
+    stt_cache_ttl_sec: int = 30 * 24 * 3600  # 30 days
+    
+    # STT rate limit and circuit breaker, shared by all workers through Redis
+    stt_rate_limit_per_sec: float = 2.0  # token bucket refill rate
+    stt_rate_limit_burst: int = 5  # token bucket size
+    stt_rate_limit_max_wait_sec: float = 2.0  # longer waits reschedule the job instead
+    stt_breaker_failure_threshold: int = 5  # retryable failures within the window that open the breaker
+    stt_breaker_window_sec: int = 60
+    stt_breaker_cooldown_sec: int = 30  # open -> half-open (one probe request)
+    
+    # STT retries: rescheduled RQ jobs, never in-process sleeps
+    stt_max_attempts: int = 5
+    stt_retry_base_sec: float = 5.0  # exponential backoff with jitter, at least Retry-After
+    stt_retry_max_sec: float = 300.0
+    
+    # Chunked STT for long recordings: split at silences, chunks transcribed concurrently
+    stt_chunking_enabled: bool = False
+    stt_chunk_min_audio_sec: float = 180.0  # shorter recordings are sent in one request
+    stt_chunk_max_sec: float = 60.0
+    stt_chunk_overlap_sec: float = 0.5  # extra audio on both sides of every cut
+    stt_chunk_concurrency: int = 4  # per job; the shared rate limit still applies
+    stt_silence_noise_db: float = -35.0
+    stt_silence_min_sec: float = 0.3
+    
+    # Worker warm-up: preload job modules and clients before taking jobs (see warmup.py)
+    worker_preload_enabled: bool = True
+    worker_ready_ttl_sec: int = 60  # async worker readiness key TTL; rq workers use their worker TTL
+    worker_ready_file: str = ""  # touched once warm, for container readiness probes
+    
+    # Progress events on Redis pub/sub for the backend's SSE endpoint (see progress.py)
+    progress_events_enabled: bool = True
+    progress_event_ttl_sec: int = 3600  # latest event per analysis, for clients that connect late
+    
+    # Event storage: "documents" (word_events/pause_events), "columnar" (analysis_events) or "both"
+    event_storage: str = "documents"
+    
     # Environment variables from docker-compose
     mongo_url: Optional[str] = None
     redis_url: Optional[str] = None
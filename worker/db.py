@@ -3,7 +3,8 @@ from beanie import init_beanie
 from config import settings
 from models import (
     TextDoc, AudioFileDoc, AnalysisDoc, ReadingSessionDoc,
-    WordEventDoc, PauseEventDoc, SttResultDoc
+    WordEventDoc, PauseEventDoc, SttResultDoc, SttCacheDoc,
+    AnalysisEventsDoc
 )
 
 
@@ -30,7 +31,9 @@ async def connect_to_mongo():
             ReadingSessionDoc,
             WordEventDoc,
             PauseEventDoc,
-            SttResultDoc
+            SttResultDoc,
+            SttCacheDoc,
+            AnalysisEventsDoc
         ]
     )
 
@@ -8,9 +8,9 @@ import json
 import sys
 import os
 import time
-import tempfile
 from datetime import datetime
 from loguru import logger
+from rq import get_current_job
 # PydanticObjectId removed in Pydantic v2, using str instead
 
 # Configure logging based on settings
@@ -60,13 +60,24 @@ setup_gcs_credentials()
 from db import connect_to_mongo, close_mongo_connection
 from models import (
     AnalysisDoc, AudioFileDoc, TextDoc, ReadingSessionDoc,
-    WordEventDoc, PauseEventDoc, SttResultDoc
+    WordEventDoc, PauseEventDoc, SttResultDoc, AnalysisEventsDoc
 )
 from services import alignment
 from services import pauses
-from services import scoring
+from services import analysis as analysis_service
+from services import persistence
+from services import list_view
+from services import audio_normalize
+from services.audio_source import AudioSource, cleanup_scratch_dir, default_scratch_dir
+from services.elevenlabs_stt import SttRetryableError, SttUnavailable
+from stt_cache import transcribe_cached
+from stt_limits import next_retry_delay, schedule_retry
+import progress
 from config import settings
 
+# Remove audio spill files left behind by killed workers
+cleanup_scratch_dir(settings.audio_scratch_dir or default_scratch_dir(), settings.audio_scratch_max_age_sec)
+
 
 def analyze_audio(analysis_id: str):
     """
@@ -75,318 +86,550 @@ def analyze_audio(analysis_id: str):
     Args:
         analysis_id: ID of the analysis document
     """
+    if settings.analysis_pipeline_mode == "staged":
+        # Hand the analysis over to the download/transcribe/align/persist queues
+        from pipeline import start_pipeline
+        return start_pipeline(analysis_id)
+    
     return asyncio.run(_analyze_audio_async(analysis_id))
 
 
 async def _analyze_audio_async(analysis_id: str):
     """
-    Async implementation of audio analysis
+    Async implementation of audio analysis for a single RQ job
     
     Args:
         analysis_id: ID of the analysis document
     """
-    start_time = time.time()
-    logger.info(f"Starting analysis for {analysis_id}")
-    
     try:
         # Connect to database
         await connect_to_mongo()
         logger.debug("Database connection established")
         
+        await run_analysis(analysis_id)
+    
+    finally:
+        await close_mongo_connection()
+        logger.debug("Database connection closed")
+
+
+def create_stt_client():
+    """Build an ElevenLabs STT client from worker settings"""
+    from services.elevenlabs_stt import ElevenLabsSTT
+    return ElevenLabsSTT(
+        api_key=settings.elevenlabs_api_key,
+        model=settings.elevenlabs_model,
+        language=settings.elevenlabs_language,
+        temperature=settings.elevenlabs_temperature,
+        seed=settings.elevenlabs_seed,
+        remove_filler_words=settings.elevenlabs_remove_filler_words,
+        remove_disfluencies=settings.elevenlabs_remove_disfluencies,
+        base_url=settings.elevenlabs_api_url
+    )
+
+
+def open_audio_source(audio) -> AudioSource:
+    """
+    Load the audio of an AudioFileDoc (blocking, run it in a thread)
+    
+    GCS blobs are streamed into memory and only spill to the managed scratch
+    directory above AUDIO_MEMORY_MAX_BYTES. The caller must close() the source.
+    
+    The normalized copy is loaded when the audio already has one.
+    
+    Args:
+        audio: AudioFileDoc with gcs_uri or local path
+        
+    Returns:
+        AudioSource with the audio content
+    """
+    gcs_uri, content_type = audio.gcs_uri, audio.content_type
+    if audio.normalized:
+        gcs_uri, content_type = audio.normalized.gcs_uri, audio.normalized.content_type
+    
+    if gcs_uri.startswith('gs://'):
+        from google.cloud import storage
+        
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.gcs_credentials_path
+        return AudioSource.from_gcs(
+            gcs_uri,
+            client=storage.Client(),
+            content_type=content_type or "audio/mp4",
+            max_memory_bytes=settings.audio_memory_max_bytes,
+            scratch_dir=settings.audio_scratch_dir or None
+        )
+    return AudioSource.from_path(audio.path)
+
+
+async def normalize_audio(audio, source: AudioSource) -> AudioSource:
+    """
+    Replace the original audio with its compact mono speech copy
+    
+    The copy is transcoded once, stored next to the original in GCS and
+    recorded on AudioFileDoc.normalized, so later attempts and re-analyses
+    download the compact file directly. Any failure falls back to the
+    original audio - normalization must never fail an analysis.
+    
+    Args:
+        audio: AudioFileDoc of the session
+        source: Original audio (closed when the copy replaces it)
+        
+    Returns:
+        The normalized AudioSource, or `source` unchanged
+    """
+    if not settings.audio_normalize_enabled or audio.normalized:
+        return source
+    
+    fmt = settings.audio_normalize_format
+    sample_rate = settings.audio_normalize_sample_rate
+    try:
+        result = await audio_normalize.normalize(
+            source, fmt, sample_rate, settings.audio_normalize_bitrate,
+            scratch_dir=settings.audio_scratch_dir or None,
+            max_memory_bytes=settings.audio_memory_max_bytes
+        )
+    except Exception as e:
+        logger.warning(f"Audio normalization failed for {audio.id}, using the original: {str(e)}")
+        return source
+    normalized = result["source"]
+    
+    if not audio.gcs_uri.startswith('gs://'):
+        # Local development storage: use the copy for this attempt only
+        source.close()
+        return normalized
+    
+    try:
+        from google.cloud import storage
+        
+        storage_name = audio_normalize.normalized_blob_name(audio.storage_name, fmt, sample_rate)
+        bucket_name = audio.gcs_uri.split('/')[2]
+        info = {
+            "storage_name": storage_name,
+            "gcs_uri": f"gs://{bucket_name}/{storage_name}",
+            "content_type": normalized.content_type,
+            "codec": fmt,
+            "sample_rate": sample_rate,
+            "channels": 1,
+            "size_bytes": normalized.size,
+            "sha256": normalized.sha256,
+            "created_at": datetime.utcnow()
+        }
+        client = storage.Client()
+        await asyncio.to_thread(normalized.upload_to_gcs, info["gcs_uri"], client)
+        
+        audio_collection = AudioFileDoc.get_motor_collection()
+        await audio_collection.update_one({"_id": audio.id}, {"$set": {"normalized": info}})
+        if not settings.audio_keep_original:
+            # Only once the copy is recorded, so the document never points at nothing
+            await asyncio.to_thread(client.bucket(bucket_name).blob(audio.storage_name).delete)
+            await audio_collection.update_one({"_id": audio.id}, {"$set": {"original_deleted": True}})
+        logger.info(f"Stored normalized audio {info['gcs_uri']} ({source.size} -> {normalized.size} bytes)")
+    except Exception as e:
+        # The copy couldn't be stored; it can still be used for this attempt
+        logger.warning(f"Could not store normalized audio for {audio.id}: {str(e)}")
+    
+    source.close()
+    return normalized
+
+
+async def _run_cpu(cpu_executor, func, *args):
+    """Run a CPU-bound function in the given process pool, or inline if there is none"""
+    if cpu_executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, func, *args)
+
+
+STAGES = ["download", "transcribe", "align", "persist"]
+
+
+def stage_completed(analysis, stage: str) -> bool:
+    """True if a previous attempt already checkpointed this stage"""
+    return stage in analysis.pipeline.get("completed", [])
+
+
+async def checkpoint(analysis, stage: str, **outputs):
+    """
+    Record a finished stage and its outputs on AnalysisDoc
+    
+    Args:
+        analysis: AnalysisDoc being processed
+        stage: One of STAGES, or a sub-step such as "events"
+        **outputs: Stage outputs stored in analysis.pipeline
+    """
+    analysis.pipeline.update(outputs)
+    completed = analysis.pipeline.setdefault("completed", [])
+    if stage not in completed:
+        completed.append(stage)
+    if stage in STAGES[:-1]:
+        analysis.stage = STAGES[STAGES.index(stage) + 1]
+    await analysis.save()
+    progress.publish(analysis)
+    logger.debug(f"Checkpointed {stage} stage for analysis {analysis.id}")
+
+
+def _list_view_collection():
+    return AnalysisDoc.get_motor_collection().database[list_view.COLLECTION]
+
+
+async def sync_list_view(analysis):
+    """Status and timings of the analysis in analysis_list_view (best effort)"""
+    try:
+        await list_view.update_status(_list_view_collection(), analysis)
+    except Exception as e:
+        logger.warning(f"Could not update list view of analysis {analysis.id}: {str(e)}")
+
+
+async def _load_session_docs(analysis):
+    """Session, audio and text documents of an analysis"""
+    session = await ReadingSessionDoc.get(analysis.session_id)
+    if not session:
+        raise Exception(f"Session {analysis.session_id} not found")
+    
+    audio = await AudioFileDoc.get(session.audio_id)
+    text = await TextDoc.get(session.text_id)
+    
+    if not audio:
+        raise Exception(f"Audio file {session.audio_id} not found")
+    if not text:
+        raise Exception(f"Text {session.text_id} not found")
+    return session, audio, text
+
+
+async def run_analysis(analysis_id: str, stt_client=None, cpu_executor=None, job=None):
+    """
+    Run the full analysis pipeline for one analysis
+    
+    The caller owns the database connection, so the async worker can share a
+    single Motor client across many concurrent analyses.
+    
+    Each stage checkpoints its output in analysis.pipeline (audio hash,
+    SttResultDoc id, alignment result, events written), so a retried job
+    resumes after the last completed stage instead of paying for STT again.
+    
+    A retryable STT failure (429, 5xx, breaker open) reschedules the RQ job
+    with a backoff delay and returns; the analysis goes back to "queued".
+    
+    Args:
+        analysis_id: ID of the analysis document
+        stt_client: Optional shared ElevenLabsSTT client
+        cpu_executor: Optional process pool for alignment; None runs it inline
+        job: RQ job running this analysis; defaults to the current rq job
+    """
+    start_time = time.time()
+    logger.info(f"Starting analysis for {analysis_id}")
+    audio_source = None
+    owns_stt_client = stt_client is None
+    
+    try:
         # Get analysis document
         analysis = await AnalysisDoc.get(analysis_id)
         if not analysis:
             logger.error(f"Analysis {analysis_id} not found")
             return
+        if analysis.status == "done":
+            logger.warning(f"Analysis {analysis_id} already done, skipping")
+            return
         
-        # Update status to running
+        # Update status to running; a retried job keeps its checkpoints and original start time
+        completed = analysis.pipeline.get("completed", [])
+        if completed:
+            logger.info(f"Resuming analysis {analysis_id} after completed stages: {completed}")
+        else:
+            analysis.started_at = datetime.utcnow()
         analysis.status = "running"
-        analysis.started_at = datetime.utcnow()
+        analysis.error = None
+        analysis.stage = next((stage for stage in STAGES if stage not in completed), "persist")
         await analysis.save()
+        progress.publish(analysis)
+        await sync_list_view(analysis)
         logger.info(f"Analysis {analysis_id} status updated to running")
         
-        # Get session document first
-        session = await ReadingSessionDoc.get(analysis.session_id)
-        if not session:
-            raise Exception(f"Session {analysis.session_id} not found")
-        
-        # Get related documents from session
-        audio = await AudioFileDoc.get(session.audio_id)
-        text = await TextDoc.get(session.text_id)
-        
-        if not audio:
-            raise Exception(f"Audio file {session.audio_id} not found")
-        if not text:
-            raise Exception(f"Text {session.text_id} not found")
+        session, audio, text = await _load_session_docs(analysis)
+        timings = dict(analysis.pipeline.get("timings_ms", {}))
         
-        # Download audio file from GCS if needed
-        if audio.gcs_uri.startswith('gs://'):
-            logger.debug(f"Downloading audio file from GCS: {audio.gcs_uri}")
-            from google.cloud import storage
+        if stage_completed(analysis, "transcribe"):
+            # Transcript is already saved - don't pay for the download and STT again
+            stt_result = await SttResultDoc.get(analysis.pipeline["stt_result_id"])
+            if not stt_result:
+                raise Exception(f"SttResultDoc {analysis.pipeline['stt_result_id']} not found")
+            words = [w.model_dump() for w in stt_result.words]
+            logger.info(f"Loaded {len(words)} words from checkpointed SttResultDoc {stt_result.id}")
+        else:
+            # Load audio from GCS or local storage (blocking SDK call, keep it off the loop)
+            logger.debug(f"Loading audio file: {audio.gcs_uri}")
+            download_start = time.time()
+            audio_source = await asyncio.to_thread(open_audio_source, audio)
+            timings["download"] = (time.time() - download_start) * 1000
+            logger.debug(f"Loaded {audio_source.name}, size: {audio_source.size} bytes, spilled to disk: {audio_source.spilled}")
             
-            # Parse GCS URL
-            gs_url = audio.gcs_uri
-            bucket_name = gs_url.split('/')[2]
-            blob_name = '/'.join(gs_url.split('/')[3:])
+            # Upload the compact mono speech copy to STT instead of the original
+            normalize_start = time.time()
+            audio_source = await normalize_audio(audio, audio_source)
+            timings["normalize"] = (time.time() - normalize_start) * 1000
+            file_size = audio_source.size
+            await checkpoint(analysis, "download", audio_sha256=audio_source.sha256, audio_size_bytes=file_size)
             
-            # Download to temporary file
-            import os
-            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.gcs_credentials_path
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_name)
+            # Initialize ElevenLabs STT client
+            logger.debug(f"Initializing ElevenLabs STT with model: {settings.elevenlabs_model}")
+            model_start = time.time()
+            if stt_client is None:
+                stt_client = create_stt_client()
+            timings["model_load"] = (time.time() - model_start) * 1000
+            logger.debug(f"ElevenLabs STT client initialized in {timings['model_load']:.2f}ms")
             
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            blob.download_to_filename(temp_file.name)
-            audio_path = temp_file.name
-            logger.debug(f"Downloaded to: {audio_path}")
-        else:
-            audio_path = audio.path
-        
-        # DEBUG: Log file details
-        file_size = os.path.getsize(audio_path) if os.path.exists(audio_path) else 0
-        logger.debug(f"Processing file: {audio_path}, size: {file_size} bytes")
-        
-        # Initialize ElevenLabs STT client
-        logger.debug(f"Initializing ElevenLabs STT with model: {settings.elevenlabs_model}")
-        model_start = time.time()
-        from services.elevenlabs_stt import ElevenLabsSTT
-        stt_client = ElevenLabsSTT(
-            api_key=settings.elevenlabs_api_key,
-            model=settings.elevenlabs_model,
-            language=settings.elevenlabs_language,
-            temperature=settings.elevenlabs_temperature,
-            seed=settings.elevenlabs_seed,
-            remove_filler_words=settings.elevenlabs_remove_filler_words,
-            remove_disfluencies=settings.elevenlabs_remove_disfluencies
-        )
-        model_load_time = (time.time() - model_start) * 1000
-        logger.debug(f"ElevenLabs STT client initialized in {model_load_time:.2f}ms")
-        
-        # Transcribe audio using ElevenLabs
-        logger.info(f"Starting ElevenLabs transcription of file: {audio_path}")
-        logger.info(f"File size: {os.path.getsize(audio_path)} bytes")
-        stt_start = time.time()
-        
-        # Call ElevenLabs API
-        transcription_result = stt_client.transcribe_file(audio_path)
-        
-        # Extract words from response - DIRECT PASSTHROUGH, no processing
-        words_data = transcription_result.get('words', [])
-        logger.info(f"About to call extract_raw_words with {len(words_data)} words from ElevenLabs")
-        words = stt_client.extract_raw_words(words_data)  # Direct passthrough
-        logger.info(f"extract_raw_words returned {len(words)} words")
-        logger.info(f"STT raw words count: {len(words_data)}, processed words count: {len(words)}")
-        
-        stt_time = (time.time() - stt_start) * 1000
-        logger.info(f"ElevenLabs transcription completed in {stt_time:.2f}ms, {len(words)} words")
-        logger.info(f"Detected language: {transcription_result.get('language_code')}, probability: {transcription_result.get('language_probability')}")
-        
-        if not words:
-            raise Exception("No words detected in audio")
-        
-        # Save STT result with raw words
-        stt_result = SttResultDoc(
-            session_id=session.id,
-            provider="elevenlabs",
-            model=settings.elevenlabs_model,
-            language=transcription_result.get('language_code', 'tr'),
-            transcript=stt_client.get_transcript_text(transcription_result),  # Use original transcript
-            words=[{
-                "word": w['word'],
-                "start": w['start'],
-                "end": w['end'],
-                "confidence": w.get('confidence')
-            } for w in words]
-        )
-        await stt_result.insert()
-        logger.info(f"Saved SttResultDoc {stt_result.id}")
-        
-        # Get first and last word times
-        first_ms = words[0]['start'] * 1000
-        last_ms = words[-1]['end'] * 1000
-        
-        # Create hypothesis text from raw words
-        hyp_text = " ".join([w['word'] for w in words])
-        logger.debug(f"Hypothesis text from raw words: {hyp_text[:100]}...")
-        logger.debug(f"Raw words sample: {[w['word'] for w in words[:5]]}")
-        logger.debug(f"Total raw words count: {len(words)}")
-        
-        # Tokenize texts
-        logger.debug("Starting text tokenization and alignment")
-        align_start = time.time()
-        
-        # Use canonical tokens from TextDoc instead of re-tokenizing
-        # This ensures we use the same tokenization as when the text was saved
-        ref_tokens = text.canonical.tokens if text.canonical and text.canonical.tokens else []
-        if not ref_tokens:
-            # Fallback to tokenizing body if canonical tokens are missing
-            from services.alignment import tokenize_tr
-            ref_tokens = tokenize_tr(text.body)
-            logger.warning("Using fallback tokenization - canonical.tokens was empty")
-        
-        # Use raw words directly - NO TOKENIZATION of hypothesis
-        hyp_tokens = [w['word'] for w in words]
-        
-        logger.debug(f"Reference tokens: {len(ref_tokens)}, Hypothesis tokens: {len(hyp_tokens)}")
-        logger.debug(f"Raw hyp tokens sample: {hyp_tokens[:5]}")
-        
-        # Perform alignment
-        alignment_result = alignment.levenshtein_align(ref_tokens, hyp_tokens)
-        
-        # Count alignment results
-        subs = sum(1 for a in alignment_result if a[0] == "replace")
-        dels = sum(1 for a in alignment_result if a[0] == "delete")
-        ins = sum(1 for a in alignment_result if a[0] == "insert")
-        correct = sum(1 for a in alignment_result if a[0] == "equal")
-        
-        align_time = (time.time() - align_start) * 1000
-        logger.debug(f"Alignment completed in {align_time:.2f}ms: {correct} correct, {subs} substitutions, {dels} deletions, {ins} insertions")
-        
-        # Build word events from alignment
-        word_events_data = alignment.build_word_events(alignment_result, words)
-        
-        # Save WordEventDoc documents
-        word_events = []
-        for i, event_data in enumerate(word_events_data):
-            word_event = WordEventDoc(
-                analysis_id=analysis.id,
-                position=i,
-                ref_token=event_data.get('ref_token'),
-                hyp_token=event_data.get('hyp_token'),
-                type=event_data.get('type', 'unknown'),
-                sub_type=event_data.get('sub_type'),
-                timing={
-                    'start_ms': event_data.get('start_ms'),
-                    'end_ms': event_data.get('end_ms')
-                } if event_data.get('start_ms') else None,
-                char_diff=event_data.get('char_diff')
-            )
-            word_events.append(word_event)
-        
-        if word_events:
-            await WordEventDoc.insert_many(word_events)
-            logger.info(f"Saved {len(word_events)} WordEventDoc documents")
-        
-        # Calculate metrics
-        metrics = scoring.compute_metrics(len(ref_tokens), subs, dels, ins)
-        wpm = scoring.compute_wpm(len(hyp_tokens), first_ms, last_ms)
-        
-        logger.info(f"Metrics calculated: WER={metrics['wer']:.3f}, Accuracy={metrics['accuracy']:.1f}%, WPM={wpm:.1f}")
-        
-        # Detect pauses
-        logger.debug("Detecting pauses")
-        pause_start = time.time()
-        pause_events_data = pauses.detect_pauses(words, settings.long_pause_ms)
-        pause_time = (time.time() - pause_start) * 1000
-        logger.debug(f"Pause detection completed in {pause_time:.2f}ms, found {len(pause_events_data)} pauses")
-        
-        # Save PauseEventDoc documents
-        pause_events = []
-        for i, event_data in enumerate(pause_events_data):
-            pause_event = PauseEventDoc(
-                analysis_id=analysis.id,
-                after_position=event_data.get('after_word_idx', i),
-                duration_ms=event_data.get('duration_ms', 0),
-                class_=event_data.get('class', 'long'),
-                start_ms=event_data.get('start_ms', 0),
-                end_ms=event_data.get('end_ms', 0)
-            )
-            pause_events.append(pause_event)
-        
-        if pause_events:
-            await PauseEventDoc.insert_many(pause_events)
-            logger.info(f"Saved {len(pause_events)} PauseEventDoc documents")
-        
-        
-        # Update analysis summary - now aggregate from events
-        total_time = (time.time() - start_time) * 1000
-        
-        # Aggregate counts from WordEventDoc
-        counts = scoring.recompute_counts(word_events)
-        
-        # Add pause counts to the detailed counts
-        counts["uzun_duraksama"] = len(pause_events)
-        
-        # Compute grade-based scoring
-        text_grade = text.grade if hasattr(text, 'grade') and text.grade else 1
-        grade_score = scoring.compute_grade_score(text_grade, counts, len(ref_tokens))
-        
-        summary = {
-            "counts": counts,
-            "wer": metrics["wer"],
-            "accuracy": metrics["accuracy"],
-            "wpm": wpm,
-            "grade_score": grade_score,  # Add grade-based scoring
-            "long_pauses": {
-                "count": len(pause_events),
-                "threshold_ms": settings.long_pause_ms
-            },
-            "error_types": {
-                "missing": counts.get("missing", 0),
-                "extra": counts.get("extra", 0),
-                "substitution": counts.get("substitution", 0),  # Use "substitution" instead of "diff"
-                "repetition": counts.get("repetition", 0),
-                "pause_long": len(pause_events)
-            }
-        }
-        
-        # Add DEBUG information if enabled
-        if settings.debug:
-            summary["debug"] = {
-                "model": {
-                    "name": settings.elevenlabs_model,
-                    "provider": "elevenlabs",
-                    "language": settings.elevenlabs_language
-                },
-                "timings_ms": {
-                    "model_load": round(model_load_time, 2),
-                    "stt": round(stt_time, 2),
-                    "align": round(align_time, 2),
-                    "pauses": round(pause_time, 2),
-                    "total": round(total_time, 2)
-                }
-            }
-        
-        analysis.summary = summary
-        analysis.status = "done"
-        analysis.finished_at = datetime.utcnow()
-        
-        # Set audio duration from AudioFileDoc
-        audio = await AudioFileDoc.get(session.audio_id)
-        if audio and audio.duration_sec:
-            analysis.audio_duration_sec = audio.duration_sec
-            logger.info(f"Audio duration set: {audio.duration_sec:.2f} seconds")
+            # Transcribe audio using ElevenLabs
+            logger.info(f"Starting ElevenLabs transcription of file: {audio_source.name}")
+            logger.info(f"File size: {file_size} bytes")
+            stt_start = time.time()
+            
+            # Call ElevenLabs API (or reuse a cached result for identical audio and parameters)
+            stt_phases = {}
+            transcription_result, stt_cache_hit = await transcribe_cached(stt_client, audio_source, phases=stt_phases)
+            timings.update({f"stt_{phase}": value for phase, value in stt_phases.items()})
+            
+            # Release the audio buffer before the CPU and database phases
+            audio_source.close()
+            
+            # Extract words from response - DIRECT PASSTHROUGH, no processing
+            words_data = transcription_result.get('words', [])
+            logger.info(f"About to call extract_raw_words with {len(words_data)} words from ElevenLabs")
+            words = stt_client.extract_raw_words(words_data)  # Direct passthrough
+            logger.info(f"extract_raw_words returned {len(words)} words")
+            logger.info(f"STT raw words count: {len(words_data)}, processed words count: {len(words)}")
+            
+            timings["stt"] = (time.time() - stt_start) * 1000
+            logger.info(f"ElevenLabs transcription completed in {timings['stt']:.2f}ms, {len(words)} words (cache {'hit' if stt_cache_hit else 'miss'})")
+            logger.info(f"Detected language: {transcription_result.get('language_code')}, probability: {transcription_result.get('language_probability')}")
+            
+            if not words:
+                raise Exception("No words detected in audio")
+            
+            # Save STT result with raw words
+            stt_result = await _save_stt_result(session, stt_client, transcription_result, words)
+            await checkpoint(analysis, "transcribe", stt_result_id=str(stt_result.id), timings_ms=timings)
         
-        await analysis.save()
+        if stage_completed(analysis, "align"):
+            aligned = analysis.pipeline["aligned"]
+            logger.info(f"Loaded checkpointed alignment: {len(aligned['word_events'])} word events")
+        else:
+            ref_tokens = _reference_tokens(text)
+            
+            logger.debug(f"Reference tokens: {len(ref_tokens)}, Hypothesis tokens: {len(words)}")
+            logger.debug(f"Raw hyp tokens sample: {[w['word'] for w in words[:5]]}")
+            
+            # Alignment, metrics and pause detection are CPU bound - offload to the pool if we have one
+            aligned = await _run_cpu(cpu_executor, analysis_service.align_transcript, ref_tokens, words, settings.long_pause_ms)
+            ops = aligned["ops"]
+            logger.debug(f"Alignment completed in {aligned['timings_ms']['align']:.2f}ms: {ops['correct']} correct, {ops['substitution']} substitutions, {ops['deletion']} deletions, {ops['insertion']} insertions")
+            logger.debug(f"Pause detection completed in {aligned['timings_ms']['pauses']:.2f}ms, found {len(aligned['pause_events'])} pauses")
+            
+            timings["align"] = aligned["timings_ms"]["align"]
+            timings["pauses"] = aligned["timings_ms"]["pauses"]
+            await checkpoint(analysis, "align", aligned=aligned, timings_ms=timings)
         
-        # Update session status to completed
-        session.status = "completed"
-        session.completed_at = datetime.utcnow()
-        await session.save()
+        await _persist_results(analysis, session, audio, text, aligned, timings, start_time)
         
-        logger.info(f"Analysis {analysis_id} completed successfully in {total_time:.2f}ms")
+        logger.info(f"Analysis {analysis_id} completed successfully in {(time.time() - start_time) * 1000:.2f}ms")
         
     except Exception as e:
+        if isinstance(e, SttRetryableError) and await _reschedule_analysis(analysis_id, e, job or get_current_job()):
+            return
+        
         error_msg = str(e).replace("{", "{{").replace("}", "}}")
         logger.error(f"Analysis {analysis_id} failed: {error_msg}", exc_info=True)
         
-        # Update analysis with error
-        try:
-            analysis = await AnalysisDoc.get(analysis_id)
-            if analysis:
-                analysis.status = "failed"
-                analysis.error = str(e)
-                analysis.finished_at = datetime.utcnow()
-                await analysis.save()
-        except:
-            pass
-        
+        await fail_analysis(analysis_id, str(e))
         raise e
     
     finally:
-        await close_mongo_connection()
-        logger.debug("Database connection closed")
+        if audio_source is not None:
+            audio_source.close()
+        if owns_stt_client and stt_client is not None:
+            await stt_client.aclose()
+
+
+async def fail_analysis(analysis_id: str, error: str):
+    """Mark an analysis failed; never raises, the caller is already handling an error"""
+    try:
+        analysis = await AnalysisDoc.get(analysis_id)
+        if analysis:
+            analysis.status = "failed"
+            analysis.error = error
+            analysis.finished_at = datetime.utcnow()
+            await analysis.save()
+            progress.publish(analysis)
+            await sync_list_view(analysis)
+    except:
+        pass
+
+
+async def _reschedule_analysis(analysis_id: str, error: SttRetryableError, job) -> bool:
+    """
+    Schedule a delayed retry of the analysis job after a transient STT failure
+    
+    Returns:
+        True if a retry was scheduled, False if the analysis should fail
+    """
+    if job is None:
+        return False
+    analysis = await AnalysisDoc.get(analysis_id)
+    if not analysis:
+        return False
+    
+    # Calls our own breaker or rate limit turned away don't use up the attempt budget
+    throttled = isinstance(error, SttUnavailable)
+    attempts = analysis.pipeline.get("stt_attempts", 0) + (0 if throttled else 1)
+    delay = next_retry_delay(error, attempts)
+    if delay is None:
+        logger.error(f"Giving up on STT for analysis {analysis_id} after {attempts} attempts")
+        return False
+    
+    schedule_retry(job, delay)
+    analysis.pipeline["stt_attempts"] = attempts
+    analysis.status = "queued"
+    if throttled:
+        analysis.error = f"STT throttled, retrying in {delay:.0f}s: {str(error)}"
+    else:
+        analysis.error = f"STT attempt {attempts} failed, retrying in {delay:.0f}s: {str(error)}"
+    await analysis.save()
+    progress.publish(analysis)
+    await sync_list_view(analysis)
+    logger.warning(f"Analysis {analysis_id}: {analysis.error}")
+    return True
+
+
+async def _save_stt_result(session, stt_client, transcription_result, words):
+    """Persist raw STT words as SttResultDoc and return it"""
+    stt_result = SttResultDoc(
+        session_id=session.id,
+        provider="elevenlabs",
+        model=settings.elevenlabs_model,
+        language=transcription_result.get('language_code', 'tr'),
+        transcript=stt_client.get_transcript_text(transcription_result),  # Use original transcript
+        words=[{
+            "word": w['word'],
+            "start": w['start'],
+            "end": w['end'],
+            "confidence": w.get('confidence')
+        } for w in words]
+    )
+    await stt_result.insert()
+    logger.info(f"Saved SttResultDoc {stt_result.id}")
+    return stt_result
+
+
+def _reference_tokens(text) -> list:
+    """Reference tokens of a TextDoc"""
+    # Use canonical tokens from TextDoc instead of re-tokenizing
+    # This ensures we use the same tokenization as when the text was saved
+    ref_tokens = text.canonical.tokens if text.canonical and text.canonical.tokens else []
+    if not ref_tokens:
+        # Fallback to tokenizing body if canonical tokens are missing
+        from services.alignment import tokenize_tr
+        ref_tokens = tokenize_tr(text.body)
+        logger.warning("Using fallback tokenization - canonical.tokens was empty")
+    return ref_tokens
+
+
+async def _persist_results(analysis, session, audio, text, aligned, timings, start_time):
+    """
+    Write word/pause events, the analysis summary and session status
+    
+    Args:
+        analysis: AnalysisDoc being processed
+        session: ReadingSessionDoc of the analysis
+        audio: AudioFileDoc of the session
+        text: TextDoc of the session
+        aligned: Output of analysis_service.align_transcript
+        timings: Stage timings in milliseconds
+        start_time: time.time() when the job started
+    """
+    # Plain BSON rows straight from the alignment output - no per-event model validation
+    word_events = persistence.word_event_rows(analysis.id, aligned["word_events"])
+    pause_events = persistence.pause_event_rows(analysis.id, aligned["pause_events"])
+    
+    metrics = aligned["metrics"]
+    logger.info(f"Metrics calculated: WER={metrics['wer']:.3f}, Accuracy={metrics['accuracy']:.1f}%, WPM={aligned['wpm']:.1f}")
+    
+    # Upserts keyed by position, so a retry after a partial write can't duplicate events
+    per_event = settings.event_storage in ("documents", "both")
+    columnar = settings.event_storage in ("columnar", "both")
+    written_words, written_pauses, timings["write_events"] = await persistence.write_events(
+        word_events, pause_events,
+        word_collection=WordEventDoc.get_motor_collection() if per_event else None,
+        pause_collection=PauseEventDoc.get_motor_collection() if per_event else None,
+        columnar_collection=AnalysisEventsDoc.get_motor_collection() if columnar else None
+    )
+    logger.info(f"Saved {written_words} word events and {written_pauses} pause events in {timings['write_events']:.2f}ms")
+    
+    # Update analysis summary - now aggregate from events
+    total_time = (time.time() - start_time) * 1000
+    summary = analysis_service.build_summary(word_events, pause_events, aligned, getattr(text, 'grade', None), settings.long_pause_ms)
+    
+    # Add DEBUG information if enabled
+    if settings.debug:
+        summary["debug"] = {
+            "model": {
+                "name": settings.elevenlabs_model,
+                "provider": "elevenlabs",
+                "language": settings.elevenlabs_language
+            },
+            "timings_ms": {
+                **{name: round(value, 2) for name, value in timings.items()},
+                "total": round(total_time, 2)
+            }
+        }
+    
+    analysis.summary = summary
+    analysis.status = "done"
+    analysis.finished_at = datetime.utcnow()
+    analysis.stage = "persist"
+    
+    # The alignment checkpoint is only needed for resuming, don't keep it on the document
+    analysis.pipeline.pop("aligned", None)
+    analysis.pipeline["events_written"] = {"word_events": written_words, "pause_events": written_pauses}
+    completed = analysis.pipeline.setdefault("completed", [])
+    for stage in ("events", "persist"):
+        if stage not in completed:
+            completed.append(stage)
+    
+    # Set audio duration from AudioFileDoc
+    if audio and audio.duration_sec:
+        analysis.audio_duration_sec = audio.duration_sec
+        logger.info(f"Audio duration set: {audio.duration_sec:.2f} seconds")
+    
+    session.status = "completed"
+    session.completed_at = datetime.utcnow()
+    
+    # The analyses list reads this row only, see services/list_view.py
+    student = None
+    if analysis.student_id:
+        student = await AnalysisDoc.get_motor_collection().database["students"].find_one(
+            {"_id": analysis.student_id}, {"first_name": 1, "last_name": 1}
+        )
+    list_view_row = list_view.list_view_row(analysis, session, text, audio, student)
+    
+    # Analysis summary, session status and list view row in one concurrent round trip
+    write_time = await persistence.write_completion(
+        AnalysisDoc.get_motor_collection(), ReadingSessionDoc.get_motor_collection(),
+        analysis.id, {
+            "summary": analysis.summary,
+            "status": analysis.status,
+            "finished_at": analysis.finished_at,
+            "stage": analysis.stage,
+            "pipeline": analysis.pipeline,
+            "audio_duration_sec": analysis.audio_duration_sec,
+            "error": None
+        },
+        session.id, {
+            "status": session.status,
+            "completed_at": session.completed_at
+        },
+        list_view_collection=_list_view_collection(), list_view_row=list_view_row
+    )
+    logger.debug(f"Analysis summary, session status and list view written in {write_time:.2f}ms")
+    progress.publish(analysis)
 
 
 if __name__ == "__main__":
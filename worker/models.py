@@ -19,6 +19,19 @@ class HashInfo(BaseModel):
     sha256: Optional[str] = None
 
 
+class NormalizedAudioInfo(BaseModel):
+    """Compact mono speech copy of an audio file, uploaded to STT instead of the original"""
+    storage_name: str  # GCS blob name
+    gcs_uri: str
+    content_type: str
+    codec: str  # "opus" or "flac"
+    sample_rate: int
+    channels: int = 1
+    size_bytes: int
+    sha256: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class PrivacyInfo(BaseModel):
     """Privacy and retention information"""
     retention_policy: Optional[str] = None
@@ -75,6 +88,10 @@ class AudioFileDoc(Document):
     # Hash information
     hash: HashInfo = Field(default_factory=HashInfo)
     
+    # Normalized copy for STT (size_bytes above stays the original size)
+    normalized: Optional[NormalizedAudioInfo] = None
+    original_deleted: bool = False  # original blob removed, only the normalized copy is left
+    
     # Privacy and ownership
     privacy: PrivacyInfo = Field(default_factory=PrivacyInfo)
     owner: OwnerInfo = Field(default_factory=OwnerInfo)
@@ -112,6 +129,8 @@ class AnalysisDoc(Document):
     summary: Dict[str, Any] = {}
     error: Optional[str] = None
     audio_duration_sec: Optional[float] = None  # Audio file duration in seconds
+    stage: Optional[Literal["download", "transcribe", "align", "persist"]] = None  # current stage in staged pipeline mode
+    pipeline: Dict[str, Any] = {}  # stage checkpoints for resume (completed, stt_result_id, aligned, events_written, ...)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
     class Settings:
@@ -168,7 +187,7 @@ class WordEventDoc(Document):
             IndexModel([("analysis_id", ASCENDING)], name="word_events_analysis_id_asc"),
             IndexModel([("position", ASCENDING)], name="word_events_position_asc"),
             IndexModel([("type", ASCENDING)], name="word_events_type_asc"),
-            IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc"),
+            IndexModel([("analysis_id", ASCENDING), ("position", ASCENDING)], name="word_events_analysis_position_asc", unique=True),
         ]
 
 print("✅ WordEventDoc model loaded")
@@ -189,6 +208,7 @@ class PauseEventDoc(Document):
         name = "pause_events"
         indexes = [
             IndexModel([("analysis_id", ASCENDING)], name="pause_events_analysis_id_asc"),
+            IndexModel([("analysis_id", ASCENDING), ("after_position", ASCENDING)], name="pause_events_analysis_after_position_asc", unique=True),
             IndexModel([("after_position", ASCENDING)], name="pause_events_after_position_asc"),
             IndexModel([("class_", ASCENDING)], name="pause_events_class_asc"),
             IndexModel([("duration_ms", DESCENDING)], name="pause_events_duration_ms_desc"),
@@ -197,6 +217,26 @@ class PauseEventDoc(Document):
 print("✅ PauseEventDoc model loaded")
 
 
+class AnalysisEventsDoc(Document):
+    """Columnar word/pause events of one analysis (see services/event_columns.py)"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    analysis_id: ObjectId  # reference to AnalysisDoc
+    version: int = 1  # columnar format version
+    strings: List[str] = Field(default_factory=list)  # token / sub_type string table
+    words: Dict[str, Any] = Field(default_factory=dict)  # packed word event columns
+    pauses: Dict[str, Any] = Field(default_factory=dict)  # packed pause event columns
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    class Settings:
+        name = "analysis_events"
+        indexes = [
+            IndexModel([("analysis_id", ASCENDING)], name="analysis_events_analysis_id_asc", unique=True),
+        ]
+
+print("✅ AnalysisEventsDoc model loaded")
+
+
 class WordData(BaseModel):
     """Word data structure for STT results"""
     word: str
@@ -229,4 +269,28 @@ class SttResultDoc(Document):
 print("✅ SttResultDoc model loaded")
 
 
+class SttCacheDoc(Document):
+    """Cached raw STT response keyed by audio hash and model parameters"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    key: str  # sha256 of audio hash + STT parameters
+    audio_sha256: str
+    provider: str
+    params: Dict[str, Any] = Field(default_factory=dict)  # model, language, temperature, seed, flags
+    result: Dict[str, Any] = Field(default_factory=dict)  # raw provider response
+    hits: int = 0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: datetime  # removed by the TTL index
+    
+    class Settings:
+        name = "stt_cache"
+        indexes = [
+            IndexModel([("key", ASCENDING)], name="stt_cache_key_asc", unique=True),
+            IndexModel([("audio_sha256", ASCENDING)], name="stt_cache_audio_sha256_asc"),
+            IndexModel([("expires_at", ASCENDING)], name="stt_cache_expires_at_ttl", expireAfterSeconds=0),
+        ]
+
+print("✅ SttCacheDoc model loaded")
+
+
 print("🎉 All document models loaded successfully")
\ No newline at end of file
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Staged analysis pipeline
+
+Splits analyze_audio into four RQ queues so I/O-heavy and CPU-heavy work
+can be scaled independently:
+
+    analysis-download    store the compact audio copy in GCS
+    analysis-transcribe  ElevenLabs STT, save SttResultDoc
+    analysis-align       alignment, metrics and pause detection
+    analysis-persist     word/pause events, summary, session status
+
+Job state and stage checkpoints live on AnalysisDoc (`stage` + `pipeline`),
+the same checkpoints run_analysis uses. The download stage stores the
+compact copy of the audio in GCS and the transcribe stage reopens it from
+there; audio bytes never go through Redis.
+
+Enable with ANALYSIS_PIPELINE_MODE=staged; main.analyze_audio then only
+enqueues the download stage.
+
+Usage:
+    python pipeline.py workers   # start rq workers for every stage (PIPELINE_WORKERS_* each)
+    python pipeline.py depths    # print per-stage queue depths
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from loguru import logger
+from redis import Redis
+from rq import Queue, Retry, get_current_job
+from rq.registry import StartedJobRegistry
+
+from jobs import (
+    STAGES, create_stt_client, open_audio_source, normalize_audio, checkpoint, stage_completed, sync_list_view,
+    _load_session_docs, _save_stt_result, _reference_tokens, _persist_results, _reschedule_analysis
+)
+from db import connect_to_mongo, close_mongo_connection
+from models import AnalysisDoc, AudioFileDoc, SttResultDoc
+from services import analysis as analysis_service
+from services.elevenlabs_stt import SttClientError, SttRetryableError
+from stt_cache import transcribe_cached
+import progress
+from config import settings
+
+
+STAGE_QUEUES = {stage: f"analysis-{stage}" for stage in STAGES}
+
+# Network stages back off longer; alignment is deterministic so one retry is enough.
+# Retryable STT failures of the transcribe stage are rescheduled by _reschedule_analysis instead.
+STAGE_RETRIES = {
+    "download": Retry(max=3, interval=[5, 15, 30]),
+    "transcribe": Retry(max=3, interval=[10, 30, 60]),
+    "align": Retry(max=1, interval=5),
+    "persist": Retry(max=3, interval=[2, 5, 10]),
+}
+STAGE_TIMEOUTS = {
+    "download": 300,
+    "transcribe": 900,
+    "align": 300,
+    "persist": 300,
+}
+
+def _redis() -> Redis:
+    """Redis connection of the current RQ job, or a new one from settings"""
+    job = get_current_job()
+    if job is not None:
+        return job.connection
+    return Redis.from_url(settings.redis_url or "redis://redis:6379/0")
+
+
+def enqueue_stage(stage: str, analysis_id: str, connection: Redis = None):
+    """Enqueue one pipeline stage for an analysis"""
+    queue = Queue(STAGE_QUEUES[stage], connection=connection or _redis())
+    job = queue.enqueue(
+        f"pipeline.stage_{stage}",
+        analysis_id,
+        retry=STAGE_RETRIES[stage],
+        job_timeout=STAGE_TIMEOUTS[stage]
+    )
+    logger.info(f"Enqueued {stage} stage for analysis {analysis_id} (job {job.id})")
+    return job
+
+
+def start_pipeline(analysis_id: str, connection: Redis = None):
+    """Entry point: start the staged pipeline with the download stage"""
+    return enqueue_stage("download", analysis_id, connection)
+
+
+def queue_depths(connection: Redis = None) -> dict:
+    """Queued/started/scheduled/failed job counts per stage"""
+    connection = connection or _redis()
+    depths = {}
+    for stage in STAGES:
+        queue = Queue(STAGE_QUEUES[stage], connection=connection)
+        depths[stage] = {
+            "queue": queue.name,
+            "queued": queue.count,
+            "started": StartedJobRegistry(queue=queue).count,
+            "scheduled": queue.scheduled_job_registry.count,
+            "failed": queue.failed_job_registry.count
+        }
+    return depths
+
+
+def _record_audio(analysis, audio):
+    """Hand the audio the transcribe stage should upload over on analysis.pipeline"""
+    if audio.normalized:
+        gcs_uri, sha256, size = audio.normalized.gcs_uri, audio.normalized.sha256, audio.normalized.size_bytes
+    else:
+        gcs_uri, sha256, size = audio.gcs_uri, audio.hash.sha256, audio.size_bytes
+    analysis.pipeline["audio_gcs_uri"] = gcs_uri
+    analysis.pipeline["audio_sha256"] = sha256
+    analysis.pipeline["audio_size_bytes"] = size
+
+
+async def _download(analysis):
+    """
+    Make sure the compact copy of the audio is stored in GCS
+
+    Only its location and hash are handed to the transcribe stage, which
+    reopens it from GCS; the audio itself never goes through Redis.
+    """
+    _session, audio, _text = await _load_session_docs(analysis)
+
+    if settings.audio_normalize_enabled and not audio.normalized:
+        source = await asyncio.to_thread(open_audio_source, audio)
+        (await normalize_audio(audio, source)).close()
+        # normalize_audio records the stored copy on the document
+        audio = await AudioFileDoc.get(audio.id)
+    _record_audio(analysis, audio)
+    logger.info(f"Audio for analysis {analysis.id}: {analysis.pipeline['audio_gcs_uri']}")
+
+
+async def _transcribe(analysis):
+    """Run STT on the audio chosen by the download stage and save SttResultDoc"""
+    session, audio, _text = await _load_session_docs(analysis)
+
+    source = await asyncio.to_thread(open_audio_source, audio)
+    # No-op once the copy is stored; local storage or a failed upload transcodes again for this attempt
+    source = await normalize_audio(audio, source)
+    with source:
+        if analysis.pipeline.get("audio_sha256") not in (None, source.sha256):
+            logger.warning(f"Audio of analysis {analysis.id} changed since the download stage")
+        analysis.pipeline["audio_sha256"] = source.sha256
+        stt_client = create_stt_client()
+        try:
+            stt_phases = {}
+            transcription_result, cache_hit = await transcribe_cached(stt_client, source, phases=stt_phases)
+        finally:
+            await stt_client.aclose()
+    analysis.pipeline["stt_cache_hit"] = cache_hit
+    analysis.pipeline.setdefault("timings_ms", {}).update({f"stt_{phase}": value for phase, value in stt_phases.items()})
+
+    words = stt_client.extract_raw_words(transcription_result.get('words', []))
+    if not words:
+        raise Exception("No words detected in audio")
+
+    stt_result = await _save_stt_result(session, stt_client, transcription_result, words)
+    await checkpoint(analysis, "transcribe", stt_result_id=str(stt_result.id))
+
+
+async def _align(analysis):
+    """Align the saved transcript and checkpoint the result for the persist stage"""
+    _session, _audio, text = await _load_session_docs(analysis)
+
+    stt_result = await SttResultDoc.get(analysis.pipeline.get("stt_result_id"))
+    if not stt_result:
+        raise Exception(f"SttResultDoc for analysis {analysis.id} not found")
+
+    words = [w.model_dump() for w in stt_result.words]
+    aligned = analysis_service.align_transcript(_reference_tokens(text), words, settings.long_pause_ms)
+
+    analysis.pipeline["aligned"] = aligned
+    logger.info(f"Aligned analysis {analysis.id}: {len(aligned['word_events'])} word events, {len(aligned['pause_events'])} pauses")
+
+
+async def _persist(analysis):
+    """Write events and the summary from the alignment output"""
+    session, audio, text = await _load_session_docs(analysis)
+
+    aligned = analysis.pipeline.get("aligned")
+    if aligned is None:
+        raise Exception(f"Alignment result for analysis {analysis.id} missing, re-run the align stage")
+
+    # Total is wall-clock since the download stage started, queue waits included
+    started_at = analysis.started_at or datetime.utcnow()
+    start_time = time.time() - (datetime.utcnow() - started_at).total_seconds()
+    timings = dict(analysis.pipeline.get("timings_ms", {}))
+
+    await _persist_results(analysis, session, audio, text, aligned, timings, start_time)
+
+
+STAGE_HANDLERS = {
+    "download": _download,
+    "transcribe": _transcribe,
+    "align": _align,
+    "persist": _persist,
+}
+
+
+async def _run_stage(analysis_id: str, stage: str):
+    """
+    Run one stage, record its state on AnalysisDoc and enqueue the next one
+
+    Args:
+        analysis_id: ID of the analysis document
+        stage: One of STAGES
+    """
+    stage_start = time.time()
+    logger.info(f"Starting {stage} stage for analysis {analysis_id}")
+
+    try:
+        await connect_to_mongo()
+
+        analysis = await AnalysisDoc.get(analysis_id)
+        if not analysis:
+            logger.error(f"Analysis {analysis_id} not found")
+            return
+        if analysis.status == "done":
+            logger.warning(f"Analysis {analysis_id} already done, skipping {stage} stage")
+            return
+
+        analysis.status = "running"
+        analysis.stage = stage
+        if analysis.started_at is None:
+            analysis.started_at = datetime.utcnow()
+        attempts = analysis.pipeline.setdefault("attempts", {})
+        attempts[stage] = attempts.get(stage, 0) + 1
+        await analysis.save()
+        progress.publish(analysis)
+        await sync_list_view(analysis)
+
+        try:
+            if stage_completed(analysis, stage):
+                logger.info(f"{stage} stage already checkpointed for analysis {analysis_id}, skipping")
+            else:
+                await STAGE_HANDLERS[stage](analysis)
+        except Exception as e:
+            job = get_current_job()
+            if isinstance(e, SttRetryableError):
+                # Provider Retry-After, jittered backoff and STT_MAX_ATTEMPTS, like run_analysis
+                if await _reschedule_analysis(analysis_id, e, job):
+                    return
+                if job is not None:
+                    job.retries_left = 0
+            if job is not None and isinstance(e, SttClientError):
+                # A 4xx won't succeed on retry
+                job.retries_left = 0
+            if job is not None and job.retries_left:
+                logger.warning(f"{stage} stage failed for analysis {analysis_id}, {job.retries_left} retries left: {str(e)}")
+            else:
+                logger.error(f"{stage} stage failed for analysis {analysis_id}: {str(e)}")
+                analysis.status = "failed"
+                analysis.error = f"{stage}: {str(e)}"
+                analysis.finished_at = datetime.utcnow()
+                await analysis.save()
+                progress.publish(analysis)
+                await sync_list_view(analysis)
+            raise
+
+        stage_time = (time.time() - stage_start) * 1000
+        logger.info(f"{stage} stage for analysis {analysis_id} completed in {stage_time:.2f}ms")
+
+        if stage != "persist":
+            analysis.pipeline.setdefault("timings_ms", {})[stage] = round(stage_time, 2)
+            await checkpoint(analysis, stage)
+            enqueue_stage(STAGES[STAGES.index(stage) + 1], analysis_id)
+
+    finally:
+        await close_mongo_connection()
+
+
+def stage_download(analysis_id: str):
+    """RQ entry point for the download stage"""
+    return asyncio.run(_run_stage(analysis_id, "download"))
+
+
+def stage_transcribe(analysis_id: str):
+    """RQ entry point for the transcribe stage"""
+    return asyncio.run(_run_stage(analysis_id, "transcribe"))
+
+
+def stage_align(analysis_id: str):
+    """RQ entry point for the align stage"""
+    return asyncio.run(_run_stage(analysis_id, "align"))
+
+
+def stage_persist(analysis_id: str):
+    """RQ entry point for the persist stage"""
+    return asyncio.run(_run_stage(analysis_id, "persist"))
+
+
+def run_stage_workers():
+    """Start PIPELINE_WORKERS_<STAGE> rq workers per stage queue and wait for them"""
+    redis_url = settings.redis_url or "redis://redis:6379/0"
+    processes = []
+    for stage in STAGES:
+        count = getattr(settings, f"pipeline_workers_{stage}")
+        # All workers preload before dequeueing; transcribe workers also pause while the STT breaker is open
+        worker_class = ["-w", "stt_limits.SttAwareWorker" if stage == "transcribe" else "warmup.WarmWorker"]
+        for _ in range(count):
+            processes.append(subprocess.Popen(
+                ["rq", "worker", "-u", redis_url, *worker_class, "--with-scheduler", STAGE_QUEUES[stage]],
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            ))
+        logger.info(f"Started {count} worker(s) for {STAGE_QUEUES[stage]}")
+
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "depths"
+    if command == "workers":
+        run_stage_workers()
+    else:
+        print(json.dumps(queue_depths(), indent=2))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Analysis progress events over Redis pub/sub
+
+Every status or stage change of an analysis is published as JSON on the
+channel `analysis:progress:<analysis_id>`:
+
+    {"analysis_id", "status", "stage", "percent", "started_at", "finished_at", "error", "at"}
+
+The backend fans these out to clients on GET /v1/upload/status/{id}/events
+(Server-Sent Events), so browsers stop polling Mongo. The latest event is
+also kept under `analysis:progress:last:<analysis_id>` for
+PROGRESS_EVENT_TTL_SEC, so a client that connects mid-analysis gets the
+current state without a database read.
+
+Publishing is best effort: a Redis outage never fails an analysis, clients
+then fall back to polling the status endpoint.
+
+Usage:
+    python progress.py watch <analysis_id>   # print the events of one analysis
+"""
+
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict
+from loguru import logger
+from redis import Redis
+
+from config import settings
+
+
+CHANNEL_PREFIX = "analysis:progress:"
+LAST_KEY_PREFIX = "analysis:progress:last:"
+FINAL_STATUSES = ("done", "failed")
+
+# Progress once a stage is checkpointed; STT dominates the runtime
+STAGE_PERCENT = {"download": 15, "transcribe": 75, "align": 90, "persist": 100}
+
+_redis_client = None
+
+
+def _redis() -> Redis:
+    """Shared Redis connection for progress events"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.redis_url or "redis://redis:6379/0")
+    return _redis_client
+
+
+def progress_percent(analysis) -> int:
+    """Percent done from the checkpointed stages of an analysis"""
+    if analysis.status == "done":
+        return 100
+    completed = analysis.pipeline.get("completed", [])
+    return max([STAGE_PERCENT[stage] for stage in completed if stage in STAGE_PERCENT] + [0])
+
+
+def progress_event(analysis) -> Dict[str, Any]:
+    """Progress event of an AnalysisDoc"""
+    return {
+        "analysis_id": str(analysis.id),
+        "status": analysis.status,
+        "stage": analysis.stage,
+        "percent": progress_percent(analysis),
+        "started_at": analysis.started_at.isoformat() if analysis.started_at else None,
+        "finished_at": analysis.finished_at.isoformat() if analysis.finished_at else None,
+        "error": analysis.error,
+        "at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def publish(analysis, redis: Redis = None):
+    """Publish the current state of an analysis; never raises"""
+    if not settings.progress_events_enabled:
+        return
+    event = progress_event(analysis)
+    payload = json.dumps(event)
+    try:
+        pipe = (redis or _redis()).pipeline(transaction=False)
+        pipe.set(LAST_KEY_PREFIX + event["analysis_id"], payload, ex=settings.progress_event_ttl_sec)
+        pipe.publish(CHANNEL_PREFIX + event["analysis_id"], payload)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not publish progress of analysis {event['analysis_id']}: {str(e)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "watch":
+        print(__doc__)
+        sys.exit(1)
+
+    pubsub = _redis().pubsub()
+    pubsub.subscribe(CHANNEL_PREFIX + sys.argv[2])
+    last = _redis().get(LAST_KEY_PREFIX + sys.argv[2])
+    if last:
+        print(last.decode())
+    for message in pubsub.listen():
+        if message["type"] != "message":
+            continue
+        print(message["data"].decode())
+        if json.loads(message["data"])["status"] in FINAL_STATUSES:
+            break
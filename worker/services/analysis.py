@@ -0,0 +1,127 @@
+"""
+CPU-bound analysis step: alignment, metrics and pause detection
+
+Everything in here works on plain lists/dicts so it can be shipped to a
+process pool by the async worker without touching the database.
+"""
+import time
+from typing import Dict, Any, List
+
+from . import alignment
+from . import pauses
+from . import scoring
+from . import persistence
+
+
+def align_transcript(ref_tokens: List[str], words: List[Dict[str, Any]], long_pause_ms: int) -> Dict[str, Any]:
+    """
+    Align STT words against the reference tokens and compute metrics
+
+    Args:
+        ref_tokens: Canonical reference tokens of the text
+        words: Raw STT words with 'word', 'start', 'end' keys (seconds)
+        long_pause_ms: Pause threshold in milliseconds
+
+    Returns:
+        Dictionary with word_events, pause_events, op counts, metrics, wpm and timings
+    """
+    align_start = time.time()
+
+    # Use raw words directly - NO TOKENIZATION of hypothesis
+    hyp_tokens = [w['word'] for w in words]
+    alignment_result = alignment.levenshtein_align(ref_tokens, hyp_tokens)
+
+    # Count alignment results
+    subs = sum(1 for a in alignment_result if a[0] == "replace")
+    dels = sum(1 for a in alignment_result if a[0] == "delete")
+    ins = sum(1 for a in alignment_result if a[0] == "insert")
+    correct = sum(1 for a in alignment_result if a[0] == "equal")
+
+    # Build word events from alignment
+    word_events = alignment.build_word_events(alignment_result, words)
+    align_time = (time.time() - align_start) * 1000
+
+    # Calculate metrics
+    first_ms = words[0]['start'] * 1000 if words else 0
+    last_ms = words[-1]['end'] * 1000 if words else 0
+    metrics = scoring.compute_metrics(len(ref_tokens), subs, dels, ins)
+    wpm = scoring.compute_wpm(len(hyp_tokens), first_ms, last_ms)
+
+    # Detect pauses
+    pause_start = time.time()
+    pause_events = pauses.detect_pauses(words, long_pause_ms)
+    pause_time = (time.time() - pause_start) * 1000
+
+    return {
+        "word_events": word_events,
+        "pause_events": pause_events,
+        "ops": {"correct": correct, "substitution": subs, "deletion": dels, "insertion": ins},
+        "metrics": metrics,
+        "wpm": wpm,
+        "ref_count": len(ref_tokens),
+        "hyp_count": len(hyp_tokens),
+        "timings_ms": {
+            "align": align_time,
+            "pauses": pause_time
+        }
+    }
+
+
+def build_summary(word_rows: List[Dict[str, Any]], pause_rows: List[Dict[str, Any]], aligned: Dict[str, Any],
+                  text_grade: int, long_pause_ms: int) -> Dict[str, Any]:
+    """
+    AnalysisDoc.summary from the persisted event rows and the alignment output
+
+    Args:
+        word_rows: persistence.word_event_rows output
+        pause_rows: persistence.pause_event_rows output
+        aligned: align_transcript output
+        text_grade: TextDoc.grade (missing grades score as grade 1)
+        long_pause_ms: Pause threshold in milliseconds
+    """
+    metrics = aligned["metrics"]
+
+    # Aggregate counts from the word events, plus pause counts
+    counts = scoring.recompute_counts(word_rows)
+    counts["uzun_duraksama"] = len(pause_rows)
+
+    # Compute grade-based scoring
+    grade_score = scoring.compute_grade_score(text_grade or 1, counts, aligned["ref_count"])
+
+    return {
+        "counts": counts,
+        "wer": metrics["wer"],
+        "accuracy": metrics["accuracy"],
+        "wpm": aligned["wpm"],
+        "grade_score": grade_score,  # Add grade-based scoring
+        "long_pauses": {
+            "count": len(pause_rows),
+            "threshold_ms": long_pause_ms
+        },
+        "error_types": {
+            "missing": counts.get("missing", 0),
+            "extra": counts.get("extra", 0),
+            "substitution": counts.get("substitution", 0),  # Use "substitution" instead of "diff"
+            "repetition": counts.get("repetition", 0),
+            "pause_long": len(pause_rows)
+        }
+    }
+
+
+def reanalyze(analysis_id, ref_tokens: List[str], words: List[Dict[str, Any]], long_pause_ms: int,
+              text_grade: int) -> Dict[str, Any]:
+    """
+    Alignment, event rows and summary of one stored analysis, for bulk recomputes
+
+    Returns:
+        {"word_rows", "pause_rows", "summary", "ops"}
+    """
+    aligned = align_transcript(ref_tokens, words, long_pause_ms)
+    word_rows = persistence.word_event_rows(analysis_id, aligned["word_events"])
+    pause_rows = persistence.pause_event_rows(analysis_id, aligned["pause_events"])
+    return {
+        "word_rows": word_rows,
+        "pause_rows": pause_rows,
+        "summary": build_summary(word_rows, pause_rows, aligned, text_grade, long_pause_ms),
+        "ops": aligned["ops"]
+    }
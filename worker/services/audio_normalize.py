@@ -0,0 +1,186 @@
+"""
+Audio normalization before STT
+
+Phone recordings arrive as large stereo m4a/wav files. Speech recognition
+only needs mono 16 kHz, so the worker transcodes them once with ffmpeg into
+a compact speech format, stores that copy next to the original in GCS and
+uploads it to the STT provider instead of the original:
+
+    opus  Ogg/Opus, VoIP tuned, ~24 kbit/s (default, smallest)
+    flac  lossless FLAC, for providers or debugging needing exact samples
+
+ffmpeg reads the input from a file because m4a files written by phones keep
+their index (moov atom) at the end, which a pipe can't seek to. The output
+is streamed from ffmpeg's stdout into a new AudioSource.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from loguru import logger
+
+from .audio_source import AudioSource
+
+
+FORMATS = {
+    "opus": {
+        "extension": ".ogg",
+        "content_type": "audio/ogg",
+        "codec_args": ["-c:a", "libopus", "-b:a", "{bitrate}", "-application", "voip", "-f", "ogg"],
+    },
+    "flac": {
+        "extension": ".flac",
+        "content_type": "audio/flac",
+        "codec_args": ["-c:a", "flac", "-compression_level", "8", "-f", "flac"],
+    },
+}
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class TranscodeError(Exception):
+    """ffmpeg is missing or could not decode the input"""
+
+
+def ffmpeg_available() -> bool:
+    """True if an ffmpeg binary is on PATH"""
+    return shutil.which("ffmpeg") is not None
+
+
+def ffmpeg_command(input_path: str, fmt: str = "opus", sample_rate: int = 16000, bitrate: str = "24k") -> List[str]:
+    """
+    ffmpeg arguments transcoding `input_path` to mono speech audio on stdout
+
+    Args:
+        input_path: Local audio file
+        fmt: Key of FORMATS
+        sample_rate: Output sample rate in Hz
+        bitrate: Target bitrate (opus only)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown audio format: {fmt} (expected one of {', '.join(FORMATS)})")
+    codec_args = [arg.format(bitrate=bitrate) for arg in FORMATS[fmt]["codec_args"]]
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-i", input_path,
+        "-vn", "-map_metadata", "-1",  # drop cover art/video streams and metadata
+        "-ac", "1", "-ar", str(sample_rate),
+        *codec_args,
+        # No encoder version tags or random Ogg stream serials: the same input
+        # always gives the same bytes, so the SHA-256 keying the STT cache is stable
+        "-fflags", "+bitexact", "-flags:a", "+bitexact",
+        "pipe:1"
+    ]
+
+
+def normalized_blob_name(storage_name: str, fmt: str = "opus", sample_rate: int = 16000) -> str:
+    """GCS blob name of the normalized copy, next to the original"""
+    root, _ext = os.path.splitext(storage_name)
+    return f"{root}.{sample_rate // 1000}k{FORMATS[fmt]['extension']}"
+
+
+@contextmanager
+def _input_path(source: AudioSource, scratch_dir: Optional[str]):
+    """Local path of the source, copying in-memory audio to a scratch file"""
+    if source.path is not None:
+        yield source.path
+        return
+
+    scratch_dir = scratch_dir or tempfile.gettempdir()
+    os.makedirs(scratch_dir, exist_ok=True)
+    suffix = os.path.splitext(source.name)[1] or ".audio"
+    with tempfile.NamedTemporaryFile(dir=scratch_dir, prefix="transcode-", suffix=suffix) as f:
+        with source.open() as audio:
+            shutil.copyfileobj(audio, f, READ_CHUNK_BYTES)
+        f.flush()
+        yield f.name
+
+
+async def transcode(source: AudioSource, fmt: str = "opus", sample_rate: int = 16000, bitrate: str = "24k",
+                    scratch_dir: Optional[str] = None, max_memory_bytes: Optional[int] = None,
+                    timeout_sec: float = 300) -> AudioSource:
+    """
+    Transcode an AudioSource to mono speech audio without blocking the loop
+
+    Args:
+        source: Original audio
+        fmt: "opus" or "flac"
+        sample_rate: Output sample rate in Hz
+        bitrate: Target bitrate (opus only)
+        scratch_dir: Directory for the temporary input file and output spill
+        max_memory_bytes: Output kept in memory up to this size
+        timeout_sec: ffmpeg is killed after this long
+
+    Returns:
+        New AudioSource with the transcoded audio (caller closes it)
+
+    Raises:
+        TranscodeError: ffmpeg missing, failed or produced no output
+    """
+    if not ffmpeg_available():
+        raise TranscodeError("ffmpeg not found on PATH")
+
+    root, _ext = os.path.splitext(source.name)
+    kwargs = {"content_type": FORMATS[fmt]["content_type"], "scratch_dir": scratch_dir}
+    if max_memory_bytes:
+        kwargs["max_memory_bytes"] = max_memory_bytes
+    output = AudioSource(f"{root}{FORMATS[fmt]['extension']}", **kwargs)
+
+    try:
+        with _input_path(source, scratch_dir) as input_path:
+            process = await asyncio.create_subprocess_exec(
+                *ffmpeg_command(input_path, fmt, sample_rate, bitrate),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+
+            async def pump():
+                while True:
+                    chunk = await process.stdout.read(READ_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    output.write(chunk)
+
+            try:
+                _, stderr = await asyncio.wait_for(
+                    asyncio.gather(pump(), process.stderr.read()), timeout=timeout_sec
+                )
+                await process.wait()
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise TranscodeError(f"ffmpeg timed out after {timeout_sec}s")
+
+        if process.returncode != 0 or output.size == 0:
+            message = stderr.decode("utf-8", "replace").strip()[-500:]
+            raise TranscodeError(f"ffmpeg exited with {process.returncode}: {message}")
+    except Exception:
+        output.close()
+        raise
+
+    return output
+
+
+async def normalize(source: AudioSource, fmt: str = "opus", sample_rate: int = 16000, bitrate: str = "24k",
+                    scratch_dir: Optional[str] = None, max_memory_bytes: Optional[int] = None) -> Dict:
+    """
+    transcode() plus size/timing report
+
+    Returns:
+        {"source": AudioSource, "original_bytes", "normalized_bytes", "ratio", "transcode_ms"}
+    """
+    start = time.time()
+    output = await transcode(source, fmt, sample_rate, bitrate, scratch_dir, max_memory_bytes)
+    transcode_ms = (time.time() - start) * 1000
+    ratio = output.size / source.size if source.size else 0.0
+    logger.info(f"Normalized {source.name}: {source.size} -> {output.size} bytes ({ratio:.1%}) as {fmt} {sample_rate} Hz mono in {transcode_ms:.0f}ms")
+    return {
+        "source": output,
+        "original_bytes": source.size,
+        "normalized_bytes": output.size,
+        "ratio": round(ratio, 4),
+        "transcode_ms": round(transcode_ms, 2)
+    }
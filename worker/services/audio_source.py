@@ -0,0 +1,220 @@
+"""
+Audio source abstraction for the STT upload path
+
+Audio is kept in memory up to `max_memory_bytes` and only spills to a file in
+a managed scratch directory for large recordings. The spill file is deleted
+when the source is closed, so nothing is left behind on the worker volume.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import time
+from typing import Optional
+from loguru import logger
+
+
+DEFAULT_MAX_MEMORY_BYTES = 32 * 1024 * 1024  # 32 MB
+DEFAULT_CONTENT_TYPE = "audio/mp4"
+
+
+def default_scratch_dir() -> str:
+    """Scratch directory used when AUDIO_SCRATCH_DIR is not configured"""
+    return os.path.join(tempfile.gettempdir(), "okuma-audio")
+
+
+def cleanup_scratch_dir(scratch_dir: str, max_age_sec: int = 3600) -> int:
+    """
+    Remove leftover spill files (e.g. from a killed worker)
+
+    Args:
+        scratch_dir: Managed scratch directory
+        max_age_sec: Only files older than this are removed
+
+    Returns:
+        Number of removed files
+    """
+    if not os.path.isdir(scratch_dir):
+        return 0
+
+    removed = 0
+    cutoff = time.time() - max_age_sec
+    for entry in os.scandir(scratch_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove scratch file {entry.path}: {e}")
+
+    if removed:
+        logger.info(f"Removed {removed} stale audio scratch files from {scratch_dir}")
+    return removed
+
+
+class AudioSource:
+    """
+    Readable audio payload with name, content type, size and SHA-256
+
+    Write chunks with write() (or use one of the constructors), then call
+    open() to get a binary file object positioned at the start. open() can be
+    called again for every upload retry.
+    """
+
+    def __init__(self, name: str, content_type: str = DEFAULT_CONTENT_TYPE,
+                 max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES, scratch_dir: Optional[str] = None):
+        self.name = name
+        self.content_type = content_type
+        self.size = 0
+        self._path = None
+        self._path_hashed = False
+        self._sha256 = hashlib.sha256()
+
+        scratch_dir = scratch_dir or default_scratch_dir()
+        os.makedirs(scratch_dir, exist_ok=True)
+        self._buffer = tempfile.SpooledTemporaryFile(
+            max_size=max_memory_bytes, dir=scratch_dir, prefix="audio-"
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, name: str = "audio.mp3", **kwargs) -> "AudioSource":
+        """Source backed by bytes already in memory"""
+        source = cls(name, **kwargs)
+        source.write(data)
+        return source
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> "AudioSource":
+        """Source reading an existing local file in place (the file is not copied or deleted)"""
+        source = cls(os.path.basename(path), **kwargs)
+        source._buffer.close()
+        source._buffer = None
+        source._path = path
+        source.size = os.path.getsize(path)
+        return source
+
+    @classmethod
+    def from_gcs(cls, gcs_uri: str, client=None, **kwargs) -> "AudioSource":
+        """
+        Stream a gs:// blob into a new source (blocking, run it in a thread)
+
+        Args:
+            gcs_uri: gs://bucket/path URI
+            client: Optional google.cloud.storage.Client to reuse
+        """
+        if client is None:
+            from google.cloud import storage
+            client = storage.Client()
+
+        bucket_name = gcs_uri.split('/')[2]
+        blob_name = '/'.join(gcs_uri.split('/')[3:])
+
+        source = cls(os.path.basename(blob_name), **kwargs)
+        try:
+            client.bucket(bucket_name).blob(blob_name).download_to_file(source)
+        except Exception:
+            source.close()
+            raise
+        return source
+
+    def upload_to_gcs(self, gcs_uri: str, client=None):
+        """
+        Upload the content to a gs:// blob (blocking, run it in a thread)
+
+        Args:
+            gcs_uri: gs://bucket/path URI
+            client: Optional google.cloud.storage.Client to reuse
+        """
+        if client is None:
+            from google.cloud import storage
+            client = storage.Client()
+
+        bucket_name = gcs_uri.split('/')[2]
+        blob_name = '/'.join(gcs_uri.split('/')[3:])
+        with self.open() as f:
+            client.bucket(bucket_name).blob(blob_name).upload_from_file(
+                f, size=self.size, content_type=self.content_type
+            )
+
+    @property
+    def path(self) -> Optional[str]:
+        """Local file path when the source reads a file in place, otherwise None"""
+        return self._path
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the content (computed on demand for local files)"""
+        if self._path is not None and not self._path_hashed:
+            with open(self._path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    self._sha256.update(chunk)
+            self._path_hashed = True
+        return self._sha256.hexdigest()
+
+    @property
+    def spilled(self) -> bool:
+        """True if the content was written to the scratch directory"""
+        return self._buffer is not None and bool(getattr(self._buffer, "_rolled", False))
+
+    def write(self, chunk: bytes) -> int:
+        """Append a chunk (file-like interface for download_to_file)"""
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        return self._buffer.write(chunk)
+
+    def open(self):
+        """Binary file object positioned at the start of the audio"""
+        if self._path is not None:
+            return open(self._path, 'rb')
+        self._buffer.seek(0)
+        return _Unclosable(self._buffer)
+
+    def read(self) -> bytes:
+        """Whole content as bytes"""
+        with self.open() as f:
+            return f.read()
+
+    def close(self):
+        """Release memory and delete any spill file"""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _Unclosable:
+    """
+    File proxy around the spooled buffer
+
+    close() is a no-op so HTTP clients don't close the shared buffer, and
+    fileno() is refused while the data is in memory because
+    SpooledTemporaryFile.fileno() would otherwise roll it over to disk.
+    """
+
+    def __init__(self, f):
+        self._f = f
+
+    def fileno(self):
+        if not getattr(self._f, "_rolled", False):
+            raise io.UnsupportedOperation("fileno")
+        return self._f.fileno()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def close(self):
+        pass
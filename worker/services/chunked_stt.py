@@ -0,0 +1,298 @@
+"""
+Chunked transcription of long recordings
+
+Long readings are split at silences into chunks of at most max_chunk_sec,
+the chunks are transcribed concurrently and the word timestamps are
+stitched back together with each chunk's offset.
+
+    silencedetect  ffmpeg finds silent stretches (noise_db, min_silence_sec)
+    plan_chunks    cut at the longest silence in the second half of every
+                   max_chunk_sec window, hard cut if there is none
+    extract        every chunk is cut with overlap_sec of extra audio on
+                   both sides, so a word on a hard cut is heard completely
+    stitch         a chunk only keeps words whose midpoint lies between its
+                   own cuts; the same word heard by both neighbours at a
+                   join is dropped once more by text + time
+
+The stitched result has the provider response shape (text, words with
+word/spacing entries, language_code), so extract_raw_words works unchanged.
+"""
+import asyncio
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .audio_source import AudioSource
+from .audio_normalize import FORMATS, TranscodeError, ffmpeg_available, ffmpeg_command, _input_path
+
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+_PROGRESS_TIME = re.compile(r"time=(\d+):(\d+):([\d.]+)")
+
+# Words closer than this across a join are the same word heard twice
+DEDUP_TOLERANCE_SEC = 0.3
+
+
+@dataclass
+class Chunk:
+    """One piece of the recording; [start, end) is cut, [own_start, own_end) is kept"""
+    index: int
+    start: float
+    end: float
+    own_start: float
+    own_end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _seconds(match) -> float:
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_silencedetect(stderr: str) -> Tuple[List[Tuple[float, float]], Optional[float]]:
+    """
+    Silences and total duration from `ffmpeg -af silencedetect` output
+
+    Returns:
+        ([(silence_start, silence_end), ...], duration in seconds or None)
+    """
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+
+    duration = None
+    match = _DURATION.search(stderr)
+    if match:
+        duration = _seconds(match)
+    else:
+        # Containers without a duration header: use the last progress time
+        times = list(_PROGRESS_TIME.finditer(stderr))
+        if times:
+            duration = _seconds(times[-1])
+
+    # A recording ending in silence has a silence_start without an end
+    if start is not None and duration is not None and duration > start:
+        silences.append((start, duration))
+    return silences, duration
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], max_chunk_sec: float,
+                overlap_sec: float = 0.5) -> List[Chunk]:
+    """
+    Chunk boundaries for a recording
+
+    Every cut lies in the second half of a max_chunk_sec window, at the
+    middle of the longest silence there; without a silence the window is cut
+    hard at max_chunk_sec and the overlap keeps the cut word intact.
+
+    Args:
+        duration: Recording length in seconds
+        silences: (start, end) pairs from parse_silencedetect
+        max_chunk_sec: Upper bound of the owned part of a chunk
+        overlap_sec: Extra audio on both sides of every cut
+    """
+    cuts = []
+    position = 0.0
+    while duration - position > max_chunk_sec:
+        low, high = position + max_chunk_sec / 2, position + max_chunk_sec
+        candidates = [(end - start, (start + end) / 2) for start, end in silences if low <= (start + end) / 2 <= high]
+        cut = max(candidates)[1] if candidates else high
+        cuts.append(cut)
+        position = cut
+
+    bounds = [0.0] + cuts + [duration]
+    chunks = []
+    for i in range(len(bounds) - 1):
+        chunks.append(Chunk(
+            index=i,
+            start=max(0.0, bounds[i] - overlap_sec),
+            end=min(duration, bounds[i + 1] + overlap_sec),
+            # Timestamps at the very ends may fall slightly outside the recording
+            own_start=bounds[i] if i > 0 else -math.inf,
+            own_end=bounds[i + 1] if i < len(bounds) - 2 else math.inf
+        ))
+    return chunks
+
+
+def _same_word(a: str, b: str) -> bool:
+    def fold(text):
+        text = unicodedata.normalize("NFC", text).casefold()
+        return "".join(ch for ch in text if ch.isalnum())
+    return fold(a) == fold(b)
+
+
+def stitch(chunk_results: List[Tuple[Chunk, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    One provider-shaped result from per-chunk results
+
+    Args:
+        chunk_results: (chunk, provider response) pairs in any order
+
+    Returns:
+        {"language_code", "language_probability", "text", "words", "chunks"}
+    """
+    words = []
+    chunks_info = []
+    languages = []
+    for chunk, result in sorted(chunk_results, key=lambda pair: pair[0].index):
+        kept = []
+        for entry in result.get("words", []):
+            start = float(entry.get("start", 0.0)) + chunk.start
+            end = float(entry.get("end", entry.get("start", 0.0))) + chunk.start
+            if chunk.own_start <= (start + end) / 2 < chunk.own_end:
+                kept.append({**entry, "start": round(start, 3), "end": round(end, 3)})
+
+        # Spacing only between words of this chunk; joins get their own
+        while kept and kept[0].get("type") != "word":
+            kept.pop(0)
+        while kept and kept[-1].get("type") != "word":
+            kept.pop()
+
+        previous = next((entry for entry in reversed(words) if entry.get("type") == "word"), None)
+        while kept and previous is not None and _same_word(kept[0].get("text", ""), previous.get("text", "")) \
+                and kept[0]["start"] < previous["end"] + DEDUP_TOLERANCE_SEC:
+            logger.debug(f"Dropping duplicate word '{kept[0].get('text')}' at chunk {chunk.index} boundary")
+            kept.pop(0)
+            while kept and kept[0].get("type") != "word":
+                kept.pop(0)
+
+        if words and kept:
+            words.append({"type": "spacing", "text": " ", "start": words[-1]["end"], "end": kept[0]["start"]})
+        words.extend(kept)
+
+        chunks_info.append({
+            "index": chunk.index, "start": round(chunk.start, 3), "end": round(chunk.end, 3),
+            "words": sum(1 for entry in kept if entry.get("type") == "word")
+        })
+        if result.get("language_code"):
+            languages.append((result.get("language_code"), result.get("language_probability")))
+
+    probabilities = [p for _, p in languages if p is not None]
+    return {
+        "language_code": languages[0][0] if languages else None,
+        "language_probability": sum(probabilities) / len(probabilities) if probabilities else None,
+        "text": "".join(entry.get("text", "") for entry in words),
+        "words": words,
+        "chunks": chunks_info
+    }
+
+
+async def _run_ffmpeg(args: List[str], collect_stdout: Optional[AudioSource] = None) -> str:
+    """Run ffmpeg, streaming stdout into an AudioSource; returns stderr"""
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+
+    async def pump():
+        while True:
+            chunk = await process.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            if collect_stdout is not None:
+                collect_stdout.write(chunk)
+
+    _, stderr = await asyncio.gather(pump(), process.stderr.read())
+    await process.wait()
+    stderr = stderr.decode("utf-8", "replace")
+    if process.returncode != 0:
+        raise TranscodeError(f"ffmpeg exited with {process.returncode}: {stderr.strip()[-500:]}")
+    return stderr
+
+
+async def detect_silences(input_path: str, noise_db: float = -35.0,
+                          min_silence_sec: float = 0.3) -> Tuple[List[Tuple[float, float]], Optional[float]]:
+    """Silences and duration of a local audio file"""
+    stderr = await _run_ffmpeg([
+        "ffmpeg", "-hide_banner", "-nostdin", "-i", input_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence_sec}",
+        "-f", "null", "-"
+    ])
+    return parse_silencedetect(stderr)
+
+
+async def extract_chunk(input_path: str, chunk: Chunk, name: str, fmt: str = "opus", sample_rate: int = 16000,
+                        bitrate: str = "24k", scratch_dir: Optional[str] = None) -> AudioSource:
+    """Cut [chunk.start, chunk.end) as mono speech audio"""
+    command = ffmpeg_command(input_path, fmt, sample_rate, bitrate)
+    # Seek before -i (fast), then limit the duration
+    input_index = command.index("-i")
+    command[input_index:input_index] = ["-ss", f"{chunk.start:.3f}", "-t", f"{chunk.duration:.3f}"]
+
+    root, _ext = os.path.splitext(name)
+    output = AudioSource(
+        f"{root}.part{chunk.index:03d}{FORMATS[fmt]['extension']}",
+        content_type=FORMATS[fmt]["content_type"], scratch_dir=scratch_dir
+    )
+    try:
+        await _run_ffmpeg(command, collect_stdout=output)
+    except Exception:
+        output.close()
+        raise
+    return output
+
+
+async def transcribe_chunked(source: AudioSource, transcribe: Callable[[AudioSource], Awaitable[Dict[str, Any]]],
+                             max_chunk_sec: float = 60.0, min_audio_sec: float = 180.0, overlap_sec: float = 0.5,
+                             concurrency: int = 4, fmt: str = "opus", sample_rate: int = 16000,
+                             bitrate: str = "24k", noise_db: float = -35.0, min_silence_sec: float = 0.3,
+                             scratch_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Transcribe a long recording as concurrently transcribed chunks
+
+    Args:
+        source: Whole recording
+        transcribe: Coroutine function sending one chunk to STT
+        max_chunk_sec: Upper bound of a chunk's owned duration
+        min_audio_sec: Recordings up to this long are not chunked
+        overlap_sec: Extra audio on both sides of every cut
+        concurrency: Chunks transcribed at the same time
+
+    Returns:
+        Stitched provider-shaped result, or None if the recording is too
+        short to split (the caller then sends it in one request)
+
+    Raises:
+        TranscodeError: ffmpeg missing or failed
+        Whatever `transcribe` raises for a chunk
+    """
+    if not ffmpeg_available():
+        raise TranscodeError("ffmpeg not found on PATH")
+
+    with _input_path(source, scratch_dir) as input_path:
+        silences, duration = await detect_silences(input_path, noise_db, min_silence_sec)
+        if duration is None:
+            raise TranscodeError(f"Could not determine the duration of {source.name}")
+        if duration <= max(min_audio_sec, max_chunk_sec):
+            return None
+
+        chunks = plan_chunks(duration, silences, max_chunk_sec, overlap_sec)
+        logger.info(f"Splitting {source.name} ({duration:.1f}s, {len(silences)} silences) into {len(chunks)} chunks: "
+                    f"{[round(chunk.own_end, 1) for chunk in chunks[:-1]]}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(chunk: Chunk):
+            async with semaphore:
+                with await extract_chunk(input_path, chunk, source.name, fmt, sample_rate, bitrate, scratch_dir) as part:
+                    return chunk, await transcribe(part)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+    return stitch(results)
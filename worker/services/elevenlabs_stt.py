@@ -1,20 +1,117 @@
 """
 ElevenLabs Speech-to-Text API integration
+
+The client keeps pooled keep-alive connections (httpx.Client for sync
+calls, httpx.AsyncClient for async calls), so consecutive transcriptions
+from one process reuse the TCP+TLS connection. Multipart bodies are
+streamed from the audio file handle in chunks instead of being built in
+memory.
 """
 from random import seed
-import requests
+import asyncio
+import hashlib
+import json
 import tempfile
 import os
 import time
+import httpx
 from typing import Dict, List, Any, Optional
 from loguru import logger
 
+from .audio_source import AudioSource
+
+
+class SttError(Exception):
+    """Transcription failure"""
+    retryable = False
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class SttClientError(SttError):
+    """4xx other than 429 (bad audio, bad key, quota) - never retried"""
+
+
+class SttRetryableError(SttError):
+    """Transient failure (429, 5xx, timeout); retry_after is a hint in seconds"""
+    retryable = True
+
+
+class SttRateLimited(SttRetryableError):
+    """429 from the provider"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, status_code=429, retry_after=retry_after)
+
+
+class SttUnavailable(SttRetryableError):
+    """Call not attempted: circuit breaker open or shared rate limit exhausted"""
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)"""
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _PhaseTrace:
+    """
+    httpcore trace hook splitting a request into phases
+    
+        connect   TCP connect + TLS handshake (0 on a reused connection)
+        upload    request headers and multipart body sent
+        server    body sent -> response headers received
+        download  response body received
+    """
+    
+    def __init__(self):
+        self.events = {}
+    
+    def __call__(self, name: str, info: Dict[str, Any]):
+        # "connection.connect_tcp.started" -> "connect_tcp.started"
+        self.events[name.split(".", 1)[-1]] = time.perf_counter()
+    
+    async def atrace(self, name: str, info: Dict[str, Any]):
+        self(name, info)
+    
+    def _span(self, start: str, end: str) -> float:
+        if start not in self.events or end not in self.events:
+            return 0.0
+        return round((self.events[end] - self.events[start]) * 1000, 2)
+    
+    def phases(self) -> Dict[str, float]:
+        connect_end = "start_tls.complete" if "start_tls.complete" in self.events else "connect_tcp.complete"
+        return {
+            "connect": self._span("connect_tcp.started", connect_end),
+            "upload": self._span("send_request_headers.started", "send_request_body.complete"),
+            "server": self._span("send_request_body.complete", "receive_response_headers.complete"),
+            "download": self._span("receive_response_body.started", "receive_response_body.complete")
+        }
+    
+    def report(self, source: AudioSource, phases: Optional[Dict[str, float]]):
+        result = self.phases()
+        reused = "connect_tcp.started" not in self.events
+        logger.info(f"ElevenLabs request phases for {source.name}: {result} (connection reused: {reused})")
+        if phases is not None:
+            phases.update(result)
+
+
+DEFAULT_API_URL = "https://api.elevenlabs.io/v1/speech-to-text"
+
 
 class ElevenLabsSTT:
     """ElevenLabs Speech-to-Text API client"""
     
     def __init__(self, api_key: str, model: str = "scribe_v1", seed: int = 12456, language: str = "tr", 
-                 temperature: float = 0.0, remove_filler_words: bool = False, remove_disfluencies: bool = False):
+                 temperature: float = 0.0, remove_filler_words: bool = False, remove_disfluencies: bool = False,
+                 max_connections: int = 10, keepalive_expiry: float = 60.0, timeout: float = 300.0,
+                 base_url: str = DEFAULT_API_URL):
         self.api_key = api_key
         self.model = model
         self.language = language        
@@ -22,11 +119,147 @@ class ElevenLabsSTT:
         self.seed = seed
         self.remove_filler_words = remove_filler_words
         self.remove_disfluencies = remove_disfluencies
-        self.base_url = "https://api.elevenlabs.io/v1/speech-to-text"
+        self.base_url = base_url or DEFAULT_API_URL
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._client = None
+        self._async_client = None
+        self._async_client_loop = None
+    
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+    
+    def session(self) -> httpx.Client:
+        """Pooled keep-alive client for sync calls (created on first use)"""
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout, limits=self._limits())
+        return self._client
+    
+    def async_session(self) -> httpx.AsyncClient:
+        """
+        Pooled keep-alive client for async calls
+        
+        An AsyncClient is bound to the event loop that created it; an rq job
+        runs each analysis in a fresh asyncio.run loop, so a new client is
+        created when the loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self._limits())
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def close(self):
+        """Close the sync connection pool"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
+    async def aclose(self):
+        """Close both connection pools"""
+        self.close()
+        if self._async_client is not None and self._async_client_loop is asyncio.get_running_loop():
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_client_loop = None
+    
+    
+    def _headers(self) -> Dict[str, str]:
+        """Request headers for the ElevenLabs API"""
+        return {
+            "xi-api-key": self.api_key
+        }
+    
+    def _form_data(self) -> Dict[str, str]:
+        """Multipart form fields sent with every transcription request"""
+        return {
+            "model_id": self.model,
+            "language_code": self.language,
+            "timestamps_granularity": "word",  # Word-level timestamps (more stable than character-level)
+            "tag_audio_events": "false",  # Disable audio events
+            "diarize": "false",  # Disable speaker diarization
+            "temperature": str(self.temperature),  # 0.0 for deterministic results
+            "seed": str(self.seed),  # Random seed for reproducibility
+            "remove_filler_words": str(self.remove_filler_words).lower(),  # Keep filler words for analysis
+            "remove_disfluencies": str(self.remove_disfluencies).lower()  # Keep disfluencies (repetitions)
+        }
+    
+    def cache_params(self) -> Dict[str, Any]:
+        """Request parameters that change the transcription output"""
+        return {
+            "provider": "elevenlabs",
+            "model": self.model,
+            "language": self.language,
+            "temperature": self.temperature,
+            "seed": self.seed,
+            "remove_filler_words": self.remove_filler_words,
+            "remove_disfluencies": self.remove_disfluencies
+        }
+    
+    def cache_key(self, audio_sha256: str) -> str:
+        """Cache key of a transcription: audio content hash + cache_params()"""
+        payload = json.dumps({"audio": audio_sha256, **self.cache_params()}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
     
     def transcribe_file(self, file_path: str) -> Dict[str, Any]:
         """
-        Transcribe audio file using ElevenLabs API with retry mechanism
+        Transcribe audio file using ElevenLabs API (single attempt)
+        
+        Args:
+            file_path: Path to audio file
+            
+        Returns:
+            Dictionary with transcription results
+        """
+        with AudioSource.from_path(file_path) as source:
+            return self.transcribe_source(source)
+    
+    def transcribe_source(self, source: AudioSource, phases: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Transcribe an AudioSource (in-memory or spilled) in a single attempt
+        
+        Failures are raised as SttError subclasses instead of being retried
+        here; the job decides when to retry (see stt_limits.py) so a worker
+        never sleeps through a backoff.
+        
+        Args:
+            source: Audio to upload; re-read from the start on every call
+            phases: Optional dict filled with connect/upload/server/download ms
+            
+        Returns:
+            Dictionary with transcription results
+            
+        Raises:
+            SttRateLimited: 429 from the provider
+            SttRetryableError: 5xx, timeout or connection error
+            SttClientError: any other 4xx - retrying will not help
+        """
+        logger.info(f"Starting ElevenLabs transcription for {source.name} ({source.size} bytes)")
+        trace = _PhaseTrace()
+        
+        try:
+            with source.open() as audio_file:
+                response = self.session().post(
+                    self.base_url,
+                    headers=self._headers(),
+                    data=self._form_data(),
+                    files={'file': (source.name, audio_file, source.content_type)},
+                    extensions={"trace": trace}
+                )
+        except httpx.TransportError as e:
+            raise SttRetryableError(f"ElevenLabs request failed: {str(e)}") from e
+        
+        trace.report(source, phases)
+        return self._handle_response(response.status_code, response.headers, response.text, response.json)
+    
+    async def transcribe_file_async(self, file_path: str) -> Dict[str, Any]:
+        """
+        Non-blocking variant of transcribe_file for use inside an event loop
         
         Args:
             file_path: Path to audio file
@@ -34,88 +267,77 @@ class ElevenLabsSTT:
         Returns:
             Dictionary with transcription results
         """
-        max_retries = 3
-        retry_delay = 5  # seconds
+        with AudioSource.from_path(file_path) as source:
+            return await self.transcribe_source_async(source)
+    
+    async def transcribe_source_async(self, source: AudioSource, phases: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Non-blocking variant of transcribe_source for use inside an event loop
+        
+        Other analyses running in the same worker keep progressing and share
+        the pooled connections. Raises the same SttError subclasses as
+        transcribe_source.
+        
+        Args:
+            source: Audio to upload; re-read from the start on every call
+            phases: Optional dict filled with connect/upload/server/download ms
+            
+        Returns:
+            Dictionary with transcription results
+        """
+        logger.info(f"Starting async ElevenLabs transcription for {source.name} ({source.size} bytes)")
+        trace = _PhaseTrace()
+        
+        try:
+            with source.open() as audio_file:
+                response = await self.async_session().post(
+                    self.base_url,
+                    headers=self._headers(),
+                    data=self._form_data(),
+                    files={'file': (source.name, audio_file, source.content_type)},
+                    extensions={"trace": trace.atrace}
+                )
+        except httpx.TransportError as e:
+            raise SttRetryableError(f"ElevenLabs request failed: {str(e)}") from e
+        
+        trace.report(source, phases)
+        return self._handle_response(response.status_code, response.headers, response.text, response.json)
+    
+    def _handle_response(self, status_code: int, headers, text: str, json_body) -> Dict[str, Any]:
+        """
+        Result of a successful response, or the matching SttError
         
-        for attempt in range(max_retries):
+        Args:
+            status_code: HTTP status code
+            headers: Response headers (for Retry-After)
+            text: Raw response body
+            json_body: Callable returning the parsed JSON body
+        """
+        if status_code == 200:
+            result = json_body()
+            logger.info(f"ElevenLabs transcription successful. Language: {result.get('language_code')}, Probability: {result.get('language_probability')}")
+            logger.info(f"ElevenLabs words array length: {len(result.get('words', []))}")
+            return result
+        
+        if status_code == 429:
+            # Rate limit or system busy
             try:
-                logger.info(f"Starting ElevenLabs transcription for file: {file_path} (attempt {attempt + 1}/{max_retries})")
-                
-                # Prepare headers
-                headers = {
-                    "xi-api-key": self.api_key
-                }
-                
-                # Prepare form data
-                form_data = {
-                    "model_id": self.model,
-                    "language_code": self.language,
-                    "timestamps_granularity": "word",  # Word-level timestamps (more stable than character-level)
-                    "tag_audio_events": "false",  # Disable audio events
-                    "diarize": "false",  # Disable speaker diarization
-                    "temperature": str(self.temperature),  # 0.0 for deterministic results
-                    "seed": str(self.seed),  # Random seed for reproducibility
-                    "remove_filler_words": str(self.remove_filler_words).lower(),  # Keep filler words for analysis
-                    "remove_disfluencies": str(self.remove_disfluencies).lower()  # Keep disfluencies (repetitions)
-                }
-                
-                # Prepare file
-                with open(file_path, 'rb') as audio_file:
-                    files = {
-                        'file': (os.path.basename(file_path), audio_file, 'audio/mp4')
-                    }
-                    
-                    # Make API request
-                    response = requests.post(
-                        self.base_url,
-                        headers=headers,
-                        data=form_data,
-                        files=files,
-                        timeout=300  # 5 minutes timeout
-                    )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"ElevenLabs transcription successful. Language: {result.get('language_code')}, Probability: {result.get('language_probability')}")
-                    
-                    # Debug: Log the full response structure
-                    logger.info(f"ElevenLabs response keys: {list(result.keys())}")
-                    logger.info(f"ElevenLabs words array length: {len(result.get('words', []))}")
-                    logger.info(f"First 3 words from ElevenLabs: {result.get('words', [])[:3]}")
-                    
-                    return result
-                elif response.status_code == 429:
-                    # Rate limit or system busy
-                    error_data = response.json() if response.text else {}
-                    error_detail = error_data.get('detail', {})
-                    error_status = error_detail.get('status', 'unknown')
-                    error_message = error_detail.get('message', 'Rate limit exceeded')
-                    
-                    if attempt < max_retries - 1:
-                        logger.warning(f"ElevenLabs API 429 error (attempt {attempt + 1}/{max_retries}): {error_status} - {error_message}")
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                        continue
-                    else:
-                        error_msg = f"ElevenLabs API error: {response.status_code} - {error_status}: {error_message}"
-                        logger.error(error_msg)
-                        raise Exception(error_msg)
-                else:
-                    error_msg = f"ElevenLabs API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                    
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"ElevenLabs transcription failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    logger.error(f"ElevenLabs transcription failed after {max_retries} attempts: {str(e)}")
-                    raise
+                error_detail = (json_body() if text else {}).get('detail', {})
+            except ValueError:
+                error_detail = {}
+            if not isinstance(error_detail, dict):
+                error_detail = {"message": str(error_detail)}
+            error_status = error_detail.get('status', 'unknown')
+            error_message = error_detail.get('message', 'Rate limit exceeded')
+            error_msg = f"ElevenLabs API error: 429 - {error_status}: {error_message}"
+            logger.warning(error_msg)
+            raise SttRateLimited(error_msg, retry_after=_retry_after(headers))
+        
+        error_msg = f"ElevenLabs API error: {status_code} - {text}"
+        logger.error(error_msg)
+        if status_code == 408 or status_code >= 500:
+            raise SttRetryableError(error_msg, status_code=status_code, retry_after=_retry_after(headers))
+        raise SttClientError(error_msg, status_code=status_code)
     
     def extract_raw_words(self, words_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
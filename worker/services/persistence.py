@@ -0,0 +1,138 @@
+"""
+Raw persistence of analysis results
+
+Events are built as plain BSON dicts straight from align_transcript output
+and written with one unordered bulk_write per collection, skipping the
+per-document Pydantic validation of WordEventDoc/PauseEventDoc. Writes are
+upserts keyed by position so a retried job never duplicates events.
+
+With EVENT_STORAGE=columnar (or both) the same rows are also stored as a
+single analysis_events document, see event_columns.py.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+from pymongo import ReplaceOne
+
+from . import event_columns, list_view
+
+
+def word_event_rows(analysis_id, word_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    word_events documents for one analysis (same shape as WordEventDoc)
+
+    Args:
+        analysis_id: ObjectId of the analysis
+        word_events: aligned["word_events"]
+    """
+    rows = []
+    for i, event_data in enumerate(word_events):
+        start_ms = event_data.get('start_ms')
+        rows.append({
+            "analysis_id": analysis_id,
+            "position": i,
+            "ref_token": event_data.get('ref_token'),
+            "hyp_token": event_data.get('hyp_token'),
+            "type": event_data.get('type', 'unknown'),
+            "sub_type": event_data.get('sub_type'),
+            "timing": {
+                "start_ms": start_ms,
+                "end_ms": event_data.get('end_ms')
+            } if start_ms else None,
+            "char_diff": event_data.get('char_diff')
+        })
+    return rows
+
+
+def pause_event_rows(analysis_id, pause_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    pause_events documents for one analysis (same shape as PauseEventDoc)
+
+    Args:
+        analysis_id: ObjectId of the analysis
+        pause_events: aligned["pause_events"]
+    """
+    return [{
+        "analysis_id": analysis_id,
+        "after_position": event_data.get('after_word_idx', i),
+        "duration_ms": event_data.get('duration_ms', 0),
+        "class_": event_data.get('class', 'long'),
+        "start_ms": event_data.get('start_ms', 0),
+        "end_ms": event_data.get('end_ms', 0)
+    } for i, event_data in enumerate(pause_events)]
+
+
+async def upsert_rows(collection, rows: List[Dict[str, Any]], position_field: str) -> int:
+    """
+    One unordered bulk_write of upserts keyed by (analysis_id, position_field)
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    operations = [
+        ReplaceOne({"analysis_id": row["analysis_id"], position_field: row[position_field]}, row, upsert=True)
+        for row in rows
+    ]
+    await collection.bulk_write(operations, ordered=False)
+    return len(rows)
+
+
+async def write_columnar(collection, analysis_id, word_rows, pause_rows):
+    """Replace the analysis_events document of an analysis"""
+    doc = event_columns.encode_events(analysis_id, word_rows, pause_rows)
+    doc["created_at"] = datetime.now(timezone.utc)
+    await collection.replace_one({"analysis_id": analysis_id}, doc, upsert=True)
+
+
+async def write_events(word_rows, pause_rows, word_collection=None, pause_collection=None,
+                       columnar_collection=None) -> Tuple[int, int, float]:
+    """
+    Write word and pause events concurrently to the configured storages
+
+    Args:
+        word_rows: Output of word_event_rows
+        pause_rows: Output of pause_event_rows
+        word_collection: word_events collection, None to skip per-word documents
+        pause_collection: pause_events collection, None to skip per-pause documents
+        columnar_collection: analysis_events collection, None to skip the columnar document
+
+    Returns:
+        (word rows written, pause rows written, latency in ms)
+    """
+    write_start = time.time()
+    writes = []
+    if word_collection is not None:
+        writes.append(upsert_rows(word_collection, word_rows, "position"))
+    if pause_collection is not None:
+        writes.append(upsert_rows(pause_collection, pause_rows, "after_position"))
+    if columnar_collection is not None and (word_rows or pause_rows):
+        analysis_id = (word_rows or pause_rows)[0]["analysis_id"]
+        writes.append(write_columnar(columnar_collection, analysis_id, word_rows, pause_rows))
+    await asyncio.gather(*writes)
+    return len(word_rows), len(pause_rows), (time.time() - write_start) * 1000
+
+
+async def write_completion(analysis_collection, session_collection, analysis_id, analysis_set: Dict[str, Any],
+                           session_id, session_set: Dict[str, Any],
+                           list_view_collection=None, list_view_row: Dict[str, Any] = None) -> float:
+    """
+    Final analysis summary and session status, as two concurrent $set updates
+
+    With list_view_collection, the analysis_list_view row (list_view.py) is
+    replaced in the same round trip.
+
+    Returns:
+        Latency in ms
+    """
+    write_start = time.time()
+    writes = [
+        analysis_collection.update_one({"_id": analysis_id}, {"$set": analysis_set}),
+        session_collection.update_one({"_id": session_id}, {"$set": session_set})
+    ]
+    if list_view_collection is not None and list_view_row is not None:
+        writes.append(list_view.upsert_row(list_view_collection, list_view_row))
+    await asyncio.gather(*writes)
+    return (time.time() - write_start) * 1000
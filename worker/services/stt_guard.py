@@ -0,0 +1,217 @@
+"""
+Shared STT rate limiting and circuit breaking
+
+Every worker process talks to ElevenLabs through the same Redis state, so a
+429 or an outage slows down all workers together instead of each one
+backing off on its own:
+
+    stt:bucket            token bucket {tokens, ts}, refilled at rate_per_sec
+    stt:paused            set after a 429 for Retry-After, blocks every worker
+    stt:breaker:failures  provider failures within window_sec
+    stt:breaker:open      present while the breaker is open (cooldown_sec)
+    stt:breaker:tripped   breaker has opened and not yet recovered
+    stt:breaker:probe     the single request allowed while half-open
+
+Nothing here sleeps for long: callers get the number of seconds to wait and
+decide whether to await a short delay or reschedule the job.
+"""
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+from loguru import logger
+
+from .elevenlabs_stt import SttError, SttRateLimited, SttUnavailable
+
+
+# KEYS: bucket, paused  ARGV: rate per second, burst
+# Returns 0 when a token was taken, otherwise milliseconds until one is available
+_TOKEN_BUCKET_LUA = """
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then
+    return paused
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class TokenBucket:
+    """Token bucket shared by all workers through Redis"""
+
+    def __init__(self, redis, rate_per_sec: float, burst: int, prefix: str = "stt"):
+        self.redis = redis
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.bucket_key = f"{prefix}:bucket"
+        self.paused_key = f"{prefix}:paused"
+        self._script = redis.register_script(_TOKEN_BUCKET_LUA)
+
+    def acquire(self) -> float:
+        """Take a token; returns 0.0 on success, otherwise seconds to wait"""
+        wait_ms = self._script(keys=[self.bucket_key, self.paused_key], args=[self.rate_per_sec, self.burst])
+        return int(wait_ms) / 1000
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens to every worker for `seconds` (after a 429)"""
+        current_ms = self.redis.pttl(self.paused_key)
+        if current_ms is None or current_ms < seconds * 1000:
+            self.redis.set(self.paused_key, 1, px=max(int(seconds * 1000), 1))
+
+
+class CircuitBreaker:
+    """
+    Redis-backed circuit breaker
+
+    closed -> open after failure_threshold failures within window_sec;
+    open -> half-open after cooldown_sec, where one probe request is let
+    through; a successful probe closes the breaker, a failed one reopens it.
+    """
+
+    def __init__(self, redis, failure_threshold: int, window_sec: int, cooldown_sec: int,
+                 prefix: str = "stt:breaker"):
+        self.redis = redis
+        self.failure_threshold = failure_threshold
+        self.window_sec = window_sec
+        self.cooldown_sec = cooldown_sec
+        self.failures_key = f"{prefix}:failures"
+        self.open_key = f"{prefix}:open"
+        self.tripped_key = f"{prefix}:tripped"
+        self.probe_key = f"{prefix}:probe"
+
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        if self.redis.exists(self.open_key):
+            return "open"
+        if self.redis.exists(self.tripped_key):
+            return "half_open"
+        return "closed"
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker half-opens, 0.0 if it isn't open"""
+        ttl_ms = self.redis.pttl(self.open_key)
+        return ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else 0.0
+
+    def allow(self) -> float:
+        """0.0 if a request may go out now, otherwise seconds to wait"""
+        retry_after = self.retry_after()
+        if retry_after:
+            return retry_after
+        if not self.redis.exists(self.tripped_key):
+            return 0.0
+        # Half-open: exactly one worker gets to probe the provider
+        if self.redis.set(self.probe_key, 1, nx=True, ex=max(self.cooldown_sec, 60)):
+            logger.info("STT circuit breaker half-open, sending probe request")
+            return 0.0
+        return float(self.cooldown_sec)
+
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        if self.redis.exists(self.tripped_key):
+            logger.info("STT circuit breaker closed")
+            self.redis.delete(self.tripped_key, self.probe_key, self.open_key)
+        self.redis.delete(self.failures_key)
+
+    def record_failure(self):
+        """Count a provider failure, opening the breaker at the threshold"""
+        if self.redis.exists(self.tripped_key):
+            # The half-open probe failed
+            self._open()
+            return
+        failures = self.redis.incr(self.failures_key)
+        if failures == 1:
+            self.redis.expire(self.failures_key, self.window_sec)
+        if failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        logger.warning(f"STT circuit breaker open for {self.cooldown_sec}s")
+        pipe = self.redis.pipeline()
+        pipe.set(self.open_key, 1, ex=self.cooldown_sec)
+        pipe.set(self.tripped_key, 1, ex=self.cooldown_sec + 24 * 3600)
+        pipe.delete(self.failures_key, self.probe_key)
+        pipe.execute()
+
+
+class SttGuard:
+    """Token bucket + circuit breaker around STT calls"""
+
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker, max_wait_sec: float,
+                 rate_limit_pause_sec: float):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_wait_sec = max_wait_sec
+        self.rate_limit_pause_sec = rate_limit_pause_sec
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run one STT call when the breaker and the shared bucket allow it
+
+        Waits of up to max_wait_sec are awaited (other analyses on the loop
+        keep running); anything longer raises SttUnavailable with retry_after
+        so the job can be rescheduled instead. The Redis round trips run in a
+        thread, the async worker shares the loop across analyses.
+        """
+        retry_after = await asyncio.to_thread(self.breaker.allow)
+        if retry_after:
+            raise SttUnavailable(f"STT circuit breaker open, retry in {retry_after:.0f}s", retry_after=retry_after)
+
+        wait = await asyncio.to_thread(self.bucket.acquire)
+        while wait:
+            if wait > self.max_wait_sec:
+                raise SttUnavailable(f"STT rate limit reached, retry in {wait:.1f}s", retry_after=wait)
+            await asyncio.sleep(wait)
+            wait = await asyncio.to_thread(self.bucket.acquire)
+
+        try:
+            result = await func()
+        except SttError as e:
+            if e.retryable:
+                await asyncio.to_thread(self.breaker.record_failure)
+            else:
+                # A 4xx still means the provider is up and answering
+                await asyncio.to_thread(self.breaker.record_success)
+            if isinstance(e, SttRateLimited):
+                await asyncio.to_thread(self.bucket.pause, e.retry_after or self.rate_limit_pause_sec)
+            raise
+        await asyncio.to_thread(self.breaker.record_success)
+        return result
+
+
+def retry_delay(attempt: int, base_sec: float, max_sec: float, retry_after: Optional[float] = None) -> float:
+    """
+    Delay before retry number `attempt` (1-based)
+
+    Exponential backoff with full jitter, never shorter than the provider's
+    Retry-After hint and never longer than max_sec.
+    """
+    backoff = min(max_sec, base_sec * (2 ** (attempt - 1)))
+    delay = random.uniform(backoff / 2, backoff)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return round(min(delay, max_sec), 1)
+
+
+def throttled_delay(retry_after: Optional[float], min_sec: float = 1.0) -> float:
+    """
+    Delay before retrying a call our own breaker or bucket turned away
+
+    Retry-After plus up to 50% jitter, so the rescheduled backlog doesn't
+    come back in a single burst when the breaker half-opens.
+    """
+    delay = max(retry_after or 0.0, min_sec)
+    return round(random.uniform(delay, delay * 1.5), 1)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Transcription cache for the STT step
+
+Raw ElevenLabs responses are stored in the `stt_cache` collection keyed by
+the audio SHA-256 plus every request parameter that changes the output
+(model, language, temperature, seed, filler/disfluency flags). Retries,
+recompute_analysis.py and re-submitted files then skip the API call.
+
+Entries expire through a TTL index after STT_CACHE_TTL_SEC. Hit/miss
+counters are kept in the Redis hash `stt_cache:stats`.
+
+Usage:
+    python stt_cache.py stats   # print hit/miss counters and entry count
+"""
+
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+from pymongo.errors import DuplicateKeyError
+from redis import Redis
+
+from models import SttCacheDoc
+from config import settings
+from stt_limits import call_stt
+from services.audio_normalize import TranscodeError
+from services.chunked_stt import transcribe_chunked
+
+
+STATS_KEY = "stt_cache:stats"
+
+_redis_client = None
+
+
+def _redis() -> Redis:
+    """Shared Redis connection for the cache counters"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.redis_url or "redis://redis:6379/0")
+    return _redis_client
+
+
+def _record(event: str):
+    """Increment a hit/miss counter; metrics must never fail an analysis"""
+    try:
+        _redis().hincrby(STATS_KEY, event, 1)
+    except Exception as e:
+        logger.warning(f"Could not record STT cache {event}: {str(e)}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and hit rate"""
+    raw = _redis().hgetall(STATS_KEY)
+    stats = {key.decode(): int(value) for key, value in raw.items()}
+    hits = stats.get("hits", 0)
+    misses = stats.get("misses", 0)
+    stats["hit_rate"] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+    return stats
+
+
+async def get_cached(stt_client, audio_sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    Cached STT response for this audio and client configuration
+
+    Args:
+        stt_client: ElevenLabsSTT whose parameters are part of the key
+        audio_sha256: Hex SHA-256 of the audio content
+
+    Returns:
+        Raw provider response, or None on a miss
+    """
+    key = stt_client.cache_key(audio_sha256)
+    entry = await SttCacheDoc.find_one(SttCacheDoc.key == key)
+
+    # The TTL monitor only runs once a minute, so check expiry ourselves too
+    if entry is None or entry.expires_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc):
+        _record("misses")
+        return None
+
+    await SttCacheDoc.get_motor_collection().update_one({"_id": entry.id}, {"$inc": {"hits": 1}})
+    _record("hits")
+    return entry.result
+
+
+async def put_cached(stt_client, audio_sha256: str, result: Dict[str, Any]):
+    """Store a successful STT response"""
+    now = datetime.now(timezone.utc)
+    entry = SttCacheDoc(
+        key=stt_client.cache_key(audio_sha256),
+        audio_sha256=audio_sha256,
+        provider=stt_client.cache_params()["provider"],
+        params=stt_client.cache_params(),
+        result=result,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.stt_cache_ttl_sec)
+    )
+    try:
+        await entry.insert()
+    except DuplicateKeyError:
+        # Another worker transcribed the same audio concurrently
+        logger.debug(f"STT cache entry for {audio_sha256} already exists")
+
+
+async def _transcribe_one(stt_client, source, phases: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], bool]:
+    """One cached STT request for the whole source"""
+    if not settings.stt_cache_enabled:
+        return await call_stt(stt_client, source, phases), False
+
+    audio_sha256 = source.sha256
+    result = await get_cached(stt_client, audio_sha256)
+    if result is not None:
+        logger.info(f"STT cache hit for audio {audio_sha256[:12]} ({source.size} bytes)")
+        return result, True
+
+    logger.info(f"STT cache miss for audio {audio_sha256[:12]}, calling the API")
+    result = await call_stt(stt_client, source, phases)
+    await put_cached(stt_client, audio_sha256, result)
+    return result, False
+
+
+async def _transcribe_chunked(stt_client, source, phases: Optional[Dict[str, float]] = None) -> Optional[Tuple[Dict[str, Any], bool]]:
+    """
+    Split a long recording at silences and transcribe the chunks concurrently
+
+    Every chunk goes through the cache and the shared rate limit on its own,
+    so a retry after one failed chunk only sends the missing chunks. The
+    stitched result is cached under the whole recording as well.
+
+    Returns:
+        (stitched response, cache hit flag), or None if the recording is too
+        short or can't be split (the caller sends it in one request)
+    """
+    if settings.stt_cache_enabled:
+        result = await get_cached(stt_client, source.sha256)
+        if result is not None:
+            logger.info(f"STT cache hit for audio {source.sha256[:12]} ({source.size} bytes)")
+            return result, True
+
+    chunk_hits = []
+
+    async def transcribe_chunk(chunk_source):
+        result, hit = await _transcribe_one(stt_client, chunk_source)
+        chunk_hits.append(hit)
+        return result
+
+    try:
+        result = await transcribe_chunked(
+            source, transcribe_chunk,
+            max_chunk_sec=settings.stt_chunk_max_sec,
+            min_audio_sec=settings.stt_chunk_min_audio_sec,
+            overlap_sec=settings.stt_chunk_overlap_sec,
+            concurrency=settings.stt_chunk_concurrency,
+            fmt=settings.audio_normalize_format,
+            sample_rate=settings.audio_normalize_sample_rate,
+            bitrate=settings.audio_normalize_bitrate,
+            noise_db=settings.stt_silence_noise_db,
+            min_silence_sec=settings.stt_silence_min_sec,
+            scratch_dir=settings.audio_scratch_dir or None
+        )
+    except TranscodeError as e:
+        logger.warning(f"Could not split {source.name} for chunked STT, sending it whole: {e}")
+        return None
+    if result is None:
+        return None
+
+    if phases is not None:
+        phases["chunks"] = float(len(chunk_hits))
+        phases["chunks_cached"] = float(sum(chunk_hits))
+    if settings.stt_cache_enabled:
+        await put_cached(stt_client, source.sha256, result)
+    return result, False
+
+
+async def transcribe_cached(stt_client, source, phases: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Transcribe an AudioSource, consulting the cache first
+
+    Cache hits don't take a token from the shared STT rate limit. With
+    STT_CHUNKING_ENABLED, recordings longer than STT_CHUNK_MIN_AUDIO_SEC are
+    transcribed as concurrent chunks (services/chunked_stt.py).
+
+    Args:
+        stt_client: ElevenLabsSTT client
+        source: AudioSource with the audio content
+        phases: Optional dict filled with the HTTP phase timings of an API call
+            (chunk counts for a chunked transcription)
+
+    Returns:
+        (raw provider response, cache hit flag)
+    """
+    if settings.stt_chunking_enabled:
+        chunked = await _transcribe_chunked(stt_client, source, phases)
+        if chunked is not None:
+            return chunked
+
+    return await _transcribe_one(stt_client, source, phases)
+
+
+async def _print_stats():
+    from db import connect_to_mongo, close_mongo_connection
+
+    await connect_to_mongo()
+    try:
+        stats = cache_stats()
+        stats["entries"] = await SttCacheDoc.find_all().count()
+        print(json.dumps(stats, indent=2))
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        asyncio.run(_print_stats())
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Shared STT rate limit, circuit breaker and non-blocking retries
+
+STT calls from every worker go through one Redis token bucket
+(STT_RATE_LIMIT_PER_SEC / STT_RATE_LIMIT_BURST) and one circuit breaker
+(see services/stt_guard.py). A 429 pauses the bucket for all workers until
+Retry-After has passed.
+
+Failed STT calls are never retried in-process. Retryable failures (429,
+5xx, timeouts, breaker open) reschedule the RQ job with a backoff delay via
+RQ's scheduler, so the worker picks up other jobs meanwhile; 4xx errors fail
+the analysis immediately. Only provider failures count toward
+STT_MAX_ATTEMPTS: calls our own breaker or bucket turned away
+(SttUnavailable) are rescheduled at their Retry-After however long the
+backlog is. While the breaker is open, SttAwareWorker and the
+async worker stop dequeueing.
+
+Usage:
+    rq worker -w stt_limits.SttAwareWorker main --with-scheduler
+    python stt_limits.py status   # breaker state, failures and rate limit pause
+    python stt_limits.py reset    # close the breaker and clear the pause
+"""
+
+import json
+import sys
+import time
+from datetime import timedelta
+from typing import Optional
+from loguru import logger
+from redis import Redis
+from rq import Queue, Retry, Worker
+
+from config import settings
+from services.elevenlabs_stt import SttError, SttUnavailable
+from services.stt_guard import TokenBucket, CircuitBreaker, SttGuard, retry_delay, throttled_delay
+from warmup import WarmupMixin
+
+
+_redis_client = None
+_guard = None
+
+
+def _redis() -> Redis:
+    """Shared Redis connection for limiter and breaker state"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.redis_url or "redis://redis:6379/0")
+    return _redis_client
+
+
+def stt_guard() -> SttGuard:
+    """Process-wide SttGuard built from settings"""
+    global _guard
+    if _guard is None:
+        redis = _redis()
+        _guard = SttGuard(
+            bucket=TokenBucket(redis, settings.stt_rate_limit_per_sec, settings.stt_rate_limit_burst),
+            breaker=CircuitBreaker(
+                redis,
+                failure_threshold=settings.stt_breaker_failure_threshold,
+                window_sec=settings.stt_breaker_window_sec,
+                cooldown_sec=settings.stt_breaker_cooldown_sec
+            ),
+            max_wait_sec=settings.stt_rate_limit_max_wait_sec,
+            rate_limit_pause_sec=settings.stt_retry_base_sec
+        )
+    return _guard
+
+
+async def call_stt(stt_client, source, phases=None):
+    """Transcribe an AudioSource through the shared rate limit and breaker"""
+    return await stt_guard().call(lambda: stt_client.transcribe_source_async(source, phases=phases))
+
+
+def next_retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Delay before retrying a failed STT call, or None if it must not be retried
+
+    Args:
+        error: Exception raised by the STT call
+        attempt: Number of provider failures so far (1-based)
+    """
+    if isinstance(error, SttUnavailable):
+        # Never reached the provider, so it isn't a failed attempt
+        return throttled_delay(error.retry_after)
+    if not isinstance(error, SttError) or not error.retryable:
+        return None
+    if attempt >= settings.stt_max_attempts:
+        return None
+    return retry_delay(attempt, settings.stt_retry_base_sec, settings.stt_retry_max_sec, error.retry_after)
+
+
+def schedule_retry(job, delay: float):
+    """
+    Enqueue a copy of an RQ job on its queue after `delay` seconds
+
+    Needs an RQ scheduler on the queue (`rq worker --with-scheduler` or the
+    async worker).
+    """
+    queue = Queue(job.origin, connection=job.connection)
+    retry_job = queue.enqueue_in(
+        timedelta(seconds=delay),
+        job.func_name,
+        *job.args,
+        job_timeout=job.timeout,
+        # Keep the RQ retries of a staged job for its non-STT failures
+        retry=Retry(max=job.retries_left, interval=job.retry_intervals or 0) if job.retries_left else None,
+        meta={"retry_of": job.id}
+    )
+    logger.info(f"Rescheduled job {job.id} as {retry_job.id} in {delay:.1f}s")
+    return retry_job
+
+
+class SttAwareWorker(WarmupMixin, Worker):
+    """rq Worker that preloads the job modules and stops dequeueing while the STT circuit breaker is open"""
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        logged = False
+        while not self._stop_requested:
+            retry_after = stt_guard().breaker.retry_after()
+            if not retry_after:
+                break
+            if not logged:
+                logger.warning(f"STT circuit breaker open, pausing dequeue for {retry_after:.0f}s")
+                logged = True
+            self.heartbeat()
+            time.sleep(min(retry_after, 5))
+        return super().dequeue_job_and_maintain_ttl(timeout, max_idle_time)
+
+
+def status() -> dict:
+    """Breaker state, failure count and rate limit pause"""
+    guard = stt_guard()
+    redis = _redis()
+    paused_ms = redis.pttl(guard.bucket.paused_key)
+    return {
+        "breaker": guard.breaker.state(),
+        "breaker_retry_after_sec": guard.breaker.retry_after(),
+        "recent_failures": int(redis.get(guard.breaker.failures_key) or 0),
+        "rate_limit_paused_sec": paused_ms / 1000 if paused_ms and paused_ms > 0 else 0.0,
+        "rate_limit_per_sec": settings.stt_rate_limit_per_sec,
+        "rate_limit_burst": settings.stt_rate_limit_burst
+    }
+
+
+def reset():
+    """Close the breaker and clear any rate limit pause"""
+    guard = stt_guard()
+    _redis().delete(
+        guard.breaker.failures_key, guard.breaker.open_key, guard.breaker.tripped_key,
+        guard.breaker.probe_key, guard.bucket.paused_key
+    )
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "status":
+        print(json.dumps(status(), indent=2))
+    elif command == "reset":
+        reset()
+        print("STT breaker and rate limit pause cleared")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
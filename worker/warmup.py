@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Worker warm-up: import profile, preloading and readiness
+
+`rq worker` only imports the job module (main -> jobs) inside the forked
+work horse, so every job paid for logging/GCS setup, Beanie models, httpx,
+motor and the lazily imported google.cloud.storage again. Workers now
+preload all of it once at boot, before they register with RQ: horses forked
+afterwards inherit the loaded modules, and a worker that is still warming up
+never dequeues a job, so jobs only go to warm workers.
+
+Once warm, a worker announces itself with the Redis key
+`worker:ready:<name>` (JSON with the preload timings, refreshed with the RQ
+heartbeat) and, if WORKER_READY_FILE is set, by touching that file for
+container readiness probes.
+
+Nothing that holds sockets or threads (Mongo, Redis pools, HTTP sessions)
+is created by the preload, so forked horses never share a connection.
+
+Usage:
+    rq worker -w warmup.WarmWorker <queue>    # any queue; transcribe uses stt_limits.SttAwareWorker
+    python warmup.py profile [--top 30]       # import-time profile of the job module (python -X importtime)
+    python warmup.py preload                  # run the preload and print per-step timings
+    python warmup.py status                   # warm workers registered in Redis
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from redis import Redis
+from rq import Worker
+
+from config import settings
+
+
+READY_KEY_PREFIX = "worker:ready:"
+
+# Job entry points first: importing jobs runs logging and GCS credential setup
+PRELOAD_MODULES = [
+    "main",
+    "jobs",
+    "pipeline",
+    "stt_cache",
+    "stt_limits",
+    "google.cloud.storage",
+    "services.elevenlabs_stt",
+    "services.chunked_stt",
+]
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def preload() -> Dict[str, float]:
+    """
+    Import the job modules and warm the clients they build per job
+
+    Returns:
+        Milliseconds per step, plus "total"
+    """
+    timings = {}
+    total = time.perf_counter()
+
+    for name in PRELOAD_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Preload of {name} failed: {str(e)}")
+        timings[f"import:{name}"] = _elapsed_ms(start)
+
+    # Credentials file parsing and the auth/crypto imports behind it
+    start = time.perf_counter()
+    try:
+        from google.cloud import storage
+
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.gcs_credentials_path
+        storage.Client().close()
+    except Exception as e:
+        logger.warning(f"GCS client warm-up skipped: {str(e)}")
+    timings["gcs_client"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    from jobs import create_stt_client
+    create_stt_client()
+    timings["stt_client"] = _elapsed_ms(start)
+
+    if settings.audio_normalize_enabled or settings.stt_chunking_enabled:
+        # Page the ffmpeg binary in before the first transcode
+        start = time.perf_counter()
+        if shutil.which("ffmpeg"):
+            subprocess.run(["ffmpeg", "-hide_banner", "-version"], capture_output=True)
+        timings["ffmpeg"] = _elapsed_ms(start)
+
+    timings["total"] = _elapsed_ms(total)
+    logger.info(f"🔥 Worker preload finished in {timings['total']:.0f}ms: {timings}")
+    return timings
+
+
+def preload_cpu_process():
+    """ProcessPoolExecutor initializer: import the alignment code once per process"""
+    importlib.import_module("services.analysis")
+
+
+def _cpu_process_pid() -> int:
+    return os.getpid()
+
+
+async def warm_process_pool(executor, processes: int) -> float:
+    """Start every process of a spawn pool now instead of on the first job; returns ms"""
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(executor, _cpu_process_pid) for _ in range(processes)))
+    return _elapsed_ms(start)
+
+
+def mark_ready(redis: Redis, name: str, timings: Dict[str, float], ttl: int):
+    """Announce a warm worker in Redis and touch WORKER_READY_FILE"""
+    redis.set(READY_KEY_PREFIX + name, json.dumps({
+        "name": name,
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "ready_at": datetime.now(timezone.utc).isoformat(),
+        "preload_ms": timings
+    }), ex=ttl)
+    if settings.worker_ready_file:
+        with open(settings.worker_ready_file, "w") as f:
+            f.write(name)
+    logger.info(f"✅ Worker {name} is warm and ready for jobs")
+
+
+def refresh_ready(redis: Redis, name: str, ttl: int):
+    """Extend the readiness key; called with every heartbeat"""
+    redis.expire(READY_KEY_PREFIX + name, ttl)
+
+
+def mark_not_ready(redis: Redis, name: str):
+    """Withdraw the readiness signal on shutdown"""
+    redis.delete(READY_KEY_PREFIX + name)
+    if settings.worker_ready_file and os.path.exists(settings.worker_ready_file):
+        os.remove(settings.worker_ready_file)
+
+
+def warm_workers(redis: Redis) -> List[Dict[str, Any]]:
+    """Readiness records of all warm workers"""
+    workers = []
+    for key in redis.scan_iter(match=READY_KEY_PREFIX + "*"):
+        value = redis.get(key)
+        if value:
+            workers.append(json.loads(value))
+    return sorted(workers, key=lambda w: w["name"])
+
+
+class WarmupMixin:
+    """
+    rq Worker mixin: preload before registering, then signal readiness
+
+    The worker registers (and so starts dequeueing) only in work(), after
+    the preload, and the readiness key lives as long as the RQ worker key.
+    """
+
+    def work(self, *args, **kwargs):
+        timings = preload() if settings.worker_preload_enabled else {}
+        mark_ready(self.connection, self.name, timings, self.worker_ttl + 60)
+        try:
+            return super().work(*args, **kwargs)
+        finally:
+            mark_not_ready(self.connection, self.name)
+
+    def heartbeat(self, timeout: Optional[int] = None, pipeline=None):
+        super().heartbeat(timeout, pipeline)
+        refresh_ready(self.connection, self.name, timeout or self.worker_ttl + 60)
+
+
+class WarmWorker(WarmupMixin, Worker):
+    """rq Worker that preloads the job modules before taking jobs"""
+
+
+def profile_imports(target: str = "main", top: int = 30) -> Dict[str, Any]:
+    """
+    Import-time profile of `target` in a fresh interpreter
+
+    Returns:
+        {"target", "total_ms", "modules": [{"module", "self_ms", "cumulative_ms"}, ...]}
+        with the `top` modules by cumulative time
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": round(int(self_us) / 1000, 2),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 2)
+        })
+
+    total = next((m["cumulative_ms"] for m in modules if m["module"] == target), None)
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return {"target": target, "total_ms": total, "modules": modules[:top]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker import profile, preload and readiness")
+    parser.add_argument("command", choices=["profile", "preload", "status"])
+    parser.add_argument("--target", default="main", help="Module to profile")
+    parser.add_argument("--top", type=int, default=30, help="Modules to show in the profile")
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        report = profile_imports(args.target, args.top)
+        print(f"import {report['target']}: {report['total_ms']}ms")
+        for module in report["modules"]:
+            print(f"  {module['cumulative_ms']:>9.1f}ms cumulative {module['self_ms']:>8.1f}ms self  {module['module']}")
+    elif args.command == "preload":
+        print(json.dumps(preload(), indent=2))
+    else:
+        print(json.dumps(warm_workers(Redis.from_url(settings.redis_url or "redis://redis:6379/0")), indent=2))